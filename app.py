@@ -1,5 +1,6 @@
 import os
 import json
+import atexit
 import logging
 from flask import Flask
 from urllib.parse import urlparse
@@ -8,6 +9,10 @@ from werkzeug.middleware.proxy_fix import ProxyFix
 # Importa la instancia única de SQLAlchemy
 from extensions import db
 from routes import routes_bp
+from parsers.worker_pool import start_parser_pool, shutdown_parser_pool
+from storage.sqlite_profile import (
+    sqlite_engine_options, init_sqlite_profile, start_writer_queue, shutdown_writer_queue
+)
 
 # Configurar logging
 logging.basicConfig(level=logging.DEBUG)
@@ -21,7 +26,7 @@ app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 database_url = os.environ.get("DATABASE_URL", "sqlite:///recruitment.db")
 app.config["SQLALCHEMY_DATABASE_URI"] = database_url
 
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {} if database_url.startswith("sqlite") else {
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = sqlite_engine_options() if database_url.startswith("sqlite") else {
     "pool_recycle": 300,
     "pool_pre_ping": True,
     "pool_timeout": 20,
@@ -43,11 +48,23 @@ db.init_app(app)
 # Crear tablas dentro del contexto de la app
 with app.app_context():
     import models  # Asegúrate que models.py use: from extensions import db
+    # WAL, pragmas y conexiones de sólo lectura para SQLite
+    init_sqlite_profile(app)
     db.create_all()
+    from storage.migrations import run_migrations
+    run_migrations()
+    from storage.document_store import load_compression_dictionaries
+    load_compression_dictionaries()
+    start_writer_queue()
+atexit.register(shutdown_writer_queue)
 
 # Registrar rutas
 app.register_blueprint(routes_bp)
 
+# Arrancar el pool de procesos de parsing (workers precalentados)
+start_parser_pool()
+atexit.register(shutdown_parser_pool)
+
 # Filtro Jinja personalizado
 @app.template_filter('from_json')
 def from_json_filter(value):
@@ -0,0 +1,14 @@
+from storage.normalization import backfill_candidate_attributes
+from storage.facets import invalidate_facet_index
+
+def backfill_attributes():
+    from app import app
+
+    with app.app_context():
+        processed = backfill_candidate_attributes()
+        # Los servidores en marcha recargan sus facetas al ver la nueva versión
+        invalidate_facet_index()
+        print(f"✅ Se normalizaron los atributos de {processed} candidatos (skills, educación, idiomas, certificaciones)")
+
+if __name__ == '__main__':
+    backfill_attributes()
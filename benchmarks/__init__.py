@@ -0,0 +1,6 @@
+"""
+Benchmarks and load tests for the recruitment system.
+
+Run from the project root, e.g.:
+    python -m benchmarks.bench_parser_pool
+"""
@@ -0,0 +1,79 @@
+"""
+Batch semantic search: one query at a time vs. one matrix-matrix product.
+
+Writes N random candidate vectors as a snapshot and runs B queries either
+as B matrix-vector products (as B separate requests would) or as a single
+batch (search_candidates_batch: one encode call, one matrix-matrix product,
+one row fetch). Encoding is a stub returning random vectors, so the numbers
+are the scoring and row-loading cost only.
+
+    python -m benchmarks.bench_batch_search --size 100000 --dim 384
+"""
+import os
+import time
+import argparse
+import tempfile
+
+import numpy as np
+from flask import Flask
+from sqlalchemy import insert
+
+from extensions import db
+
+MODEL = 'bench-model'
+
+
+def build_app(path: str) -> Flask:
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{path}"
+    db.init_app(app)
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=100000, help='Candidates')
+    parser.add_argument('--dim', type=int, default=384, help='Vector dimensions')
+    parser.add_argument('--limit', type=int, default=10, help='Results per query')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    from utils.config import CONFIG
+    CONFIG['VECTOR_SNAPSHOT_DIR'] = os.path.join(directory, 'snapshot')
+    CONFIG['LOCAL_EMBEDDING_MODEL'] = MODEL
+
+    from models import Candidate
+    from storage.batch_search import search_candidates_batch
+    from storage.vector_snapshot import write_snapshot
+
+    rng = np.random.default_rng(5)
+    app = build_app(os.path.join(directory, 'bench.db'))
+    with app.app_context():
+        db.create_all()
+        db.session.execute(insert(Candidate), [
+            {'id': i, 'name': f'Candidate {i}', 'original_filename': f'cv_{i}.pdf', 'file_type': 'pdf'}
+            for i in range(1, args.size + 1)
+        ])
+        db.session.commit()
+        write_snapshot(zip(range(1, args.size + 1), rng.standard_normal((args.size, args.dim), dtype=np.float32)),
+                       args.size, args.dim, MODEL)
+        print(f"{args.size} candidates x {args.dim} dims, top {args.limit}\n")
+        print(f"{'queries':>8s} {'one by one':>14s} {'batch':>14s} {'speedup':>8s}")
+
+        for batch in (1, 4, 16, 64):
+            vectors = rng.standard_normal((batch, args.dim), dtype=np.float32)
+            queries = [f'query {i}' for i in range(batch)]
+            search_candidates_batch(queries[:1], lambda texts: vectors[:1], args.limit)  # calentar
+
+            start = time.perf_counter()
+            for i in range(batch):
+                search_candidates_batch(queries[i:i + 1], lambda texts, i=i: vectors[i:i + 1], args.limit)
+            single = time.perf_counter() - start
+
+            start = time.perf_counter()
+            search_candidates_batch(queries, lambda texts: vectors, args.limit)
+            batched = time.perf_counter() - start
+            print(f"{batch:8d} {batch / single:10.1f} q/s {batch / batched:10.1f} q/s {single / batched:7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Ingest throughput: the former two-commit upload path vs. the unit of work,
+per upload and in batches.
+
+- two commits: candidate (with ORM term rows) committed, then the embedding
+  written by a second UPDATE and commit, as upload_cv used to do
+- uow x1: CandidateUnitOfWork, one candidate per transaction
+- uow xN: CandidateUnitOfWork, N candidates per transaction (bulk import)
+
+    python -m benchmarks.bench_bulk_ingest --size 1000 --batch 50
+"""
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+
+from flask import Flask
+from sqlalchemy import text
+
+from benchmarks.corpus import synthetic_labeled_cv
+from extensions import db
+
+
+def build_app(path: str) -> Flask:
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{path}"
+    db.init_app(app)
+    return app
+
+def synthetic_upload(seed: int, rng: random.Random):
+    text_, labels = synthetic_labeled_cv(seed, repeat=3)
+    info = {
+        'name': labels['name'], 'email': labels['email'], 'phone': labels['phone'],
+        'skills': json.dumps(labels['skills']), 'languages': json.dumps(labels['languages']),
+        'education': json.dumps([]), 'experience': json.dumps([])
+    }
+    return info, text_, [rng.uniform(-1, 1) for _ in range(1536)]
+
+def two_commits(uploads) -> None:
+    from storage.normalization import sync_candidate_terms
+    from storage.unit_of_work import new_candidate
+    for i, (info, full_text, embedding) in enumerate(uploads):
+        candidate = new_candidate(info, full_text, f'cv_{i}.pdf', 'pdf', embedding=embedding)
+        sync_candidate_terms(candidate, full_text)
+        db.session.add(candidate)
+        db.session.commit()
+        db.session.execute(text("UPDATE candidate_document SET text_embedding = :e WHERE candidate_id = :id"),
+                           {'e': json.dumps(embedding), 'id': candidate.id})
+        db.session.commit()
+
+def unit_of_work(uploads, batch: int) -> None:
+    from storage.unit_of_work import CandidateUnitOfWork, new_candidate
+    work = CandidateUnitOfWork()
+    for i, (info, full_text, embedding) in enumerate(uploads):
+        work.add(new_candidate(info, full_text, f'cv_{i}.pdf', 'pdf', embedding=embedding), embedding, full_text)
+        if len(work) >= batch:
+            work.commit()
+    work.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=500, help='Candidates inserted per variant')
+    parser.add_argument('--batch', type=int, default=50, help='Candidates per transaction for the bulk variant')
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    uploads = [synthetic_upload(i, rng) for i in range(args.size)]
+
+    variants = (
+        ('two commits', lambda: two_commits(uploads)),
+        ('uow x1', lambda: unit_of_work(uploads, 1)),
+        (f'uow x{args.batch}', lambda: unit_of_work(uploads, args.batch)),
+    )
+    for label, run in variants:
+        path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+        app = build_app(path)
+        with app.app_context():
+            import models  # noqa: F401
+            import storage.stats  # noqa: F401
+            db.create_all()
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            count = db.session.query(db.func.count(models.Candidate.id)).scalar()
+            print(f"{label:12s} {count / elapsed:8.1f} candidates/s  ({elapsed:.2f} s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Circuit breaker behaviour against the fault-injecting OpenAI stub.
+
+Runs three phases against benchmarks/openai_stub_server.py: healthy, outage
+(all calls fail or hang) and recovery. For each call it prints the latency seen
+by the caller and the breaker state, showing that once the circuit opens the
+calls return immediately with the local fallback and that half-open probes
+close it again when the stub recovers.
+
+    python -m benchmarks.bench_circuit_breaker --outage slow
+"""
+import os
+import time
+import argparse
+
+from benchmarks.openai_stub_server import start_stub_server, set_faults
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--outage', choices=['error', 'slow'], default='error')
+    parser.add_argument('--calls', type=int, default=16, help='Calls per phase')
+    args = parser.parse_args()
+
+    start_stub_server(args.port)
+
+    # La configuración se lee al importar: preparar el entorno antes
+    os.environ['OPENAI_BASE_URL'] = f'http://127.0.0.1:{args.port}/v1'
+    os.environ['OPENAI_API_KEY'] = 'stub'
+    os.environ.setdefault('OPENAI_TIMEOUT', '2')
+    os.environ.setdefault('OPENAI_MAX_RETRIES', '0')
+    os.environ.setdefault('BREAKER_OPEN_SECONDS', '3')
+    os.environ.setdefault('BREAKER_SLOW_CALL_SECONDS', '1')
+
+    from parsers import vision_parser
+
+    outage = {'error': {'error_rate': 1.0, 'latency': 0.0}, 'slow': {'error_rate': 0.0, 'latency': 5.0}}
+    phases = [
+        ('healthy', {'error_rate': 0.0, 'latency': 0.05}),
+        ('outage', outage[args.outage]),
+        ('recovery', {'error_rate': 0.0, 'latency': 0.05}),
+    ]
+
+    for phase, faults in phases:
+        set_faults(**faults)
+        print(f"\n== {phase} ({faults})")
+        if phase == 'recovery':
+            time.sleep(float(os.environ['BREAKER_OPEN_SECONDS']))
+        for i in range(args.calls):
+            start = time.perf_counter()
+            embedding = vision_parser.generate_text_embedding(f"candidato {i}")
+            elapsed = time.perf_counter() - start
+            fallback = not any(embedding)
+            print(f"call {i:2d}: {elapsed * 1000:8.1f} ms  "
+                  f"{'fallback' if fallback else 'remote  '}  "
+                  f"breaker={vision_parser.embedding_breaker.state}")
+
+
+if __name__ == '__main__':
+    main()
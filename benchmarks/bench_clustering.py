@@ -0,0 +1,109 @@
+"""
+Talent-pool clustering: refit time, memory and quality, online assignment.
+
+Stores N local embeddings drawn around K hidden profile centres as a vector
+snapshot (SQLite for the candidate rows), then times:
+
+- a cold refit (k-means++ + mini-batch k-means + assignment of every
+  candidate + labels), and the peak Python/numpy memory a refit allocates,
+- a warm refit (starting from the stored centroids): how many candidates
+  change cluster,
+- the online assignment of new uploads,
+
+and reports cluster purity against the hidden profiles.
+
+    python -m benchmarks.bench_clustering --size 100000 --dim 384 --k 20
+"""
+import os
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+import numpy as np
+from flask import Flask
+from sqlalchemy import insert, select
+
+from extensions import db
+
+MODEL = 'bench-model'
+
+
+def build_app(path: str) -> Flask:
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{path}"
+    db.init_app(app)
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=100000, help='Candidates')
+    parser.add_argument('--dim', type=int, default=384, help='Vector dimensions')
+    parser.add_argument('--k', type=int, default=20, help='Hidden profiles and clusters')
+    parser.add_argument('--uploads', type=int, default=50, help='Online assignments timed')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    from utils.config import CONFIG
+    CONFIG['VECTOR_SNAPSHOT_DIR'] = os.path.join(directory, 'snapshot')
+    CONFIG['LOCAL_EMBEDDING_MODEL'] = MODEL
+    CONFIG['CLUSTER_REFIT_EVERY'] = 0
+
+    from models import Candidate, CandidateLocalEmbedding
+    from storage.clustering import refit_clusters, assign_candidate_cluster
+    from storage.local_embeddings import encode_vector
+    from storage.vector_snapshot import write_snapshot
+
+    rng = np.random.default_rng(9)
+    centers = rng.standard_normal((args.k, args.dim), dtype=np.float32)
+    profiles = rng.integers(0, args.k, args.size)
+    matrix = centers[profiles] + 1.2 * rng.standard_normal((args.size, args.dim), dtype=np.float32)
+
+    app = build_app(os.path.join(directory, 'bench.db'))
+    with app.app_context():
+        db.create_all()
+        for first in range(0, args.size, 10000):
+            db.session.execute(insert(Candidate), [
+                {'id': i, 'name': f'Candidate {i}', 'original_filename': f'cv_{i}.pdf', 'file_type': 'pdf'}
+                for i in range(first + 1, min(first + 10000, args.size) + 1)
+            ])
+        db.session.commit()
+        write_snapshot(zip(range(1, args.size + 1), matrix), args.size, args.dim, MODEL)
+        print(f"{args.size} candidates x {args.dim} dims, k={args.k}, "
+              f"batch {CONFIG['CLUSTER_BATCH_SIZE']} x {CONFIG['CLUSTER_ITERATIONS']} iterations\n")
+
+        stats = refit_clusters(k=args.k)
+        print(f"cold refit   {stats['seconds']:6.2f} s, mean similarity {stats['mean_similarity']:.3f}")
+
+        assigned = dict(db.session.execute(select(Candidate.id, Candidate.cluster_id)).all())
+        clusters = np.array([assigned[i] for i in range(1, args.size + 1)])
+        purity = sum(np.bincount(profiles[clusters == c]).max() for c in np.unique(clusters)) / args.size
+        print(f"purity vs hidden profiles {purity:.3f}")
+
+        # tracemalloc ralentiza mucho: la memoria se mide en un ajuste aparte (restart, sin cambios de asignación)
+        tracemalloc.start()
+        refit_clusters(k=args.k, restart=True)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"refit peak   {peak / 2 ** 20:6.1f} MB allocated (vectors: {matrix.nbytes / 2 ** 20:.0f} MB)")
+
+        stats = refit_clusters(k=args.k)
+        print(f"warm refit   {stats['seconds']:6.2f} s, {stats['changed']} candidates changed cluster")
+
+        timings = []
+        for profile in rng.integers(0, args.k, args.uploads):
+            candidate = Candidate(name='New', original_filename='new.pdf', file_type='pdf')
+            db.session.add(candidate)
+            db.session.flush()
+            vector = centers[profile] + 1.2 * rng.standard_normal(args.dim, dtype=np.float32)
+            db.session.add(CandidateLocalEmbedding(candidate_id=candidate.id, model=MODEL, input_hash='-',
+                                                   dimensions=args.dim, vector=encode_vector(vector)))
+            db.session.commit()
+            start = time.perf_counter()
+            assign_candidate_cluster(candidate.id)
+            timings.append(time.perf_counter() - start)
+        print(f"online assignment {np.median(timings) * 1000:6.2f} ms (median)")
+
+
+if __name__ == '__main__':
+    main()
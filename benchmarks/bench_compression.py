@@ -0,0 +1,55 @@
+"""
+Storage size and decode cost of the CV text: plain vs. zlib vs. zstd vs. zstd with
+a dictionary trained on the corpus.
+
+Uses the synthetic CV corpus (one CV per seed, realistic Spanish sections).
+"Ratio" is plain bytes / stored bytes; "decode" is the time to turn one stored
+value back into text, i.e. the extra cost of opening a candidate detail page.
+
+    python -m benchmarks.bench_compression --size 2000
+"""
+import time
+import argparse
+
+from benchmarks.corpus import synthetic_labeled_cv
+from utils import compression
+from utils.compression import compress_text, decompress_text, train_dictionary, register_dictionary
+
+
+def measure(label: str, texts: list, encode) -> None:
+    plain = sum(len(t.encode('utf-8')) for t in texts)
+    stored = [encode(t) for t in texts]
+    size = sum(len(s) for s in stored)
+
+    start = time.perf_counter()
+    for value in stored:
+        decompress_text(value)
+    decode = (time.perf_counter() - start) / len(stored)
+
+    print(f"{label:12s} {size / 1024 / 1024:8.2f} MB  ratio {plain / size:5.2f}x  decode {decode * 1e6:7.1f} µs/value")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=2000, help='CVs in the corpus')
+    parser.add_argument('--repeat', type=int, default=2, help='Experience blocks per CV (controls CV size)')
+    args = parser.parse_args()
+
+    texts = [synthetic_labeled_cv(i, repeat=args.repeat)[0] for i in range(args.size)]
+    print(f"{args.size} CVs, mean {sum(len(t) for t in texts) / len(texts) / 1024:.1f} KB\n")
+
+    measure('plain', texts, lambda t: t.encode('utf-8'))
+    measure('zlib', texts, lambda t: compress_text(t, 'zlib'))
+    if not compression.zstd_available():
+        print("zstandard not installed: skipping zstd variants")
+        return
+
+    measure('zstd', texts, lambda t: compress_text(t, 'zstd'))
+    # Diccionario entrenado con una muestra distinta de la que se comprime
+    training = [synthetic_labeled_cv(args.size + i, repeat=args.repeat)[0] for i in range(min(args.size, 1000))]
+    register_dictionary(1, train_dictionary(training), active=True)
+    measure('zstd+dict', texts, lambda t: compress_text(t, 'zstd'))
+
+
+if __name__ == '__main__':
+    main()
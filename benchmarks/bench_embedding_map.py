@@ -0,0 +1,105 @@
+"""
+2-D talent-pool map: refit time and memory, upload projection, payload size.
+
+Stores N local embeddings as a vector snapshot (SQLite for the candidate
+rows), then times a refit (streamed PCA + rewrite of every candidate's
+coordinates) with the peak Python/numpy memory it allocates, the projection
+of new uploads, and compares the JSON size of a visualization page with
+full 1536-dim embeddings against the cached coordinates.
+
+    python -m benchmarks.bench_embedding_map --size 100000 --dim 384
+"""
+import os
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+import numpy as np
+from flask import Flask
+from sqlalchemy import insert
+
+from extensions import db
+
+MODEL = 'bench-model'
+
+
+def build_app(path: str) -> Flask:
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{path}"
+    db.init_app(app)
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=100000, help='Candidates')
+    parser.add_argument('--dim', type=int, default=384, help='Vector dimensions')
+    parser.add_argument('--page', type=int, default=100, help='Candidates per visualization page')
+    parser.add_argument('--uploads', type=int, default=50, help='Upload projections timed')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    from utils.config import CONFIG
+    CONFIG['VECTOR_SNAPSHOT_DIR'] = os.path.join(directory, 'snapshot')
+    CONFIG['LOCAL_EMBEDDING_MODEL'] = MODEL
+    CONFIG['MAP_REFIT_EVERY'] = 0
+
+    from models import Candidate, CandidateLocalEmbedding
+    from storage.embedding_map import refit_map, update_candidate_map, get_map_coordinates
+    from storage.local_embeddings import encode_vector
+    from storage.vector_snapshot import write_snapshot
+
+    rng = np.random.default_rng(5)
+    centers = rng.standard_normal((20, args.dim), dtype=np.float32)
+    matrix = centers[rng.integers(0, 20, args.size)] + 1.2 * rng.standard_normal((args.size, args.dim),
+                                                                                  dtype=np.float32)
+
+    app = build_app(os.path.join(directory, 'bench.db'))
+    with app.app_context():
+        db.create_all()
+        for first in range(0, args.size, 10000):
+            db.session.execute(insert(Candidate), [
+                {'id': i, 'name': f'Candidate {i}', 'original_filename': f'cv_{i}.pdf', 'file_type': 'pdf'}
+                for i in range(first + 1, min(first + 10000, args.size) + 1)
+            ])
+        db.session.commit()
+        write_snapshot(zip(range(1, args.size + 1), matrix), args.size, args.dim, MODEL)
+        print(f"{args.size} candidates x {args.dim} dims, batch {CONFIG['MAP_BATCH_SIZE']}\n")
+
+        stats = refit_map()
+        print(f"refit        {stats['seconds']:6.2f} s, explained variance {stats['explained_variance']}")
+        # tracemalloc ralentiza mucho: la memoria se mide en un segundo ajuste
+        tracemalloc.start()
+        refit_map()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"refit peak   {peak / 2 ** 20:6.1f} MB allocated (vectors: {matrix.nbytes / 2 ** 20:.0f} MB)")
+
+        timings = []
+        for _ in range(args.uploads):
+            candidate = Candidate(name='New', original_filename='new.pdf', file_type='pdf')
+            db.session.add(candidate)
+            db.session.flush()
+            vector = centers[rng.integers(0, 20)] + 1.2 * rng.standard_normal(args.dim, dtype=np.float32)
+            db.session.add(CandidateLocalEmbedding(candidate_id=candidate.id, model=MODEL, input_hash='-',
+                                                   dimensions=args.dim, vector=encode_vector(vector)))
+            db.session.commit()
+            start = time.perf_counter()
+            update_candidate_map(candidate.id)
+            timings.append(time.perf_counter() - start)
+        print(f"upload projection {np.median(timings) * 1000:6.2f} ms (median)")
+
+        ids = list(range(1, args.page + 1))
+        embeddings = rng.standard_normal((args.page, 1536)).round(8).tolist()
+        full = json.dumps([{'id': i, 'embedding': e} for i, e in zip(ids, embeddings)])
+        start = time.perf_counter()
+        coordinates = get_map_coordinates(ids)
+        lookup_ms = (time.perf_counter() - start) * 1000
+        mapped = json.dumps([{'id': i, 'map': coordinates.get(i)} for i in ids])
+        print(f"page of {args.page}: {len(full) / 1024:8.1f} KB with 1536-dim embeddings, "
+              f"{len(mapped) / 1024:6.1f} KB with map coordinates ({lookup_ms:.2f} ms lookup)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Cost vs. accuracy report for confidence-gated LLM extraction.
+
+For every threshold it reports the LLM-skip rate and, per field, how often the
+regex extraction agrees with the labels on the CVs that skip the LLM.
+
+Labeled sample format (JSONL), one CV per line:
+    {"text": "...", "labels": {"name": "...", "email": "...", "phone": "...",
+                               "skills": [...], "institutions": [...]}}
+
+    python -m benchmarks.bench_extraction_policy --labels sample.jsonl
+    python -m benchmarks.bench_extraction_policy --size 200          # synthetic sample
+"""
+import re
+import json
+import argparse
+import unicodedata
+from typing import Dict, List, Optional
+
+from benchmarks.corpus import synthetic_labeled_cv
+from parsers.text_cleaner import clean_and_extract_info_with_confidence
+from parsers.extraction_policy import decide_llm_extraction
+
+FIELDS = ['name', 'email', 'phone', 'skills', 'education']
+
+
+def _norm(value: str) -> str:
+    value = unicodedata.normalize('NFKD', value or '')
+    return ''.join(c for c in value if not unicodedata.combining(c)).lower().strip()
+
+def _json_list(value) -> List:
+    try:
+        parsed = json.loads(value) if isinstance(value, str) and value else value
+        return parsed if isinstance(parsed, list) else []
+    except json.JSONDecodeError:
+        return []
+
+def field_agreement(info: Dict, labels: Dict) -> Dict[str, Optional[float]]:
+    """
+    Agreement (0-1) between an extraction and the labels, per field.
+    Fields missing from the labels are reported as None.
+    """
+    result = {}
+    if 'name' in labels:
+        result['name'] = float(_norm(info.get('name')) == _norm(labels['name']))
+    if 'email' in labels:
+        result['email'] = float(_norm(info.get('email')) == _norm(labels['email']))
+    if 'phone' in labels:
+        result['phone'] = float(re.sub(r'\D', '', info.get('phone') or '') == re.sub(r'\D', '', labels['phone']))
+    if 'skills' in labels:
+        got = {_norm(s) for s in _json_list(info.get('skills')) if isinstance(s, str)}
+        want = {_norm(s) for s in labels['skills']}
+        result['skills'] = len(got & want) / len(got | want) if got | want else 1.0
+    if 'institutions' in labels:
+        got = [_norm(e.get('institution', '')) for e in _json_list(info.get('education')) if isinstance(e, dict)]
+        want = [_norm(i) for i in labels['institutions']]
+        result['education'] = sum(any(w in g for g in got) for w in want) / len(want) if want else 1.0
+    return result
+
+def load_sample(path: Optional[str], size: int) -> List[Dict]:
+    if path:
+        with open(path, encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    return [dict(zip(('text', 'labels'), synthetic_labeled_cv(i))) for i in range(size)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--labels', help='Labeled JSONL sample (default: synthetic)')
+    parser.add_argument('--size', type=int, default=200, help='Synthetic sample size')
+    parser.add_argument('--thresholds', default='0.4,0.5,0.6,0.7,0.75,0.8,0.9')
+    parser.add_argument('--fields', default='', help='Comma separated LLM_FIELDS to evaluate')
+    args = parser.parse_args()
+
+    sample = load_sample(args.labels, args.size)
+    extracted = [clean_and_extract_info_with_confidence(item['text']) for item in sample]
+    llm_fields = [f.strip() for f in args.fields.split(',') if f.strip()]
+
+    print(f"{len(sample)} labeled CVs, LLM_FIELDS={llm_fields or 'all'}")
+    print(f"{'threshold':>9} {'skip rate':>9}  " + "  ".join(f"{f:>9}" for f in FIELDS))
+
+    for threshold in [float(t) for t in args.thresholds.split(',')]:
+        skipped = 0
+        totals = {f: [] for f in FIELDS}
+        for item, (info, confidence) in zip(sample, extracted):
+            decision = decide_llm_extraction(confidence, threshold=threshold, llm_fields=llm_fields)
+            agreement = field_agreement(info, item.get('labels', {}))
+            # Campos que se quedan con el valor local (no los sustituye el LLM)
+            local_fields = FIELDS if not decision['call_llm'] else [f for f in FIELDS if f not in decision['fields']]
+            skipped += not decision['call_llm']
+            for field in local_fields:
+                if agreement.get(field) is not None:
+                    totals[field].append(agreement[field])
+
+        row = "  ".join(
+            f"{sum(v) / len(v):9.2f}" if v else f"{'-':>9}" for v in (totals[f] for f in FIELDS)
+        )
+        print(f"{threshold:9.2f} {skipped / len(sample):9.1%}  {row}")
+
+    print("\nField columns: agreement of the locally kept values with the labels "
+          "(higher is safer to skip the LLM).")
+
+
+if __name__ == '__main__':
+    main()
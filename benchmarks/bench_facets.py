@@ -0,0 +1,70 @@
+"""
+Facet count latency at scale, without a database.
+
+Fills a FacetIndex with synthetic candidates (skills, institutions, languages,
+certifications and experience bands drawn from skewed distributions) and times
+global counts and per-query counts for result sets of several sizes.
+
+    python -m benchmarks.bench_facets --size 1000000
+"""
+import time
+import random
+import argparse
+
+import numpy as np
+
+from benchmarks.corpus import SKILLS, INSTITUTIONS, LANGUAGES
+from storage.facets import FacetIndex, EXPERIENCE_BANDS
+
+
+def synthetic_values(rng: random.Random, extra_skills: list) -> dict:
+    skills = rng.sample(SKILLS, 5) + rng.sample(extra_skills, 2)
+    band = rng.choice(EXPERIENCE_BANDS)[2]
+    return {
+        'skills': [(s.lower(), s) for s in skills],
+        'institutions': [(i.lower(), i) for i in rng.sample(INSTITUTIONS, 1)],
+        'languages': [(l.lower(), l) for l in rng.sample(LANGUAGES, 2)],
+        'certifications': [(f"cert-{rng.randint(0, 500)}", f"Cert {rng.randint(0, 500)}")],
+        'experience': [(band, band)]
+    }
+
+def timed(label: str, func, runs: int = 20) -> None:
+    func()  # calentar (construye bitmaps perezosos)
+    start = time.perf_counter()
+    for _ in range(runs):
+        func()
+    print(f"{label:40s} {(time.perf_counter() - start) / runs * 1000:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=200000, help='Candidates in the index')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    extra_skills = [f"skill-{i}" for i in range(2000)]  # cola larga de habilidades poco frecuentes
+
+    index = FacetIndex()
+    start = time.perf_counter()
+    for candidate_id in range(1, args.size + 1):
+        index.add(candidate_id, synthetic_values(rng, extra_skills))
+    index.loaded = True
+    print(f"Indexed {args.size} candidates in {time.perf_counter() - start:.1f} s\n")
+
+    ids = np.arange(1, args.size + 1)
+    np_rng = np.random.default_rng(args.seed)
+
+    timed("global counts", lambda: index.counts())
+    for result_size in (50, 5000, args.size // 10, args.size // 2):
+        result = np_rng.choice(ids, size=min(result_size, args.size), replace=False)
+        timed(f"result set of {len(result)}", lambda: index.counts(result))
+
+    start = time.perf_counter()
+    index.add(args.size + 1, synthetic_values(rng, extra_skills))
+    index.remove(args.size // 2)
+    print(f"{'incremental add + remove':40s} {(time.perf_counter() - start) * 1000:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
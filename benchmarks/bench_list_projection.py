@@ -0,0 +1,106 @@
+"""
+Bytes read and latency per listing: full Candidate rows vs. the summary projection.
+
+Fills a temporary SQLite database with synthetic candidates carrying realistic
+heavy columns (full CV text, vision JSON and a 1536-float embedding) and lists
+pages of them both ways. "Bytes" is the size of the column values returned to
+Python for the page. A LIKE scan over the candidate table shows the cost of
+touching the hot rows (the heavy payloads live in candidate_document).
+
+    python -m benchmarks.bench_list_projection --size 5000 --page 50
+"""
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+
+from flask import Flask
+from sqlalchemy.orm import joinedload
+
+from benchmarks.corpus import synthetic_labeled_cv
+from extensions import db
+
+
+def build_app(path: str) -> Flask:
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{path}"
+    db.init_app(app)
+    return app
+
+def populate(size: int) -> None:
+    from models import Candidate
+    rng = random.Random(3)
+    for i in range(size):
+        text, labels = synthetic_labeled_cv(i, repeat=4)
+        db.session.add(Candidate(
+            name=labels['name'], email=labels['email'], phone=labels['phone'],
+            skills=json.dumps(labels['skills']), education=json.dumps([]), experience=json.dumps([]),
+            languages=json.dumps(labels['languages']), certifications='[]', summary='',
+            full_text=text, vision_analysis=json.dumps({'raw': text[:3000]}),
+            text_embedding=json.dumps([rng.uniform(-1, 1) for _ in range(1536)]),
+            original_filename=f'cv_{i}.pdf', file_type='pdf'
+        ))
+        if i % 500 == 499:
+            db.session.commit()
+    db.session.commit()
+
+def row_bytes(values) -> int:
+    return sum(len(str(v)) for v in values if v is not None)
+
+def measure(label: str, list_page, pages: int) -> None:
+    total_bytes = 0
+    start = time.perf_counter()
+    for page in range(pages):
+        rows = list_page(page)
+        total_bytes += sum(row_bytes(values) for values in rows)
+        db.session.expunge_all()
+    elapsed = (time.perf_counter() - start) / pages
+    print(f"{label:12s} {elapsed * 1000:8.2f} ms/page  {total_bytes / pages / 1024:9.1f} KB/page")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=2000, help='Candidates in the database')
+    parser.add_argument('--page', type=int, default=50, help='Page size')
+    parser.add_argument('--pages', type=int, default=20, help='Pages listed per variant')
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    app = build_app(path)
+    with app.app_context():
+        from models import Candidate
+        from storage.projections import SUMMARY_COLUMNS
+        from storage.sqlite_handler import get_candidates_page
+
+        db.create_all()
+        populate(args.size)
+        print(f"{args.size} candidates, database {os.path.getsize(path) / 1024 / 1024:.1f} MB\n")
+
+        columns = [c.key for c in Candidate.__table__.columns] + ['full_text', 'vision_analysis', 'text_embedding']
+
+        def full_rows(page):
+            candidates = db.session.query(Candidate).options(joinedload(Candidate.document))\
+                .order_by(Candidate.created_at.desc(), Candidate.id.desc())\
+                .offset(page * args.page).limit(args.page).all()
+            return [[getattr(c, column) for column in columns] for c in candidates]
+
+        cursors = {0: None}
+
+        def projection(page):
+            summaries, cursors[page + 1] = get_candidates_page(args.page, cursors.get(page))
+            return [[getattr(s, column.key) for column in SUMMARY_COLUMNS] for s in summaries]
+
+        measure('full rows', full_rows, args.pages)
+        measure('projection', projection, args.pages)
+
+        # Recorrido de la tabla caliente (filtro sobre columnas pequeñas)
+        start = time.perf_counter()
+        for _ in range(args.pages):
+            db.session.query(db.func.count(Candidate.id)).filter(Candidate.skills.ilike('%python%')).scalar()
+        print(f"{'skills scan':12s} {(time.perf_counter() - start) / args.pages * 1000:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
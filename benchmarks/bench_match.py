@@ -0,0 +1,111 @@
+"""
+Latency of /api/match (job-description matching) over a large pool.
+
+Builds N candidates with normalized skills, languages, degrees and years of
+experience (SQLite), a vector snapshot of random local embeddings, loads the
+facet index, then times match_job_description() (requirement extraction,
+vectorized scoring of the whole pool, top-k) and loading the top 50 rows,
+for a few job descriptions. The JD embedding is a fixed random vector: the
+local model's encode time (one text) is not included.
+
+    python -m benchmarks.bench_match --size 100000 --dim 384
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+
+import numpy as np
+from flask import Flask
+from sqlalchemy import insert
+
+from benchmarks.corpus import SKILLS, LANGUAGES
+from extensions import db
+
+MODEL = 'bench-model'
+DEGREES = ['Tecnólogo en Redes', 'Ingeniero en Sistemas', 'Licenciado en Informática', 'Máster en Ciencia de Datos',
+           'Doctorado en Computación']
+JOB_DESCRIPTIONS = [
+    "Buscamos Desarrollador Backend con al menos 5 años de experiencia en Python, Django y PostgreSQL. "
+    "Deseable Docker. Título de Ingeniería en Sistemas. Inglés intermedio.",
+    "Frontend developer: React, JavaScript and Angular, 3+ years. Bachelor's degree. English required.",
+    "Analista de datos con maestría, manejo de Python y MySQL, 2 años de experiencia, francés deseable.",
+]
+
+
+def build_app(path: str) -> Flask:
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{path}"
+    db.init_app(app)
+    return app
+
+def populate(size: int, rng: random.Random) -> None:
+    from models import Candidate, CandidateSkill, CandidateLanguage, CandidateEducation
+    from storage.normalization import canonical_skill, canonical_language
+
+    for first in range(1, size + 1, 10000):
+        ids = range(first, min(first + 10000, size + 1))
+        db.session.execute(insert(Candidate), [
+            {'id': i, 'name': f'Candidate {i}', 'email': f'c{i}@mail.com', 'original_filename': f'cv_{i}.pdf',
+             'file_type': 'pdf', 'experience_years': rng.randint(0, 15)} for i in ids
+        ])
+        skills, languages, education = [], [], []
+        for i in ids:
+            skills += [{'candidate_id': i, 'name': s, 'canonical': canonical_skill(s)} for s in rng.sample(SKILLS, 6)]
+            languages += [{'candidate_id': i, 'name': l, 'canonical': canonical_language(l)}
+                          for l in rng.sample(LANGUAGES, 2)]
+            education.append({'candidate_id': i, 'institution': 'ESPOL', 'degree': rng.choice(DEGREES)})
+        db.session.execute(insert(CandidateSkill), skills)
+        db.session.execute(insert(CandidateLanguage), languages)
+        db.session.execute(insert(CandidateEducation), education)
+    db.session.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=100000, help='Candidates')
+    parser.add_argument('--dim', type=int, default=384, help='Vector dimensions')
+    parser.add_argument('--runs', type=int, default=20, help='Timed runs per job description')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    from utils.config import CONFIG
+    CONFIG['VECTOR_SNAPSHOT_DIR'] = os.path.join(directory, 'snapshot')
+    CONFIG['LOCAL_EMBEDDING_MODEL'] = MODEL
+
+    from storage.facets import get_facet_index
+    from storage.matching import match_job_description, iter_matches
+    from storage.vector_snapshot import write_snapshot
+
+    app = build_app(os.path.join(directory, 'bench.db'))
+    rng = np.random.default_rng(11)
+    with app.app_context():
+        db.create_all()
+        populate(args.size, random.Random(11))
+        matrix = rng.standard_normal((args.size, args.dim), dtype=np.float32)
+        write_snapshot(zip(range(1, args.size + 1), matrix), args.size, args.dim, MODEL)
+        del matrix
+
+        start = time.perf_counter()
+        get_facet_index()
+        print(f"{args.size} candidates x {args.dim} dims, facet index loaded in {time.perf_counter() - start:.1f}s\n")
+
+        query = rng.standard_normal(args.dim, dtype=np.float32)
+        encode = lambda texts: query[None, :]
+        for description in JOB_DESCRIPTIONS:
+            match_job_description(description, encode)  # calentar caché de páginas y bitmaps
+            totals, scoring = [], []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                result = match_job_description(description, encode, 50)
+                rows = list(iter_matches(result['ranking'], 50))
+                totals.append((time.perf_counter() - start) * 1000)
+                scoring.append(result['timings']['scoring_ms'])
+            print(f"requirements: {result['requirements']}")
+            print(f"  scoring p50 {np.percentile(scoring, 50):6.1f} ms | total (with top-50 rows) "
+                  f"p50 {np.percentile(totals, 50):6.1f} ms, p95 {np.percentile(totals, 95):6.1f} ms, "
+                  f"{len(rows)} results, best {rows[0]['score']:.3f}\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Near-duplicate detection: MinHash signature cost, ingest lookup latency and
+accuracy against known edited copies.
+
+Stores N synthetic CVs (signature + LSH buckets), then checks edited copies
+of some of them (words dropped, replaced and appended, as when a candidate
+re-sends a retouched CV) and unrelated new CVs. Reports precision/recall at
+NEAR_DUPLICATE_THRESHOLD and the per-upload lookup time, then the batch
+clustering time.
+
+    python -m benchmarks.bench_near_duplicates --size 5000 --queries 500
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+
+import numpy as np
+from flask import Flask
+
+from benchmarks.corpus import synthetic_cv_text, SKILLS
+from extensions import db
+
+
+def build_app(path: str) -> Flask:
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{path}"
+    db.init_app(app)
+    return app
+
+def edited_copy(text: str, rng: random.Random, edit_rate: float) -> str:
+    words = text.split()
+    edited = []
+    for word in words:
+        roll = rng.random()
+        if roll < edit_rate / 2:
+            continue
+        edited.append(rng.choice(SKILLS) if roll < edit_rate else word)
+    return " ".join(edited + ["Disponibilidad", "inmediata"])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=5000, help='Stored CVs')
+    parser.add_argument('--queries', type=int, default=500, help='Edited copies and unrelated CVs checked (each)')
+    parser.add_argument('--edit-rate', type=float, default=0.02, help='Fraction of words dropped or replaced')
+    args = parser.parse_args()
+
+    from models import Candidate
+    from storage.near_duplicates import minhash_signature, find_near_duplicates, store_signature,\
+        cluster_near_duplicates
+
+    rng = random.Random(7)
+    texts = [synthetic_cv_text(seed, repeat=3) for seed in range(args.size)]
+
+    start = time.perf_counter()
+    signatures = [minhash_signature(text) for text in texts]
+    elapsed = time.perf_counter() - start
+    print(f"signatures: {args.size} CVs in {elapsed:.2f}s ({elapsed / args.size * 1000:.2f} ms per CV)")
+
+    app = build_app(os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    with app.app_context():
+        db.create_all()
+        db.session.execute(Candidate.__table__.insert(), [{'name': f'CV {i}', 'original_filename': f'cv_{i}.pdf', 'file_type': 'pdf'}
+                                                     for i in range(args.size)])
+        for candidate_id, signature in enumerate(signatures, start=1):
+            store_signature(db.session, candidate_id, signature)
+        db.session.commit()
+
+        originals = rng.sample(range(args.size), args.queries)
+        checks = [(minhash_signature(edited_copy(texts[i], rng, args.edit_rate)), i + 1) for i in originals]
+        checks += [(minhash_signature(synthetic_cv_text(args.size + n, repeat=3)), None)
+                   for n in range(args.queries)]
+
+        timings = []
+        true_positives = false_positives = false_negatives = 0
+        for signature, expected in checks:
+            start = time.perf_counter()
+            found = {candidate_id for candidate_id, _ in find_near_duplicates(signature)}
+            timings.append(time.perf_counter() - start)
+            true_positives += expected in found
+            false_negatives += expected is not None and expected not in found
+            false_positives += len(found - {expected})
+
+        timings = np.array(timings) * 1000
+        precision = true_positives / max(1, true_positives + false_positives)
+        recall = true_positives / max(1, true_positives + false_negatives)
+        print(f"lookup: p50 {np.percentile(timings, 50):.3f} ms, p95 {np.percentile(timings, 95):.3f} ms "
+              f"over {args.size} stored CVs")
+        print(f"accuracy: precision {precision:.3f}, recall {recall:.3f} "
+              f"({args.queries} edited copies, {args.queries} unrelated CVs)")
+
+        # Copias editadas almacenadas para el agrupamiento por lotes
+        next_id = args.size + 1
+        db.session.execute(Candidate.__table__.insert(), [{'name': f'Copy {i}', 'original_filename': f'copy_{i}.pdf', 'file_type': 'pdf'}
+                                                     for i in originals])
+        for n, (signature, _) in enumerate(checks[:args.queries]):
+            store_signature(db.session, next_id + n, signature)
+        db.session.commit()
+        start = time.perf_counter()
+        groups = cluster_near_duplicates()
+        print(f"clustering: {len(groups)} groups in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
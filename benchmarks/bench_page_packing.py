@@ -0,0 +1,117 @@
+"""
+Vision tokens per CV before and after page packing.
+
+"Before" is the previous behaviour: every page (up to 4) thumbnailed to 1024px
+and sent at default detail. "After" is page_packer.pack_pages. With --with-llm
+both variants are also sent to the vision model and the extracted fields are
+compared with the labels (synthetic corpus) to report accuracy.
+
+    python -m benchmarks.bench_page_packing --size 20
+    python -m benchmarks.bench_page_packing --pdf-dir ./cvs          # real PDFs, tokens only
+    python -m benchmarks.bench_page_packing --size 10 --with-llm     # needs OPENAI_API_KEY
+"""
+import os
+import random
+import argparse
+from typing import List
+
+from PIL import Image, ImageDraw
+
+from benchmarks.corpus import synthetic_labeled_cv
+from benchmarks.bench_extraction_policy import field_agreement, FIELDS
+from parsers.page_packer import pack_pages, estimate_image_tokens
+from parsers.vision_parser import image_to_base64
+
+PAGE_SIZE = (1654, 2339)  # A4 a 200 dpi, como pdf_to_images
+
+
+def render_pages(text: str, seed: int) -> List[Image.Image]:
+    """Render a CV text as A4 pages with wide margins, plus a blank or duplicated last page."""
+    rng = random.Random(seed)
+    lines = text.split('\n') * 3
+    per_page = 40
+    pages = []
+    for start in range(0, len(lines), per_page):
+        page = Image.new('RGB', PAGE_SIZE, 'white')
+        draw = ImageDraw.Draw(page)
+        for i, line in enumerate(lines[start:start + per_page]):
+            draw.text((220, 260 + i * 44), line, fill='black')
+        pages.append(page)
+    if rng.random() < 0.5:
+        pages.append(Image.new('RGB', PAGE_SIZE, 'white'))
+    else:
+        pages.append(pages[-1].copy())
+    return pages[:4]
+
+def baseline_tokens(pages: List[Image.Image]) -> int:
+    total = 0
+    for page in pages[:4]:
+        thumb = page.copy()
+        thumb.thumbnail((1024, 1024))
+        total += estimate_image_tokens(thumb.width, thumb.height, 'high')
+    return total
+
+def load_pdf_pages(pdf_dir: str):
+    from parsers.vision_parser import pdf_to_images
+    for name in sorted(os.listdir(pdf_dir)):
+        if name.lower().endswith('.pdf'):
+            yield name, pdf_to_images(os.path.join(pdf_dir, name)), None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=20, help='Synthetic CVs')
+    parser.add_argument('--pdf-dir', help='Directory with real PDF CVs')
+    parser.add_argument('--budget', type=int, help='Token budget (default VISION_TOKEN_BUDGET)')
+    parser.add_argument('--with-llm', action='store_true', help='Also measure extraction accuracy')
+    args = parser.parse_args()
+
+    if args.pdf_dir:
+        documents = load_pdf_pages(args.pdf_dir)
+    else:
+        documents = (
+            (f"synthetic-{i}", render_pages(text, i), labels)
+            for i, (text, labels) in ((i, synthetic_labeled_cv(i, repeat=2)) for i in range(args.size))
+        )
+
+    before_total = after_total = count = 0
+    accuracy = {'before': {f: [] for f in FIELDS}, 'after': {f: [] for f in FIELDS}}
+
+    for name, pages, labels in documents:
+        before = baseline_tokens(pages)
+        packed = pack_pages([p.copy() for p in pages], token_budget=args.budget)
+        after = sum(p['tokens'] for p in packed)
+        before_total += before
+        after_total += after
+        count += 1
+        print(f"{name:24s} pages={len(pages)}  before={before:5d}  after={after:5d}  "
+              f"images={len(packed)} detail={','.join(p['detail'] for p in packed)}")
+
+        if args.with_llm and labels:
+            from parsers.vision_parser import analyze_encoded_images_with_vision
+            from parsers.speculative import vision_to_candidate_info
+            variants = {
+                'before': [image_to_base64(p.copy()) for p in pages[:4]],
+                'after': packed,
+            }
+            for variant, encoded in variants.items():
+                info = vision_to_candidate_info(analyze_encoded_images_with_vision(encoded))
+                for field, value in field_agreement(info, labels).items():
+                    accuracy[variant][field].append(value)
+
+    if not count:
+        print("No documents found")
+        return
+
+    print(f"\nTokens per CV: before={before_total / count:.0f}  after={after_total / count:.0f}  "
+          f"(-{1 - after_total / before_total:.0%})")
+    if args.with_llm:
+        for variant in ('before', 'after'):
+            row = "  ".join(f"{f}={sum(v) / len(v):.2f}" for f, v in accuracy[variant].items() if v)
+            print(f"Accuracy {variant:6s}: {row}")
+    else:
+        print("Accuracy: not measured (run with --with-llm)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Upload parsing throughput: inline (request thread) vs. the parser process pool.
+
+Simulates a threaded server handling concurrent uploads. Each "upload" runs the
+regex extractor (clean_and_extract_info) on a synthetic CV.
+
+    python -m benchmarks.bench_parser_pool --uploads 200 --threads 8
+"""
+import os
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.corpus import synthetic_corpus
+from parsers.text_cleaner import clean_and_extract_info
+from parsers import worker_pool
+
+
+def run_uploads(texts, threads: int, parse) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(parse, texts))
+    return len(texts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--uploads', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=8, help='Concurrent request threads')
+    parser.add_argument('--repeat', type=int, default=20, help='CV size multiplier')
+    args = parser.parse_args()
+
+    texts = synthetic_corpus(args.uploads, repeat=args.repeat)
+    cpu_count = os.cpu_count() or 1
+
+    baseline = run_uploads(texts, args.threads, clean_and_extract_info)
+    print(f"inline (GIL-bound)      : {baseline:8.1f} uploads/s")
+
+    sizes = sorted({1, 2, 4, cpu_count} & set(range(1, cpu_count + 1)))
+    for size in sizes:
+        worker_pool.start_parser_pool(size)
+        try:
+            rate = run_uploads(texts, args.threads, worker_pool.clean_and_extract_info_in_pool)
+        finally:
+            worker_pool.shutdown_parser_pool()
+        print(f"pool, {size:2d} worker(s)     : {rate:8.1f} uploads/s  (x{rate / baseline:.2f})")
+
+
+if __name__ == '__main__':
+    main()
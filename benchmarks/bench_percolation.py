@@ -0,0 +1,130 @@
+"""
+Saved-search percolation at ingest vs re-running every saved search.
+
+Stores Q saved searches (2-3 keywords drawn from a skill vocabulary, some
+with a semantic threshold) in SQLite, then for a few new candidates (a CV
+of ~T distinct terms) times:
+
+- percolate_candidate: lookup of the CV terms (and prefixes) in the term
+  index of the searches, one matrix-vector product for the semantic ones,
+  and an exact check of the found searches that have filters,
+- the naive alternative: checking the new candidate against each saved
+  search with the keyword search (candidate_matches_search), Q queries,
+
+and checks both find the same keyword matches.
+
+    python -m benchmarks.bench_percolation --searches 1000,10000 --terms 800
+"""
+import os
+import time
+import argparse
+import tempfile
+
+import numpy as np
+from flask import Flask
+from sqlalchemy import delete, insert, select
+
+from extensions import db
+
+MODEL = 'bench-model'
+DIM = 384
+
+
+def build_app(path: str) -> Flask:
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{path}"
+    db.init_app(app)
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--searches', default='1000,10000', help='Saved searches to compare')
+    parser.add_argument('--terms', type=int, default=800, help='Distinct terms per CV')
+    parser.add_argument('--vocabulary', type=int, default=20000, help='Distinct terms in the corpus')
+    parser.add_argument('--candidates', type=int, default=5, help='New candidates timed')
+    parser.add_argument('--naive', type=int, default=1000, help='Searches checked one by one (naive timing)')
+    args = parser.parse_args()
+
+    from utils.config import CONFIG
+    CONFIG['LOCAL_EMBEDDING_MODEL'] = MODEL
+
+    from models import (Candidate, CandidateLocalEmbedding, CandidateTerm, SavedSearch, SavedSearchEmbedding,
+                        SavedSearchTerm, SearchNotification)
+    from storage.local_embeddings import encode_vector
+    from storage.saved_searches import percolate_candidate
+    from storage.sqlite_handler import candidate_matches_search
+
+    rng = np.random.default_rng(3)
+    vocabulary = [f"skill{i}" for i in range(args.vocabulary)]
+    # Frecuencias tipo Zipf para el texto de los CV; las consultas usan términos del mismo vocabulario
+    # pero sin los 200 más frecuentes (palabras comunes que extract_keywords no suele dejar pasar)
+    weights = 1 / np.arange(1, args.vocabulary + 1)
+    weights /= weights.sum()
+    query_weights = np.where(np.arange(args.vocabulary) < 200, 0, weights)
+    query_weights /= query_weights.sum()
+
+    app = build_app(os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    with app.app_context():
+        db.create_all()
+        candidates = []
+        for i in range(1, args.candidates + 1):
+            terms = rng.choice(args.vocabulary, args.terms, replace=False, p=weights)
+            db.session.add(Candidate(id=i, name=f'Candidate {i}', original_filename='cv.pdf', file_type='pdf'))
+            db.session.flush()
+            db.session.execute(insert(CandidateTerm), [{'candidate_id': i, 'term': vocabulary[t]} for t in terms])
+            db.session.add(CandidateLocalEmbedding(candidate_id=i, model=MODEL, input_hash='-', dimensions=DIM,
+                                                   vector=encode_vector(rng.standard_normal(DIM))))
+            candidates.append(i)
+        db.session.commit()
+
+        print(f"CV of {args.terms} terms (vocabulary {args.vocabulary}), {args.candidates} new candidates\n")
+        print(f"{'searches':>9} {'percolate ms':>13} {'naive ms':>9} {'matches':>8} {'same':>5}")
+        stored = 0
+        for total in [int(q) for q in args.searches.split(',')]:
+            searches, terms, embeddings = [], [], []
+            for search_id in range(stored + 1, total + 1):
+                keywords = rng.choice(args.vocabulary, rng.integers(2, 4), replace=False, p=query_weights)
+                semantic = rng.random() < 0.2
+                searches.append({'id': search_id, 'name': f'Search {search_id}',
+                                 'query': ' '.join(vocabulary[k] for k in keywords),
+                                 'min_similarity': 0.2 if semantic else None})
+                terms.extend({'saved_search_id': search_id, 'keyword': position, 'term': vocabulary[k]}
+                             for position, k in enumerate(keywords))
+                if semantic:
+                    vector = rng.standard_normal(DIM)
+                    embeddings.append({'saved_search_id': search_id, 'model': MODEL,
+                                       'vector': encode_vector(vector / np.linalg.norm(vector))})
+            if searches:
+                db.session.execute(insert(SavedSearch), searches)
+                db.session.execute(insert(SavedSearchTerm), terms)
+            if embeddings:
+                db.session.execute(insert(SavedSearchEmbedding), embeddings)
+            db.session.commit()
+            stored = total
+
+            timings, naive_timings, matches, same = [], [], 0, True
+            queries = db.session.execute(select(SavedSearch.id, SavedSearch.query)
+                                         .order_by(SavedSearch.id)).all()
+            for candidate_id in candidates:
+                db.session.execute(delete(SearchNotification))
+                db.session.commit()
+                start = time.perf_counter()
+                found = percolate_candidate(candidate_id)
+                timings.append(time.perf_counter() - start)
+                matches += len(found)
+
+                checked = queries[:args.naive]
+                start = time.perf_counter()
+                naive = {search_id for search_id, query in checked if candidate_matches_search(candidate_id, query)}
+                naive_timings.append((time.perf_counter() - start) * len(queries) / len(checked))
+                keyword_hits = {n['saved_search_id'] for n in found
+                                if n['matched_by'] != 'semantic' and n['saved_search_id'] <= len(checked)}
+                same = same and keyword_hits == naive
+            print(f"{total:9d} {np.median(timings) * 1000:13.1f} {np.median(naive_timings) * 1000:9.0f} "
+                  f"{matches / len(candidates):8.1f} {'yes' if same else 'NO':>5}")
+        if args.naive:
+            print(f"\nnaive ms extrapolated from the first {args.naive} searches")
+
+
+if __name__ == '__main__':
+    main()
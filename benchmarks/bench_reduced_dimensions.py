@@ -0,0 +1,80 @@
+"""
+Reduced-dimension first stage vs. full 1536-dim vectors.
+
+Scores N candidate vectors against a set of queries with an exact scan
+(what an exact pgvector scan does, in numpy) at the full dimension and at
+reduced prefixes (re-normalized, as utils.embeddings.reduce_embedding), and
+reports index memory, scan time and recall@k against the full-dimension
+ranking, with and without re-ranking the top N with the full vectors.
+
+text-embedding-3 vectors concentrate information in their first dimensions
+(Matryoshka training); the synthetic corpus imitates that with clustered
+vectors whose per-dimension scale decays with the dimension index, so the
+absolute recall figures are indicative only. Re-run with real embeddings
+before lowering EMBEDDING_DIMENSIONS in production.
+
+    python -m benchmarks.bench_reduced_dimensions --size 100000 --dims 256,512,1536
+"""
+import time
+import argparse
+
+import numpy as np
+
+FULL = 1536
+
+
+def unit(matrix: np.ndarray) -> np.ndarray:
+    return matrix / np.linalg.norm(matrix, axis=-1, keepdims=True)
+
+def top_k(matrix: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ matrix.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(top, np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1), axis=1)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=100000, help='Candidates')
+    parser.add_argument('--dims', default='256,512,1536', help='First-stage dimensions to compare')
+    parser.add_argument('--queries', type=int, default=100, help='Queries')
+    parser.add_argument('--k', type=int, default=10, help='Results per query (recall@k)')
+    parser.add_argument('--rerank', type=int, default=100, help='First-stage candidates re-ranked at full dimension')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    scale = (1 + np.arange(FULL, dtype=np.float32)) ** -0.5  # energía decreciente con la dimensión
+    centers = rng.standard_normal((1000, FULL), dtype=np.float32)
+    full = np.empty((args.size, FULL), dtype=np.float32)
+    for first in range(0, args.size, 20000):
+        count = min(20000, args.size - first)
+        block = centers[rng.integers(0, 1000, count)] + 0.8 * rng.standard_normal((count, FULL), dtype=np.float32)
+        full[first:first + count] = unit(block * scale)
+    queries = unit((centers[rng.integers(0, 1000, args.queries)] +
+                    0.8 * rng.standard_normal((args.queries, FULL), dtype=np.float32)) * scale)
+    exact = top_k(full, queries, args.k)
+
+    print(f"{args.size} candidates, {args.queries} queries, recall@{args.k} vs full {FULL}-dim ranking\n")
+    print(f"{'dims':>5} {'index MB':>9} {'scan ms/q':>10} {'recall':>7} {'+rerank':>8} {'rerank ms/q':>12}")
+    for dims in [int(d) for d in args.dims.split(',')]:
+        reduced = np.ascontiguousarray(unit(full[:, :dims])) if dims < FULL else full
+        reduced_queries = unit(queries[:, :dims])
+
+        start = time.perf_counter()
+        first_stage = top_k(reduced, reduced_queries, max(args.k, args.rerank))
+        scan_ms = (time.perf_counter() - start) / args.queries * 1000
+
+        recall = np.mean([len(set(found[:args.k]) & set(expected)) / args.k
+                          for found, expected in zip(first_stage, exact)])
+        start = time.perf_counter()
+        reranked = []
+        for query, shortlist in zip(queries, first_stage):
+            scores = full[shortlist] @ query
+            reranked.append(shortlist[np.argsort(-scores)[:args.k]])
+        rerank_ms = (time.perf_counter() - start) / args.queries * 1000
+        recall_rerank = np.mean([len(set(found) & set(expected)) / args.k
+                                 for found, expected in zip(reranked, exact)])
+        print(f"{dims:5d} {reduced.nbytes / 2 ** 20:9.0f} {scan_ms:10.2f} {recall:7.3f} {recall_rerank:8.3f} "
+              f"{rerank_ms:12.3f}")
+
+
+if __name__ == '__main__':
+    main()
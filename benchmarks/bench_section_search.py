@@ -0,0 +1,118 @@
+"""
+Section-level (multi-vector) retrieval: latency and recall of the centroid
+shortlist against scanning every section vector.
+
+Builds N candidates with S random section vectors each (sections drawn around
+topic centres, so every candidate mixes a few topics), exports the section
+and centroid snapshots, then times per query:
+
+- one vector per candidate (the mean of its sections): the single-vector cost
+- max-sim over every section (exact, S times the vectors)
+- search_sections(): centroid scan + max-sim over the sections of the
+  SECTION_RERANK_CANDIDATES best centroids
+
+and the recall@k of search_sections() against the exact max-sim ranking.
+
+    python -m benchmarks.bench_section_search --size 50000 --sections 6 --dim 384
+"""
+import os
+import time
+import argparse
+import tempfile
+
+import numpy as np
+from flask import Flask
+from sqlalchemy import insert
+
+from extensions import db
+
+MODEL = 'bench-model'
+
+
+def build_app(path: str) -> Flask:
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{path}"
+    db.init_app(app)
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=50000, help='Candidates')
+    parser.add_argument('--sections', type=int, default=6, help='Sections per candidate')
+    parser.add_argument('--dim', type=int, default=384, help='Vector dimensions')
+    parser.add_argument('--queries', type=int, default=50, help='Timed queries')
+    parser.add_argument('--k', type=int, default=20, help='Results per query')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    from utils.config import CONFIG
+    CONFIG['SECTION_SNAPSHOT_DIR'] = os.path.join(directory, 'sections')
+    CONFIG['LOCAL_EMBEDDING_MODEL'] = MODEL
+
+    from models import Candidate, CandidateSectionEmbedding
+    from storage.local_embeddings import encode_vector
+    from storage.section_embeddings import SECTION_KINDS, export_section_embeddings, search_sections, \
+        pool_section_scores
+
+    rng = np.random.default_rng(5)
+    centers = rng.standard_normal((500, args.dim), dtype=np.float32)
+    rows = args.size * args.sections
+    matrix = centers[rng.integers(0, 500, rows)] + 1.5 * rng.standard_normal((rows, args.dim), dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    owners = np.repeat(np.arange(1, args.size + 1), args.sections)
+    kinds = np.tile(np.minimum(np.arange(args.sections), len(SECTION_KINDS) - 1), args.size).astype(np.int8)
+
+    app = build_app(os.path.join(directory, 'bench.db'))
+    with app.app_context():
+        db.create_all()
+        for first in range(0, args.size, 10000):
+            ids = range(first + 1, min(first + 10000, args.size) + 1)
+            db.session.execute(insert(Candidate), [
+                {'id': i, 'name': f'Candidate {i}', 'original_filename': f'cv_{i}.pdf', 'file_type': 'pdf'}
+                for i in ids
+            ])
+        for first in range(0, rows, 20000):
+            db.session.execute(insert(CandidateSectionEmbedding), [
+                {'candidate_id': int(owners[row]), 'model': MODEL, 'kind': SECTION_KINDS[kinds[row]],
+                 'position': row % args.sections, 'input_hash': '-', 'vector': encode_vector(matrix[row])}
+                for row in range(first, min(first + 20000, rows))
+            ])
+        db.session.commit()
+
+        start = time.perf_counter()
+        export_section_embeddings(MODEL)
+        print(f"{args.size} candidates x {args.sections} sections x {args.dim} dims, "
+              f"rerank {CONFIG['SECTION_RERANK_CANDIDATES']}, export {time.perf_counter() - start:.1f}s\n")
+
+        pooled = matrix.reshape(args.size, args.sections, args.dim).mean(axis=1)
+        queries = centers[rng.integers(0, 500, args.queries)] + rng.standard_normal((args.queries, args.dim),
+                                                                                      dtype=np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+        search_sections(queries[0], args.k)  # calentar caché de páginas
+
+        timings = {'single vector': [], 'max-sim, every section': [], 'centroids + rerank': []}
+        recall = []
+        for query in queries:
+            start = time.perf_counter()
+            scores = pooled @ query
+            np.argpartition(-scores, args.k)[:args.k]
+            timings['single vector'].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            candidate_ids, scores, _ = pool_section_scores(owners, kinds, matrix @ query)
+            exact = set(candidate_ids[np.argpartition(-scores, args.k)[:args.k]].tolist())
+            timings['max-sim, every section'].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            found = {candidate_id for candidate_id, _, _ in search_sections(query, args.k)}
+            timings['centroids + rerank'].append(time.perf_counter() - start)
+            recall.append(len(exact & found) / args.k)
+
+        for name, values in timings.items():
+            print(f"{name:24s} p50 {np.percentile(values, 50) * 1000:7.2f} ms, "
+                  f"p95 {np.percentile(values, 95) * 1000:7.2f} ms")
+        print(f"\nrecall@{args.k} of centroids + rerank vs exact max-sim: {np.mean(recall):.3f}")
+
+
+if __name__ == '__main__':
+    main()
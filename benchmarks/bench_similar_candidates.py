@@ -0,0 +1,134 @@
+"""
+"Similar candidates": precomputed neighbour graph vs. a scan per page view.
+
+Stores N random local embeddings as a vector snapshot, then times:
+
+- full rebuild of the graph (blocked matrix products, 1 thread vs. all cores)
+- incremental insert of a new candidate and delete of an existing one
+- reading the similar candidates of one candidate (candidate page) from the
+  graph, against computing them with a scan of every vector
+
+The graph is checked against exact top-k (recall) after the incremental updates.
+
+    python -m benchmarks.bench_similar_candidates --size 20000 --dim 384
+"""
+import os
+import time
+import argparse
+import tempfile
+
+import numpy as np
+from flask import Flask
+from sqlalchemy import insert
+
+from extensions import db
+
+MODEL = 'bench-model'
+
+
+def build_app(path: str, snapshot_dir: str) -> Flask:
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{path}"
+    os.environ['VECTOR_SNAPSHOT_DIR'] = snapshot_dir
+    db.init_app(app)
+    return app
+
+def exact_top(matrix: np.ndarray, ids: np.ndarray, row: int, k: int) -> set:
+    scores = matrix @ matrix[row]
+    scores[row] = -np.inf
+    return set(ids[np.argsort(-scores)[:k]].tolist())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=20000, help='Candidates')
+    parser.add_argument('--dim', type=int, default=384, help='Vector dimensions')
+    parser.add_argument('--updates', type=int, default=50, help='Incremental inserts and deletes timed')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    app = build_app(os.path.join(directory, 'bench.db'), os.path.join(directory, 'snapshot'))
+    from utils.config import CONFIG
+    CONFIG['VECTOR_SNAPSHOT_DIR'] = os.path.join(directory, 'snapshot')
+    CONFIG['LOCAL_EMBEDDING_MODEL'] = MODEL
+    k = CONFIG['SIMILAR_CANDIDATES_K']
+
+    from models import Candidate
+    from storage.local_embeddings import write_local_embedding
+    from storage.vector_snapshot import write_snapshot
+    from storage.similar_candidates import (rebuild_similar_candidates, link_candidate_neighbors, unlink_candidate,
+                                            refill_neighbors, get_similar_candidates)
+
+    rng = np.random.default_rng(3)
+    # Vectores con estructura de grupos (como perfiles parecidos), no ruido uniforme
+    centers = rng.standard_normal((200, args.dim), dtype=np.float32)
+    matrix = centers[rng.integers(0, 200, args.size)] + rng.standard_normal((args.size, args.dim), dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    ids = np.arange(1, args.size + 1)
+
+    with app.app_context():
+        db.create_all()
+        db.session.execute(insert(Candidate), [
+            {'name': f'Candidate {i}', 'original_filename': f'cv_{i}.pdf', 'file_type': 'pdf', 'skills': '[]'}
+            for i in ids.tolist()
+        ])
+        db.session.commit()
+        write_snapshot(zip(ids.tolist(), matrix), args.size, args.dim, MODEL)
+        print(f"{args.size} candidates x {args.dim} dims, k={k}, {os.cpu_count()} cores\n")
+
+        for workers in sorted({1, os.cpu_count() or 1}):
+            stats = rebuild_similar_candidates(MODEL, workers=workers)
+            print(f"rebuild ({workers:2d} threads)      {stats['seconds']:8.2f} s  ({stats['rows']} rows)")
+
+        # Altas incrementales: el "modelo" devuelve un vector cercano a un grupo
+        new_vectors = centers[rng.integers(0, 200, args.updates)] + \
+            rng.standard_normal((args.updates, args.dim), dtype=np.float32)
+        timings = []
+        for vector in new_vectors:
+            candidate = Candidate(name='New', original_filename='new.pdf', file_type='pdf', skills='["Python"]')
+            db.session.add(candidate)
+            db.session.flush()
+            write_local_embedding(db.session, candidate.id, MODEL, candidate.name, vector)
+            db.session.commit()
+            start = time.perf_counter()
+            link_candidate_neighbors(candidate.id, vector, MODEL)
+            timings.append(time.perf_counter() - start)
+        print(f"incremental insert        {np.median(timings) * 1000:8.1f} ms (median)")
+
+        timings = []
+        for candidate_id in rng.choice(ids, args.updates, replace=False).tolist():
+            start = time.perf_counter()
+            affected = unlink_candidate(db.session, candidate_id)
+            db.session.delete(db.session.get(Candidate, candidate_id))
+            db.session.commit()
+            refill_neighbors(affected, MODEL)
+            timings.append(time.perf_counter() - start)
+        print(f"incremental delete        {np.median(timings) * 1000:8.1f} ms (median)")
+
+        probes = rng.choice(ids, 200).tolist()
+        start = time.perf_counter()
+        for candidate_id in probes:
+            get_similar_candidates(candidate_id)
+        graph_ms = (time.perf_counter() - start) / len(probes) * 1000
+
+        start = time.perf_counter()
+        for candidate_id in probes:
+            scores = matrix @ matrix[candidate_id - 1]
+            top = np.argpartition(-scores, k)[:k + 1]
+            db.session.query(Candidate.id, Candidate.name).filter(Candidate.id.in_(ids[top].tolist())).all()
+        scan_ms = (time.perf_counter() - start) / len(probes) * 1000
+        print(f"page read: graph {graph_ms:.2f} ms, scan {scan_ms:.2f} ms")
+
+        # Calidad tras las actualizaciones: vecinos del grafo vs. top-k exacto sobre los vectores originales
+        alive = set(db.session.execute(db.select(Candidate.id)).scalars())
+        mask = np.isin(ids, list(alive))
+        recall = []
+        for candidate_id in [c for c in probes if c in alive][:100]:
+            row = int(np.searchsorted(ids[mask], candidate_id))
+            expected = exact_top(matrix[mask], ids[mask], row, k)
+            found = {s['id'] for s in get_similar_candidates(candidate_id) if s['id'] <= args.size}
+            recall.append(len(expected & found) / k)
+        print(f"recall@{k} vs exact (original candidates): {np.mean(recall):.3f}")
+
+
+if __name__ == '__main__':
+    main()
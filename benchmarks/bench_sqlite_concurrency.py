@@ -0,0 +1,141 @@
+"""
+Concurrent read/write throughput on SQLite: default settings vs. the
+deployment profile (storage/sqlite_profile.py).
+
+Writer threads insert candidates (with their document row) while reader
+threads list filtered pages of summaries, for a fixed duration.
+
+- default: rollback journal, no pragmas, every writer commits on its own
+- profile: WAL + synchronous=NORMAL + mmap/cache/busy_timeout, read-only
+  engine for the readers and the batched writer queue
+
+    python -m benchmarks.bench_sqlite_concurrency --seconds 10 --readers 8 --writers 4
+"""
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from benchmarks.corpus import synthetic_labeled_cv
+from extensions import db
+
+
+def make_candidate(seed: int):
+    from models import Candidate
+    text, labels = synthetic_labeled_cv(seed)
+    return Candidate(
+        name=labels['name'], email=labels['email'], phone=labels['phone'],
+        skills=json.dumps(labels['skills']), education='[]', experience='[]',
+        languages=json.dumps(labels['languages']), certifications='[]', summary='',
+        full_text=text, original_filename=f'cv_{seed}.pdf', file_type='pdf'
+    )
+
+def create_database(path: str, rows: int) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    db.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all(make_candidate(i) for i in range(rows))
+        session.commit()
+    engine.dispose()
+
+def read_page(session: Session, rng: random.Random) -> None:
+    from models import Candidate
+    from storage.projections import SUMMARY_COLUMNS
+    skill = rng.choice(['python', 'java', 'react', 'docker', 'aws'])
+    session.query(*SUMMARY_COLUMNS).filter(Candidate.skills.ilike(f'%{skill}%'))\
+        .order_by(Candidate.created_at.desc(), Candidate.id.desc()).limit(50).all()
+    session.rollback()
+
+
+def run(label: str, path: str, args, profile: bool) -> None:
+    from storage.sqlite_profile import WriterQueue, configure_sqlite_engine, sqlite_engine_options
+
+    if profile:
+        write_engine = create_engine(f"sqlite:///{path}", **sqlite_engine_options())
+        configure_sqlite_engine(write_engine)
+        read_engine = create_engine(f"sqlite:///{path}", pool_size=args.readers, **sqlite_engine_options())
+        configure_sqlite_engine(read_engine, read_only=True)
+        writer = WriterQueue(write_engine)
+    else:
+        write_engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+        read_engine = write_engine
+        writer = None
+
+    counts = {'reads': 0, 'writes': 0, 'errors': 0}
+    lock = threading.Lock()
+    stop = time.monotonic() + args.seconds
+
+    def count(key):
+        with lock:
+            counts[key] += 1
+
+    def reader(n):
+        rng = random.Random(n)
+        with Session(read_engine) as session:
+            while time.monotonic() < stop:
+                try:
+                    read_page(session, rng)
+                    count('reads')
+                except Exception:
+                    session.rollback()
+                    count('errors')
+
+    def write_once(seed):
+        candidate = make_candidate(seed)
+        if writer is not None:
+            writer.submit(lambda session: session.add(candidate)).result()
+            return
+        with Session(write_engine) as session:
+            session.add(candidate)
+            session.commit()
+
+    def writer_thread(n):
+        seed = 10_000_000 * (n + 1)
+        while time.monotonic() < stop:
+            try:
+                write_once(seed)
+                count('writes')
+            except Exception:
+                count('errors')
+            seed += 1
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+    threads += [threading.Thread(target=writer_thread, args=(i,)) for i in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if writer is not None:
+        writer.stop()
+    write_engine.dispose()
+    read_engine.dispose()
+
+    print(f"{label:8s} reads {counts['reads'] / args.seconds:9.1f}/s  writes {counts['writes'] / args.seconds:8.1f}/s  "
+          f"errors {counts['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=5000, help='Candidates before the run')
+    parser.add_argument('--seconds', type=float, default=10, help='Duration of each run')
+    parser.add_argument('--readers', type=int, default=8, help='Reader threads')
+    parser.add_argument('--writers', type=int, default=4, help='Writer threads')
+    args = parser.parse_args()
+
+    import models  # noqa: F401
+    import storage.stats  # noqa: F401  (los contadores se actualizan en cada insert, como en la app)
+
+    for label, profile in (('default', False), ('profile', True)):
+        path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+        create_database(path, args.rows)
+        run(label, path, args, profile)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Startup cost of the candidate vectors: pickled dict vs. memory-mapped snapshot.
+
+Writes the same random vectors as candidate_vectors.pkl (dict id -> ndarray)
+and as a snapshot (storage/vector_snapshot.py), then times opening each one,
+looking up 1000 random ids and a full scan (matrix-vector product).
+
+    python -m benchmarks.bench_vector_snapshot --size 100000 --dim 384
+"""
+import os
+import time
+import pickle
+import argparse
+import tempfile
+
+import numpy as np
+
+from storage.vector_snapshot import write_snapshot, open_snapshot
+
+
+def timed(label: str, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:28s} {(time.perf_counter() - start) * 1000:9.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=100000, help='Number of vectors')
+    parser.add_argument('--dim', type=int, default=384, help='Vector dimensions')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    ids = np.arange(1, args.size + 1) * 3
+    matrix = rng.standard_normal((args.size, args.dim), dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    lookups = rng.choice(ids, 1000)
+    query = matrix[0]
+
+    directory = tempfile.mkdtemp()
+    pickle_path = os.path.join(directory, 'candidate_vectors.pkl')
+    with open(pickle_path, 'wb') as f:
+        pickle.dump({int(i): matrix[n].copy() for n, i in enumerate(ids)}, f)
+    write_snapshot(zip(ids.tolist(), matrix), args.size, args.dim, 'bench', os.path.join(directory, 'snap'))
+    del matrix
+    print(f"{args.size} x {args.dim} vectors, pickle {os.path.getsize(pickle_path) / 1024 / 1024:.0f} MB\n")
+
+    # Los .npy recién escritos están en la caché de páginas, igual que el pickle:
+    # se compara el coste de deserializar frente al de mapear
+    snapshot = timed('snapshot open', lambda: open_snapshot(os.path.join(directory, 'snap')))
+    timed('snapshot 1000 lookups', lambda: [snapshot.get(int(i)) for i in lookups])
+    timed('snapshot full scan', lambda: np.asarray(snapshot.vectors) @ query)
+
+    vectors = timed('pickle load', lambda: pickle.load(open(pickle_path, 'rb')))
+    timed('pickle 1000 lookups', lambda: [vectors[int(i)] for i in lookups])
+    timed('pickle full scan (stack)', lambda: np.stack(list(vectors.values())) @ query)
+
+
+if __name__ == '__main__':
+    main()
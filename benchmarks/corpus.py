@@ -0,0 +1,90 @@
+"""
+Synthetic CV corpus shared by the benchmarks.
+"""
+import random
+from typing import Dict, List, Tuple
+
+FIRST_NAMES = ['Ana', 'Carlos', 'María', 'José', 'Lucía', 'Andrés', 'Gabriela', 'Diego', 'Valeria', 'Jorge']
+LAST_NAMES = ['Gonzalez', 'Pérez', 'Mendoza', 'Torres', 'Vera', 'Castro', 'Ramírez', 'Suárez', 'Loor', 'Zambrano']
+SKILLS = ['Python', 'Java', 'JavaScript', 'React', 'Angular', 'Django', 'Flask', 'PostgreSQL', 'MySQL', 'Docker',
+          'Kubernetes', 'AWS', 'Azure', 'Git', 'HTML', 'CSS', 'C#', '.NET 6', 'Laravel', 'PowerBI', 'Jira']
+INSTITUTIONS = ['Escuela Superior Politécnica del Litoral', 'Universidad de Guayaquil',
+                'Universidad Politécnica Salesiana', 'Universidad Central del Ecuador',
+                'Universidad Técnica Particular de Loja']
+TITLES = ['Desarrollador Backend', 'Desarrollador Frontend', 'Analista de Sistemas', 'Ingeniero de Software',
+          'Líder Técnico', 'Consultor de Datos']
+COMPANIES = ['Banco Pichincha', 'Empresa Eléctrica S.A.', 'Kruger Corp', 'Sofka Technologies', 'Datafast Ltda']
+LANGUAGES = ['Español', 'Inglés', 'Francés', 'Portugués']
+
+
+def synthetic_cv_text(seed: int, repeat: int = 1) -> str:
+    """
+    Build a deterministic, realistic-looking CV text.
+
+    Args:
+        seed (int): Seed for the random generator
+        repeat (int): Number of times the experience block is repeated (controls size)
+
+    Returns:
+        str: CV text
+    """
+    return synthetic_labeled_cv(seed, repeat)[0]
+
+
+def synthetic_labeled_cv(seed: int, repeat: int = 1) -> Tuple[str, Dict]:
+    """
+    Build a synthetic CV together with its ground-truth fields.
+
+    Args:
+        seed (int): Seed for the random generator
+        repeat (int): Number of times the experience block is repeated (controls size)
+
+    Returns:
+        Tuple[str, Dict]: CV text and labels (name, email, phone, skills, institutions, languages)
+    """
+    rng = random.Random(seed)
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    email = name.lower().replace(' ', '.').replace('í', 'i').replace('é', 'e').replace('á', 'a') + f"{seed}@mail.com"
+    phone = f"+593 9{rng.randint(10000000, 99999999)}"
+    skills = rng.sample(SKILLS, 6)
+
+    lines = [
+        name,
+        f"Email: {email}",
+        f"Teléfono: {phone}",
+        "RESUMEN",
+        f"Profesional con {rng.randint(1, 15)} años de experiencia en desarrollo de software.",
+        "EXPERIENCIA",
+    ]
+    for _ in range(repeat):
+        for _ in range(rng.randint(1, 3)):
+            start = rng.randint(2008, 2020)
+            lines.append(f"{rng.choice(TITLES)} en {rng.choice(COMPANIES)}")
+            lines.append(f"{start} - {start + rng.randint(1, 4)}")
+            lines.append(f"Uso de {skills[0]} y {skills[1]} para servicios internos, manejo de {skills[2]}.")
+    start = rng.randint(2005, 2018)
+    institution = rng.choice(INSTITUTIONS)
+    languages = rng.sample(LANGUAGES, 2)
+    lines += [
+        "EDUCACIÓN",
+        f"Universidad: {institution}",
+        f"Ingeniero en Sistemas Computacionales {start} - {start + 5}",
+        "HABILIDADES",
+        ", ".join(skills),
+        "IDIOMAS",
+        ", ".join(languages),
+    ]
+    labels = {
+        'name': name,
+        'email': email,
+        'phone': phone,
+        'skills': skills,
+        'institutions': [institution],
+        'languages': languages,
+    }
+    return "\n".join(lines), labels
+
+
+def synthetic_corpus(size: int, repeat: int = 1) -> List[str]:
+    """Return `size` synthetic CV texts."""
+    return [synthetic_cv_text(i, repeat=repeat) for i in range(size)]
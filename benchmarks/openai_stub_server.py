@@ -0,0 +1,109 @@
+"""
+Local fault-injecting stand-in for the OpenAI API.
+
+Serves /v1/embeddings and /v1/chat/completions with configurable latency and
+error rate so the circuit breaker can be exercised without the real API.
+Point the app at it with:
+
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=stub python main.py
+
+Faults can be changed at runtime:
+
+    curl -X POST localhost:8765/_fault -d '{"error_rate": 1.0, "latency": 0}'
+"""
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FAULTS = {'latency': 0.0, 'error_rate': 0.0, 'status': 503, 'dimensions': 1536}
+_faults_lock = threading.Lock()
+
+CHAT_CONTENT = json.dumps({
+    'name': 'Stub Candidate', 'email': 'stub@example.com', 'phone': '+593 999999999',
+    'skills': ['Python'], 'experience': [], 'education': [],
+    'languages': ['Español'], 'certifications': [], 'summary': 'Stub response'
+})
+
+
+def set_faults(**faults) -> None:
+    with _faults_lock:
+        FAULTS.update(faults)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):  # silenciar el log por petición
+        pass
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode('utf-8')
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # el cliente abandonó la petición (timeout)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+
+        if self.path == '/_fault':
+            set_faults(**payload)
+            return self._send_json(200, dict(FAULTS))
+
+        with _faults_lock:
+            faults = dict(FAULTS)
+
+        time.sleep(faults['latency'])
+        if random.random() < faults['error_rate']:
+            return self._send_json(faults['status'], {'error': {'message': 'injected fault', 'type': 'server_error'}})
+
+        if self.path.endswith('/embeddings'):
+            inputs = payload.get('input', [])
+            inputs = inputs if isinstance(inputs, list) else [inputs]
+            dims = payload.get('dimensions') or faults['dimensions']
+            return self._send_json(200, {
+                'object': 'list',
+                'model': payload.get('model', 'text-embedding-3-small'),
+                'data': [
+                    {'object': 'embedding', 'index': i, 'embedding': [random.random() for _ in range(dims)]}
+                    for i in range(len(inputs))
+                ],
+                'usage': {'prompt_tokens': 1, 'total_tokens': 1}
+            })
+
+        if self.path.endswith('/chat/completions'):
+            return self._send_json(200, {
+                'id': 'stub', 'object': 'chat.completion', 'created': int(time.time()),
+                'model': payload.get('model', 'gpt-4o'),
+                'choices': [{'index': 0, 'finish_reason': 'stop',
+                             'message': {'role': 'assistant', 'content': CHAT_CONTENT}}],
+                'usage': {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2}
+            })
+
+        self._send_json(404, {'error': {'message': f'unknown path {self.path}'}})
+
+
+def start_stub_server(port: int = 8765) -> ThreadingHTTPServer:
+    """Start the stub server in a daemon thread and return it."""
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    set_faults(latency=args.latency, error_rate=args.error_rate)
+    print(f"OpenAI stub listening on http://127.0.0.1:{args.port}/v1")
+    ThreadingHTTPServer(('127.0.0.1', args.port), StubHandler).serve_forever()
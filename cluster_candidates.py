@@ -0,0 +1,25 @@
+import argparse
+from storage.clustering import refit_clusters, list_clusters
+
+def cluster_candidates(k: int = None, iterations: int = None, batch_size: int = None, restart: bool = False):
+    from app import app
+
+    with app.app_context():
+        stats = refit_clusters(k=k, iterations=iterations, batch_size=batch_size, restart=restart)
+        if not stats['clusters']:
+            print(f"⚠️ Sólo hay {stats['candidates']} candidatos con embedding local: ejecuta generate_embeddings.py")
+            return
+        print(f"✅ {stats['candidates']} candidatos en {stats['clusters']} clusters "
+              f"({stats['changed']} reasignados, similitud media {stats['mean_similarity']:.3f}, "
+              f"{stats['seconds']:.1f} s)")
+        for cluster in list_clusters():
+            print(f"   #{cluster['id']:<3} {cluster['size']:>6}  {cluster['label']}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Agrupa a los candidatos en clusters (mini-batch k-means)')
+    parser.add_argument('--k', type=int, default=None, help='Número de clusters (por defecto CLUSTER_COUNT)')
+    parser.add_argument('--iterations', type=int, default=None, help='Mini-lotes (por defecto CLUSTER_ITERATIONS)')
+    parser.add_argument('--batch-size', type=int, default=None, help='Vectores por mini-lote (por defecto CLUSTER_BATCH_SIZE)')
+    parser.add_argument('--restart', action='store_true', help='Empezar de cero en vez de partir de los centroides actuales')
+    args = parser.parse_args()
+    cluster_candidates(k=args.k, iterations=args.iterations, batch_size=args.batch_size, restart=args.restart)
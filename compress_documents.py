@@ -0,0 +1,24 @@
+import argparse
+from storage.document_store import train_document_dictionary, rewrite_documents
+
+def compress_documents(train: bool = False, recompress: bool = False):
+    from app import app
+
+    with app.app_context():
+        if train:
+            dictionary_id = train_document_dictionary()
+            if dictionary_id:
+                print(f"📚 Diccionario zstd {dictionary_id} entrenado con los CV almacenados")
+
+        stats = rewrite_documents(recompress=recompress)
+        saved = stats['bytes_before'] - stats['bytes_after']
+        print(f"✅ Se reescribieron {stats['rewritten']} de {stats['rows']} documentos "
+              f"({stats['bytes_before'] / 1024 / 1024:.1f} MB -> {stats['bytes_after'] / 1024 / 1024:.1f} MB, "
+              f"ahorro {saved / 1024 / 1024:.1f} MB)")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Comprime el texto de los CV y el JSON del LLM ya almacenados')
+    parser.add_argument('--train', action='store_true', help='Entrenar un diccionario zstd antes de reescribir')
+    parser.add_argument('--recompress', action='store_true', help='Reescribir también los valores ya comprimidos')
+    args = parser.parse_args()
+    compress_documents(train=args.train, recompress=args.recompress)
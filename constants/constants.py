@@ -20,3 +20,59 @@ ROLE_ALIASES = {
     "backend": ["backend", "java", "c#", "python", "spring", ".net", "node"],
     "fullstack": ["full stack", "frontend", "backend", "fullstack"],
 }
+
+
+SKILL_ALIASES = {
+    "js": "javascript",
+    "ts": "typescript",
+    "nodejs": "node.js",
+    "node js": "node.js",
+    "node": "node.js",
+    "reactjs": "react",
+    "react.js": "react",
+    "vuejs": "vue",
+    "vue.js": "vue",
+    "angularjs": "angular",
+    "postgres": "postgresql",
+    "sql server": "sql server",
+    "mssql": "sql server",
+    "mongo": "mongodb",
+    "c sharp": "c#",
+    "c.net": "c#",
+    ".net 6": ".net",
+    "dotnet": ".net",
+    "springboot": "spring boot",
+    "spring": "spring boot",
+    "tailwind": "tailwindcss",
+    "power bi": "powerbi",
+    "k8s": "kubernetes",
+    "github action": "github actions",
+    "gnu/linux": "linux",
+}
+
+
+LANGUAGE_ALIASES = {
+    "espanol": "spanish",
+    "español": "spanish",
+    "castellano": "spanish",
+    "spanish": "spanish",
+    "ingles": "english",
+    "inglés": "english",
+    "english": "english",
+    "frances": "french",
+    "francés": "french",
+    "french": "french",
+    "portugues": "portuguese",
+    "portugués": "portuguese",
+    "portuguese": "portuguese",
+    "aleman": "german",
+    "alemán": "german",
+    "german": "german",
+    "italiano": "italian",
+    "italian": "italian",
+    "chino": "chinese",
+    "mandarin": "chinese",
+    "chinese": "chinese",
+    "kichwa": "kichwa",
+    "quichua": "kichwa",
+}
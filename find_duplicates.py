@@ -0,0 +1,23 @@
+import argparse
+from storage.near_duplicates import backfill_signatures, cluster_near_duplicates
+
+def find_duplicates(backfill: bool = False, threshold: float = None):
+    from app import app
+
+    with app.app_context():
+        if backfill:
+            indexed = backfill_signatures()
+            print(f"🔎 Se calcularon las firmas MinHash de {indexed} candidatos")
+
+        groups = cluster_near_duplicates(threshold)
+        duplicates = sum(len(members) for members in groups.values())
+        print(f"✅ {len(groups)} grupos de CV casi duplicados ({duplicates} candidatos marcados como duplicados)")
+        for original_id, members in sorted(groups.items()):
+            print(f"   #{original_id}: {', '.join(f'#{m}' for m in members)}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Agrupa los CV casi duplicados (MinHash + LSH)')
+    parser.add_argument('--backfill', action='store_true', help='Calcular antes las firmas de los candidatos sin firma')
+    parser.add_argument('--threshold', type=float, default=None, help='Similitud mínima (por defecto NEAR_DUPLICATE_THRESHOLD)')
+    args = parser.parse_args()
+    find_duplicates(backfill=args.backfill, threshold=args.threshold)
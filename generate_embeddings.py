@@ -1,46 +1,62 @@
-import pickle
-from models import Candidate
+import argparse
 from sentence_transformers import SentenceTransformer
-import json
 
-model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+from storage.local_embeddings import rebuild_local_embeddings, embedding_input, local_model_name
+from storage.vector_snapshot import export_local_embeddings
+from storage.similar_candidates import rebuild_similar_candidates
+from storage.section_embeddings import rebuild_section_embeddings, export_section_embeddings
+from utils.config import get_config
 
-def get_text_for_embedding(candidate):
-    def parse_json_field(field):
-        try:
-            parsed = json.loads(field)
-            if isinstance(parsed, list):
-                return ", ".join(parsed)
-            return str(parsed)
-        except:
-            return str(field or "")
-
-    return " ".join(filter(None, [
-        candidate.name,
-        parse_json_field(candidate.skills),
-        parse_json_field(candidate.summary),
-        parse_json_field(candidate.experience),
-        parse_json_field(candidate.education)
-    ])).strip()
-    
-def generate_candidate_embeddings():
-    from app import app
-    from extensions import db  
+MODEL_NAME = local_model_name()
 
-    with app.app_context():
-        candidates = Candidate.query.all()
-        embeddings = {}
+model = SentenceTransformer(MODEL_NAME)
 
-        for c in candidates:
-            text = get_text_for_embedding(c)
-            if text:
-                emb = model.encode(text)
-                embeddings[c.id] = emb
+def get_text_for_embedding(candidate):
+    return embedding_input(candidate)
 
-        with open('candidate_vectors.pkl', 'wb') as f:
-            pickle.dump(embeddings, f)
+def encode_texts(texts):
+    return model.encode(list(texts), batch_size=get_config('EMBEDDING_BATCH_SIZE', 256),
+                        convert_to_numpy=True, show_progress_bar=False)
 
-        print(f"✅ Se generaron {len(embeddings)} embeddings y se guardaron en 'candidate_vectors.pkl'")
+def generate_candidate_embeddings(batch_size=None, force=False, restart=False, export=True, neighbors=True,
+                                  sections=True):
+    from app import app
+
+    with app.app_context():
+        stats = rebuild_local_embeddings(encode_texts, MODEL_NAME, batch_size=batch_size,
+                                         force=force, restart=restart)
+        print(f"✅ {stats['rows']} candidatos revisados: {stats['embedded']} embeddings nuevos o actualizados, "
+              f"{stats['skipped']} sin cambios ({stats['rows_per_second']:.0f} filas/s, {stats['seconds']:.1f} s)")
+
+        if export:
+            path = export_local_embeddings(MODEL_NAME)
+            if path:
+                print(f"✅ Snapshot de vectores publicado en '{path}'")
+
+        if sections:
+            stats = rebuild_section_embeddings(encode_texts, MODEL_NAME, batch_size=batch_size,
+                                               force=force, restart=restart)
+            print(f"✅ Secciones: {stats['embedded']} candidatos actualizados ({stats['sections']} secciones), "
+                  f"{stats['skipped']} sin cambios ({stats['seconds']:.1f} s)")
+            if export:
+                path = export_section_embeddings(MODEL_NAME)
+                if path:
+                    print(f"✅ Snapshot de secciones publicado en '{path}'")
+
+        if neighbors:
+            graph = rebuild_similar_candidates(MODEL_NAME)
+            print(f"✅ Candidatos similares recalculados: {graph['candidates']} candidatos, "
+                  f"{graph['rows']} vecinos ({graph['seconds']:.1f} s)")
 
 if __name__ == '__main__':
-    generate_candidate_embeddings()
+    parser = argparse.ArgumentParser(description='Genera (incrementalmente) los embeddings locales de los candidatos')
+    parser.add_argument('--batch-size', type=int, help='Textos por llamada al modelo')
+    parser.add_argument('--force', action='store_true', help='Recalcular aunque el texto no haya cambiado')
+    parser.add_argument('--restart', action='store_true', help='Ignorar el checkpoint de una ejecución interrumpida')
+    parser.add_argument('--no-export', action='store_true', help='No publicar el snapshot de vectores')
+    parser.add_argument('--no-neighbors', action='store_true', help='No recalcular los candidatos similares')
+    parser.add_argument('--no-sections', action='store_true', help='No calcular los embeddings por sección')
+    args = parser.parse_args()
+    generate_candidate_embeddings(batch_size=args.batch_size, force=args.force, restart=args.restart,
+                                  export=not args.no_export, neighbors=not args.no_neighbors,
+                                  sections=not args.no_sections)
@@ -0,0 +1,61 @@
+import os
+import argparse
+from werkzeug.utils import secure_filename
+
+from parsers.worker_pool import extract_text_from_bytes, clean_and_extract_info_in_pool
+from storage.unit_of_work import CandidateUnitOfWork, new_candidate
+
+ALLOWED_EXTENSIONS = {'pdf', 'docx', 'txt'}
+
+def import_candidates(folder: str, batch_size: int = 50, embeddings: bool = False):
+    """
+    Import every CV of a folder, committing batch_size candidates per transaction.
+    Uses the local extractor only (no vision/LLM calls).
+    """
+    from app import app
+    from parsers.vision_parser import generate_text_embedding, build_embedding_text
+
+    with app.app_context():
+        work = CandidateUnitOfWork()
+        imported = failed = 0
+
+        for filename in sorted(os.listdir(folder)):
+            file_ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+            if file_ext not in ALLOWED_EXTENSIONS:
+                continue
+
+            try:
+                with open(os.path.join(folder, filename), 'rb') as f:
+                    extracted_text = extract_text_from_bytes(f.read(), file_ext)
+                if not extracted_text.strip():
+                    print(f"⚠️ {filename}: no se pudo extraer texto")
+                    failed += 1
+                    continue
+
+                candidate_info = clean_and_extract_info_in_pool(extracted_text)
+                embedding = []
+                if embeddings:
+                    embedding = generate_text_embedding(build_embedding_text(candidate_info, extracted_text))
+
+                candidate = new_candidate(candidate_info, extracted_text, secure_filename(filename), file_ext,
+                                          embedding=embedding)
+                work.add(candidate, embedding, extracted_text)
+            except Exception as e:
+                print(f"❌ {filename}: {str(e)}")
+                failed += 1
+                continue
+
+            if len(work) >= batch_size:
+                imported += len(work.commit())
+                print(f"   {imported} candidatos importados...")
+
+        imported += len(work.commit())
+        print(f"✅ Se importaron {imported} candidatos ({failed} archivos con errores)")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Importa en lote los CV de una carpeta')
+    parser.add_argument('folder', help='Carpeta con archivos PDF, DOCX o TXT')
+    parser.add_argument('--batch-size', type=int, default=50, help='Candidatos por transacción')
+    parser.add_argument('--embeddings', action='store_true', help='Generar embeddings con OpenAI')
+    args = parser.parse_args()
+    import_candidates(args.folder, batch_size=args.batch_size, embeddings=args.embeddings)
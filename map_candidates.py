@@ -0,0 +1,20 @@
+import argparse
+from storage.embedding_map import refit_map
+
+def map_candidates(batch_size: int = None):
+    from app import app
+
+    with app.app_context():
+        stats = refit_map(batch_size=batch_size)
+        if not stats['explained_variance']:
+            print(f"⚠️ Sólo hay {stats['candidates']} candidatos con embedding local: ejecuta generate_embeddings.py")
+            return
+        x, y = stats['explained_variance']
+        print(f"✅ {stats['candidates']} candidatos en el mapa 2-D "
+              f"(varianza explicada {x:.1%} + {y:.1%}, {stats['seconds']:.1f} s)")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Recalcula el mapa 2-D de candidatos (PCA de los embeddings)')
+    parser.add_argument('--batch-size', type=int, default=None, help='Vectores por paso (por defecto MAP_BATCH_SIZE)')
+    args = parser.parse_args()
+    map_candidates(batch_size=args.batch_size)
@@ -1,7 +1,10 @@
+import json
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.ext.associationproxy import association_proxy
 from extensions import db 
+from utils.compression import CompressedText
 
 class Candidate(db.Model):
     """Candidate model for storing CV information and extracted data"""
@@ -19,23 +22,52 @@ class Candidate(db.Model):
     skills = db.Column(db.Text)  # JSON string of skills
     
     # CV Content
-    full_text = db.Column(db.Text, nullable=False)  # Complete CV text
     original_filename = db.Column(db.String(255), nullable=False)
     file_type = db.Column(db.String(10), nullable=False)  # pdf, docx, txt
     
-    # AI Analysis Results
-    vision_analysis = db.Column(db.Text)  # JSON string from OpenAI Vision analysis
-    text_embedding = db.Column(db.Text)  # JSON array of embedding vector
-    
     # Additional extracted fields
     languages = db.Column(db.Text)  # JSON string of languages
     certifications = db.Column(db.Text)  # JSON string of certifications
     summary = db.Column(db.Text)  # Professional summary
+    experience_years = db.Column(db.Integer)  # Estimated from the experience dates (facets)
+    duplicate_of_id = db.Column(db.Integer, db.ForeignKey('candidate.id'), index=True)  # Near-duplicate CV (MinHash)
+    cluster_id = db.Column(db.Integer, db.ForeignKey('candidate_cluster.id'), index=True)  # Talent-pool segment (k-means)
+    map_x = db.Column(db.Float)  # 2-D map of the pool (PCA of the local embedding)
+    map_y = db.Column(db.Float)
     
     # Metadata
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Large payloads live in candidate_document (1:1) to keep this row small
+    document = db.relationship('CandidateDocument', uselist=False, backref='candidate', cascade='all, delete-orphan')
+    full_text = association_proxy('document', 'full_text', creator=lambda value: CandidateDocument(full_text=value))
+    vision_analysis = association_proxy('document', 'vision_analysis',
+                                        creator=lambda value: CandidateDocument(full_text='', vision_analysis=value))
+    text_embedding = association_proxy('document', 'text_embedding',
+                                       creator=lambda value: CandidateDocument(full_text='', text_embedding=value))
+    
+    # Normalized attributes (indexed copies of the JSON columns above)
+    skill_entries = db.relationship('CandidateSkill', backref='candidate', cascade='all, delete-orphan')
+    education_entries = db.relationship('CandidateEducation', backref='candidate', cascade='all, delete-orphan')
+    language_entries = db.relationship('CandidateLanguage', backref='candidate', cascade='all, delete-orphan')
+    certification_entries = db.relationship('CandidateCertification', backref='candidate', cascade='all, delete-orphan')
+    term_entries = db.relationship('CandidateTerm', cascade='all, delete-orphan')
+    local_embeddings = db.relationship('CandidateLocalEmbedding', cascade='all, delete-orphan')
+    section_embeddings = db.relationship('CandidateSectionEmbedding', cascade='all, delete-orphan')
+    minhash = db.relationship('CandidateMinhash', uselist=False, cascade='all, delete-orphan')
+    lsh_buckets = db.relationship('CandidateLshBucket', cascade='all, delete-orphan')
+    neighbors = db.relationship('CandidateNeighbor', foreign_keys='CandidateNeighbor.candidate_id',
+                                cascade='all, delete-orphan')
+    search_notifications = db.relationship('SearchNotification', backref='candidate', cascade='all, delete-orphan')
+    cluster = db.relationship('CandidateCluster')
+    # Al borrar el original, sus duplicados quedan sin marcar (duplicate_of_id = NULL)
+    duplicates = db.relationship('Candidate', backref=db.backref('duplicate_of', remote_side=[id]))
+    
+    __table_args__ = (
+        db.Index('ix_candidate_created_at_id', 'created_at', 'id'),  # Keyset pagination
+    )
+    
     def __repr__(self):
         return f'<Candidate {self.name}>'
     
@@ -57,3 +89,266 @@ class Candidate(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+
+class CandidateDocument(db.Model):
+    """Large payloads of a candidate (CV text, vision JSON, embedding), split from the candidate row"""
+    
+    candidate_id = db.Column(db.Integer, db.ForeignKey('candidate.id', ondelete='CASCADE'), primary_key=True)
+    full_text = db.Column(CompressedText, nullable=False)  # Complete CV text (compressed)
+    vision_analysis = db.Column(CompressedText)  # JSON string from OpenAI Vision analysis (compressed)
+    text_embedding = db.Column(db.Text)  # JSON array of embedding vector
+
+
+class CandidateLocalEmbedding(db.Model):
+    """Embedding from the local sentence-transformers model, with the hash of its input text"""
+    
+    candidate_id = db.Column(db.Integer, db.ForeignKey('candidate.id', ondelete='CASCADE'), primary_key=True)
+    model = db.Column(db.String(200), primary_key=True)
+    input_hash = db.Column(db.String(40), nullable=False)  # sha1 del texto embebido: sólo se recalcula si cambia
+    dimensions = db.Column(db.Integer, nullable=False)
+    vector = db.Column(db.LargeBinary, nullable=False)  # float32 little-endian
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # Re-embebidos tras el snapshot; updated_at primero para que la PK siga sirviendo a candidate_id > n
+        db.Index('ix_candidate_local_embedding_updated_at_model', 'updated_at', 'model'),
+    )
+
+
+class CandidateSectionEmbedding(db.Model):
+    """Local-model embedding of one section of a CV (summary, an experience entry, education, skills)"""
+    
+    candidate_id = db.Column(db.Integer, db.ForeignKey('candidate.id', ondelete='CASCADE'), primary_key=True)
+    model = db.Column(db.String(200), primary_key=True)
+    kind = db.Column(db.String(20), primary_key=True)  # 'summary', 'experience', 'education', 'skills'
+    position = db.Column(db.SmallInteger, primary_key=True)  # orden de la entrada dentro de la sección
+    input_hash = db.Column(db.String(40), nullable=False)  # sha1 de todas las secciones del candidato
+    vector = db.Column(db.LargeBinary, nullable=False)  # float32 little-endian
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # Reescritas tras el snapshot; updated_at primero para que la PK siga sirviendo a candidate_id > n
+        db.Index('ix_candidate_section_embedding_updated_at_model', 'updated_at', 'model'),
+    )
+
+
+class CandidateMinhash(db.Model):
+    """MinHash signature of a candidate's CV text (near-duplicate detection)"""
+    
+    candidate_id = db.Column(db.Integer, db.ForeignKey('candidate.id', ondelete='CASCADE'), primary_key=True)
+    signature = db.Column(db.LargeBinary, nullable=False)  # uint32 little-endian, MINHASH_PERMUTATIONS values
+
+
+class CandidateLshBucket(db.Model):
+    """LSH bucket of one band of a candidate's MinHash signature"""
+    
+    bucket = db.Column(db.BigInteger, primary_key=True)  # hash del número de banda y sus valores
+    candidate_id = db.Column(db.Integer, db.ForeignKey('candidate.id', ondelete='CASCADE'), primary_key=True)
+
+
+class CandidateCluster(db.Model):
+    """Cluster of similar candidates (mini-batch k-means over the local embeddings)"""
+    
+    id = db.Column(db.Integer, primary_key=True)  # estable entre reajustes: se parte de los centroides anteriores
+    model = db.Column(db.String(200), nullable=False)
+    label = db.Column(db.String(200))  # p. ej. "React · JavaScript · CSS (Junior)"
+    top_skills = db.Column(db.Text)  # JSON [[skill, candidates], ...]
+    centroid = db.Column(db.LargeBinary, nullable=False)  # float32 little-endian, norma 1
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class EmbeddingMap(db.Model):
+    """Axes of the 2-D talent-pool map (PCA of the local embeddings of a model)"""
+    
+    model = db.Column(db.String(200), primary_key=True)
+    mean = db.Column(db.LargeBinary, nullable=False)  # float32 little-endian
+    axes = db.Column(db.LargeBinary, nullable=False)  # float32 (2, d) por filas
+    explained_variance = db.Column(db.Text)  # JSON [ratio_x, ratio_y]
+    candidates = db.Column(db.Integer)  # candidatos usados en el ajuste
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class CandidateNeighbor(db.Model):
+    """Precomputed nearest neighbour of a candidate ("similar candidates")"""
+    
+    candidate_id = db.Column(db.Integer, db.ForeignKey('candidate.id', ondelete='CASCADE'), primary_key=True)
+    neighbor_id = db.Column(db.Integer, db.ForeignKey('candidate.id', ondelete='CASCADE'), primary_key=True, index=True)
+    similarity = db.Column(db.Float, nullable=False)  # coseno entre los embeddings locales
+
+
+class JobCheckpoint(db.Model):
+    """Progress of a resumable batch job (last candidate id processed)"""
+    
+    name = db.Column(db.String(200), primary_key=True)
+    last_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class StatCounter(db.Model):
+    """Dashboard counter maintained in the same transaction as the rows it counts"""
+    
+    name = db.Column(db.String(100), primary_key=True)  # e.g. 'candidates', 'file_type:pdf', 'uploads:2024-05-01'
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+
+class FacetChange(db.Model):
+    """Candidate whose facet values changed; every process applies it to its in-memory facet index"""
+    
+    id = db.Column(db.Integer, primary_key=True)
+    candidate_id = db.Column(db.Integer, nullable=False)  # sin FK: la fila sobrevive al borrado del candidato
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    # Ids nunca reutilizados (tras la purga): los procesos leen id > último aplicado
+    __table_args__ = {'sqlite_autoincrement': True}
+
+
+class CompressionDictionary(db.Model):
+    """zstd dictionary trained on stored CV texts (referenced by id from compressed values)"""
+    
+    id = db.Column(db.Integer, primary_key=True)
+    data = db.Column(db.LargeBinary, nullable=False)
+    sample_count = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class CandidateTerm(db.Model):
+    """Distinct normalized word of a candidate's CV text (keyword search without scanning the text)"""
+    
+    candidate_id = db.Column(db.Integer, db.ForeignKey('candidate.id', ondelete='CASCADE'), primary_key=True)
+    term = db.Column(db.String(64), primary_key=True)
+    
+    __table_args__ = (
+        db.Index('ix_candidate_term_term_candidate', 'term', 'candidate_id'),
+    )
+
+
+class CandidateSkill(db.Model):
+    """Normalized skill of a candidate, one row per canonical skill"""
+    
+    id = db.Column(db.Integer, primary_key=True)
+    candidate_id = db.Column(db.Integer, db.ForeignKey('candidate.id', ondelete='CASCADE'), nullable=False, index=True)
+    name = db.Column(db.String(200), nullable=False)  # As written in the CV
+    canonical = db.Column(db.String(200), nullable=False)  # Normalized name used for filtering
+    
+    __table_args__ = (
+        db.Index('ix_candidate_skill_canonical_candidate', 'canonical', 'candidate_id'),
+    )
+
+
+class CandidateEducation(db.Model):
+    """Normalized education entry of a candidate"""
+    
+    id = db.Column(db.Integer, primary_key=True)
+    candidate_id = db.Column(db.Integer, db.ForeignKey('candidate.id', ondelete='CASCADE'), nullable=False, index=True)
+    institution = db.Column(db.String(300))
+    canonical_institution = db.Column(db.String(300))
+    degree = db.Column(db.String(200))
+    field = db.Column(db.String(200))
+    status = db.Column(db.String(50))
+    year = db.Column(db.String(50))
+    
+    __table_args__ = (
+        db.Index('ix_candidate_education_institution_candidate', 'canonical_institution', 'candidate_id'),
+    )
+
+
+class CandidateLanguage(db.Model):
+    """Normalized language spoken by a candidate"""
+    
+    id = db.Column(db.Integer, primary_key=True)
+    candidate_id = db.Column(db.Integer, db.ForeignKey('candidate.id', ondelete='CASCADE'), nullable=False, index=True)
+    name = db.Column(db.String(100), nullable=False)
+    canonical = db.Column(db.String(100), nullable=False)
+    level = db.Column(db.String(100))
+    
+    __table_args__ = (
+        db.Index('ix_candidate_language_canonical_candidate', 'canonical', 'candidate_id'),
+    )
+
+
+class CandidateCertification(db.Model):
+    """Normalized certification of a candidate"""
+    
+    id = db.Column(db.Integer, primary_key=True)
+    candidate_id = db.Column(db.Integer, db.ForeignKey('candidate.id', ondelete='CASCADE'), nullable=False, index=True)
+    name = db.Column(db.String(300), nullable=False)
+    canonical = db.Column(db.String(300), nullable=False)
+    
+    __table_args__ = (
+        db.Index('ix_candidate_certification_canonical_candidate', 'canonical', 'candidate_id'),
+    )
+
+
+class SavedSearch(db.Model):
+    """Recruiter search kept open: new candidates matching it produce a notification"""
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(200), nullable=False)
+    query = db.Column(db.Text, nullable=False)
+    filters = db.Column(db.Text)  # JSON, mismos filtros estructurados que /search-api
+    min_similarity = db.Column(db.Float)  # umbral semántico (None = sólo palabras clave)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Índice de percolación: la propia consulta, indexada
+    terms = db.relationship('SavedSearchTerm', cascade='all, delete-orphan')
+    embeddings = db.relationship('SavedSearchEmbedding', cascade='all, delete-orphan')
+    notifications = db.relationship('SearchNotification', backref='saved_search', cascade='all, delete-orphan')
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'query': self.query,
+            'filters': json.loads(self.filters) if self.filters else {},
+            'min_similarity': self.min_similarity,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+class SavedSearchTerm(db.Model):
+    """Term of a saved-search keyword; the keyword matches when all its terms are in the CV"""
+    
+    saved_search_id = db.Column(db.Integer, db.ForeignKey('saved_search.id', ondelete='CASCADE'), primary_key=True)
+    keyword = db.Column(db.SmallInteger, primary_key=True)  # posición de la palabra clave en la consulta
+    term = db.Column(db.String(64), primary_key=True)
+    
+    __table_args__ = (
+        db.Index('ix_saved_search_term_term', 'term'),
+    )
+
+
+class SavedSearchEmbedding(db.Model):
+    """Local-model embedding of a saved search query"""
+    
+    saved_search_id = db.Column(db.Integer, db.ForeignKey('saved_search.id', ondelete='CASCADE'), primary_key=True)
+    model = db.Column(db.String(200), primary_key=True)
+    vector = db.Column(db.LargeBinary, nullable=False)  # float32 little-endian, norma 1
+
+
+class SearchNotification(db.Model):
+    """New candidate matching a saved search"""
+    
+    id = db.Column(db.Integer, primary_key=True)
+    saved_search_id = db.Column(db.Integer, db.ForeignKey('saved_search.id', ondelete='CASCADE'), nullable=False)
+    candidate_id = db.Column(db.Integer, db.ForeignKey('candidate.id', ondelete='CASCADE'), nullable=False,
+                             index=True)
+    matched_by = db.Column(db.String(20), nullable=False)  # 'keywords', 'semantic' o 'both'
+    score = db.Column(db.Float)  # fracción de palabras clave presentes, o similitud coseno
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    read_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.UniqueConstraint('saved_search_id', 'candidate_id', name='uq_search_notification'),
+        db.Index('ix_search_notification_read_created', 'read_at', 'created_at'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'saved_search_id': self.saved_search_id,
+            'candidate_id': self.candidate_id,
+            'matched_by': self.matched_by,
+            'score': self.score,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'read_at': self.read_at.isoformat() if self.read_at else None
+        }
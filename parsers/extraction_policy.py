@@ -0,0 +1,96 @@
+"""
+Policy deciding when a CV needs the LLM extraction.
+
+The regex extractor scores every field (see text_cleaner.score_extraction_confidence).
+The LLM is only called when the weighted overall confidence is below
+LLM_CONFIDENCE_THRESHOLD or, when LLM_FIELDS is configured, when one of those
+fields is below LLM_FIELD_THRESHOLD. In the latter case only those fields are
+taken from the LLM result.
+"""
+import logging
+from typing import Dict, List, Optional
+
+from utils.config import get_config
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Campos que sólo la visión sabe extraer; se aceptan siempre que se llame al LLM
+LLM_ONLY_FIELDS = ['languages', 'certifications', 'summary']
+
+def overall_confidence(confidence: Dict[str, float], weights: Optional[Dict[str, float]] = None) -> float:
+    """
+    Weighted mean of the per-field confidence scores.
+
+    Args:
+        confidence (Dict[str, float]): Field -> confidence
+        weights (Optional[Dict[str, float]]): Field -> weight. Defaults to LLM_FIELD_WEIGHTS.
+
+    Returns:
+        float: Overall confidence between 0 and 1
+    """
+    weights = weights or get_config('LLM_FIELD_WEIGHTS', {})
+    total_weight = sum(weights.get(field, 1.0) for field in confidence)
+    if not total_weight:
+        return 0.0
+    weighted = sum(score * weights.get(field, 1.0) for field, score in confidence.items())
+    return round(weighted / total_weight, 3)
+
+def _with_llm_only(fields: List[str]) -> List[str]:
+    # Ya que se paga la llamada, los campos que sólo da la visión se aceptan siempre
+    return list(dict.fromkeys(list(fields) + LLM_ONLY_FIELDS))
+
+def decide_llm_extraction(confidence: Dict[str, float],
+                          threshold: Optional[float] = None,
+                          llm_fields: Optional[List[str]] = None,
+                          field_threshold: Optional[float] = None) -> Dict:
+    """
+    Decide whether the LLM must be called for a CV, and for which fields.
+
+    Args:
+        confidence (Dict[str, float]): Per-field confidence of the regex extraction
+        threshold (Optional[float]): Overall confidence threshold
+        llm_fields (Optional[List[str]]): Restrict the LLM to these fields (empty = all)
+        field_threshold (Optional[float]): Per-field threshold used with llm_fields
+
+    Returns:
+        Dict: call_llm (bool), fields (fields the LLM may overwrite, always
+              including LLM_ONLY_FIELDS when it is called),
+              overall (float) and reason (str)
+    """
+    threshold = get_config('LLM_CONFIDENCE_THRESHOLD', 0.75) if threshold is None else threshold
+    field_threshold = get_config('LLM_FIELD_THRESHOLD', 0.6) if field_threshold is None else field_threshold
+    llm_fields = get_config('LLM_FIELDS', []) if llm_fields is None else llm_fields
+
+    overall = overall_confidence(confidence)
+    all_fields = list(confidence) + LLM_ONLY_FIELDS
+
+    if llm_fields:
+        low_fields = [f for f in llm_fields if confidence.get(f, 0.0) < field_threshold]
+        if overall < threshold:
+            return {'call_llm': True, 'fields': _with_llm_only(llm_fields), 'overall': overall,
+                    'reason': f'overall confidence {overall} < {threshold}'}
+        if low_fields:
+            return {'call_llm': True, 'fields': _with_llm_only(low_fields), 'overall': overall,
+                    'reason': f'low confidence fields: {", ".join(low_fields)}'}
+    elif overall < threshold:
+        return {'call_llm': True, 'fields': all_fields, 'overall': overall,
+                'reason': f'overall confidence {overall} < {threshold}'}
+
+    return {'call_llm': False, 'fields': [], 'overall': overall,
+            'reason': f'overall confidence {overall} >= {threshold}'}
+
+def record_decision(decision: Dict) -> None:
+    """
+    Count the decision so the LLM-skip rate is visible in /api/metrics.
+    """
+    metrics.increment('llm_extraction.total')
+    metrics.increment('llm_extraction.called' if decision['call_llm'] else 'llm_extraction.skipped')
+    logger.info(f"LLM extraction {'called' if decision['call_llm'] else 'skipped'}: {decision['reason']}")
+
+def llm_skip_rate() -> float:
+    """Share of uploads that did not need the LLM (current process)."""
+    total = metrics.get_counter('llm_extraction.total')
+    return metrics.get_counter('llm_extraction.skipped') / total if total else 0.0
+
+metrics.register_gauge('llm_extraction.skip_rate', llm_skip_rate)
@@ -0,0 +1,230 @@
+"""
+Token-budget-aware packing of CV pages for the vision model.
+
+Before pages are sent to GPT-4o they are:
+- cropped to their content (white margins removed),
+- filtered (blank pages and near-duplicate pages dropped),
+- tiled several pages per image when needed to stay under a token budget,
+- sent with `detail: low` or `detail: high` depending on their text density.
+"""
+import math
+import logging
+from typing import Dict, List, Optional
+
+from PIL import Image, ImageChops, ImageOps, ImageStat
+
+from utils.config import get_config
+
+logger = logging.getLogger(__name__)
+
+# Coste de imágenes en GPT-4o: 85 tokens base + 170 por bloque de 512px (detail high)
+BASE_IMAGE_TOKENS = 85
+TILE_TOKENS = 170
+TILE_SIZE = 512
+
+INK_THRESHOLD = 200     # gris por debajo de esto se considera tinta
+MAX_PAGES = 4
+
+def estimate_image_tokens(width: int, height: int, detail: str = 'high') -> int:
+    """
+    Estimate the prompt tokens an image costs for the vision model.
+
+    Args:
+        width (int): Image width in pixels
+        height (int): Image height in pixels
+        detail (str): 'low' or 'high' ('auto' is billed like 'high' for page-sized images)
+
+    Returns:
+        int: Estimated tokens
+    """
+    if detail == 'low':
+        return BASE_IMAGE_TOKENS
+
+    # La API encaja la imagen en 2048x2048 y luego lleva el lado corto a 768
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+
+    tiles = math.ceil(width / TILE_SIZE) * math.ceil(height / TILE_SIZE)
+    return BASE_IMAGE_TOKENS + TILE_TOKENS * tiles
+
+def _ink_mask(image: Image.Image) -> Image.Image:
+    gray = ImageOps.grayscale(image)
+    return gray.point(lambda p: 255 if p < INK_THRESHOLD else 0)
+
+def crop_margins(image: Image.Image, padding: int = 16) -> Image.Image:
+    """
+    Crop the white margins around the page content.
+
+    Args:
+        image (Image.Image): Page image
+        padding (int): Pixels of margin kept around the content
+
+    Returns:
+        Image.Image: Cropped image (the original if the page is blank)
+    """
+    bbox = _ink_mask(image).getbbox()
+    if not bbox:
+        return image
+    left, top, right, bottom = bbox
+    return image.crop((
+        max(0, left - padding),
+        max(0, top - padding),
+        min(image.width, right + padding),
+        min(image.height, bottom + padding)
+    ))
+
+def ink_ratio(image: Image.Image) -> float:
+    """
+    Share of dark pixels on the page, used as a text-density estimate.
+
+    Args:
+        image (Image.Image): Page image
+
+    Returns:
+        float: Ratio between 0 and 1
+    """
+    sample = image.copy()
+    sample.thumbnail((256, 256))
+    histogram = _ink_mask(sample).histogram()
+    total = sum(histogram)
+    return histogram[255] / total if total else 0.0
+
+def page_thumbnail(image: Image.Image) -> Image.Image:
+    """
+    Small grayscale signature of a page used for near-duplicate detection.
+    Large enough (128px) that different text layouts do not look alike.
+    """
+    return ImageOps.grayscale(image).resize((128, 128), Image.Resampling.BILINEAR)
+
+def page_difference(first: Image.Image, second: Image.Image) -> float:
+    """
+    Mean absolute pixel difference (0-255) between two page thumbnails.
+    """
+    return ImageStat.Stat(ImageChops.difference(first, second)).mean[0]
+
+def drop_blank_and_duplicate_pages(pages: List[Image.Image], min_ink: Optional[float] = None,
+                                   max_difference: Optional[float] = None) -> List[Image.Image]:
+    """
+    Remove blank pages and pages that are near-duplicates of an earlier page.
+
+    Args:
+        pages (List[Image.Image]): Page images (already cropped)
+        min_ink (Optional[float]): Pages with less ink than this are blank
+        max_difference (Optional[float]): Max mean pixel difference for a duplicate
+
+    Returns:
+        List[Image.Image]: Remaining pages, in order
+    """
+    min_ink = get_config('VISION_BLANK_PAGE_MAX_INK', 0.002) if min_ink is None else min_ink
+    max_difference = get_config('VISION_DUPLICATE_MAX_DIFF', 2.0) if max_difference is None else max_difference
+
+    kept, thumbnails = [], []
+    for index, page in enumerate(pages):
+        if ink_ratio(page) < min_ink:
+            logger.debug(f"Dropping blank page {index + 1}")
+            continue
+        thumbnail = page_thumbnail(page)
+        if any(page_difference(thumbnail, other) <= max_difference for other in thumbnails):
+            logger.debug(f"Dropping near-duplicate page {index + 1}")
+            continue
+        kept.append(page)
+        thumbnails.append(thumbnail)
+    return kept
+
+def choose_detail(image: Image.Image, low_detail_max_ink: Optional[float] = None) -> str:
+    """
+    Pick the vision detail level for a page from its text density.
+    Sparse pages are legible at 512px ('low'); dense pages need 'high'.
+    """
+    low_detail_max_ink = get_config('VISION_LOW_DETAIL_MAX_INK', 0.03) if low_detail_max_ink is None else low_detail_max_ink
+    return 'low' if ink_ratio(image) < low_detail_max_ink else 'high'
+
+def tile_pages(pages: List[Image.Image], gap: int = 12) -> Image.Image:
+    """
+    Place pages side by side in a single image (all scaled to the same height).
+
+    Args:
+        pages (List[Image.Image]): Page images
+        gap (int): White pixels between pages
+
+    Returns:
+        Image.Image: Tiled RGB image
+    """
+    if len(pages) == 1:
+        return pages[0].convert('RGB')
+    height = min(page.height for page in pages)
+    scaled = [page.convert('RGB').resize((max(1, round(page.width * height / page.height)), height))
+              for page in pages]
+    width = sum(page.width for page in scaled) + gap * (len(scaled) - 1)
+    canvas = Image.new('RGB', (width, height), 'white')
+    x = 0
+    for page in scaled:
+        canvas.paste(page, (x, 0))
+        x += page.width + gap
+    return canvas
+
+def _layout(pages: List[Image.Image], details: List[str], group_size: int) -> List[Dict]:
+    images = []
+    for start in range(0, len(pages), group_size):
+        group = pages[start:start + group_size]
+        detail = 'high' if 'high' in details[start:start + group_size] else 'low'
+        tiled = tile_pages(group)
+        images.append({
+            'image': tiled,
+            'detail': detail,
+            'pages': len(group),
+            'tokens': estimate_image_tokens(tiled.width, tiled.height, detail)
+        })
+    return images
+
+def pack_pages(images: List[Image.Image], token_budget: Optional[int] = None) -> List[Dict]:
+    """
+    Prepare CV pages for the vision model under a token budget.
+
+    Layouts are tried from least to most aggressive (one page per image, then
+    2, 3... pages tiled per image); the first one within budget is used. If
+    none fits, the pages are sent tiled in a single low-detail image.
+
+    Args:
+        images (List[Image.Image]): Page images, in order
+        token_budget (Optional[int]): Max image tokens per CV. Defaults to VISION_TOKEN_BUDGET.
+
+    Returns:
+        List[Dict]: One dict per image with base64, detail, pages and tokens
+    """
+    from parsers.vision_parser import image_to_base64
+
+    token_budget = get_config('VISION_TOKEN_BUDGET', 1200) if token_budget is None else token_budget
+
+    pages = [crop_margins(image) for image in images[:MAX_PAGES]]
+    pages = drop_blank_and_duplicate_pages(pages)
+    if not pages:
+        return []
+
+    details = [choose_detail(page) for page in pages]
+    chosen = None
+    for group_size in range(1, len(pages) + 1):
+        layout = _layout(pages, details, group_size)
+        if sum(item['tokens'] for item in layout) <= token_budget:
+            chosen = layout
+            break
+    if chosen is None:
+        chosen = _layout(pages, ['low'] * len(pages), len(pages))
+
+    packed = []
+    for item in chosen:
+        max_size = (2048, 2048) if item['detail'] == 'high' else (512, 512)
+        base64_image = image_to_base64(item['image'], max_size=max_size)
+        if base64_image:
+            packed.append({
+                'base64': base64_image,
+                'detail': item['detail'],
+                'pages': item['pages'],
+                'tokens': item['tokens']
+            })
+
+    logger.info(f"Packed {len(images)} page(s) into {len(packed)} image(s), "
+                f"~{sum(p['tokens'] for p in packed)} tokens (budget {token_budget})")
+    return packed
@@ -0,0 +1,127 @@
+"""
+Speculative extraction: the local regex parser runs alongside the LLM call.
+
+The regex result is available within milliseconds and is persisted right away;
+the vision result, when it arrives, upgrades the stored record field by field.
+"""
+import json
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, List, Optional
+
+from utils.config import get_config
+from parsers.vision_parser import extract_cv_data_with_vision
+
+logger = logging.getLogger(__name__)
+
+# Fields the LLM may upgrade, in the order they are stored on Candidate
+CANDIDATE_FIELDS = ['name', 'email', 'phone', 'education', 'experience', 'skills',
+                    'languages', 'certifications', 'summary']
+JSON_LIST_FIELDS = {'education', 'experience', 'skills', 'languages', 'certifications'}
+
+# Las llamadas a la API de visión son I/O: basta con hilos
+_vision_executor = ThreadPoolExecutor(
+    max_workers=get_config('VISION_WORKERS', 4),
+    thread_name_prefix='vision'
+)
+
+def submit_vision_extraction(file_path: str, file_type: str, file_bytes: Optional[bytes] = None) -> Future:
+    """
+    Start the vision extraction in the background.
+
+    Args:
+        file_path (str): Path to CV file
+        file_type (str): Type of file (pdf, docx, jpg, png)
+        file_bytes (Optional[bytes]): Raw file content
+
+    Returns:
+        Future: Resolves to the vision data dict ({} on failure)
+    """
+    return _vision_executor.submit(extract_cv_data_with_vision, file_path, file_type, file_bytes)
+
+def wait_for_vision(future: Future, timeout: Optional[float] = None) -> Dict:
+    """
+    Wait up to `timeout` seconds for a vision result.
+
+    Args:
+        future (Future): Future returned by submit_vision_extraction
+        timeout (Optional[float]): Seconds to wait. Defaults to VISION_GRACE_SECONDS.
+
+    Returns:
+        Dict: Vision data, or {} if not ready yet or failed
+    """
+    timeout = get_config('VISION_GRACE_SECONDS', 0) if timeout is None else timeout
+    try:
+        return future.result(timeout=timeout) or {}
+    except FutureTimeoutError:
+        return {}
+    except Exception as e:
+        logger.warning(f"Vision fallback: {str(e)}")
+        return {}
+
+def _is_empty(value) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, str):
+        return not value.strip() or value.strip() in ('[]', '{}', 'Unknown')
+    if isinstance(value, (list, dict)):
+        return len(value) == 0
+    return False
+
+def vision_to_candidate_info(vision_data: Dict) -> Dict:
+    """
+    Convert the raw vision JSON into the candidate_info shape used for storage.
+
+    Args:
+        vision_data (Dict): Result of the vision analysis
+
+    Returns:
+        Dict: Candidate information with list fields serialized as JSON strings
+    """
+    info = {}
+    for field in CANDIDATE_FIELDS:
+        value = vision_data.get(field)
+        if _is_empty(value):
+            continue
+        if field in JSON_LIST_FIELDS and not isinstance(value, str):
+            value = json.dumps(value, ensure_ascii=False)
+        info[field] = value
+    return info
+
+def merge_candidate_info(local_info: Dict, vision_data: Dict, fields: Optional[List[str]] = None) -> Dict:
+    """
+    Merge the local regex result with the vision result, field by field.
+
+    Non-empty vision fields win; everything else keeps the local value.
+
+    Args:
+        local_info (Dict): Output of clean_and_extract_info
+        vision_data (Dict): Result of the vision analysis
+        fields (Optional[List[str]]): Only take these fields from the vision result
+
+    Returns:
+        Dict: Merged candidate information
+    """
+    merged = dict(local_info)
+    for field, value in vision_to_candidate_info(vision_data or {}).items():
+        if fields is None or field in fields:
+            merged[field] = value
+    return merged
+
+def upgraded_fields(current_info: Dict, vision_data: Dict, fields: Optional[List[str]] = None) -> Dict:
+    """
+    Return only the fields whose value changes when the vision result is applied.
+
+    Args:
+        current_info (Dict): Values currently stored for the candidate
+        vision_data (Dict): Result of the vision analysis
+        fields (Optional[List[str]]): Only take these fields from the vision result
+
+    Returns:
+        Dict: Field -> new value
+    """
+    return {
+        field: value
+        for field, value in vision_to_candidate_info(vision_data or {}).items()
+        if (fields is None or field in fields) and current_info.get(field) != value
+    }
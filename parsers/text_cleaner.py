@@ -1,7 +1,7 @@
 import re
 import json
 import logging
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +43,24 @@ def clean_and_extract_info(text: str) -> Dict:
             'skills': ''
         }
 
+def clean_and_extract_info_with_confidence(text: str) -> Tuple[Dict, Dict[str, float]]:
+    """
+    Extract structured information and a confidence score (0-1) for each field.
+    
+    Args:
+        text (str): Raw text content from CV
+        
+    Returns:
+        Tuple[Dict, Dict[str, float]]: Candidate information and per-field confidence
+    """
+    candidate_info = clean_and_extract_info(text)
+    try:
+        confidence = score_extraction_confidence(candidate_info, text)
+    except Exception as e:
+        logger.warning(f"Error scoring extraction confidence: {str(e)}")
+        confidence = {field: 0.0 for field in CONFIDENCE_FIELDS}
+    return candidate_info, confidence
+
 def clean_text(text: str) -> str:
     """
     Clean and normalize text content, reintroduce section-based newlines.
@@ -502,3 +520,169 @@ def extract_skills(text: str) -> str:
     except Exception as e:
         logger.warning(f"Error extracting skills: {str(e)}")
         return ''
+
+
+
+# ---------------------------------------------------------------------------
+# Per-field confidence scores
+# ---------------------------------------------------------------------------
+
+CONFIDENCE_FIELDS = ['name', 'email', 'phone', 'skills', 'education', 'experience']
+
+# Palabras que delatan que el "nombre" es en realidad un encabezado
+HEADER_WORDS = {
+    'email', 'correo', 'teléfono', 'telefono', 'phone', 'celular', 'cv', 'resume', 'curriculum',
+    'vitae', 'experiencia', 'experience', 'educación', 'educacion', 'skills', 'habilidades',
+    'resumen', 'summary', 'perfil', 'profile', 'información', 'personal', 'datos'
+}
+
+# Palabras de cargos o empresas que no forman parte de un nombre propio
+ROLE_WORDS = {
+    'desarrollador', 'developer', 'programador', 'ingeniero', 'engineer', 'analista', 'analyst',
+    'consultor', 'gerente', 'manager', 'jefe', 'líder', 'lider', 'backend', 'frontend',
+    'technologies', 'corp', 'ltda', 'universidad', 'university'
+}
+
+def _parse_json_list(value: str) -> List:
+    try:
+        parsed = json.loads(value) if value else []
+        return parsed if isinstance(parsed, list) else []
+    except (json.JSONDecodeError, TypeError):
+        return []
+
+def name_confidence(name: str, raw_text: str) -> float:
+    """
+    Confidence that the extracted name is the candidate's real name.
+    
+    Args:
+        name (str): Extracted name
+        raw_text (str): Raw CV text (before cleaning)
+        
+    Returns:
+        float: Confidence between 0 and 1
+    """
+    if not name or name == 'Unknown':
+        return 0.0
+    words = name.split()
+    if any(word.lower().strip('.:,') in HEADER_WORDS for word in words):
+        return 0.1
+
+    if any(word.lower() in ROLE_WORDS for word in words):
+        return 0.2
+
+    score = 0.3
+    if 2 <= len(words) <= 4 and all(word[:1].isupper() for word in words):
+        score += 0.2
+    # Un nombre real suele ser la primera línea del CV
+    first_lines = [line.strip() for line in (raw_text or '').strip().split('\n')[:3]]
+    if name.strip() in first_lines:
+        score += 0.45
+    return min(score, 0.95)
+
+def email_confidence(email: str) -> float:
+    """Confidence that the extracted email is valid."""
+    if not email:
+        return 0.0
+    return 0.95 if re.fullmatch(r'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}', email) else 0.3
+
+def phone_confidence(phone: str, text: str) -> float:
+    """
+    Confidence that the extracted phone number is complete.
+    
+    Args:
+        phone (str): Extracted phone number
+        text (str): Text the phone was extracted from
+        
+    Returns:
+        float: Confidence between 0 and 1
+    """
+    if not phone:
+        return 0.0
+
+    # Un número seguido de más dígitos fue cortado por el patrón
+    index = text.find(phone)
+    if index >= 0:
+        rest = text[index + len(phone):index + len(phone) + 2].strip()
+        if rest[:1].isdigit():
+            return 0.4
+
+    digits = len(re.sub(r'\D', '', phone))
+    if 10 <= digits <= 13:
+        return 0.9
+    if 8 <= digits <= 9:
+        return 0.6
+    return 0.3
+
+def skills_confidence(skills: str) -> float:
+    """
+    Confidence in the extracted skills list: enough items, and items that look like skills.
+    """
+    items = _parse_json_list(skills)
+    if not items:
+        return 0.0
+    clean_items = [
+        item for item in items
+        if isinstance(item, str) and len(item) <= 30 and '\n' not in item and len(item.split()) <= 3
+    ]
+    quality = len(clean_items) / len(items)
+    return round(min(1.0, len(clean_items) / 5) * quality * 0.95, 3)
+
+def education_confidence(education: str) -> float:
+    """
+    Confidence in the extracted education: institution, degree and dates per entry.
+    """
+    entries = [e for e in _parse_json_list(education) if isinstance(e, dict)]
+    if not entries:
+        return 0.0
+    scores = []
+    for entry in entries:
+        score = 0.0
+        if entry.get('institution'):
+            score += 0.4
+        if entry.get('degree'):
+            score += 0.3
+        if re.search(r'\b(19|20)\d{2}\b', entry.get('details', '') or entry.get('year', '') or ''):
+            score += 0.3
+        scores.append(score)
+    return round(min(sum(scores) / len(scores), 0.95), 3)
+
+def experience_confidence(experience: str) -> float:
+    """
+    Confidence in the extracted experience: short title, company and dates per entry.
+    """
+    entries = [e for e in _parse_json_list(experience) if isinstance(e, dict)]
+    if not entries:
+        return 0.0
+    scores = []
+    for entry in entries:
+        title = entry.get('title', '') or ''
+        score = 0.0
+        if title and len(title) <= 80:
+            score += 0.4
+        if entry.get('company'):
+            score += 0.3
+        if re.search(r'\b(19|20)\d{2}\b', entry.get('details', '') or ''):
+            score += 0.3
+        scores.append(score)
+    return round(min(sum(scores) / len(scores), 0.95), 3)
+
+def score_extraction_confidence(candidate_info: Dict, raw_text: str) -> Dict[str, float]:
+    """
+    Score every field produced by clean_and_extract_info.
+    
+    Args:
+        candidate_info (Dict): Output of clean_and_extract_info
+        raw_text (str): Raw CV text
+        
+    Returns:
+        Dict[str, float]: Field -> confidence between 0 and 1
+    """
+    cleaned_text = clean_text(raw_text)
+    return {
+        'name': name_confidence(candidate_info.get('name', ''), raw_text),
+        'email': email_confidence(candidate_info.get('email', '')),
+        'phone': phone_confidence(candidate_info.get('phone', ''), cleaned_text),
+        'skills': skills_confidence(candidate_info.get('skills', '')),
+        'education': education_confidence(candidate_info.get('education', '')),
+        'experience': experience_confidence(candidate_info.get('experience', '')),
+    }
@@ -8,6 +8,10 @@ from pdf2image import convert_from_path, convert_from_bytes
 from PIL import Image
 from openai import OpenAI 
 from dotenv import load_dotenv
+from utils.config import get_config
+from utils.circuit_breaker import get_breaker, CircuitOpenError
+from utils.embeddings import model_dimensions, stored_dimensions, placeholder_embedding
+from utils import metrics
 
 load_dotenv()
 
@@ -24,9 +28,24 @@ if not OPENAI_API_KEY:
 else:
     openai_client = OpenAI(
         api_key=OPENAI_API_KEY,
-        organization=OPENAI_ORG_ID
+        organization=OPENAI_ORG_ID,
+        timeout=get_config('OPENAI_TIMEOUT', 30),
+        max_retries=get_config('OPENAI_MAX_RETRIES', 2)
     )
 
+# Cortocircuitos: con la API caída o lenta se pasa directo al fallback local
+llm_breaker = get_breaker('openai_llm')
+embedding_breaker = get_breaker('openai_embeddings')
+
+def llm_available() -> bool:
+    """
+    Check whether an LLM call would currently be attempted.
+    
+    Returns:
+        bool: False when the client is missing or the circuit is open
+    """
+    return openai_client is not None and llm_breaker.is_call_permitted()
+
 def pdf_to_images(pdf_path: str) -> List[Image.Image]:
     """
     Convert PDF to list of PIL Images.
@@ -107,16 +126,38 @@ def analyze_cv_with_vision(images: List[Image.Image]) -> Dict:
         logger.warning("OpenAI client not available. Skipping vision analysis.")
         return {}
     
+    # Recortar, descartar páginas vacías/duplicadas y agrupar bajo el presupuesto de tokens
+    from parsers.page_packer import pack_pages
+    return analyze_encoded_images_with_vision(pack_pages(images))
+
+def analyze_encoded_images_with_vision(encoded_images: List[Union[str, Dict]]) -> Dict:
+    """
+    Analyze CV page images already encoded as base64 JPEGs using OpenAI Vision API.
+    
+    Args:
+        encoded_images (List[Union[str, Dict]]): Base64 encoded CV page images, or
+            packed images from page_packer.pack_pages (base64, detail, tokens)
+        
+    Returns:
+        Dict: Extracted candidate information
+    """
+    if not openai_client:
+        logger.warning("OpenAI client not available. Skipping vision analysis.")
+        return {}
+    
     try:
-        # Convert images to base64
         image_messages = []
-        for i, image in enumerate(images[:4]):  # Analyze max 2 pages
-            base64_image = image_to_base64(image)
-            if base64_image:
-                image_messages.append({
-                    "type": "image_url",
-                    "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}
-                })
+        for encoded in encoded_images[:4]:
+            packed = encoded if isinstance(encoded, dict) else {'base64': encoded, 'detail': 'auto'}
+            image_messages.append({
+                "type": "image_url",
+                "image_url": {
+                    "url": f"data:image/jpeg;base64,{packed['base64']}",
+                    "detail": packed.get('detail', 'auto')
+                }
+            })
+            if 'tokens' in packed:
+                metrics.increment('vision.image_tokens', packed['tokens'])
         
         if not image_messages:
             logger.warning("No valid images to analyze")
@@ -168,7 +209,8 @@ def analyze_cv_with_vision(images: List[Image.Image]) -> Dict:
         messages = [{"role": "user", "content": content}]
         
         # Call OpenAI Vision API
-        response = openai_client.chat.completions.create(
+        response = llm_breaker.call(
+            openai_client.chat.completions.create,
             model="gpt-4o",  # Latest OpenAI model with vision capabilities
             messages=messages,  # type: ignore
             max_tokens=2000,
@@ -186,17 +228,22 @@ def analyze_cv_with_vision(images: List[Image.Image]) -> Dict:
         
         return result
         
+    except CircuitOpenError as e:
+        logger.warning(f"Skipping vision analysis: {str(e)}")
+        return {}
     except Exception as e:
         logger.error(f"Error analyzing CV with vision: {str(e)}")
         return {}
 
-def extract_cv_data_with_vision(file_path: str, file_type: str) -> Dict:
+def extract_cv_data_with_vision(file_path: str, file_type: str, file_bytes: Optional[bytes] = None) -> Dict:
     """
     Extract CV data using vision analysis.
     
     Args:
         file_path (str): Path to CV file
         file_type (str): Type of file (pdf, docx, jpg, png)
+        file_bytes (Optional[bytes]): Raw file content. When given for PDFs, pages
+            are rendered and encoded in the parser process pool.
         
     Returns:
         Dict: Extracted candidate information
@@ -204,7 +251,14 @@ def extract_cv_data_with_vision(file_path: str, file_type: str) -> Dict:
     try:
         images = []
         
-        if file_type.lower() == 'pdf':
+        if file_type.lower() == 'pdf' and file_bytes is not None:
+            from parsers.worker_pool import encode_pdf_pages_in_pool
+            encoded_images = encode_pdf_pages_in_pool(file_bytes)
+            if not encoded_images:
+                logger.warning(f"No images generated from {file_type} file")
+                return {}
+            return analyze_encoded_images_with_vision(encoded_images)
+        elif file_type.lower() == 'pdf':
             images = pdf_to_images(file_path)
         elif file_type.lower() in ['jpg', 'jpeg', 'png']:
             # If it's already an image
@@ -236,38 +290,64 @@ def extract_cv_data_with_vision(file_path: str, file_type: str) -> Dict:
         logger.error(f"Error extracting CV data with vision: {str(e)}")
         return {}
 
-def generate_text_embedding(text: str, model_name: str = "text-embedding-3-small") -> List[float]:
+def build_embedding_text(candidate_info: Dict, full_text: str) -> str:
+    """
+    Build the text used to embed a candidate.
+    
+    Args:
+        candidate_info (Dict): Structured candidate information
+        full_text (str): Complete CV text
+        
+    Returns:
+        str: Single-line text for the embedding model
+    """
+    return " ".join(filter(None, [
+        candidate_info.get('name', ''),
+        candidate_info.get('skills', ''),
+        candidate_info.get('experience', ''),
+        (full_text or '')[:1500]  # Controla el tamaño del input
+    ])).replace("\n", " ")
+
+def generate_text_embedding(text: str, model_name: Optional[str] = None) -> List[float]:
     """
     Generate embedding for a given text using OpenAI Embedding API.
     
     Args:
         text (str): Input text to embed (up to 8000 tokens).
-        model_name (str): Name of the embedding model to use.
+        model_name (Optional[str]): Name of the embedding model to use. Defaults to EMBEDDING_MODEL.
         
     Returns:
-        List[float]: Embedding vector (1536 dimensions for text-embedding-3-small)
+        List[float]: Embedding vector of stored_dimensions() values (the full
+        vector with EMBEDDING_STORE_FULL, otherwise the index dimensions)
     """
     if not openai_client:
         logger.warning("OpenAI client not available. Skipping embedding generation.")
-        return [0.0] * 1536
+        return placeholder_embedding()
     
     try:
         cleaned_text = text.strip().replace("\n", " ")[:8000]
         if not cleaned_text:
-            return [0.0] * 1536
-
-        response = openai_client.embeddings.create(
-            model=model_name,
-            input=[cleaned_text]
+            return placeholder_embedding()
+
+        # Sólo se piden menos dimensiones si no se guarda el vector completo (modelos text-embedding-3)
+        options = {'dimensions': stored_dimensions()} if stored_dimensions() < model_dimensions() else {}
+        response = embedding_breaker.call(
+            openai_client.embeddings.create,
+            model=model_name or get_config('EMBEDDING_MODEL', 'text-embedding-3-small'),
+            input=[cleaned_text],
+            **options
         )
         
         embedding = response.data[0].embedding
         logger.info(f"Generated embedding ({len(embedding)} dims) for text: {cleaned_text[:60]}...")
         return embedding
 
+    except CircuitOpenError as e:
+        logger.warning(f"Using local placeholder embedding: {str(e)}")
+        return placeholder_embedding()
     except Exception as e:
         logger.error(f"OpenAI embedding error: {str(e)}")
-        return [0.0] * 1536
+        return placeholder_embedding()
 
 
 def search_candidates_semantic(query: str, candidate_embeddings: List[Dict], top_k: int = 10, similarity_threshold: float = 0.6) -> List[Dict]:
@@ -393,7 +473,8 @@ Texto del CV:
 {text[:12000]}  <!-- GPT-4o permite hasta 128k tokens, usamos 12k para evitar cortes. -->
 """
 
-        response = openai_client.chat.completions.create(
+        response = llm_breaker.call(
+            openai_client.chat.completions.create,
             model="gpt-4o",
             messages=[{"role": "user", "content": prompt}],
             max_tokens=2000,
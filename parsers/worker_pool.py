@@ -0,0 +1,222 @@
+"""
+Managed process pool for CPU-bound parsing work.
+
+PDF/DOCX text extraction, regex extraction and image encoding hold the GIL,
+so running them on the request thread serializes concurrent uploads. This
+module keeps a warm pool of worker processes that receive raw bytes (never
+file paths) and return plain Python data.
+"""
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.config import get_config
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+# ---------------------------------------------------------------------------
+# Tasks executed inside the worker processes. They must be module-level
+# functions so they can be pickled.
+# ---------------------------------------------------------------------------
+
+def _warm_worker() -> int:
+    """Import the heavy parsing modules once per worker process."""
+    from parsers import pdf_parser, docx_parser, text_cleaner  # noqa: F401
+    from parsers import vision_parser  # noqa: F401
+    return os.getpid()
+
+def _extract_text_task(file_bytes: bytes, file_ext: str) -> str:
+    if file_ext == 'pdf':
+        from parsers.pdf_parser import extract_text_from_pdf_bytes
+        return extract_text_from_pdf_bytes(file_bytes)
+    if file_ext == 'docx':
+        from parsers.docx_parser import extract_text_from_docx_bytes
+        return extract_text_from_docx_bytes(file_bytes)
+    if file_ext == 'txt':
+        return file_bytes.decode('utf-8')
+    raise Exception(f"Unsupported file type: {file_ext}")
+
+def _clean_and_extract_task(text: str) -> Dict:
+    from parsers.text_cleaner import clean_and_extract_info
+    return clean_and_extract_info(text)
+
+def _clean_and_extract_with_confidence_task(text: str) -> Tuple[Dict, Dict[str, float]]:
+    from parsers.text_cleaner import clean_and_extract_info_with_confidence
+    return clean_and_extract_info_with_confidence(text)
+
+def _encode_pdf_pages_task(pdf_bytes: bytes) -> List[Dict]:
+    from parsers.vision_parser import pdf_bytes_to_images
+    from parsers.page_packer import pack_pages
+    return pack_pages(pdf_bytes_to_images(pdf_bytes))
+
+
+# ---------------------------------------------------------------------------
+# Pool management
+# ---------------------------------------------------------------------------
+
+def _pool_size() -> int:
+    return max(0, int(get_config('PARSER_POOL_SIZE', 0) or 0))
+
+def start_parser_pool(size: Optional[int] = None) -> Optional[ProcessPoolExecutor]:
+    """
+    Create the worker pool and warm-start every worker.
+
+    Args:
+        size (Optional[int]): Number of worker processes. Defaults to PARSER_POOL_SIZE.
+
+    Returns:
+        Optional[ProcessPoolExecutor]: The pool, or None when pooling is disabled
+    """
+    global _executor
+
+    # Los procesos hijos re-importan la app; nunca deben crear su propio pool
+    if multiprocessing.parent_process() is not None:
+        return None
+
+    size = _pool_size() if size is None else size
+    if size <= 0:
+        logger.info("Parser pool disabled, parsing will run inline")
+        return None
+
+    with _executor_lock:
+        if _executor is not None:
+            return _executor
+
+        _executor = ProcessPoolExecutor(max_workers=size)
+        try:
+            futures = [_executor.submit(_warm_worker) for _ in range(size)]
+            pids = {f.result(timeout=get_config('PARSER_TASK_TIMEOUT', 60)) for f in futures}
+            logger.info(f"Parser pool started with {size} workers ({len(pids)} warmed)")
+        except Exception as e:
+            logger.warning(f"Parser pool warm-up incomplete: {str(e)}")
+
+        return _executor
+
+def shutdown_parser_pool(wait: bool = True) -> None:
+    """Stop the worker pool, if running."""
+    global _executor
+
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait, cancel_futures=True)
+            _executor = None
+            logger.info("Parser pool stopped")
+
+def _reset_broken_pool(broken: ProcessPoolExecutor, terminate: bool = False) -> None:
+    global _executor
+
+    with _executor_lock:
+        if _executor is broken:
+            _executor = None
+    if terminate:
+        # cancel() no detiene una tarea en curso: se matan los procesos (un PDF patológico
+        # dejaría el worker ocupado indefinidamente y, con varios, todo el pool)
+        for process in list((getattr(broken, '_processes', None) or {}).values()):
+            if process.is_alive():
+                process.terminate()
+    broken.shutdown(wait=False, cancel_futures=True)
+    start_parser_pool()
+
+def run_in_pool(func: Callable, *args, timeout: Optional[float] = None) -> Any:
+    """
+    Run a task in the parser pool, or inline when the pool is disabled.
+
+    Args:
+        func (Callable): Module-level function to execute
+        *args: Picklable arguments for the function
+        timeout (Optional[float]): Seconds to wait. Defaults to PARSER_TASK_TIMEOUT.
+
+    Returns:
+        Any: Result of the task
+
+    Raises:
+        Exception: If the task times out or the pool breaks
+    """
+    executor = _executor
+    if executor is None:
+        return func(*args)
+
+    timeout = get_config('PARSER_TASK_TIMEOUT', 60) if timeout is None else timeout
+    try:
+        future = executor.submit(func, *args)
+    except (BrokenProcessPool, RuntimeError):
+        _reset_broken_pool(executor)
+        return func(*args)
+
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        future.cancel()
+        logger.error(f"Parser task {func.__name__} timed out after {timeout}s, recycling the parser pool")
+        _reset_broken_pool(executor, terminate=True)
+        raise Exception(f"Parsing timed out after {timeout} seconds")
+    except BrokenProcessPool as e:
+        logger.error(f"Parser pool broken while running {func.__name__}: {str(e)}")
+        _reset_broken_pool(executor)
+        raise Exception("Parser worker crashed while processing the file")
+
+
+# ---------------------------------------------------------------------------
+# Public helpers used by the upload flow
+# ---------------------------------------------------------------------------
+
+def extract_text_from_bytes(file_bytes: bytes, file_ext: str, timeout: Optional[float] = None) -> str:
+    """
+    Extract plain text from an uploaded file's bytes in the parser pool.
+
+    Args:
+        file_bytes (bytes): Raw file content
+        file_ext (str): File extension (pdf, docx, txt)
+        timeout (Optional[float]): Task timeout in seconds
+
+    Returns:
+        str: Extracted text content
+    """
+    return run_in_pool(_extract_text_task, file_bytes, file_ext.lower(), timeout=timeout)
+
+def clean_and_extract_info_in_pool(text: str, timeout: Optional[float] = None) -> Dict:
+    """
+    Run the regex extractor (clean_and_extract_info) in the parser pool.
+
+    Args:
+        text (str): Raw text content from CV
+        timeout (Optional[float]): Task timeout in seconds
+
+    Returns:
+        Dict: Structured candidate information
+    """
+    return run_in_pool(_clean_and_extract_task, text, timeout=timeout)
+
+def clean_and_extract_with_confidence_in_pool(text: str, timeout: Optional[float] = None) -> Tuple[Dict, Dict[str, float]]:
+    """
+    Run the regex extractor plus its per-field confidence scoring in the parser pool.
+
+    Args:
+        text (str): Raw text content from CV
+        timeout (Optional[float]): Task timeout in seconds
+
+    Returns:
+        Tuple[Dict, Dict[str, float]]: Candidate information and per-field confidence
+    """
+    return run_in_pool(_clean_and_extract_with_confidence_task, text, timeout=timeout)
+
+def encode_pdf_pages_in_pool(pdf_bytes: bytes, timeout: Optional[float] = None) -> List[Dict]:
+    """
+    Render PDF pages and pack them for the vision model in the parser pool.
+
+    Args:
+        pdf_bytes (bytes): PDF file content
+        timeout (Optional[float]): Task timeout in seconds
+
+    Returns:
+        List[Dict]: Packed images (base64, detail, pages, tokens), see page_packer.pack_pages
+    """
+    return run_in_pool(_encode_pdf_pages_task, pdf_bytes, timeout=timeout)
@@ -1,16 +1,48 @@
 import os
 import json
+import uuid
 import logging
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app
+from flask import Response, stream_with_context
 from werkzeug.utils import secure_filename
 from extensions import db
-from models import Candidate
+from models import Candidate, CandidateCluster, CandidateDocument
 from parsers.pdf_parser import extract_text_from_pdf
 from parsers.docx_parser import extract_text_from_docx
 from parsers.text_cleaner import clean_and_extract_info
 from parsers.vision_parser import extract_cv_data_with_vision, generate_text_embedding,search_candidates_semantic
-from storage.sqlite_handler import search_candidates, get_all_candidates
+from parsers.vision_parser import build_embedding_text, llm_available
+from parsers.worker_pool import extract_text_from_bytes, clean_and_extract_with_confidence_in_pool
+from parsers.extraction_policy import decide_llm_extraction, record_decision
+from utils import metrics
+from parsers.speculative import (
+    CANDIDATE_FIELDS, submit_vision_extraction, wait_for_vision, merge_candidate_info, upgraded_fields
+)
+from storage.sqlite_handler import search_candidates, search_candidate_ids
+from storage.sqlite_handler import search_candidates_page, get_candidates_page, get_file_type_counts, get_candidates_count
+from storage.sqlite_handler import search_candidate_rows
+from storage.projections import CandidateSummary
+from storage.pagination import paginate_ranked
+from storage.local_embeddings import local_model_name
+from utils.config import get_config
+from utils.embeddings import embedding_json, has_embedding
+from storage.sqlite_profile import run_write
+from storage.normalization import sync_candidate_attributes
+from storage.facets import get_facet_index, index_candidate, unindex_candidate
+from storage.stats import get_dashboard_stats
+from storage.unit_of_work import CandidateUnitOfWork, new_candidate
+from storage.vector_search import write_embedding_vectors
+from storage.similar_candidates import unlink_candidate, refill_neighbors
+from storage.similar_candidates import get_similar_candidates
+from storage.derived_indexes import encode_local_vectors, rederive_candidate
+from storage.clustering import list_clusters
+from storage.embedding_map import get_map_coordinates
+from storage.saved_searches import create_saved_search, delete_saved_search, list_saved_searches
+from storage.saved_searches import get_notifications, mark_notifications_read
+from storage.matching import match_job_description, iter_matches
+from storage.batch_search import search_candidates_batch
 from sqlalchemy import or_
+from sqlalchemy.orm import joinedload
 from flask import request, jsonify
 from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
@@ -20,7 +52,7 @@ import pickle
 import traceback
 
 
-model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+model = SentenceTransformer(local_model_name())
 
 logger = logging.getLogger(__name__)
 
@@ -28,13 +60,16 @@ routes_bp = Blueprint('routes', __name__)
 
 ALLOWED_EXTENSIONS = {'pdf', 'docx', 'txt'}
 
+def encode_local(texts):
+    return model.encode(list(texts), convert_to_numpy=True, show_progress_bar=False)
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 @routes_bp.route('/')
 def index():
-    total_candidates = db.session.query(Candidate).count()
-    recent_candidates = db.session.query(Candidate).order_by(Candidate.created_at.desc()).limit(5).all()
+    total_candidates = get_candidates_count()
+    recent_candidates, _ = get_candidates_page(limit=5)
     return render_template('index.html', total_candidates=total_candidates, recent_candidates=recent_candidates)
 
 @routes_bp.route('/upload', methods=['GET', 'POST'])
@@ -51,94 +86,71 @@ def upload_cv():
 
         filename = secure_filename(file.filename or 'unknown')
         file_ext = filename.rsplit('.', 1)[1].lower()
-        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+        # Nombre único: el archivo puede seguir en uso por la visión en segundo plano
+        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], f"{uuid.uuid4().hex}_{filename}")
+        vision_future = None
 
         try:
-            # Guardar archivo
-            file.save(filepath)
-
-            # Extraer texto plano
-            extracted_text = ""
-            if file_ext == 'pdf':
-                extracted_text = extract_text_from_pdf(filepath)
-            elif file_ext == 'docx':
-                extracted_text = extract_text_from_docx(filepath)
-            elif file_ext == 'txt':
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    extracted_text = f.read()
+            # Guardar archivo (la conversión DOCX -> imagen necesita una ruta)
+            file_bytes = file.read()
+            with open(filepath, 'wb') as f:
+                f.write(file_bytes)
+
+            # Extraer texto plano en el pool de procesos
+            extracted_text = extract_text_from_bytes(file_bytes, file_ext)
 
             if not extracted_text.strip():
                 os.remove(filepath)
                 flash('No se pudo extraer texto del archivo.', 'error')
                 return redirect(request.url)
 
-            # Intentar extracción con visión
-            vision_data = {}
-            try:
-                vision_data = extract_cv_data_with_vision(filepath, file_ext)
-            except Exception as ve:
-                logger.warning(f"Vision fallback: {str(ve)}")
+            # Parser local con confianza por campo; el LLM sólo si hace falta
+            candidate_info, confidence = clean_and_extract_with_confidence_in_pool(extracted_text)
+            decision = decide_llm_extraction(confidence)
+            record_decision(decision)
 
-            # Fallback a parser de texto si vision_data está vacío
-            if not vision_data or not any(vision_data.values()):
-                candidate_info = clean_and_extract_info(extracted_text)
-            else:
-                candidate_info = {
-                    'name': vision_data.get('name', 'Unknown'),
-                    'email': vision_data.get('email', ''),
-                    'phone': vision_data.get('phone', ''),
-                    'education': json.dumps(vision_data.get('education', [])),
-                    'experience': json.dumps(vision_data.get('experience', [])),
-                    'skills': json.dumps(vision_data.get('skills', []))
-                }
-
-            # Crear texto base para el embedding
-            embedding_text = " ".join(filter(None, [
-                candidate_info.get('name', ''),
-                candidate_info.get('skills', ''),
-                candidate_info.get('experience', ''),
-                extracted_text[:1500]  # Controla el tamaño del input
-            ])).replace("\n", " ")
+            # Lanzar la visión en segundo plano; si ya respondió (dentro del
+            # margen de gracia) se fusiona ahora
+            vision_data = {}
+            if decision['call_llm'] and not llm_available():
+                # Circuito abierto: nos quedamos con la extracción local
+                metrics.increment('llm_extraction.short_circuited')
+            elif decision['call_llm']:
+                vision_future = submit_vision_extraction(filepath, file_ext, file_bytes)
+                vision_data = wait_for_vision(vision_future)
+                if vision_data:
+                    candidate_info = merge_candidate_info(candidate_info, vision_data, decision['fields'])
 
             # Generar embedding
             embedding = []
             try:
-                embedding = generate_text_embedding(embedding_text)
+                embedding = generate_text_embedding(build_embedding_text(candidate_info, extracted_text))
             except Exception as ee:
                 logger.warning(f"Error embedding: {str(ee)}")
 
-            # Crear candidato
-            candidate = Candidate(
-                name=candidate_info.get('name', 'Unknown'),
-                email=candidate_info.get('email', ''),
-                phone=candidate_info.get('phone', ''),
-                education=candidate_info.get('education', ''),
-                experience=candidate_info.get('experience', ''),
-                skills=candidate_info.get('skills', ''),
-                languages=json.dumps(vision_data.get('languages', [])),
-                certifications=json.dumps(vision_data.get('certifications', [])),
-                summary=vision_data.get('summary', ''),
-                vision_analysis=json.dumps(vision_data),
-                text_embedding=json.dumps(embedding),
-                full_text=extracted_text,
-                original_filename=filename,
-                file_type=file_ext
-            )
-
-            db.session.add(candidate)
-            db.session.commit()
-
-            # Opcional: guardar vector si usas Pinecone u otro servicio externo
-            if embedding:
-                from storage.vector_search import store_embedding_vector
-                store_embedding_vector(candidate.id, embedding)
-
-            os.remove(filepath)
+            # Crear candidato: fila, documento, atributos, términos y vectores en una sola transacción;
+            # vecinos, cluster, mapa y búsquedas guardadas se actualizan tras el commit
+            candidate = new_candidate(candidate_info, extracted_text, filename, file_ext, vision_data, embedding)
+            work = CandidateUnitOfWork()
+            work.add(candidate, embedding, extracted_text, encode_local)
+            work.commit()
+
+            if vision_future is None or vision_data:
+                os.remove(filepath)
+            else:
+                # Visión no fusionada: el registro se mejora cuando llegue (o ya mismo, si
+                # terminó durante el embedding o el commit: add_done_callback la ejecuta al instante)
+                _schedule_vision_upgrade(vision_future, candidate.id, filepath, decision['fields'])
+
             flash(f"CV cargado correctamente. Candidato: {candidate.name}", 'success')
+            if candidate.duplicate_of_id:
+                flash(f"Posible CV duplicado del candidato #{candidate.duplicate_of_id}", 'warning')
             return redirect(url_for('routes.view_candidate', candidate_id=candidate.id))
 
         except Exception as e:
             logger.error(f"Error procesando CV {filename}: {str(e)}")
+            if vision_future is not None:
+                vision_future.cancel()
             if os.path.exists(filepath):
                 os.remove(filepath)
             flash(f"Error procesando archivo: {str(e)}", 'error')
@@ -147,6 +159,82 @@ def upload_cv():
     return render_template('upload.html')
 
 
+def _schedule_vision_upgrade(vision_future, candidate_id, filepath, fields=None):
+    """
+    Upgrade a stored candidate with the vision result once it arrives.
+    """
+    app = current_app._get_current_object()
+
+    def _on_vision_done(future):
+        try:
+            vision_data = future.result() or {}
+            if vision_data:
+                with app.app_context():
+                    _upgrade_candidate_with_vision(candidate_id, vision_data, fields)
+        except Exception as e:
+            logger.warning(f"Vision upgrade failed for candidate {candidate_id}: {str(e)}")
+        finally:
+            if os.path.exists(filepath):
+                os.remove(filepath)
+
+    vision_future.add_done_callback(_on_vision_done)
+
+
+def _upgrade_candidate_with_vision(candidate_id, vision_data, fields=None):
+    """
+    Merge a late vision result into the stored candidate, field by field.
+    """
+    candidate = db.session.get(Candidate, candidate_id)
+    if not candidate:
+        return
+
+    current_info = {field: getattr(candidate, field) for field in CANDIDATE_FIELDS}
+    changes = upgraded_fields(current_info, vision_data, fields)
+
+    # Re-generar el embedding sólo si cambió el texto que lo alimenta (llamada a la API fuera del escritor)
+    embedding = None
+    if changes.keys() & {'name', 'skills', 'experience'}:
+        current_info.update(changes)
+        embedding = generate_text_embedding(build_embedding_text(current_info, candidate.full_text))
+    attributes_changed = bool(changes.keys() & {'skills', 'education', 'experience', 'languages', 'certifications'})
+    # Vectores locales y secciones: sólo si cambió alguno de los campos que los alimentan
+    local_vectors = None
+    if changes.keys() & {'name', 'skills', 'summary', 'experience', 'education'}:
+        for field, value in changes.items():
+            setattr(candidate, field, value)
+        local_vectors = encode_local_vectors(candidate, encode_local)
+    db.session.rollback()
+
+    def write(session):
+        stored = session.get(Candidate, candidate_id)
+        if stored is None:
+            return None
+        for field, value in changes.items():
+            setattr(stored, field, value)
+        stored.vision_analysis = json.dumps(vision_data)
+        if embedding is not None:
+            stored.text_embedding = embedding_json(embedding)
+        if attributes_changed:
+            sync_candidate_attributes(stored)
+        if has_embedding(embedding):
+            write_embedding_vectors(session, [(candidate_id, embedding)])
+        if local_vectors is not None:
+            local_vectors.write(session, candidate_id)
+        return stored
+
+    # Hilo del callback de visión: la escritura pasa por la cola del escritor como las cargas
+    candidate = run_write(write)
+    if candidate is None:
+        return
+
+    if attributes_changed:
+        index_candidate(candidate)
+    if local_vectors is not None:
+        rederive_candidate(candidate_id, local_vectors, reembedded=True)
+
+    logger.info(f"Candidate {candidate_id} upgraded with vision fields: {sorted(changes)}")
+
+
 @routes_bp.route('/search', methods=['GET', 'POST'])
 def search():
     candidates = []
@@ -176,24 +264,42 @@ def search():
     return render_template('search_new.html', candidates=candidates, search_query=search_query)
 
 
+def _page_size(value):
+    """Requested page size, bounded by MAX_PAGE_SIZE."""
+    try:
+        size = int(value) if value else get_config('PAGE_SIZE', 50)
+    except (TypeError, ValueError):
+        size = get_config('PAGE_SIZE', 50)
+    return max(1, min(size, get_config('MAX_PAGE_SIZE', 200)))
+
+
 @routes_bp.route('/candidates')
 def candidates():
     try:
-        all_candidates = get_all_candidates()
-        return render_template('candidates.html', candidates=all_candidates)
+        # Navegación por cluster: /candidates?cluster=<id>
+        cluster = db.session.get(CandidateCluster, request.args.get('cluster', type=int) or 0)
+        page, next_cursor = get_candidates_page(
+            limit=_page_size(request.args.get('limit')),
+            cursor=request.args.get('cursor'),
+            filters={'clusters': [cluster.id]} if cluster else None
+        )
+        total = Candidate.query.filter_by(cluster_id=cluster.id).count() if cluster else get_candidates_count()
+        return render_template('candidates.html', candidates=page, next_cursor=next_cursor, cluster=cluster,
+                               total=total, file_type_counts=get_file_type_counts())
     except Exception as e:
         logger.error(f"Error fetching candidates: {str(e)}")
         flash(f'Error fetching candidates: {str(e)}', 'error')
-        return render_template('candidates.html', candidates=[])
+        return render_template('candidates.html', candidates=[], next_cursor=None, total=0, file_type_counts={})
 
 @routes_bp.route('/candidate/<int:candidate_id>')
 def view_candidate(candidate_id):
     try:
-        candidate = db.session.get(Candidate, candidate_id)
+        candidate = db.session.get(Candidate, candidate_id, options=[joinedload(Candidate.document)])
         if not candidate:
             flash('Candidate not found', 'error')
             return redirect(url_for('routes.candidates'))
-        return render_template('candidate_detail.html', candidate=candidate)
+        return render_template('candidate_detail.html', candidate=candidate,
+                               similar_candidates=get_similar_candidates(candidate_id))
     except Exception as e:
         logger.error(f"Error fetching candidate {candidate_id}: {str(e)}")
         flash(f'Error fetching candidate: {str(e)}', 'error')
@@ -202,10 +308,24 @@ def view_candidate(candidate_id):
 @routes_bp.route('/candidate/<int:candidate_id>/delete', methods=['POST'])
 def delete_candidate(candidate_id):
     try:
-        candidate = Candidate.query.get_or_404(candidate_id)
-        candidate_name = candidate.name
-        db.session.delete(candidate)
-        db.session.commit()
+        def write(session):
+            candidate = session.get(Candidate, candidate_id)
+            if candidate is None:
+                return None
+            name = candidate.name
+            affected = unlink_candidate(session, candidate_id)
+            session.delete(candidate)
+            return name, affected
+
+        deleted = run_write(write)
+        if deleted is None:
+            return jsonify({'success': False, 'message': 'Candidato no encontrado'}), 404
+        candidate_name, affected = deleted
+        unindex_candidate(candidate_id)
+        try:
+            refill_neighbors(affected)
+        except Exception as ne:
+            logger.warning(f"Error refilling similar candidates after deleting {candidate_id}: {str(ne)}")
         flash(f'Candidato {candidate_name} eliminado exitosamente', 'success')
         return jsonify({'success': True, 'message': 'Candidato eliminado'})
     except Exception as e:
@@ -222,18 +342,25 @@ def search_api():
         if request.is_json:
             data = request.get_json()
             search_query = data.get('query', '').strip()
+            # Filtros estructurados opcionales: {"skills": [...], "institutions": [...], "languages": [...],
+            # "clusters": [ids]}
+            filters = data.get('filters') or {}
+            limit = _page_size(data.get('limit'))
+            cursor = data.get('cursor')
 
             try:
                 if search_query:
-                    candidates = search_candidates(search_query)
+                    candidates, next_cursor = search_candidates_page(search_query, filters, limit, cursor)
                 else:
-                    candidates = get_all_candidates(limit=100)
+                    candidates, next_cursor = get_candidates_page(limit, cursor, filters)
 
                 return jsonify({
                     "status": "success",
                     "query": search_query,
+                    "filters": filters,
                     "count": len(candidates),
-                    "candidates": [c.to_dict() for c in candidates]
+                    "candidates": [c.to_dict() for c in candidates],
+                    "next_cursor": next_cursor
                 })
             except Exception as e:
                 logger.error(f"Error performing search: {str(e)}")
@@ -247,7 +374,7 @@ def search_api():
                     candidates = search_candidates(search_query)
                     flash(f'Found {len(candidates)} candidate(s) for "{search_query}"', 'success' if candidates else 'info')
                 else:
-                    candidates = get_all_candidates(limit=100)
+                    candidates, _ = get_candidates_page(limit=100)
                     flash(f'Most recent {len(candidates)} candidates loaded', 'info')
             except Exception as e:
                 logger.error(f"Error performing search: {str(e)}")
@@ -256,37 +383,127 @@ def search_api():
     return render_template('search_new.html', candidates=candidates, search_query=search_query)
 
 
+@routes_bp.route('/api/match', methods=['POST'])
+def match_api():
+    """
+    Rank all candidates against a job description.
+
+    Body: {"description": "...", "limit": 50}
+    Response (application/x-ndjson): a header line with the extracted
+    requirements, then one line per candidate, best first, with its score
+    breakdown.
+    """
+    data = request.get_json(silent=True) or {}
+    description = (data.get('description') or '').strip()
+    if not description:
+        return jsonify({"status": "error", "message": "description is required"}), 400
+    try:
+        limit = max(1, min(int(data.get('limit') or get_config('MATCH_TOP_K', 50)),
+                           get_config('MATCH_MAX_RESULTS', 500)))
+    except (TypeError, ValueError):
+        return jsonify({"status": "error", "message": "limit must be an integer"}), 400
+
+    try:
+        result = match_job_description(description, encode_local, limit)
+    except Exception as e:
+        logger.error(f"Error matching job description: {str(e)}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+    def generate():
+        yield json.dumps({
+            "status": "success",
+            "requirements": result['requirements'],
+            "scored": result['scored'],
+            "timings": {name: round(value, 1) for name, value in result['timings'].items()}
+        }) + "\n"
+        for match in iter_matches(result['ranking'], limit):
+            yield json.dumps(match) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+@routes_bp.route('/api/search-batch', methods=['POST'])
+def search_batch_api():
+    """
+    Run several semantic searches in one request.
+
+    Body: {"queries": ["backend python", "frontend react", ...], "limit": 10, "min_similarity": 0.3,
+           "pooling": "max"}  (optional: rank by section embeddings, "max" or "weighted")
+    """
+    data = request.get_json(silent=True) or {}
+    queries = [str(query).strip() for query in data.get('queries') or [] if str(query).strip()]
+    if not queries:
+        return jsonify({"status": "error", "message": "queries must be a non-empty list"}), 400
+    if len(queries) > get_config('BATCH_SEARCH_MAX_QUERIES', 100):
+        return jsonify({"status": "error",
+                        "message": f"At most {get_config('BATCH_SEARCH_MAX_QUERIES', 100)} queries per batch"}), 400
+    pooling = data.get('pooling')
+    if pooling not in (None, 'max', 'weighted'):
+        return jsonify({"status": "error", "message": "pooling must be 'max' or 'weighted'"}), 400
+    try:
+        min_similarity = float(data.get('min_similarity') or 0.0)
+    except (TypeError, ValueError):
+        return jsonify({"status": "error", "message": "min_similarity must be a number"}), 400
+
+    try:
+        result = search_candidates_batch(queries, encode_local, _page_size(data.get('limit')),
+                                         min_similarity, pooling=pooling)
+        return jsonify({
+            "status": "success",
+            "count": len(queries),
+            "results": [
+                {
+                    "query": item['query'],
+                    "count": len(item['candidates']),
+                    "candidates": [c.to_dict() | {"similarity": c.similarity} |
+                                   ({"best_section": item['sections'][c.id]} if c.id in item['sections'] else {})
+                                   for c in item['candidates']]
+                }
+                for item in result['results']
+            ],
+            "timings": {name: round(value, 1) for name, value in result['timings'].items()}
+        })
+    except Exception as e:
+        logger.error(f"Error performing batch search: {str(e)}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
 @routes_bp.route('/api/candidates-vectors-detailed', methods=['GET', 'POST'])
 def candidates_vectors_detailed():
     try:
         # Obtener query desde POST (JSON) o GET (query param)
         if request.method == 'POST':
             data = request.get_json(silent=True) or {}
-            query = data.get("query", "").strip()
         else:
-            query = request.args.get("query", "").strip()
+            data = request.args
+        query = (data.get("query") or "").strip()
+        limit = _page_size(data.get("limit"))
+        cursor = data.get("cursor")
 
-        # Si hay query, usar search. Si no, traer todos los candidatos
         if query:
-            matched_candidates = search_candidates(query)
+            # Ranking por similitud sobre el conjunto de coincidencias, paginado por (score, id)
+            rows, _ = search_candidate_rows(query, limit=get_config('RANKED_SEARCH_MAX_RESULTS', 1000),
+                                            extra_columns=(CandidateDocument.full_text,))
+            matched_candidates = [
+                CandidateSummary.from_row(row, similarity=round(estimate_similarity(query, row), 4))
+                for row in rows
+            ]
+            page, next_cursor = paginate_ranked(matched_candidates, lambda c: c.similarity, limit, cursor)
         else:
-            matched_candidates = get_all_candidates(limit=100)
-
-        # Estimar similitud (sólo si hay query), sino 0
-        for candidate in matched_candidates:
-            candidate.similarity = estimate_similarity(query, candidate) if query else 0.0
-
-        # Ordenar por similitud descendente
-        matched_candidates.sort(key=lambda c: c.similarity, reverse=True)
+            # Sin query todos tienen similitud 0: paginar por recencia
+            page, next_cursor = get_candidates_page(limit, cursor)
 
+        # Coordenadas 2-D precalculadas (None si el candidato aún no está en el mapa)
+        coordinates = get_map_coordinates(candidate.id for candidate in page)
         return jsonify({
             "status": "success",
             "query": query,
-            "count": len(matched_candidates),
+            "count": len(page),
             "candidates": [
-                candidate.to_dict() | {"similarity": round(candidate.similarity, 4)}
-                for candidate in matched_candidates
-            ]
+                candidate.to_dict() | {"similarity": candidate.similarity, "map": coordinates.get(candidate.id)}
+                for candidate in page
+            ],
+            "next_cursor": next_cursor
         })
 
     except Exception as e:
@@ -311,6 +528,161 @@ def estimate_similarity(query, candidate):
     return matches / len(keywords) if keywords else 0
 
 
+@routes_bp.route('/clusters')
+def clusters():
+    try:
+        return render_template('clusters.html', clusters=list_clusters())
+    except Exception as e:
+        logger.error(f"Error fetching clusters: {str(e)}")
+        flash(f'Error fetching clusters: {str(e)}', 'error')
+        return render_template('clusters.html', clusters=[])
+
+
+@routes_bp.route('/api/clusters')
+def clusters_api():
+    """
+    Talent-pool clusters with their size and top skills. Filter searches
+    with {"filters": {"clusters": [id]}} on /search-api.
+    """
+    try:
+        clusters = list_clusters()
+        return jsonify({"status": "success", "count": len(clusters), "clusters": clusters})
+    except Exception as e:
+        logger.error(f"Error fetching clusters: {str(e)}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@routes_bp.route('/api/facets')
+def facets_api():
+    """
+    Facet counts for all candidates, or for the result set of a query.
+    Query params: q, skills, institutions, languages, clusters (comma separated), top.
+    """
+    try:
+        search_query = request.args.get('q', '').strip()
+        filters = {
+            key: [v.strip() for v in request.args.get(key, '').split(',') if v.strip()]
+            for key in ('skills', 'institutions', 'languages', 'clusters')
+        }
+        filters = {key: values for key, values in filters.items() if values}
+
+        candidate_ids = search_candidate_ids(search_query, filters)
+        facets = get_facet_index().counts(candidate_ids, top=request.args.get('top', type=int))
+
+        return jsonify({
+            "status": "success",
+            "query": search_query,
+            "filters": filters,
+            "total": len(candidate_ids) if candidate_ids is not None else len(get_facet_index()),
+            "facets": facets
+        })
+    except Exception as e:
+        logger.error(f"Error computing facets: {str(e)}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@routes_bp.route('/api/saved-searches', methods=['GET', 'POST'])
+def saved_searches_api():
+    """
+    List saved searches (with unread notification counts) or save one.
+
+    Body (POST): {"name": "Frontend Sr", "query": "react typescript", "filters": {"skills": ["React"]},
+                  "semantic": true, "min_similarity": 0.45}  (semantic matching is optional)
+    """
+    if request.method == 'GET':
+        try:
+            searches = list_saved_searches()
+            return jsonify({"status": "success", "count": len(searches), "saved_searches": searches})
+        except Exception as e:
+            logger.error(f"Error listing saved searches: {str(e)}")
+            return jsonify({"status": "error", "message": str(e)}), 500
+
+    data = request.get_json(silent=True) or {}
+    query = (data.get('query') or '').strip()
+    if not query:
+        return jsonify({"status": "error", "message": "query is required"}), 400
+    filters = data.get('filters') or None
+    if filters is not None and not isinstance(filters, dict):
+        return jsonify({"status": "error", "message": "filters must be an object"}), 400
+    min_similarity = data.get('min_similarity')
+    if min_similarity is None and data.get('semantic'):
+        min_similarity = get_config('SAVED_SEARCH_MIN_SIMILARITY', 0.45)
+    try:
+        min_similarity = float(min_similarity) if min_similarity is not None else None
+    except (TypeError, ValueError):
+        return jsonify({"status": "error", "message": "min_similarity must be a number"}), 400
+
+    try:
+        search = create_saved_search((data.get('name') or query).strip(), query, filters, min_similarity,
+                                     encode_local)
+        return jsonify({"status": "success", "saved_search": search}), 201
+    except Exception as e:
+        logger.error(f"Error saving search: {str(e)}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@routes_bp.route('/api/saved-searches/<int:search_id>', methods=['DELETE'])
+def delete_saved_search_api(search_id):
+    try:
+        if not delete_saved_search(search_id):
+            return jsonify({"status": "error", "message": "Saved search not found"}), 404
+        return jsonify({"status": "success"})
+    except Exception as e:
+        logger.error(f"Error deleting saved search {search_id}: {str(e)}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@routes_bp.route('/api/notifications')
+def notifications_api():
+    """
+    New candidates matching saved searches, newest first.
+    Query params: all=1 (include read ones), saved_search_id, limit.
+    """
+    try:
+        notifications = get_notifications(unread_only=request.args.get('all') != '1',
+                                          saved_search_id=request.args.get('saved_search_id', type=int),
+                                          limit=_page_size(request.args.get('limit')))
+        return jsonify({"status": "success", "count": len(notifications), "notifications": notifications})
+    except Exception as e:
+        logger.error(f"Error fetching notifications: {str(e)}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@routes_bp.route('/api/notifications/read', methods=['POST'])
+def read_notifications_api():
+    """
+    Mark notifications as read. Body: {"ids": [1, 2]} (without ids, all of them).
+    """
+    data = request.get_json(silent=True) or {}
+    ids = data.get('ids')
+    if ids is not None and (not isinstance(ids, list) or not all(isinstance(i, int) for i in ids)):
+        return jsonify({"status": "error", "message": "ids must be a list of integers"}), 400
+    try:
+        return jsonify({"status": "success", "updated": mark_notifications_read(ids)})
+    except Exception as e:
+        logger.error(f"Error marking notifications: {str(e)}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@routes_bp.route('/api/stats')
+def stats_api():
+    """
+    Dashboard counters (total, with vectors, per file type, uploads per day).
+    Query params: days (upload history, default 30).
+    """
+    try:
+        days = max(1, min(request.args.get('days', 30, type=int), 366))
+        return jsonify({"status": "success", "stats": get_dashboard_stats(days)})
+    except Exception as e:
+        logger.error(f"Error reading dashboard stats: {str(e)}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@routes_bp.route('/api/metrics')
+def metrics_api():
+    return jsonify({"status": "success", "metrics": metrics.snapshot()})
+
+
 @routes_bp.errorhandler(413)
 def too_large(e):
     flash('File too large. Maximum size is 16MB.', 'error')
@@ -0,0 +1,114 @@
+"""
+Batch semantic search: many queries against the candidate matrix at once.
+
+All queries are encoded in one call to the local model and scored with a
+single matrix-matrix product per vector block (snapshot + recent local
+embeddings), so the candidate vectors are read once per batch instead of
+once per query. Each query keeps its own top k (argpartition per row),
+and the candidate rows of all results are loaded with one query.
+
+With a section pooling ('max' or 'weighted') each query is ranked by the
+candidates' section embeddings instead (see storage.section_embeddings).
+"""
+import time
+import logging
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from models import Candidate
+from storage.projections import CandidateSummary, summary_query
+from storage.section_embeddings import search_sections
+from storage.vector_snapshot import candidate_vector_sources
+from storage.local_embeddings import local_model_name
+from utils.config import get_config
+
+logger = logging.getLogger(__name__)
+
+def top_k_per_query(query_vectors: np.ndarray, sources, k: int) -> List[List]:
+    """
+    Best candidates of every query with one matrix product per vector block.
+
+    Args:
+        query_vectors (np.ndarray): (n, d) unit query embeddings
+        sources: candidate_vector_sources() blocks
+        k (int): Candidates kept per query
+
+    Returns:
+        List[List]: Per query, (candidate id, similarity) pairs, most similar first
+    """
+    if not sources or not len(query_vectors):
+        return [[] for _ in range(len(query_vectors))]
+    ids = np.concatenate([ids for ids, _ in sources])
+    # (consultas x candidatos): cada bloque de vectores se recorre una sola vez para todo el lote,
+    # y cada fila contigua se particiona por separado
+    scores = np.concatenate([query_vectors @ np.asarray(vectors).T for _, vectors in sources], axis=1)
+
+    k = min(k, len(ids))
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k] if k < len(ids) else \
+        np.broadcast_to(np.arange(len(ids)), scores.shape)
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind='stable')
+    top, top_scores = np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+    return [list(zip(ids[row].tolist(), row_scores.tolist())) for row, row_scores in zip(top, top_scores)]
+
+def search_candidates_batch(queries: Sequence[str], encode: Callable[[Sequence[str]], np.ndarray],
+                            limit: Optional[int] = None, min_similarity: float = 0.0,
+                            model_name: Optional[str] = None, pooling: Optional[str] = None) -> Dict:
+    """
+    Run several semantic searches in one pass.
+
+    Args:
+        queries (Sequence[str]): Search texts
+        encode (Callable): Encodes a list of texts into a (n, d) float array (local model)
+        limit (Optional[int]): Results per query. Defaults to PAGE_SIZE.
+        min_similarity (float): Minimum cosine similarity of a result
+        model_name (Optional[str]): Local model of the candidate vectors. Defaults to LOCAL_EMBEDDING_MODEL.
+        pooling (Optional[str]): Rank by section embeddings with this pooling ('max' or 'weighted')
+            instead of the candidate vectors
+
+    Returns:
+        Dict: results (per query: query, candidates with similarity and, with a pooling, the best
+        section of each candidate) and timings in ms
+    """
+    limit = limit or get_config('PAGE_SIZE', 50)
+    model_name = model_name or local_model_name()
+    timings = {}
+
+    start = time.perf_counter()
+    query_vectors = np.asarray(encode(list(queries)), dtype=np.float32)
+    norms = np.linalg.norm(query_vectors, axis=1, keepdims=True)
+    query_vectors = query_vectors / np.where(norms > 0, norms, 1)
+    timings['embedding_ms'] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    # Margen para los candidatos borrados después de exportar el snapshot
+    sections = [{} for _ in queries]
+    if pooling:
+        ranked = []
+        for query_vector, best in zip(query_vectors, sections):
+            ranking = search_sections(query_vector, limit * 2, pooling, model_name)
+            best.update((candidate_id, section) for candidate_id, _, section in ranking)
+            ranked.append([(candidate_id, score) for candidate_id, score, _ in ranking])
+    else:
+        ranked = top_k_per_query(query_vectors, candidate_vector_sources(model_name), limit * 2)
+    timings['scoring_ms'] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    wanted = list({candidate_id for ranking in ranked for candidate_id, score in ranking if score >= min_similarity})
+    rows = {}
+    for offset in range(0, len(wanted), 500):
+        chunk = wanted[offset:offset + 500]
+        rows.update((row.id, row) for row in summary_query().filter(Candidate.id.in_(chunk)))
+
+    results = []
+    for query, ranking, best in zip(queries, ranked, sections):
+        candidates = [
+            CandidateSummary.from_row(rows[candidate_id], similarity=round(score, 4))
+            for candidate_id, score in ranking if score >= min_similarity and candidate_id in rows
+        ][:limit]
+        results.append({'query': query, 'candidates': candidates, 'sections': best})
+    timings['rows_ms'] = (time.perf_counter() - start) * 1000
+
+    logger.info(f"Batch search: {len(queries)} queries, scoring {timings['scoring_ms']:.1f} ms")
+    return {'results': results, 'timings': timings}
@@ -0,0 +1,345 @@
+"""
+Talent-pool clustering ("frontend juniors", ".NET seniors") over the local
+embeddings, with spherical mini-batch k-means.
+
+- refit: CLUSTER_ITERATIONS steps, each on CLUSTER_BATCH_SIZE vectors drawn
+  at random from the vector snapshot (memory-mapped, so only those rows are
+  read) and the local embeddings stored after it; memory stays bounded by
+  the batch size whatever the pool size. A refit starts from the previous
+  centroids, so cluster ids stay stable, then assigns every candidate in
+  streamed blocks and writes only the assignments that changed.
+- upload: the new candidate joins the nearest centroid, which moves towards
+  it (online mini-batch step); every CLUSTER_REFIT_EVERY uploads a refit
+  runs in a background thread.
+
+Clusters are labelled with the most common skills of their members and the
+seniority of their average years of experience.
+"""
+import json
+import time
+import logging
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import delete, func, select, update, bindparam
+
+from extensions import db
+from models import Candidate, CandidateCluster, CandidateLocalEmbedding, CandidateSkill
+from storage.local_embeddings import decode_vector, encode_vector, local_model_name
+from storage.vector_snapshot import candidate_vector_sources
+from utils.config import get_config
+
+logger = logging.getLogger(__name__)
+
+# Años medios de experiencia -> etiqueta de seniority
+SENIORITY = ((3, 'Junior'), (6, 'Semi-senior'), (None, 'Senior'))
+WRITE_CHUNK = 5000
+
+_refit_lock = threading.Lock()
+_assigned_since_refit = 0
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms > 0, norms, 1)
+
+def _gather(sources, offsets: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    # Filas sueltas de los bloques (posiciones globales ordenadas); del snapshot sólo se leen esas páginas
+    parts = []
+    for (_, vectors), start, end in zip(sources, offsets[:-1], offsets[1:]):
+        selected = positions[(positions >= start) & (positions < end)] - start
+        if len(selected):
+            parts.append(np.asarray(vectors[selected], dtype=np.float32))
+    return np.concatenate(parts)
+
+def _kmeans_plus_plus(sample: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    # k-means++ "greedy": varios candidatos por paso, se queda el que más reduce la distancia total
+    trials = 2 + int(np.log(k))
+    centroids = [sample[rng.integers(len(sample))]]
+    # Distancia euclídea al cuadrado entre vectores unitarios: 2 - 2 cos
+    distance = np.maximum(2 - 2 * sample @ centroids[0], 0)
+    for _ in range(1, k):
+        total = distance.sum()
+        candidates = rng.choice(len(sample), trials, p=distance / total) if total > 0 else \
+            rng.integers(len(sample), size=trials)
+        distances = np.minimum(distance, np.maximum(2 - 2 * sample[candidates] @ sample.T, 0))
+        best = int(np.argmin(distances.sum(axis=1)))
+        centroids.append(sample[candidates[best]])
+        distance = distances[best]
+    return np.stack(centroids)
+
+def minibatch_kmeans(sources, k: int, iterations: int, batch_size: int,
+                     centroids: Optional[np.ndarray] = None, seed: int = 0) -> np.ndarray:
+    """
+    Spherical mini-batch k-means (Sculley, 2010) over vector blocks.
+
+    Args:
+        sources: candidate_vector_sources() blocks (unit vectors)
+        k (int): Clusters
+        iterations (int): Mini-batches
+        batch_size (int): Vectors per mini-batch
+        centroids (Optional[np.ndarray]): (k, d) starting centroids. Defaults to k-means++ on a sample.
+        seed (int): Random seed
+
+    Returns:
+        np.ndarray: (k, d) unit centroids
+    """
+    rng = np.random.default_rng(seed)
+    offsets = np.cumsum([0] + [len(ids) for ids, _ in sources])
+    total = int(offsets[-1])
+    batch_size = min(batch_size, total)
+
+    if centroids is None or len(centroids) != k:
+        sample = _gather(sources, offsets, np.sort(rng.choice(total, min(total, max(batch_size, 10 * k)),
+                                                              replace=False)))
+        centroids = _kmeans_plus_plus(sample, k, rng)
+    centroids = np.array(centroids, dtype=np.float32)
+
+    counts = np.zeros(k, dtype=np.float64)
+    for _ in range(iterations):
+        batch = _gather(sources, offsets, np.sort(rng.choice(total, batch_size, replace=False)))
+        labels = np.argmax(batch @ centroids.T, axis=1)
+        batch_counts = np.bincount(labels, minlength=k)
+        # Suma por cluster como producto con la matriz de pertenencia (más rápido que np.add.at)
+        membership = np.zeros((len(batch), k), dtype=np.float32)
+        membership[np.arange(len(batch)), labels] = 1
+        sums = membership.T @ batch
+        # Paso por centroide con tasa n_lote / n_acumulado: converge al centro de sus puntos
+        counts += batch_counts
+        touched = batch_counts > 0
+        rate = (batch_counts[touched] / counts[touched]).astype(np.float32)[:, None]
+        centroids[touched] = (1 - rate) * centroids[touched] + rate * (sums[touched] / batch_counts[touched, None])
+        centroids = _normalize(centroids)
+    return centroids
+
+def assign_clusters(sources, centroids: np.ndarray, batch_size: int):
+    """
+    Nearest centroid of every vector, in streamed blocks.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: candidate ids, cluster index and cosine similarity
+    """
+    ids, labels, similarities = [], [], []
+    for block_ids, vectors in sources:
+        for start in range(0, len(block_ids), batch_size):
+            scores = np.asarray(vectors[start:start + batch_size], dtype=np.float32) @ centroids.T
+            best = np.argmax(scores, axis=1)
+            ids.append(np.asarray(block_ids[start:start + batch_size]))
+            labels.append(best)
+            similarities.append(scores[np.arange(len(best)), best])
+    return np.concatenate(ids), np.concatenate(labels), np.concatenate(similarities)
+
+def _stored_centroids(model_name: str) -> Dict[int, np.ndarray]:
+    rows = db.session.execute(select(CandidateCluster.id, CandidateCluster.centroid)
+                              .where(CandidateCluster.model == model_name)
+                              .order_by(CandidateCluster.id)).all()
+    return {cluster_id: decode_vector(centroid) for cluster_id, centroid in rows}
+
+def _seniority(years: Optional[float]) -> Optional[str]:
+    if years is None:
+        return None
+    return next(label for limit, label in SENIORITY if limit is None or years < limit)
+
+def label_clusters() -> Dict[int, str]:
+    """
+    Label every cluster with its members' most common skills and seniority.
+
+    Returns:
+        Dict[int, str]: Label per cluster id
+    """
+    from storage.sqlite_profile import run_write
+
+    top = get_config('CLUSTER_LABEL_SKILLS', 3)
+    skills: Dict[int, List] = {}
+    rows = db.session.execute(
+        select(Candidate.cluster_id, func.min(CandidateSkill.name), func.count())
+        .join(CandidateSkill, CandidateSkill.candidate_id == Candidate.id)
+        .where(Candidate.cluster_id.isnot(None))
+        .group_by(Candidate.cluster_id, CandidateSkill.canonical)
+    ).all()
+    for cluster_id, name, count in rows:
+        skills.setdefault(cluster_id, []).append((name, count))
+    years = dict(db.session.execute(
+        select(Candidate.cluster_id, func.avg(Candidate.experience_years))
+        .where(Candidate.cluster_id.isnot(None))
+        .group_by(Candidate.cluster_id)
+    ).all())
+
+    labels, top_skills = {}, {}
+    for cluster_id in db.session.execute(select(CandidateCluster.id)).scalars():
+        best = sorted(skills.get(cluster_id, []), key=lambda item: (-item[1], item[0]))[:max(top, 10)]
+        top_skills[cluster_id] = best
+        label = " · ".join(name for name, _ in best[:top]) or f"Cluster {cluster_id}"
+        seniority = _seniority(years.get(cluster_id))
+        labels[cluster_id] = f"{label} ({seniority})" if seniority else label
+
+    def write(session) -> int:
+        for cluster_id, label in labels.items():
+            session.execute(update(CandidateCluster).where(CandidateCluster.id == cluster_id)
+                            .values(label=label[:200], top_skills=json.dumps(top_skills[cluster_id])))
+        return len(labels)
+
+    run_write(write)
+    return labels
+
+def refit_clusters(model_name: Optional[str] = None, k: Optional[int] = None, iterations: Optional[int] = None,
+                   batch_size: Optional[int] = None, restart: bool = False) -> Dict:
+    """
+    Fit the clusters again over every candidate vector and reassign candidates.
+    Must run inside an app context.
+
+    Args:
+        model_name (Optional[str]): Local model. Defaults to LOCAL_EMBEDDING_MODEL.
+        k (Optional[int]): Clusters. Defaults to CLUSTER_COUNT.
+        iterations (Optional[int]): Mini-batches. Defaults to CLUSTER_ITERATIONS.
+        batch_size (Optional[int]): Vectors per mini-batch. Defaults to CLUSTER_BATCH_SIZE.
+        restart (bool): Start from k-means++ instead of the stored centroids
+
+    Returns:
+        Dict: candidates, clusters, changed (reassigned candidates), mean_similarity, seconds
+    """
+    from storage.sqlite_profile import run_write
+
+    global _assigned_since_refit
+    model_name = model_name or local_model_name()
+    k = k or get_config('CLUSTER_COUNT', 20)
+    iterations = iterations or get_config('CLUSTER_ITERATIONS', 100)
+    batch_size = batch_size or get_config('CLUSTER_BATCH_SIZE', 4096)
+    start = time.perf_counter()
+
+    sources = candidate_vector_sources(model_name)
+    total = sum(len(ids) for ids, _ in sources)
+    if total < k:
+        return {'candidates': total, 'clusters': 0, 'changed': 0, 'mean_similarity': 0.0, 'seconds': 0.0}
+
+    previous = {} if restart else _stored_centroids(model_name)
+    initial = np.stack([previous[i] for i in range(1, k + 1)]) if set(previous) >= set(range(1, k + 1)) else None
+    centroids = minibatch_kmeans(sources, k, iterations, batch_size, initial)
+    ids, labels, similarities = assign_clusters(sources, centroids, batch_size)
+    cluster_ids = labels + 1
+
+    def write_clusters(session) -> None:
+        for index, centroid in enumerate(centroids, start=1):
+            session.merge(CandidateCluster(id=index, model=model_name, centroid=encode_vector(centroid)))
+
+    run_write(write_clusters)
+
+    # Sólo se reescriben las asignaciones que cambiaron
+    current = dict(db.session.execute(select(Candidate.id, Candidate.cluster_id)).all())
+    changed = [{'candidate_id': int(candidate_id), 'cluster_id': int(cluster_id)}
+               for candidate_id, cluster_id in zip(ids.tolist(), cluster_ids.tolist())
+               if candidate_id in current and current[candidate_id] != cluster_id]
+    statement = update(Candidate.__table__).where(Candidate.__table__.c.id == bindparam('candidate_id'))\
+        .values(cluster_id=bindparam('cluster_id'))
+    for offset in range(0, len(changed), WRITE_CHUNK):
+        chunk = changed[offset:offset + WRITE_CHUNK]
+        run_write(lambda session, chunk=chunk: session.execute(statement, chunk))
+
+    def drop_extra_clusters(session) -> None:
+        # Clusters de un ajuste anterior con más k (o de otro modelo)
+        extra = select(CandidateCluster.id).where((CandidateCluster.id > k) | (CandidateCluster.model != model_name))
+        session.execute(update(Candidate).where(Candidate.cluster_id.in_(extra)).values(cluster_id=None))
+        session.execute(delete(CandidateCluster).where(CandidateCluster.id.in_(extra)))
+
+    run_write(drop_extra_clusters)
+    db.session.commit()
+    label_clusters()
+
+    _assigned_since_refit = 0
+    stats = {
+        'candidates': len(ids),
+        'clusters': k,
+        'changed': len(changed),
+        'mean_similarity': float(similarities.mean()),
+        'seconds': time.perf_counter() - start
+    }
+    logger.info(f"Cluster refit: {stats}")
+    return stats
+
+def assign_candidate_cluster(candidate_id: int, model_name: Optional[str] = None) -> Optional[int]:
+    """
+    Put a newly embedded candidate in its nearest cluster and move that
+    centroid towards it. Schedules a background refit every CLUSTER_REFIT_EVERY calls.
+
+    Args:
+        candidate_id (int): Candidate with a stored local embedding
+        model_name (Optional[str]): Local model. Defaults to LOCAL_EMBEDDING_MODEL.
+
+    Returns:
+        Optional[int]: Cluster id, or None if there are no clusters (or no embedding) yet
+    """
+    from storage.sqlite_profile import run_write
+
+    global _assigned_since_refit
+    model_name = model_name or local_model_name()
+    _assigned_since_refit += 1
+    refit_every = get_config('CLUSTER_REFIT_EVERY', 500)
+    if refit_every and _assigned_since_refit >= refit_every:
+        schedule_refit(model_name)
+
+    stored = db.session.get(CandidateLocalEmbedding, (candidate_id, model_name))
+    centroids = _stored_centroids(model_name)
+    if stored is None or not centroids:
+        return None
+    vector = _normalize(decode_vector(stored.vector))
+    cluster_ids = list(centroids)
+    matrix = np.stack([centroids[cluster_id] for cluster_id in cluster_ids])
+    cluster_id = cluster_ids[int(np.argmax(matrix @ vector))]
+    size = db.session.execute(select(func.count()).where(Candidate.cluster_id == cluster_id)).scalar()
+    db.session.rollback()
+    centroid = _normalize(centroids[cluster_id] + (vector - centroids[cluster_id]) / (size + 1))
+
+    def write(session) -> int:
+        session.execute(update(Candidate).where(Candidate.id == candidate_id).values(cluster_id=cluster_id))
+        session.execute(update(CandidateCluster).where(CandidateCluster.id == cluster_id)
+                        .values(centroid=encode_vector(centroid)))
+        return cluster_id
+
+    return run_write(write)
+
+def schedule_refit(model_name: Optional[str] = None) -> bool:
+    """
+    Start a refit in a background thread (one at a time per process).
+    Must be called inside an app context.
+
+    Returns:
+        bool: False if a refit is already running
+    """
+    global _assigned_since_refit
+    if not _refit_lock.acquire(blocking=False):
+        return False
+    _assigned_since_refit = 0
+    app = current_app._get_current_object()
+
+    def run():
+        try:
+            with app.app_context():
+                refit_clusters(model_name)
+        except Exception as e:
+            logger.warning(f"Background cluster refit failed: {str(e)}")
+        finally:
+            _refit_lock.release()
+
+    threading.Thread(target=run, name='cluster-refit', daemon=True).start()
+    return True
+
+def list_clusters() -> List[Dict]:
+    """
+    Clusters with their current size, largest first.
+
+    Returns:
+        List[Dict]: id, label, size and top_skills ([skill, candidates] pairs)
+    """
+    sizes = dict(db.session.execute(
+        select(Candidate.cluster_id, func.count()).where(Candidate.cluster_id.isnot(None))
+        .group_by(Candidate.cluster_id)
+    ).all())
+    clusters = [{
+        'id': cluster.id,
+        'label': cluster.label or f"Cluster {cluster.id}",
+        'size': sizes.get(cluster.id, 0),
+        'top_skills': json.loads(cluster.top_skills) if cluster.top_skills else []
+    } for cluster in db.session.execute(select(CandidateCluster)).scalars()]
+    return sorted(clusters, key=lambda cluster: (-cluster['size'], cluster['id']))
@@ -0,0 +1,88 @@
+"""
+Indexes derived from a candidate's fields, re-derived whenever they change.
+
+The local embedding and the section embeddings are computed from the
+candidate's fields before its write (outside the writer thread) and written
+in the same transaction as the candidate, so they never describe an older
+version of it. After the commit, rederive_candidate updates what is built
+from the local embedding: the neighbour graph, the cluster, the map
+coordinates and the saved-search notifications. An upload and a late
+vision upgrade both go through here.
+"""
+import logging
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from storage.clustering import assign_candidate_cluster
+from storage.embedding_map import update_candidate_map
+from storage.local_embeddings import VECTOR_DTYPE, embedding_input, write_local_embedding, local_model_name
+from storage.saved_searches import percolate_candidate
+from storage.section_embeddings import candidate_sections, write_section_embeddings
+from storage.similar_candidates import link_candidate_neighbors
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LocalVectors:
+    """Local-model vectors of one version of a candidate."""
+    model: str
+    text: str
+    vector: Optional[np.ndarray]
+    sections: List[Tuple[str, int, str]]
+    section_vectors: np.ndarray
+
+    def write(self, session, candidate_id: int) -> None:
+        """Replace the candidate's stored vectors on a session, without committing."""
+        write_local_embedding(session, candidate_id, self.model, self.text, self.vector)
+        write_section_embeddings(session, candidate_id, self.model, self.sections, self.section_vectors)
+
+
+def encode_local_vectors(candidate, encode: Callable[[Sequence[str]], np.ndarray],
+                         model_name: Optional[str] = None) -> LocalVectors:
+    """
+    Encode the local embedding and the sections of a candidate (one encode call).
+
+    Args:
+        candidate: Candidate (its id is not needed)
+        encode (Callable): Encodes a list of texts into a (n, d) float array
+        model_name (Optional[str]): Local model. Defaults to LOCAL_EMBEDDING_MODEL.
+
+    Returns:
+        LocalVectors: Vectors to write with the candidate
+    """
+    model_name = model_name or local_model_name()
+    text = embedding_input(candidate)
+    sections = candidate_sections(candidate)
+    texts = ([text] if text else []) + [section_text for _, _, section_text in sections]
+    vectors = np.asarray(encode(texts), dtype=VECTOR_DTYPE) if texts else np.zeros((0, 0), dtype=VECTOR_DTYPE)
+    vector = vectors[0] if text else None
+    return LocalVectors(model_name, text, vector, sections, vectors[1:] if text else vectors)
+
+def rederive_candidate(candidate_id: int, vectors: LocalVectors, reembedded: bool = False) -> None:
+    """
+    Update the indexes built from a committed candidate's local embedding.
+    Each one is best effort: a failure is logged and does not undo the write.
+
+    Args:
+        candidate_id (int): Committed candidate
+        vectors (LocalVectors): Vectors written with it
+        reembedded (bool): The candidate already had vectors (it was edited)
+    """
+    if vectors.vector is None:
+        return
+    steps = [
+        ('updating similar candidates',
+         lambda: link_candidate_neighbors(candidate_id, vectors.vector, vectors.model, relink=reembedded)),
+        ('assigning cluster', lambda: assign_candidate_cluster(candidate_id, vectors.model)),
+        ('projecting on the map', lambda: update_candidate_map(candidate_id, vectors.model)),
+        # Búsquedas guardadas: sólo se notifican las que aún no lo habían encontrado
+        ('matching against saved searches', lambda: percolate_candidate(candidate_id, vectors.model)),
+    ]
+    for step, run in steps:
+        try:
+            run()
+        except Exception as e:
+            logger.warning(f"Error {step} of candidate {candidate_id}: {str(e)}")
@@ -0,0 +1,164 @@
+"""
+Maintenance of the compressed candidate documents: zstd dictionaries and the
+rewrite of rows stored before compression (see utils/compression.py).
+"""
+import logging
+import random
+from typing import Optional
+
+from sqlalchemy import LargeBinary, select, text, type_coerce, update
+
+from extensions import db
+from models import CandidateDocument, CandidateTerm, CompressionDictionary
+from storage.normalization import text_terms
+from utils.compression import (
+    active_dictionary_id, compress_text, decompress_text, is_compressed,
+    register_dictionary, set_dictionary_loader, train_dictionary, zstd_available
+)
+from utils.config import get_config
+
+logger = logging.getLogger(__name__)
+
+def _fetch_dictionary(dictionary_id: int) -> Optional[bytes]:
+    # Conexión aparte: se llama mientras se leen las filas de otra consulta
+    with db.engine.connect() as connection:
+        return connection.execute(select(CompressionDictionary.data)
+                                  .where(CompressionDictionary.id == dictionary_id)).scalar()
+
+# Diccionarios entrenados por otro proceso (compress_documents.py --train) se cargan al encontrarlos
+set_dictionary_loader(_fetch_dictionary)
+
+def load_compression_dictionaries() -> int:
+    """
+    Register every stored zstd dictionary; the newest one compresses new values.
+    Must run inside an app context.
+
+    Returns:
+        int: Number of dictionaries loaded
+    """
+    if not zstd_available():
+        return 0
+    dictionaries = db.session.query(CompressionDictionary).order_by(CompressionDictionary.id).all()
+    for dictionary in dictionaries:
+        register_dictionary(dictionary.id, dictionary.data, active=True)
+    if dictionaries:
+        logger.info(f"Loaded {len(dictionaries)} compression dictionaries (active: {active_dictionary_id()})")
+    return len(dictionaries)
+
+def train_document_dictionary(sample_size: Optional[int] = None) -> Optional[int]:
+    """
+    Train a zstd dictionary on a random sample of stored CV texts and make it active.
+
+    Args:
+        sample_size (Optional[int]): Documents to sample. Defaults to COMPRESSION_DICT_SAMPLES.
+
+    Returns:
+        Optional[int]: ID of the new dictionary, or None if there are too few documents
+    """
+    sample_size = sample_size or get_config('COMPRESSION_DICT_SAMPLES', 2000)
+    ids = [row[0] for row in db.session.query(CandidateDocument.candidate_id).all()]
+    if len(ids) < 20:
+        logger.warning(f"Only {len(ids)} documents: not enough samples to train a dictionary")
+        return None
+
+    sample_ids = random.sample(ids, min(sample_size, len(ids)))
+    samples = [row[0] for row in db.session.query(CandidateDocument.full_text)
+               .filter(CandidateDocument.candidate_id.in_(sample_ids)).all()]
+
+    dictionary = CompressionDictionary(data=train_dictionary(samples), sample_count=len(samples))
+    db.session.add(dictionary)
+    db.session.commit()
+    register_dictionary(dictionary.id, dictionary.data, active=True)
+
+    logger.info(f"Trained compression dictionary {dictionary.id} on {len(samples)} documents")
+    return dictionary.id
+
+def index_missing_terms(batch_size: int = 500) -> int:
+    """
+    Index the words of the CV text of documents that have no candidate_term
+    rows yet (stored before the term index existed). Keyword search only
+    reads the term index, so these CVs would not match on their text.
+
+    Args:
+        batch_size (int): Documents per transaction
+
+    Returns:
+        int: Documents indexed (those whose text produced no terms are not counted)
+    """
+    indexed = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(CandidateDocument.candidate_id, CandidateDocument.full_text)
+            .where(CandidateDocument.candidate_id > last_id,
+                   CandidateDocument.full_text.isnot(None),
+                   ~CandidateDocument.candidate_id.in_(select(CandidateTerm.candidate_id).distinct()))
+            .order_by(CandidateDocument.candidate_id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        for candidate_id, full_text in rows:
+            terms = text_terms(full_text)
+            db.session.add_all(CandidateTerm(candidate_id=candidate_id, term=term) for term in terms)
+            indexed += bool(terms)
+        db.session.commit()
+        db.session.expunge_all()
+        last_id = rows[-1][0]
+        logger.info(f"Indexed the CV terms of {indexed} documents")
+    return indexed
+
+def rewrite_documents(batch_size: int = 500, recompress: bool = False) -> dict:
+    """
+    Compress documents stored as plain text and index the words of their CV text.
+
+    Args:
+        batch_size (int): Documents per transaction
+        recompress (bool): Also rewrite already compressed values (e.g. after training
+                           a new dictionary)
+
+    Returns:
+        dict: rows seen, rows rewritten, bytes before and after
+    """
+    documents = CandidateDocument.__table__
+    stats = {'rows': 0, 'rewritten': 0, 'bytes_before': 0, 'bytes_after': 0}
+    indexed = {row[0] for row in db.session.execute(select(CandidateTerm.candidate_id).distinct())}
+    last_id = 0
+
+    while True:
+        # SQL directo: leer los valores tal como están guardados, sin descomprimir
+        rows = db.session.execute(text(
+            "SELECT candidate_id, full_text, vision_analysis FROM candidate_document "
+            "WHERE candidate_id > :last_id ORDER BY candidate_id LIMIT :limit"
+        ), {'last_id': last_id, 'limit': batch_size}).fetchall()
+        if not rows:
+            break
+
+        for candidate_id, full_text, vision_analysis in rows:
+            stats['rows'] += 1
+            values = {}
+            for column, stored in (('full_text', full_text), ('vision_analysis', vision_analysis)):
+                if stored is None or (is_compressed(stored) and not recompress):
+                    continue
+                compressed = compress_text(decompress_text(stored))
+                stats['bytes_before'] += len(stored.encode('utf-8') if isinstance(stored, str) else stored)
+                stats['bytes_after'] += len(compressed)
+                # Ya comprimido: escribir los bytes sin volver a pasar por CompressedText
+                values[documents.c[column]] = type_coerce(compressed, LargeBinary)
+
+            if values:
+                db.session.execute(update(documents)
+                                   .where(documents.c.candidate_id == candidate_id)
+                                   .values(values))
+                stats['rewritten'] += 1
+
+            if candidate_id not in indexed and full_text is not None:
+                db.session.add_all(CandidateTerm(candidate_id=candidate_id, term=term)
+                                   for term in text_terms(decompress_text(full_text)))
+
+        db.session.commit()
+        db.session.expunge_all()
+        last_id = rows[-1][0]
+        logger.info(f"Rewrote {stats['rewritten']}/{stats['rows']} candidate documents")
+
+    return stats
@@ -0,0 +1,219 @@
+"""
+2-D map of the talent pool for the vector visualization: a PCA projection
+of the local embeddings, cached per candidate (Candidate.map_x / map_y).
+
+- refit: the mean and covariance are accumulated over MAP_BATCH_SIZE-row
+  blocks of the vector snapshot (memory-mapped) and the local embeddings
+  stored after it, so memory stays at one block plus a d x d matrix whatever
+  the pool size. The two leading eigenvectors are the map axes; their signs
+  follow the previous fit so the picture does not mirror between refits.
+  Every candidate's coordinates are then rewritten.
+- upload: the new candidate is projected on the current axes; every
+  MAP_REFIT_EVERY uploads a refit runs in a background thread.
+"""
+import json
+import time
+import logging
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import select, update, bindparam
+
+from extensions import db
+from models import Candidate, CandidateLocalEmbedding, EmbeddingMap
+from storage.local_embeddings import decode_vector, encode_vector, local_model_name
+from storage.vector_snapshot import candidate_vector_sources
+from utils.config import get_config
+
+logger = logging.getLogger(__name__)
+
+WRITE_CHUNK = 5000
+
+_refit_lock = threading.Lock()
+_projected_since_refit = 0
+
+
+def fit_projection(sources, batch_size: int, previous: Optional[np.ndarray] = None
+                   ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    PCA to two dimensions from streamed vector blocks.
+
+    Args:
+        sources: candidate_vector_sources() blocks
+        batch_size (int): Rows read per step
+        previous (Optional[np.ndarray]): (2, d) axes of the previous fit, to keep their orientation
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: mean (d,), axes (2, d) and explained variance ratio (2,)
+    """
+    count = 0
+    total = None
+    moments = None
+    for _, vectors in sources:
+        for start in range(0, len(vectors), batch_size):
+            block = np.asarray(vectors[start:start + batch_size], dtype=np.float64)
+            if total is None:
+                total = np.zeros(block.shape[1])
+                moments = np.zeros((block.shape[1], block.shape[1]))
+            count += len(block)
+            total += block.sum(axis=0)
+            moments += block.T @ block
+
+    mean = total / count
+    covariance = moments / count - np.outer(mean, mean)
+    eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+    axes = eigenvectors[:, ::-1][:, :2].T
+    if previous is not None and previous.shape == axes.shape:
+        axes *= np.where(np.sum(axes * previous, axis=1) < 0, -1, 1)[:, None]
+    ratio = eigenvalues[::-1][:2] / max(eigenvalues.sum(), 1e-12)
+    return mean.astype(np.float32), axes.astype(np.float32), ratio
+
+def project(vectors: np.ndarray, mean: np.ndarray, axes: np.ndarray) -> np.ndarray:
+    """
+    Map coordinates of unit vectors.
+
+    Returns:
+        np.ndarray: (n, 2) coordinates
+    """
+    return (np.asarray(vectors, dtype=np.float32) - mean) @ axes.T
+
+def _stored_map(model_name: str) -> Optional[EmbeddingMap]:
+    return db.session.get(EmbeddingMap, model_name)
+
+def refit_map(model_name: Optional[str] = None, batch_size: Optional[int] = None) -> Dict:
+    """
+    Fit the map axes again and recompute every candidate's coordinates.
+    Must run inside an app context.
+
+    Args:
+        model_name (Optional[str]): Local model. Defaults to LOCAL_EMBEDDING_MODEL.
+        batch_size (Optional[int]): Rows per step. Defaults to MAP_BATCH_SIZE.
+
+    Returns:
+        Dict: candidates, explained_variance (two ratios), seconds
+    """
+    from storage.sqlite_profile import run_write
+
+    global _projected_since_refit
+    model_name = model_name or local_model_name()
+    batch_size = batch_size or get_config('MAP_BATCH_SIZE', 4096)
+    start = time.perf_counter()
+
+    sources = candidate_vector_sources(model_name)
+    total = sum(len(ids) for ids, _ in sources)
+    if total < 3:
+        return {'candidates': total, 'explained_variance': [], 'seconds': 0.0}
+
+    stored = _stored_map(model_name)
+    previous = decode_vector(stored.axes).reshape(2, -1) if stored is not None else None
+    mean, axes, ratio = fit_projection(sources, batch_size, previous)
+    db.session.rollback()
+
+    def write_map(session) -> None:
+        session.merge(EmbeddingMap(model=model_name, mean=encode_vector(mean), axes=encode_vector(axes.ravel()),
+                                   explained_variance=json.dumps([round(float(r), 4) for r in ratio]),
+                                   candidates=total))
+
+    run_write(write_map)
+
+    statement = update(Candidate.__table__).where(Candidate.__table__.c.id == bindparam('candidate_id'))\
+        .values(map_x=bindparam('x'), map_y=bindparam('y'))
+    for ids, vectors in sources:
+        for offset in range(0, len(ids), WRITE_CHUNK):
+            coordinates = project(vectors[offset:offset + WRITE_CHUNK], mean, axes).tolist()
+            chunk = [{'candidate_id': int(candidate_id), 'x': x, 'y': y}
+                     for candidate_id, (x, y) in zip(ids[offset:offset + WRITE_CHUNK].tolist(), coordinates)]
+            run_write(lambda session, chunk=chunk: session.execute(statement, chunk))
+
+    _projected_since_refit = 0
+    stats = {
+        'candidates': total,
+        'explained_variance': [round(float(r), 4) for r in ratio],
+        'seconds': time.perf_counter() - start
+    }
+    logger.info(f"Embedding map refit: {stats}")
+    return stats
+
+def update_candidate_map(candidate_id: int, model_name: Optional[str] = None) -> Optional[Tuple[float, float]]:
+    """
+    Project a newly embedded candidate on the current map axes. Schedules
+    a background refit every MAP_REFIT_EVERY calls.
+
+    Args:
+        candidate_id (int): Candidate with a stored local embedding
+        model_name (Optional[str]): Local model. Defaults to LOCAL_EMBEDDING_MODEL.
+
+    Returns:
+        Optional[Tuple[float, float]]: Coordinates, or None if there is no map (or no embedding) yet
+    """
+    from storage.sqlite_profile import run_write
+
+    global _projected_since_refit
+    model_name = model_name or local_model_name()
+    _projected_since_refit += 1
+    refit_every = get_config('MAP_REFIT_EVERY', 1000)
+    if refit_every and _projected_since_refit >= refit_every:
+        schedule_map_refit(model_name)
+
+    stored = db.session.get(CandidateLocalEmbedding, (candidate_id, model_name))
+    embedding_map = _stored_map(model_name)
+    if stored is None or embedding_map is None:
+        return None
+    vector = decode_vector(stored.vector)
+    vector = vector / (np.linalg.norm(vector) or 1)
+    x, y = project(vector[None, :], decode_vector(embedding_map.mean),
+                   decode_vector(embedding_map.axes).reshape(2, -1))[0].tolist()
+    db.session.rollback()
+
+    def write(session) -> Tuple[float, float]:
+        session.execute(update(Candidate).where(Candidate.id == candidate_id).values(map_x=x, map_y=y))
+        return x, y
+
+    return run_write(write)
+
+def schedule_map_refit(model_name: Optional[str] = None) -> bool:
+    """
+    Start a map refit in a background thread (one at a time per process).
+    Must be called inside an app context.
+
+    Returns:
+        bool: False if a refit is already running
+    """
+    global _projected_since_refit
+    if not _refit_lock.acquire(blocking=False):
+        return False
+    _projected_since_refit = 0
+    app = current_app._get_current_object()
+
+    def run():
+        try:
+            with app.app_context():
+                refit_map(model_name)
+        except Exception as e:
+            logger.warning(f"Background embedding map refit failed: {str(e)}")
+        finally:
+            _refit_lock.release()
+
+    threading.Thread(target=run, name='embedding-map-refit', daemon=True).start()
+    return True
+
+def get_map_coordinates(candidate_ids: Iterable[int]) -> Dict[int, Dict[str, float]]:
+    """
+    Cached map coordinates of some candidates.
+
+    Args:
+        candidate_ids (Iterable[int]): Candidate ids
+
+    Returns:
+        Dict[int, Dict[str, float]]: {"x", "y"} per candidate id (candidates not mapped yet are absent)
+    """
+    candidate_ids = list(candidate_ids)
+    if not candidate_ids:
+        return {}
+    rows = db.session.execute(
+        select(Candidate.id, Candidate.map_x, Candidate.map_y)
+        .where(Candidate.id.in_(candidate_ids), Candidate.map_x.isnot(None))
+    ).all()
+    return {candidate_id: {'x': round(x, 4), 'y': round(y, 4)} for candidate_id, x, y in rows}
@@ -0,0 +1,529 @@
+"""
+In-memory facet engine for the search UI ("Python (312) · Java (201) · ESPOL (88)").
+
+Facet values come from the normalized attribute tables (see storage/normalization.py)
+and from the estimated years of experience. The index keeps:
+- global counts per value, updated incrementally on upload/edit/delete,
+- the values of each candidate, for exact counts over small result sets,
+- packed bitmaps (one bit per candidate id) for the most frequent values, so
+  counts over large result sets are a bitwise AND + popcount per value,
+- dense per-id arrays of numeric attributes (years of experience, degree
+  level), so requirement matching scores the whole pool with numpy.
+
+Every ORM insert, update or delete of a candidate also records its id in
+facet_change, in the same transaction. Each process applies the changes it
+has not seen yet by reloading those candidates only, so uploads, edits and
+deletes handled by another worker show up in its counts too. Bulk jobs
+(backfill_attributes.py) bump the facet_index_version counter instead, and
+every process then reloads its whole index. Both are checked at most once
+per VERSION_CHECK_SECONDS.
+"""
+import time
+import logging
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.orm import selectinload
+
+from extensions import db
+from models import (Candidate, CandidateSkill, CandidateEducation, CandidateLanguage, CandidateCertification,
+                    FacetChange, StatCounter)
+from storage.normalization import degree_level
+from storage.stats import get_counter, increment_counter, FACET_INDEX_VERSION, FACET_CHANGES_PRUNED
+from utils.config import get_config
+
+logger = logging.getLogger(__name__)
+
+FACETS = ('skills', 'institutions', 'languages', 'certifications', 'experience')
+VERSION_CHECK_SECONDS = 1.0
+
+# Bitmaps de 64 bits little-endian: el bit i de la palabra w es el candidato 64*w + i,
+# el mismo orden que np.packbits(..., bitorder='little')
+BITMAP_DTYPE = np.dtype('<u8')
+
+# Atributos numéricos por candidato: nombre -> (dtype, valor desconocido)
+ATTRIBUTES = {
+    'experience_years': (np.float32, np.nan),
+    'degree_level': (np.int8, 0),
+}
+
+# Bandas de experiencia: (mínimo, máximo inclusive, etiqueta)
+EXPERIENCE_BANDS = ((0, 1, '0-1'), (2, 4, '2-4'), (5, 9, '5-9'), (10, None, '10+'))
+
+def experience_band(years: Optional[int]) -> Optional[str]:
+    """
+    Experience band label for a number of years.
+
+    Args:
+        years (Optional[int]): Estimated years of experience
+
+    Returns:
+        Optional[str]: Band label, or None if the years are unknown
+    """
+    if years is None:
+        return None
+    for low, high, label in EXPERIENCE_BANDS:
+        if years >= low and (high is None or years <= high):
+            return label
+    return None
+
+def facet_values(candidate: Candidate) -> Dict[str, List[Tuple[str, str]]]:
+    """
+    Facet values of a candidate as (canonical value, display label) pairs.
+
+    Args:
+        candidate (Candidate): Candidate with its normalized attributes loaded
+
+    Returns:
+        Dict[str, List[Tuple[str, str]]]: Values per facet
+    """
+    band = experience_band(candidate.experience_years)
+    return {
+        'skills': [(s.canonical, s.name) for s in candidate.skill_entries],
+        'institutions': [(e.canonical_institution, e.institution) for e in candidate.education_entries
+                         if e.canonical_institution],
+        'languages': [(l.canonical, l.name) for l in candidate.language_entries],
+        'certifications': [(c.canonical, c.name) for c in candidate.certification_entries],
+        'experience': [(band, band)] if band else []
+    }
+
+
+def attribute_values(candidate: Candidate) -> Dict[str, Optional[float]]:
+    """
+    Numeric attributes of a candidate used for requirement matching.
+
+    Args:
+        candidate (Candidate): Candidate with its normalized attributes loaded
+
+    Returns:
+        Dict[str, Optional[float]]: experience_years and degree_level
+    """
+    return {
+        'experience_years': candidate.experience_years,
+        'degree_level': max((degree_level(e.degree) for e in candidate.education_entries), default=0)
+    }
+
+
+class FacetIndex:
+    """
+    Facet counts over all candidates and over arbitrary result sets.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.loaded = False
+        self.version = 0
+        self.last_change = 0
+        self.checked_at = 0.0
+        self._reset()
+
+    def _reset(self) -> None:
+        self._codes = {facet: {} for facet in FACETS}    # valor -> código
+        self._values = {facet: [] for facet in FACETS}   # código -> valor
+        self._labels = {facet: [] for facet in FACETS}   # código -> etiqueta
+        self._counts = {facet: Counter() for facet in FACETS}
+        self._bitmaps = {facet: {} for facet in FACETS}  # código -> bitmap empaquetado
+        self._candidates = {}                             # candidate_id -> {facet: (códigos)}
+        self._words = 0                                   # palabras de 64 bits por bitmap
+        self._attributes = {name: np.zeros(0, dtype=dtype) for name, (dtype, _) in ATTRIBUTES.items()}
+        self._top_cache = {}
+
+    def __len__(self) -> int:
+        return len(self._candidates)
+
+    # ------------------------------------------------------------------ updates
+
+    def _code(self, facet: str, value: str, label: str) -> int:
+        code = self._codes[facet].get(value)
+        if code is None:
+            code = len(self._values[facet])
+            self._codes[facet][value] = code
+            self._values[facet].append(value)
+            self._labels[facet].append(label or value)
+        return code
+
+    def _ensure_capacity(self, candidate_id: int) -> None:
+        needed = (candidate_id >> 6) + 1
+        if needed <= self._words:
+            return
+        words = max(needed, self._words * 2, 1024)
+        for bitmaps in self._bitmaps.values():
+            for code, bitmap in bitmaps.items():
+                grown = np.zeros(words, dtype=BITMAP_DTYPE)
+                grown[:len(bitmap)] = bitmap
+                bitmaps[code] = grown
+        for name, (dtype, unknown) in ATTRIBUTES.items():
+            grown = np.full(words * 64, unknown, dtype=dtype)
+            grown[:len(self._attributes[name])] = self._attributes[name]
+            self._attributes[name] = grown
+        self._words = words
+
+    def _set_bit(self, bitmap: np.ndarray, candidate_id: int, on: bool) -> None:
+        bit = BITMAP_DTYPE.type(1 << (candidate_id & 63))
+        if on:
+            bitmap[candidate_id >> 6] |= bit
+        else:
+            bitmap[candidate_id >> 6] &= ~bit
+
+    def add(self, candidate_id: int, values: Dict[str, List[Tuple[str, str]]],
+            attributes: Optional[Dict[str, Optional[float]]] = None) -> None:
+        """
+        Index a candidate's facet values.
+
+        Args:
+            candidate_id (int): Candidate ID
+            values (Dict[str, List[Tuple[str, str]]]): Output of facet_values()
+            attributes (Optional[Dict[str, Optional[float]]]): Output of attribute_values()
+        """
+        with self._lock:
+            if candidate_id in self._candidates:
+                self.remove(candidate_id)
+            self._ensure_capacity(candidate_id)
+
+            entry = {}
+            for facet in FACETS:
+                codes = tuple(dict.fromkeys(self._code(facet, value, label)
+                                            for value, label in values.get(facet, []) if value))
+                for code in codes:
+                    self._counts[facet][code] += 1
+                    bitmap = self._bitmaps[facet].get(code)
+                    if bitmap is not None:
+                        self._set_bit(bitmap, candidate_id, True)
+                if codes:
+                    entry[facet] = codes
+            self._candidates[candidate_id] = entry
+            for name, value in (attributes or {}).items():
+                if name in ATTRIBUTES and value is not None:
+                    self._attributes[name][candidate_id] = value
+            self._top_cache = {}
+
+    def remove(self, candidate_id: int) -> None:
+        """
+        Remove a candidate from the index (no-op if it is not indexed).
+
+        Args:
+            candidate_id (int): Candidate ID
+        """
+        with self._lock:
+            entry = self._candidates.pop(candidate_id, None)
+            if entry is None:
+                return
+            for facet, codes in entry.items():
+                for code in codes:
+                    self._counts[facet][code] -= 1
+                    if self._counts[facet][code] <= 0:
+                        del self._counts[facet][code]
+                    bitmap = self._bitmaps[facet].get(code)
+                    if bitmap is not None:
+                        self._set_bit(bitmap, candidate_id, False)
+            for name, (_, unknown) in ATTRIBUTES.items():
+                self._attributes[name][candidate_id] = unknown
+            self._top_cache = {}
+
+    # ------------------------------------------------------------------ queries
+
+    def _top_codes(self, facet: str, limit: int) -> List[int]:
+        key = (facet, limit)
+        if key not in self._top_cache:
+            self._top_cache[key] = [code for code, _ in self._counts[facet].most_common(limit)]
+        return self._top_cache[key]
+
+    def _bitmap(self, facet: str, code: int) -> np.ndarray:
+        bitmap = self._bitmaps[facet].get(code)
+        if bitmap is None:
+            # Valor que se volvió frecuente: construir su bitmap una sola vez
+            bitmap = np.zeros(self._words, dtype=BITMAP_DTYPE)
+            for candidate_id, entry in self._candidates.items():
+                if code in entry.get(facet, ()):
+                    self._set_bit(bitmap, candidate_id, True)
+            self._bitmaps[facet][code] = bitmap
+        return bitmap
+
+    def _format(self, facet: str, counts: Iterable[Tuple[int, int]], top: int) -> List[Dict]:
+        ranked = sorted(((count, code) for code, count in counts if count > 0), key=lambda item: (-item[0], item[1]))
+        return [
+            {'value': self._values[facet][code], 'label': self._labels[facet][code], 'count': int(count)}
+            for count, code in ranked[:top]
+        ]
+
+    def value_mask(self, facet: str, value: str, candidate_ids: np.ndarray) -> np.ndarray:
+        """
+        Which candidates have a facet value.
+
+        Args:
+            facet (str): Facet name
+            value (str): Canonical value
+            candidate_ids (np.ndarray): Candidate ids (int64)
+
+        Returns:
+            np.ndarray: bool per candidate id
+        """
+        with self._lock:
+            mask = np.zeros(len(candidate_ids), dtype=bool)
+            code = self._codes[facet].get(value)
+            if code is None:
+                return mask
+            bits = np.unpackbits(self._bitmap(facet, code).view(np.uint8), bitorder='little')
+            inside = (candidate_ids >= 0) & (candidate_ids < len(bits))
+            mask[inside] = bits[candidate_ids[inside]].astype(bool)
+            return mask
+
+    def attribute(self, name: str, candidate_ids: np.ndarray) -> np.ndarray:
+        """
+        Numeric attribute of many candidates (unknown values as in ATTRIBUTES).
+
+        Args:
+            name (str): Attribute name (see ATTRIBUTES)
+            candidate_ids (np.ndarray): Candidate ids (int64)
+
+        Returns:
+            np.ndarray: Attribute value per candidate id
+        """
+        dtype, unknown = ATTRIBUTES[name]
+        with self._lock:
+            values = self._attributes[name]
+            result = np.full(len(candidate_ids), unknown, dtype=dtype)
+            inside = (candidate_ids >= 0) & (candidate_ids < len(values))
+            result[inside] = values[candidate_ids[inside]]
+            return result
+
+    def has_value(self, facet: str, value: str) -> bool:
+        """Whether any candidate has a facet value."""
+        with self._lock:
+            code = self._codes[facet].get(value)
+            return code is not None and self._counts[facet][code] > 0
+
+    def counts(self, candidate_ids: Optional[Iterable[int]] = None, top: Optional[int] = None,
+               facets: Optional[Iterable[str]] = None) -> Dict[str, List[Dict]]:
+        """
+        Facet counts over all candidates or over a result set.
+
+        Args:
+            candidate_ids (Optional[Iterable[int]]): Result set. None for all candidates.
+            top (Optional[int]): Values per facet. Defaults to FACET_TOP_VALUES.
+            facets (Optional[Iterable[str]]): Facets to compute. Defaults to all.
+
+        Returns:
+            Dict[str, List[Dict]]: value/label/count dicts per facet, most frequent first
+        """
+        top = top or get_config('FACET_TOP_VALUES', 10)
+        facets = [facet for facet in (facets or FACETS) if facet in FACETS]
+
+        with self._lock:
+            if candidate_ids is None:
+                return {
+                    facet: self._format(facet, ((code, self._counts[facet][code])
+                                                for code in self._top_codes(facet, top)), top)
+                    for facet in facets
+                }
+
+            ids = np.asarray(candidate_ids if isinstance(candidate_ids, np.ndarray) else list(candidate_ids),
+                             dtype=np.int64)
+            ids = ids[(ids >= 0) & (ids < self._words * 64)]
+
+            if len(ids) <= get_config('FACET_EXACT_MAX_RESULTS', 500):
+                # Resultado pequeño: conteo exacto recorriendo los valores de cada candidato
+                entries = [self._candidates.get(candidate_id) for candidate_id in ids.tolist()]
+                entries = [entry for entry in entries if entry]
+                return {
+                    facet: self._format(facet, Counter(
+                        code for entry in entries for code in entry.get(facet, ())).items(), top)
+                    for facet in facets
+                }
+
+            # Resultado grande: AND + popcount contra los bitmaps de los valores más frecuentes
+            mask = np.zeros(self._words * 64, dtype=bool)
+            mask[ids] = True
+            result = np.packbits(mask, bitorder='little').view(BITMAP_DTYPE)
+
+            # Si el resultado ocupa pocas palabras, operar sólo sobre ellas
+            touched = np.flatnonzero(result)
+            if len(touched) < self._words // 2:
+                result = result[touched]
+            else:
+                touched = None
+
+            candidates_per_facet = get_config('FACET_BITMAP_VALUES', 100)
+            output = {}
+            for facet in facets:
+                counts = []
+                for code in self._top_codes(facet, max(top, candidates_per_facet)):
+                    bitmap = self._bitmap(facet, code)
+                    if touched is not None:
+                        bitmap = bitmap[touched]
+                    counts.append((code, int(np.bitwise_count(bitmap & result).sum())))
+                output[facet] = self._format(facet, counts, top)
+            return output
+
+    # ------------------------------------------------------------------ loading
+
+    def load(self) -> None:
+        """
+        (Re)build the index from the normalized attribute tables.
+        """
+        with self._lock:
+            self._reset()
+            # Versión y último cambio leídos antes de cargar: lo escrito durante la carga se aplica después
+            self.version = get_counter(FACET_INDEX_VERSION)
+            self.last_change = max(db.session.execute(select(func.max(FacetChange.id))).scalar() or 0,
+                                   get_counter(FACET_CHANGES_PRUNED))
+            self.checked_at = time.monotonic()
+            entries = {}
+
+            sources = (
+                ('skills', CandidateSkill.candidate_id, CandidateSkill.canonical, CandidateSkill.name),
+                ('institutions', CandidateEducation.candidate_id, CandidateEducation.canonical_institution,
+                 CandidateEducation.institution),
+                ('languages', CandidateLanguage.candidate_id, CandidateLanguage.canonical, CandidateLanguage.name),
+                ('certifications', CandidateCertification.candidate_id, CandidateCertification.canonical,
+                 CandidateCertification.name),
+            )
+            for facet, candidate_id, value, label in sources:
+                rows = db.session.query(candidate_id, value, label).execution_options(yield_per=10000)
+                for row_id, row_value, row_label in rows:
+                    if row_value:
+                        entries.setdefault(row_id, {}).setdefault(facet, []).append((row_value, row_label))
+
+            attributes = {}
+            rows = db.session.query(Candidate.id, Candidate.experience_years).execution_options(yield_per=10000)
+            for candidate_id, years in rows:
+                band = experience_band(years)
+                entries.setdefault(candidate_id, {})['experience'] = [(band, band)] if band else []
+                attributes[candidate_id] = {'experience_years': years, 'degree_level': 0}
+
+            rows = db.session.query(CandidateEducation.candidate_id, CandidateEducation.degree)\
+                .filter(CandidateEducation.degree.isnot(None)).execution_options(yield_per=10000)
+            for candidate_id, degree in rows:
+                if candidate_id in attributes:
+                    attributes[candidate_id]['degree_level'] = max(attributes[candidate_id]['degree_level'],
+                                                                   degree_level(degree))
+
+            for candidate_id, values in entries.items():
+                self.add(candidate_id, values, attributes.get(candidate_id))
+
+            # Bitmaps para los valores más frecuentes de cada faceta
+            for facet in FACETS:
+                for code in self._top_codes(facet, get_config('FACET_BITMAP_VALUES', 100)):
+                    self._bitmap(facet, code)
+
+            self.loaded = True
+            logger.info(f"Facet index loaded for {len(self._candidates)} candidates")
+
+    def apply_changes(self) -> int:
+        """
+        Reload the candidates changed (by any process) since the last load or apply.
+
+        Returns:
+            int: Candidates reloaded or removed
+        """
+        with self._lock:
+            changes = db.session.execute(
+                select(FacetChange.id, FacetChange.candidate_id)
+                .where(FacetChange.id > self.last_change)
+                .order_by(FacetChange.id)
+            ).all()
+            if not changes:
+                return 0
+            changed = {candidate_id for _, candidate_id in changes}
+            candidates = db.session.execute(
+                select(Candidate).where(Candidate.id.in_(changed)).options(
+                    selectinload(Candidate.skill_entries), selectinload(Candidate.education_entries),
+                    selectinload(Candidate.language_entries), selectinload(Candidate.certification_entries))
+            ).scalars().all()
+            for candidate in candidates:
+                self.add(candidate.id, facet_values(candidate), attribute_values(candidate))
+            # Los que ya no existen se borraron
+            for candidate_id in changed - {candidate.id for candidate in candidates}:
+                self.remove(candidate_id)
+            self.last_change = changes[-1][0]
+            return len(changed)
+
+
+facet_index = FacetIndex()
+
+def get_facet_index() -> FacetIndex:
+    """
+    Shared facet index, loaded from the database on first use and reloaded
+    when another process invalidated it. Must be called inside an app context.
+    """
+    if facet_index.loaded and time.monotonic() - facet_index.checked_at >= VERSION_CHECK_SECONDS:
+        facet_index.checked_at = time.monotonic()
+        if get_counter(FACET_INDEX_VERSION) != facet_index.version:
+            logger.info("Facet index invalidated by another process, reloading")
+            facet_index.loaded = False
+        elif get_counter(FACET_CHANGES_PRUNED) > facet_index.last_change:
+            # Cambios purgados antes de aplicarlos: no hay delta posible
+            logger.info("Facet index missed pruned changes, reloading")
+            facet_index.loaded = False
+        else:
+            facet_index.apply_changes()
+    if not facet_index.loaded:
+        with facet_index._lock:
+            if not facet_index.loaded:
+                facet_index.load()
+    return facet_index
+
+def invalidate_facet_index() -> None:
+    """
+    Make every process (this one included) reload its facet index on next
+    use. Call after bulk changes to the normalized attribute tables.
+    """
+    from storage.sqlite_profile import run_write
+
+    run_write(lambda session: increment_counter(session.connection(), FACET_INDEX_VERSION))
+
+def index_candidate(candidate: Candidate) -> None:
+    """
+    Add or refresh a candidate in the facet index (after its attributes are committed).
+    """
+    if facet_index.loaded:
+        facet_index.add(candidate.id, facet_values(candidate), attribute_values(candidate))
+
+def unindex_candidate(candidate_id: int) -> None:
+    """
+    Remove a deleted candidate from the facet index.
+    """
+    if facet_index.loaded:
+        facet_index.remove(candidate_id)
+
+def prune_facet_changes(max_age_hours: Optional[float] = None) -> int:
+    """
+    Delete the facet changes older than max_age_hours. A process that had
+    not applied them reloads its whole index instead.
+
+    Args:
+        max_age_hours (Optional[float]): Defaults to FACET_CHANGE_RETENTION_HOURS.
+
+    Returns:
+        int: Changes deleted
+    """
+    from storage.sqlite_profile import run_write
+
+    max_age_hours = get_config('FACET_CHANGE_RETENTION_HOURS', 24) if max_age_hours is None else max_age_hours
+    cutoff = datetime.utcnow() - timedelta(hours=max_age_hours)
+    last = db.session.execute(select(func.max(FacetChange.id)).where(FacetChange.created_at < cutoff)).scalar()
+    db.session.rollback()
+    if not last:
+        return 0
+
+    def write(session) -> int:
+        deleted = session.execute(delete(FacetChange).where(FacetChange.id <= last)).rowcount
+        connection = session.connection()
+        pruned = connection.execute(select(StatCounter.value).where(StatCounter.name == FACET_CHANGES_PRUNED)).scalar()
+        increment_counter(connection, FACET_CHANGES_PRUNED, last - (pruned or 0))
+        return deleted
+
+    return run_write(write)
+
+
+@event.listens_for(Candidate, 'after_insert')
+@event.listens_for(Candidate, 'after_update')
+@event.listens_for(Candidate, 'after_delete')
+def _candidate_changed(mapper, connection, target):
+    # En la misma transacción que el candidato: un rollback descarta ambos
+    connection.execute(insert(FacetChange).values(candidate_id=target.id, created_at=datetime.utcnow()))
+
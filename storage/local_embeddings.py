@@ -0,0 +1,223 @@
+"""
+Embeddings from the local sentence-transformers model, stored per candidate.
+
+Each row keeps the hash of the text it was computed from, so a rebuild only
+re-encodes candidates whose embedding input changed. The rebuild streams the
+candidate table in id order and records its position in job_checkpoint after
+every chunk, so an interrupted run resumes where it stopped.
+"""
+import json
+import time
+import hashlib
+import logging
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import delete, insert, select
+
+from extensions import db
+from models import Candidate, CandidateLocalEmbedding, JobCheckpoint
+from utils.config import get_config
+
+logger = logging.getLogger(__name__)
+
+VECTOR_DTYPE = np.dtype('<f4')
+
+# Columnas que alimentan el embedding local (ninguna de candidate_document)
+EMBEDDING_INPUT_COLUMNS = (
+    Candidate.id,
+    Candidate.name,
+    Candidate.skills,
+    Candidate.summary,
+    Candidate.experience,
+    Candidate.education,
+)
+
+def local_model_name() -> str:
+    """Name of the configured local sentence-transformers model (LOCAL_EMBEDDING_MODEL)."""
+    return get_config('LOCAL_EMBEDDING_MODEL', "sentence-transformers/all-MiniLM-L6-v2")
+
+def _parse_json_field(field) -> str:
+    try:
+        parsed = json.loads(field)
+        if isinstance(parsed, list):
+            return ", ".join(parsed)
+        return str(parsed)
+    except (json.JSONDecodeError, TypeError, ValueError):
+        return str(field or "")
+
+def embedding_input(candidate) -> str:
+    """
+    Text embedded by the local model for a candidate.
+
+    Args:
+        candidate: Candidate or row exposing the EMBEDDING_INPUT_COLUMNS
+
+    Returns:
+        str: Embedding input
+    """
+    return " ".join(filter(None, [
+        candidate.name,
+        _parse_json_field(candidate.skills),
+        _parse_json_field(candidate.summary),
+        _parse_json_field(candidate.experience),
+        _parse_json_field(candidate.education)
+    ])).strip()
+
+def input_hash(text: str) -> str:
+    """sha1 of an embedding input."""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+def encode_vector(vector) -> bytes:
+    """Serialize a vector as float32 bytes."""
+    return np.asarray(vector, dtype=VECTOR_DTYPE).tobytes()
+
+def decode_vector(data: bytes) -> np.ndarray:
+    """Read a vector stored with encode_vector."""
+    return np.frombuffer(data, dtype=VECTOR_DTYPE)
+
+def get_checkpoint(name: str) -> int:
+    """Last candidate id processed by a job (0 if it has not started)."""
+    checkpoint = db.session.get(JobCheckpoint, name)
+    return checkpoint.last_id if checkpoint else 0
+
+def set_checkpoint(name: str, last_id: int) -> None:
+    """Record a job's progress (committed with the caller's transaction)."""
+    checkpoint = db.session.get(JobCheckpoint, name)
+    if checkpoint is None:
+        db.session.add(JobCheckpoint(name=name, last_id=last_id))
+    else:
+        checkpoint.last_id = last_id
+
+def clear_checkpoint(name: str) -> None:
+    """Forget a job's progress (next run starts from the beginning)."""
+    db.session.query(JobCheckpoint).filter(JobCheckpoint.name == name).delete()
+    db.session.commit()
+
+def _store_vectors(model_name: str, ids: List[int], hashes: List[str], vectors: np.ndarray) -> None:
+    # Reemplazo por lotes: un DELETE y un INSERT multi-fila, válido en SQLite y PostgreSQL
+    db.session.execute(delete(CandidateLocalEmbedding).where(
+        CandidateLocalEmbedding.model == model_name, CandidateLocalEmbedding.candidate_id.in_(ids)
+    ))
+    db.session.execute(insert(CandidateLocalEmbedding), [
+        {'candidate_id': candidate_id, 'model': model_name, 'input_hash': hash_,
+         'dimensions': int(vector.shape[0]), 'vector': encode_vector(vector)}
+        for candidate_id, hash_, vector in zip(ids, hashes, vectors)
+    ])
+
+def write_local_embedding(session, candidate_id: int, model_name: str, text: str,
+                          vector: Optional[np.ndarray]) -> None:
+    """
+    Replace a candidate's local embedding on a session, without committing.
+
+    Args:
+        session: Session of the transaction
+        candidate_id (int): Candidate id
+        model_name (str): Model identifier stored with the vector
+        text (str): Embedding input the vector was computed from
+        vector (Optional[np.ndarray]): Vector, or None if the candidate has no input to embed
+    """
+    session.execute(delete(CandidateLocalEmbedding).where(
+        CandidateLocalEmbedding.candidate_id == candidate_id, CandidateLocalEmbedding.model == model_name))
+    if vector is not None:
+        session.execute(insert(CandidateLocalEmbedding), [{
+            'candidate_id': candidate_id, 'model': model_name, 'input_hash': input_hash(text),
+            'dimensions': int(vector.shape[0]), 'vector': encode_vector(vector)
+        }])
+
+def rebuild_local_embeddings(encode: Callable[[Sequence[str]], np.ndarray], model_name: str,
+                             batch_size: Optional[int] = None, chunk_size: Optional[int] = None,
+                             force: bool = False, restart: bool = False) -> Dict:
+    """
+    Embed every candidate whose input changed since its last embedding.
+
+    Candidates are read in id order, chunk_size rows per transaction (streamed
+    with yield_per). Changed inputs are encoded batch_size texts at a time and
+    the checkpoint is committed with each chunk's vectors.
+
+    Args:
+        encode (Callable): Encodes a list of texts into a (n, d) float array
+        model_name (str): Model identifier stored with the vectors
+        batch_size (Optional[int]): Texts per encode call. Defaults to EMBEDDING_BATCH_SIZE.
+        chunk_size (Optional[int]): Candidates per transaction. Defaults to EMBEDDING_CHUNK_SIZE.
+        force (bool): Re-encode even if the input hash did not change
+        restart (bool): Ignore a previous interrupted run's checkpoint
+
+    Returns:
+        Dict: rows read, rows embedded, rows skipped, seconds, rows_per_second
+    """
+    batch_size = batch_size or get_config('EMBEDDING_BATCH_SIZE', 256)
+    chunk_size = chunk_size or get_config('EMBEDDING_CHUNK_SIZE', 5000)
+    job = f"local_embeddings:{model_name}"
+    if restart:
+        clear_checkpoint(job)
+
+    last_id = get_checkpoint(job)
+    if last_id:
+        logger.info(f"Resuming {job} after candidate {last_id}")
+
+    stats = {'rows': 0, 'embedded': 0, 'skipped': 0}
+    start = time.perf_counter()
+    stored_hash = CandidateLocalEmbedding.input_hash
+
+    while True:
+        query = select(*EMBEDDING_INPUT_COLUMNS, stored_hash)\
+            .outerjoin(CandidateLocalEmbedding, (CandidateLocalEmbedding.candidate_id == Candidate.id)
+                       & (CandidateLocalEmbedding.model == model_name))\
+            .where(Candidate.id > last_id)\
+            .order_by(Candidate.id)\
+            .limit(chunk_size)
+        rows = db.session.execute(query.execution_options(yield_per=1000))
+
+        read = 0
+        pending: List[Tuple[int, str, str]] = []
+        for row in rows:
+            read += 1
+            last_id = row.id
+            text = embedding_input(row)
+            hash_ = input_hash(text)
+            if text and (force or hash_ != row.input_hash):
+                pending.append((row.id, hash_, text))
+            else:
+                stats['skipped'] += 1
+        if not read:
+            break
+
+        for offset in range(0, len(pending), batch_size):
+            batch = pending[offset:offset + batch_size]
+            vectors = np.asarray(encode([text for _, _, text in batch]), dtype=VECTOR_DTYPE)
+            _store_vectors(model_name, [b[0] for b in batch], [b[1] for b in batch], vectors)
+
+        stats['rows'] += read
+        stats['embedded'] += len(pending)
+        set_checkpoint(job, last_id)
+        db.session.commit()
+
+        elapsed = time.perf_counter() - start
+        logger.info(f"{job}: {stats['rows']} rows ({stats['embedded']} embedded, {stats['skipped']} unchanged), "
+                    f"{stats['rows'] / elapsed:.0f} rows/s")
+
+    clear_checkpoint(job)
+    stats['seconds'] = time.perf_counter() - start
+    stats['rows_per_second'] = stats['rows'] / stats['seconds'] if stats['seconds'] else 0.0
+    return stats
+
+def iter_local_embeddings(model_name: str, yield_per: int = 5000) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Stream the stored vectors of a model in candidate id order.
+
+    Args:
+        model_name (str): Model identifier
+        yield_per (int): Rows fetched per round-trip
+
+    Yields:
+        Tuple[int, np.ndarray]: candidate id and vector
+    """
+    rows = db.session.execute(
+        select(CandidateLocalEmbedding.candidate_id, CandidateLocalEmbedding.vector)
+        .where(CandidateLocalEmbedding.model == model_name)
+        .order_by(CandidateLocalEmbedding.candidate_id)
+        .execution_options(yield_per=yield_per)
+    )
+    for candidate_id, vector in rows:
+        yield candidate_id, decode_vector(vector)
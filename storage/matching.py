@@ -0,0 +1,199 @@
+"""
+Job-description matching: rank the whole candidate pool against a JD.
+
+The JD is parsed once into structured requirements (skills, languages,
+minimum degree, years of experience) and embedded once with the local
+model. Every candidate is then scored with array operations only:
+
+- semantic: cosine similarity with the candidate vectors (snapshot + recent
+  local embeddings, one matrix-vector product),
+- skills / languages: fraction of the required values the candidate has,
+  from the facet index bitmaps,
+- experience: years of experience over the years required (capped at 1),
+- degree: 1 if the candidate's highest degree reaches the required level.
+
+The final score is the weighted mean of the components that apply
+(MATCH_*_WEIGHT); only the top k candidates are loaded from the database.
+"""
+import time
+import logging
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from constants.constants import SKILL_ALIASES, LANGUAGE_ALIASES
+from models import Candidate
+from storage.facets import get_facet_index
+from storage.normalization import canonical_text, DEGREE_LEVEL_PATTERNS, TERM_PATTERN, YEARS_PATTERN
+from storage.projections import CandidateSummary, summary_query
+from storage.vector_snapshot import candidate_vector_sources
+from storage.local_embeddings import local_model_name
+from utils.config import get_config
+
+logger = logging.getLogger(__name__)
+
+MAX_SKILL_WORDS = 3  # "machine learning", "sql server", "google cloud platform"
+COMPONENTS = ('semantic', 'skills', 'languages', 'experience', 'degree')
+
+def _ngrams(text: str) -> Iterator[str]:
+    words = TERM_PATTERN.findall(canonical_text(text))
+    for size in range(1, MAX_SKILL_WORDS + 1):
+        for start in range(len(words) - size + 1):
+            yield " ".join(words[start:start + size])
+
+def extract_requirements(description: str) -> Dict:
+    """
+    Structured requirements of a job description.
+
+    Skills are the phrases of the JD that are (after alias resolution) a skill
+    some candidate has, so the vocabulary is the pool's own.
+
+    Args:
+        description (str): Job description text
+
+    Returns:
+        Dict: skills and languages (canonical), degree_level (0 = none) and years (None = not stated)
+    """
+    facet_index = get_facet_index()
+    skills, languages = {}, {}
+    for gram in _ngrams(description):
+        language = LANGUAGE_ALIASES.get(gram)
+        if language:
+            languages.setdefault(language, None)
+            continue
+        skill = SKILL_ALIASES.get(gram, gram)
+        if len(skill) > 1 and skill not in skills and facet_index.has_value('skills', skill):
+            skills[skill] = None
+
+    # El requisito es el nivel mínimo mencionado ("ingeniería; deseable maestría" -> tercer nivel);
+    # "técnico" suele ser un adjetivo, sólo cuenta si no hay otro nivel
+    text = canonical_text(description)
+    levels = {level for level, pattern in DEGREE_LEVEL_PATTERNS if pattern.search(text)}
+    degree = min(levels - {1} or levels or {0})
+
+    years = [int(value) for value in YEARS_PATTERN.findall(description)]
+    return {
+        'skills': list(skills),
+        'languages': list(languages),
+        'degree_level': degree,
+        'years': max(years) if years else None
+    }
+
+def _weights() -> Dict[str, float]:
+    return {component: float(get_config(f'MATCH_{component.upper()}_WEIGHT', 0.0)) for component in COMPONENTS}
+
+def score_candidates(query_vector: np.ndarray, requirements: Dict, sources, limit: int) -> Dict:
+    """
+    Score every candidate with vectors against a JD and keep the best ones.
+
+    Args:
+        query_vector (np.ndarray): Unit embedding of the JD
+        requirements (Dict): Output of extract_requirements()
+        sources: candidate_vector_sources() blocks
+        limit (int): Candidates to keep
+
+    Returns:
+        Dict: scored (pool size) and ranking, a list of (candidate id, score, breakdown)
+    """
+    facet_index = get_facet_index()
+    if not sources:
+        return {'scored': 0, 'ranking': []}
+    ids = np.concatenate([ids for ids, _ in sources])
+    components = {'semantic': np.clip(np.concatenate([np.asarray(vectors) @ query_vector
+                                                      for _, vectors in sources]), 0, 1)}
+
+    skill_masks = None
+    if requirements['skills']:
+        skill_masks = np.stack([facet_index.value_mask('skills', skill, ids) for skill in requirements['skills']])
+        components['skills'] = skill_masks.mean(axis=0)
+    if requirements['languages']:
+        components['languages'] = np.mean([facet_index.value_mask('languages', language, ids)
+                                           for language in requirements['languages']], axis=0)
+    if requirements['years']:
+        years = np.nan_to_num(facet_index.attribute('experience_years', ids), nan=0.0)
+        components['experience'] = np.minimum(years / requirements['years'], 1.0)
+    if requirements['degree_level']:
+        components['degree'] = (facet_index.attribute('degree_level', ids) >= requirements['degree_level'])\
+            .astype(np.float32)
+
+    weights = _weights()
+    total_weight = sum(weights[name] for name in components) or 1.0
+    score = sum(weights[name] * values for name, values in components.items()) / total_weight
+
+    # Margen para los candidatos borrados después de exportar el snapshot
+    keep = min(len(ids), limit * 2)
+    top = np.argpartition(-score, keep - 1)[:keep] if keep < len(ids) else np.arange(len(ids))
+    top = top[np.argsort(-score[top], kind='stable')]
+
+    ranking = []
+    for position in top.tolist():
+        breakdown = {name: round(float(values[position]), 4) for name, values in components.items()}
+        if skill_masks is not None:
+            breakdown['matched_skills'] = [skill for skill, mask in zip(requirements['skills'], skill_masks)
+                                           if mask[position]]
+        ranking.append((int(ids[position]), float(score[position]), breakdown))
+    return {'scored': len(ids), 'ranking': ranking}
+
+def match_job_description(description: str, encode: Callable[[Sequence[str]], np.ndarray],
+                          limit: Optional[int] = None, model_name: Optional[str] = None) -> Dict:
+    """
+    Rank the candidate pool against a job description.
+
+    Args:
+        description (str): Job description text
+        encode (Callable): Encodes a list of texts into a (n, d) float array (local model)
+        limit (Optional[int]): Candidates to return. Defaults to MATCH_TOP_K.
+        model_name (Optional[str]): Local model of the candidate vectors. Defaults to LOCAL_EMBEDDING_MODEL.
+
+    Returns:
+        Dict: requirements, scored, limit, ranking (see score_candidates) and timings in ms
+    """
+    limit = limit or get_config('MATCH_TOP_K', 50)
+    model_name = model_name or local_model_name()
+    timings = {}
+
+    start = time.perf_counter()
+    requirements = extract_requirements(description)
+    timings['requirements_ms'] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    query_vector = np.asarray(encode([description]), dtype=np.float32)[0]
+    query_vector = query_vector / (np.linalg.norm(query_vector) or 1.0)
+    timings['embedding_ms'] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    result = score_candidates(query_vector, requirements, candidate_vector_sources(model_name), limit)
+    timings['scoring_ms'] = (time.perf_counter() - start) * 1000
+
+    logger.info(f"JD match: {result['scored']} candidates scored in {timings['scoring_ms']:.1f} ms, "
+                f"requirements {requirements}")
+    return {'requirements': requirements, 'limit': limit, 'timings': timings, **result}
+
+def iter_matches(ranking: List, limit: int, chunk_size: int = 10) -> Iterator[Dict]:
+    """
+    Load the ranked candidates in small chunks, for streaming.
+
+    Args:
+        ranking (List): (candidate id, score, breakdown), best first
+        limit (int): Candidates to yield
+        chunk_size (int): Candidates loaded per query
+
+    Yields:
+        Dict: Candidate summary with rank, score and breakdown
+    """
+    emitted = 0
+    for offset in range(0, len(ranking), chunk_size):
+        chunk = ranking[offset:offset + chunk_size]
+        rows = {row.id: row for row in summary_query().filter(Candidate.id.in_([c[0] for c in chunk]))}
+        for candidate_id, score, breakdown in chunk:
+            row = rows.get(candidate_id)
+            if row is None:
+                continue
+            emitted += 1
+            yield CandidateSummary.from_row(row, similarity=breakdown['semantic']).to_dict() | {
+                'rank': emitted,
+                'score': round(score, 4),
+                'breakdown': breakdown
+            }
+            if emitted >= limit:
+                return
@@ -0,0 +1,253 @@
+"""
+Lightweight schema migrations run at startup.
+
+`db.create_all()` creates missing tables but never alters existing ones, so
+columns and indexes added to existing models are applied here. Every step is
+idempotent and safe to run on each boot; data migrations that read a whole
+table run once per database (run_once records a marker in job_checkpoint).
+"""
+import logging
+
+from sqlalchemy import bindparam, inspect, text
+
+from extensions import db
+
+logger = logging.getLogger(__name__)
+
+def run_once(name: str, migration):
+    """
+    Run a data migration unless it already ran on this database.
+
+    Args:
+        name (str): Migration name (marker 'migration:<name>' in job_checkpoint)
+        migration (Callable): Idempotent migration (two workers booting at once may both run it)
+
+    Returns:
+        The migration's result, or None if it had already run
+    """
+    from models import JobCheckpoint
+
+    marker = f"migration:{name}"
+    if db.session.get(JobCheckpoint, marker) is not None:
+        return None
+    result = migration()
+    if db.session.get(JobCheckpoint, marker) is None:
+        db.session.add(JobCheckpoint(name=marker, last_id=0))
+    db.session.commit()
+    return result
+
+def ensure_column(table: str, column: str, ddl: str) -> bool:
+    """
+    Add a column to an existing table if it is missing.
+
+    Args:
+        table (str): Table name
+        column (str): Column name
+        ddl (str): Column type and options, e.g. "INTEGER"
+
+    Returns:
+        bool: True if the column was added
+    """
+    columns = {c['name'] for c in inspect(db.engine).get_columns(table)}
+    if column in columns:
+        return False
+    with db.engine.begin() as connection:
+        connection.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {ddl}'))
+    logger.info(f"Migration: added column {table}.{column}")
+    return True
+
+def ensure_index(name: str, table: str, columns: str) -> bool:
+    """
+    Create an index on an existing table if it is missing.
+
+    Args:
+        name (str): Index name
+        table (str): Table name
+        columns (str): Column list, e.g. "created_at DESC, id DESC"
+
+    Returns:
+        bool: True if the index was created
+    """
+    indexes = {i['name'] for i in inspect(db.engine).get_indexes(table)}
+    if name in indexes:
+        return False
+    with db.engine.begin() as connection:
+        connection.execute(text(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})'))
+    logger.info(f"Migration: created index {name} on {table}")
+    return True
+
+def move_candidate_documents() -> bool:
+    """
+    Move full_text, vision_analysis and text_embedding from the candidate row
+    into candidate_document, then drop the old columns.
+
+    Returns:
+        bool: True if there was anything to move
+    """
+    columns = {c['name'] for c in inspect(db.engine).get_columns('candidate')}
+    legacy = [c for c in ('full_text', 'vision_analysis', 'text_embedding') if c in columns]
+    if not legacy:
+        return False
+
+    targets = ['candidate_id', 'full_text', 'vision_analysis', 'text_embedding']
+    sources = [
+        'id',
+        "COALESCE(full_text, '')" if 'full_text' in legacy else "''",
+        'vision_analysis' if 'vision_analysis' in legacy else 'NULL',
+        'text_embedding' if 'text_embedding' in legacy else 'NULL',
+    ]
+    with db.engine.begin() as connection:
+        moved = connection.execute(text(
+            f"INSERT INTO candidate_document ({', '.join(targets)}) "
+            f"SELECT {', '.join(sources)} FROM candidate "
+            f"WHERE id NOT IN (SELECT candidate_id FROM candidate_document)"
+        )).rowcount
+        for column in legacy:
+            connection.execute(text(f'ALTER TABLE candidate DROP COLUMN {column}'))
+
+    logger.info(f"Migration: moved {moved} candidate documents to candidate_document "
+                f"and dropped {legacy} from candidate (run VACUUM to reclaim space)")
+    return True
+
+def ensure_binary_column(table: str, column: str) -> bool:
+    """
+    Convert a TEXT column to binary so it can hold compressed values.
+    SQLite stores bytes in any column, so only other databases are altered.
+
+    Returns:
+        bool: True if the column was converted
+    """
+    if db.engine.dialect.name == 'sqlite':
+        return False
+    column_type = next((c['type'] for c in inspect(db.engine).get_columns(table) if c['name'] == column), None)
+    if column_type is None or column_type.python_type is bytes:
+        return False
+    with db.engine.begin() as connection:
+        connection.execute(text(
+            f"ALTER TABLE {table} ALTER COLUMN {column} TYPE BYTEA USING convert_to({column}, 'UTF8')"
+        ))
+    logger.info(f"Migration: converted {table}.{column} to BYTEA (plain text rows stay readable)")
+    return True
+
+def ensure_vector_dimensions() -> bool:
+    """
+    Resize candidate.embedding_vector (pgvector) to EMBEDDING_DIMENSIONS and
+    refill it from the stored embeddings (prefix re-normalized, pgvector >= 0.7).
+    Other databases have no vector column.
+
+    Returns:
+        bool: True if the column was resized
+    """
+    from utils.embeddings import index_dimensions, vector_type
+
+    if db.engine.dialect.name != 'postgresql':
+        return False
+    current = db.session.execute(text("""
+        SELECT format_type(atttypid, atttypmod) FROM pg_attribute
+        WHERE attrelid = 'candidate'::regclass AND attname = 'embedding_vector' AND NOT attisdropped
+    """)).scalar()
+    db.session.rollback()
+    if current is None or current == vector_type():
+        return False
+    dimensions = index_dimensions()
+    with db.engine.begin() as connection:
+        connection.execute(text(f"ALTER TABLE candidate ALTER COLUMN embedding_vector TYPE {vector_type()} USING NULL"))
+        # Matryoshka: las primeras dimensiones del vector guardado, normalizadas
+        connection.execute(text(f"""
+            UPDATE candidate c
+            SET embedding_vector = l2_normalize(subvector(d.text_embedding::vector, 1, {dimensions}))::{vector_type()}
+            FROM candidate_document d
+            WHERE d.candidate_id = c.id AND d.text_embedding IS NOT NULL
+              AND vector_dims(d.text_embedding::vector) >= {dimensions}
+        """))
+    logger.info(f"Migration: resized candidate.embedding_vector from {current} to {vector_type()}")
+    return True
+
+def initialize_stat_counters() -> bool:
+    """
+    Fill the dashboard counters of a database created before they existed.
+
+    Returns:
+        bool: True if the counters were rebuilt
+    """
+    from storage.stats import rebuild_counters
+    has_counters = db.session.execute(text('SELECT 1 FROM stat_counter LIMIT 1')).first()
+    has_candidates = db.session.execute(text('SELECT 1 FROM candidate LIMIT 1')).first()
+    if has_counters or not has_candidates:
+        return False
+    rebuild_counters()
+    logger.info("Migration: initialized dashboard counters")
+    return True
+
+def clear_placeholder_embeddings(batch_size: int = 1000) -> int:
+    """
+    Set to NULL the stored embeddings that are not real vectors ('[]' or
+    the all-zero placeholder saved while the embeddings API was unavailable),
+    so they no longer count as candidates with vectors.
+
+    Returns:
+        int: Embeddings cleared
+    """
+    from utils.embeddings import stored_embedding_present
+
+    cleared = []
+    rows = db.session.execute(text(
+        "SELECT candidate_id, text_embedding FROM candidate_document WHERE text_embedding IS NOT NULL"
+    )).yield_per(batch_size)
+    for candidate_id, value in rows:
+        if not stored_embedding_present(value):
+            cleared.append(candidate_id)
+    if not cleared:
+        return 0
+    with db.engine.begin() as connection:
+        for offset in range(0, len(cleared), batch_size):
+            connection.execute(text("UPDATE candidate_document SET text_embedding = NULL "
+                                    "WHERE candidate_id IN :ids").bindparams(bindparam('ids', expanding=True)),
+                               {'ids': cleared[offset:offset + batch_size]})
+    logger.info(f"Migration: cleared {len(cleared)} placeholder embeddings")
+    return len(cleared)
+
+def ensure_candidate_terms() -> int:
+    """
+    Fill the keyword term index for documents stored before it existed, so
+    their CVs keep matching keyword searches on their full text.
+
+    Returns:
+        int: Documents indexed
+    """
+    from storage.document_store import index_missing_terms
+
+    indexed = index_missing_terms()
+    if indexed:
+        logger.info(f"Migration: indexed the CV terms of {indexed} existing documents")
+    return indexed
+
+def run_migrations() -> None:
+    """
+    Apply pending schema changes. Must run inside an app context, after create_all().
+    """
+    ensure_column('candidate', 'experience_years', 'INTEGER')
+    ensure_index('ix_candidate_created_at_id', 'candidate', 'created_at, id')
+    ensure_column('candidate', 'duplicate_of_id', 'INTEGER REFERENCES candidate(id)')
+    ensure_index('ix_candidate_duplicate_of_id', 'candidate', 'duplicate_of_id')
+    ensure_column('candidate', 'cluster_id', 'INTEGER REFERENCES candidate_cluster(id)')
+    ensure_index('ix_candidate_cluster_id', 'candidate', 'cluster_id')
+    ensure_column('candidate', 'map_x', 'REAL')
+    ensure_column('candidate', 'map_y', 'REAL')
+    ensure_index('ix_candidate_local_embedding_updated_at_model', 'candidate_local_embedding', 'updated_at, model')
+    ensure_column('candidate_section_embedding', 'updated_at', 'TIMESTAMP')
+    ensure_index('ix_candidate_section_embedding_updated_at_model', 'candidate_section_embedding', 'updated_at, model')
+    move_candidate_documents()
+    ensure_binary_column('candidate_document', 'full_text')
+    ensure_binary_column('candidate_document', 'vision_analysis')
+    run_once('candidate_terms', ensure_candidate_terms)
+    ensure_vector_dimensions()
+    # Ya no se guardan marcadores de posición: basta con limpiar una vez
+    cleared = run_once('clear_placeholder_embeddings', clear_placeholder_embeddings)
+    if not initialize_stat_counters() and cleared:
+        # SQL directo: los eventos no ajustan el contador de vectores
+        from storage.stats import rebuild_counters
+        rebuild_counters()
+
+    from storage.facets import prune_facet_changes
+    prune_facet_changes()
@@ -0,0 +1,298 @@
+"""
+Near-duplicate CV detection with MinHash and banded LSH.
+
+The CV text is split into word shingles; its MinHash signature
+(MINHASH_PERMUTATIONS minimum hashes) estimates the Jaccard similarity
+between two CVs as the fraction of equal positions. The signature is cut
+into MINHASH_BANDS bands, and each band (with its band number) is hashed
+into a bucket stored in candidate_lsh_bucket: two CVs are compared only if
+they share a bucket in at least one band, so checking an upload is one
+query of MINHASH_BANDS primary-key probes instead of a scan.
+
+A candidate whose estimated similarity with an earlier one reaches
+NEAR_DUPLICATE_THRESHOLD is flagged with duplicate_of_id (the earliest CV
+of its group).
+"""
+import zlib
+import hashlib
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import insert, select, text as sql_text
+
+from extensions import db
+from models import Candidate, CandidateLshBucket, CandidateMinhash
+from storage.normalization import canonical_text, TERM_PATTERN
+from utils.config import get_config
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_DTYPE = np.dtype('<u4')
+EMPTY_HASH = 0xFFFFFFFF  # firma de un texto sin palabras: no se indexa en LSH
+_MASK_32 = np.uint64(0xFFFFFFFF)
+
+def _permutations(count: int) -> Tuple[np.ndarray, np.ndarray]:
+    # Semilla fija: las firmas guardadas deben seguir siendo comparables
+    rng = np.random.default_rng(20240501)
+    a = rng.integers(1, 2 ** 63, size=count, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2 ** 63, size=count, dtype=np.uint64)
+    return a, b
+
+_PERMUTATIONS = _permutations(get_config('MINHASH_PERMUTATIONS', 128))
+
+def shingle_hashes(text: str, size: Optional[int] = None) -> np.ndarray:
+    """
+    32-bit hashes of the distinct word shingles of a text.
+
+    Args:
+        text (str): CV text
+        size (Optional[int]): Words per shingle. Defaults to SHINGLE_SIZE.
+
+    Returns:
+        np.ndarray: uint64 array of shingle hashes (< 2**32)
+    """
+    size = size or get_config('SHINGLE_SIZE', 3)
+    words = TERM_PATTERN.findall(canonical_text(text))
+    if not words:
+        return np.zeros(0, dtype=np.uint64)
+    # crc32 es estable entre procesos (hash() de Python no lo es)
+    tokens = np.fromiter((zlib.crc32(word.encode('utf-8')) for word in words), dtype=np.uint64, count=len(words))
+    if len(tokens) < size:
+        size = len(tokens)
+    shingles = np.zeros(len(tokens) - size + 1, dtype=np.uint64)
+    for offset in range(size):
+        # Combinación polinómica de los hashes de las palabras (aritmética módulo 2**64)
+        shingles = shingles * np.uint64(1_000_003) + tokens[offset:offset + len(shingles)]
+    return np.unique((shingles ^ (shingles >> np.uint64(32))) & _MASK_32)
+
+def minhash_signature(text: str) -> np.ndarray:
+    """
+    MinHash signature of a CV text.
+
+    Args:
+        text (str): CV text
+
+    Returns:
+        np.ndarray: uint32 array of MINHASH_PERMUTATIONS minimum hashes
+    """
+    a, b = _PERMUTATIONS
+    hashes = shingle_hashes(text)
+    if not len(hashes):
+        return np.full(len(a), EMPTY_HASH, dtype=SIGNATURE_DTYPE)
+    # Hashing multiply-shift: los 32 bits altos de (a*x + b) mod 2**64
+    permuted = (np.outer(a, hashes) + b[:, None]) >> np.uint64(32)
+    return permuted.min(axis=1).astype(SIGNATURE_DTYPE)
+
+def band_buckets(signature: np.ndarray) -> List[int]:
+    """
+    Bucket key of each LSH band of a signature.
+
+    Args:
+        signature (np.ndarray): MinHash signature
+
+    Returns:
+        List[int]: One signed 64-bit key per band
+    """
+    bands = get_config('MINHASH_BANDS', 16)
+    rows = len(signature) // bands
+    data = np.ascontiguousarray(signature, dtype=SIGNATURE_DTYPE)
+    return [
+        int.from_bytes(hashlib.blake2b(data[band * rows:(band + 1) * rows].tobytes(), digest_size=8,
+                                       salt=band.to_bytes(2, 'little')).digest(), 'little', signed=True)
+        for band in range(bands)
+    ]
+
+def is_empty_signature(signature: np.ndarray) -> bool:
+    """True for the signature of a text without words."""
+    return bool(np.all(signature == EMPTY_HASH))
+
+def estimate_similarity(signature: np.ndarray, other: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(signature == other))
+
+def find_near_duplicates(signature: np.ndarray, session=None, exclude_id: Optional[int] = None,
+                         threshold: Optional[float] = None) -> List[Tuple[int, float]]:
+    """
+    Stored candidates whose CV is a near duplicate of a signature.
+
+    Args:
+        signature (np.ndarray): MinHash signature of the CV
+        session: Session to query. Defaults to db.session.
+        exclude_id (Optional[int]): Candidate to leave out (the CV itself)
+        threshold (Optional[float]): Minimum estimated similarity. Defaults to NEAR_DUPLICATE_THRESHOLD.
+
+    Returns:
+        List[Tuple[int, float]]: (candidate id, similarity), most similar first
+    """
+    if is_empty_signature(signature):
+        return []
+    session = session or db.session
+    threshold = threshold if threshold is not None else get_config('NEAR_DUPLICATE_THRESHOLD', 0.75)
+
+    # Una sola consulta: candidatos que comparten algún bucket, con su firma
+    matches = select(CandidateLshBucket.candidate_id)\
+        .where(CandidateLshBucket.bucket.in_(band_buckets(signature)))
+    signatures = session.execute(
+        select(CandidateMinhash.candidate_id, CandidateMinhash.signature)
+        .where(CandidateMinhash.candidate_id.in_(matches))
+    ).all()
+    results = [(candidate_id, estimate_similarity(signature, np.frombuffer(stored, dtype=SIGNATURE_DTYPE)))
+               for candidate_id, stored in signatures if candidate_id != exclude_id]
+    return sorted([r for r in results if r[1] >= threshold], key=lambda r: (-r[1], r[0]))
+
+def store_signature(session, candidate_id: int, signature: np.ndarray) -> None:
+    """
+    Insert the signature and LSH buckets of a candidate (no commit).
+
+    Args:
+        session: Session of the current transaction
+        candidate_id (int): Candidate id
+        signature (np.ndarray): MinHash signature
+    """
+    session.execute(insert(CandidateMinhash), [{
+        'candidate_id': candidate_id,
+        'signature': np.ascontiguousarray(signature, dtype=SIGNATURE_DTYPE).tobytes()
+    }])
+    if is_empty_signature(signature):
+        return
+    session.execute(insert(CandidateLshBucket), [
+        {'bucket': bucket, 'candidate_id': candidate_id} for bucket in set(band_buckets(signature))
+    ])
+
+def flag_near_duplicate(session, candidate: Candidate, signature: np.ndarray) -> Optional[int]:
+    """
+    Index a newly flushed candidate and flag it if it duplicates an earlier CV.
+
+    Args:
+        session: Session of the current transaction
+        candidate (Candidate): Candidate with its id assigned
+        signature (np.ndarray): MinHash signature of its CV text
+
+    Returns:
+        Optional[int]: Id of the original CV, if it is a near duplicate
+    """
+    matches = find_near_duplicates(signature, session, exclude_id=candidate.id)
+    store_signature(session, candidate.id, signature)
+    if not matches:
+        return None
+
+    # Se apunta al CV más antiguo del grupo
+    original_ids = session.execute(
+        select(Candidate.id, Candidate.duplicate_of_id).where(Candidate.id.in_([m[0] for m in matches]))
+    ).all()
+    original_id = min(duplicate_of_id or candidate_id for candidate_id, duplicate_of_id in original_ids)
+    if original_id < candidate.id:
+        candidate.duplicate_of_id = original_id
+        return original_id
+    return None
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent: Dict[int, int] = {}
+
+    def find(self, item: int) -> int:
+        root = self.parent.setdefault(item, item)
+        while root != self.parent[root]:
+            root = self.parent[root]
+        while item != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a: int, b: int) -> None:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            # La raíz es siempre el id menor (el CV más antiguo)
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+def backfill_signatures(batch_size: int = 500) -> int:
+    """
+    Compute the signature and buckets of every candidate that has none.
+    Must run inside an app context.
+
+    Returns:
+        int: Number of candidates indexed
+    """
+    from models import CandidateDocument
+
+    processed = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(CandidateDocument.candidate_id, CandidateDocument.full_text)
+            .outerjoin(CandidateMinhash, CandidateMinhash.candidate_id == CandidateDocument.candidate_id)
+            .where(CandidateMinhash.candidate_id.is_(None), CandidateDocument.candidate_id > last_id)
+            .order_by(CandidateDocument.candidate_id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        for candidate_id, full_text in rows:
+            store_signature(db.session, candidate_id, minhash_signature(full_text or ''))
+        db.session.commit()
+        last_id = rows[-1][0]
+        processed += len(rows)
+        logger.info(f"Indexed MinHash signatures of {processed} candidates")
+    return processed
+
+def cluster_near_duplicates(threshold: Optional[float] = None) -> Dict[int, List[int]]:
+    """
+    Group all stored candidates into near-duplicate clusters and flag them:
+    every member points to the earliest CV of its cluster.
+    Must run inside an app context.
+
+    Args:
+        threshold (Optional[float]): Minimum estimated similarity. Defaults to NEAR_DUPLICATE_THRESHOLD.
+
+    Returns:
+        Dict[int, List[int]]: Original candidate id -> ids of its duplicates
+    """
+    threshold = threshold if threshold is not None else get_config('NEAR_DUPLICATE_THRESHOLD', 0.75)
+
+    # Sólo los buckets compartidos generan pares candidatos
+    shared = select(CandidateLshBucket.bucket)\
+        .group_by(CandidateLshBucket.bucket)\
+        .having(db.func.count() > 1)
+    rows = db.session.execute(
+        select(CandidateLshBucket.bucket, CandidateLshBucket.candidate_id)
+        .where(CandidateLshBucket.bucket.in_(shared))
+        .order_by(CandidateLshBucket.bucket, CandidateLshBucket.candidate_id)
+    ).all()
+
+    groups: Dict[int, List[int]] = {}
+    for bucket, candidate_id in rows:
+        groups.setdefault(bucket, []).append(candidate_id)
+    pairs = {(a, b) for members in groups.values() for i, a in enumerate(members) for b in members[i + 1:]}
+
+    involved = sorted({candidate_id for pair in pairs for candidate_id in pair})
+    signatures = {
+        candidate_id: np.frombuffer(stored, dtype=SIGNATURE_DTYPE)
+        for candidate_id, stored in db.session.execute(
+            select(CandidateMinhash.candidate_id, CandidateMinhash.signature)
+            .where(CandidateMinhash.candidate_id.in_(involved))
+        )
+    } if involved else {}
+
+    clusters = _UnionFind()
+    for a, b in pairs:
+        if estimate_similarity(signatures[a], signatures[b]) >= threshold:
+            clusters.union(a, b)
+
+    duplicates: Dict[int, List[int]] = {}
+    for candidate_id in clusters.parent:
+        root = clusters.find(candidate_id)
+        if root != candidate_id:
+            duplicates.setdefault(root, []).append(candidate_id)
+
+    # Reescribir las marcas: los originales y los que ya no tienen grupo quedan en NULL
+    db.session.execute(sql_text("UPDATE candidate SET duplicate_of_id = NULL WHERE duplicate_of_id IS NOT NULL"))
+    updates = [{'original_id': root, 'candidate_id': member}
+               for root, members in duplicates.items() for member in members]
+    if updates:
+        db.session.execute(sql_text("UPDATE candidate SET duplicate_of_id = :original_id WHERE id = :candidate_id"),
+                           updates)
+    db.session.commit()
+
+    logger.info(f"Near-duplicate clustering: {len(duplicates)} groups, {len(updates)} duplicates flagged")
+    return {root: sorted(members) for root, members in duplicates.items()}
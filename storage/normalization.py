@@ -0,0 +1,303 @@
+"""
+Normalized candidate attributes (skills, education, languages, certifications).
+
+The JSON columns on Candidate stay the source of truth for display; the child
+tables hold canonical names so structured filters ("has Python", "studied at
+ESPOL", "speaks English") are indexed joins instead of LIKE scans.
+"""
+import re
+import json
+import logging
+import unicodedata
+from typing import Dict, List, Optional
+
+from extensions import db
+from models import (
+    Candidate, CandidateSkill, CandidateEducation, CandidateLanguage, CandidateCertification, CandidateTerm
+)
+from constants.constants import UNIVERSITY_ALIASES, SKILL_ALIASES, LANGUAGE_ALIASES
+
+logger = logging.getLogger(__name__)
+
+# Niveles de idioma que se separan del nombre ("Inglés B2", "Inglés - Intermedio")
+LANGUAGE_LEVEL_PATTERN = re.compile(
+    r'\s*(?:[-–:(,]\s*)?\b(a1|a2|b1|b2|c1|c2|nativo|native|materno|b[aá]sico|basic|intermedio|'
+    r'intermediate|avanzado|advanced|fluido|fluent)\b.*$',
+    re.IGNORECASE
+)
+
+def canonical_text(value: str) -> str:
+    """
+    Lowercase, strip accents, collapse whitespace and trim punctuation.
+
+    Args:
+        value (str): Raw text
+
+    Returns:
+        str: Canonical text
+    """
+    value = unicodedata.normalize("NFKD", value or "")
+    value = "".join(c for c in value if not unicodedata.combining(c)).lower()
+    value = re.sub(r'\s+', ' ', value)
+    return value.strip(' .,;:-–•·')
+
+def canonical_skill(skill: str) -> str:
+    """Canonical name of a skill ('ReactJS' -> 'react', 'Postgres' -> 'postgresql')."""
+    key = canonical_text(skill)
+    return SKILL_ALIASES.get(key, key)
+
+def canonical_language(language: str) -> str:
+    """Canonical name of a language without its level ('Inglés (B2)' -> 'english')."""
+    key = canonical_text(LANGUAGE_LEVEL_PATTERN.sub('', language or ''))
+    key = key.strip(' ()')
+    return LANGUAGE_ALIASES.get(key, key)
+
+def language_level(language: str) -> str:
+    """Level mentioned next to a language, if any."""
+    match = LANGUAGE_LEVEL_PATTERN.search(language or '')
+    return match.group(0).strip(' -–:(),') if match else ''
+
+_CANONICAL_UNIVERSITIES = {alias: canonical_text(name) for alias, name in UNIVERSITY_ALIASES.items()}
+
+def canonical_institution(institution: str) -> str:
+    """
+    Canonical institution name. Known universities map to their full name
+    whether the CV uses the acronym ('ESPOL') or the full name.
+
+    Args:
+        institution (str): Institution as written in the CV
+
+    Returns:
+        str: Canonical institution name
+    """
+    key = canonical_text(institution)
+    if not key:
+        return ''
+    words = set(re.findall(r'\w+', key))
+    for alias, full_name in _CANONICAL_UNIVERSITIES.items():
+        if alias in words or full_name in key:
+            return full_name
+    return key
+
+# Nivel académico: 1 técnico/tecnólogo, 2 tercer nivel, 3 maestría/posgrado, 4 doctorado
+DEGREE_LEVEL_PATTERNS = (
+    (4, re.compile(r'\b(doctor(ado)?|ph\.?\s?d)\b')),
+    (3, re.compile(r'\b(maestri\w*|master\w*|magister|mba|m\.?sc|posgrado|postgrado|especializacion)\b')),
+    (2, re.compile(r'\b(ingenier\w*|licenciad\w*|licenciatura|bachelor\w*|tercer nivel|titulo universitario|'
+                   r'grado universitario|economista|abogad\w*|arquitect\w*|contador\w* publico)\b')),
+    (1, re.compile(r'\b(tecnolog\w*|tecnic\w*|technician|associate)\b')),
+)
+
+def degree_level(degree: str) -> int:
+    """
+    Academic level named in a degree or requirement text.
+
+    Args:
+        degree (str): Degree as written ("Ingeniería en Sistemas", "Máster en Datos")
+
+    Returns:
+        int: 4 doctorate, 3 master/postgraduate, 2 bachelor/engineering, 1 technical, 0 unknown
+    """
+    text = canonical_text(degree)
+    for level, pattern in DEGREE_LEVEL_PATTERNS:
+        if pattern.search(text):
+            return level
+    return 0
+
+def _json_list(value) -> List:
+    if not value:
+        return []
+    try:
+        parsed = json.loads(value) if isinstance(value, str) else value
+    except (json.JSONDecodeError, TypeError):
+        # Texto libre separado por comas (formato antiguo)
+        return [part.strip() for part in str(value).split(',') if part.strip()]
+    return parsed if isinstance(parsed, list) else []
+
+def _text(value) -> str:
+    if isinstance(value, dict):
+        return str(value.get('name') or value.get('language') or value.get('title') or '')
+    return str(value or '')
+
+YEAR_RANGE_PATTERN = re.compile(
+    r'\b((?:19|20)\d{2})\s*(?:[-–/]|a|to|hasta)\s*((?:19|20)\d{2}|present[e]?|actual(?:idad|mente)?|current|hoy)\b',
+    re.IGNORECASE
+)
+YEARS_PATTERN = re.compile(r'\b(\d{1,2})\+?\s*(?:years?|años?)\b', re.IGNORECASE)
+
+def estimate_experience_years(experience, current_year: Optional[int] = None) -> Optional[int]:
+    """
+    Estimate total years of experience from the experience entries.
+    Overlapping date ranges count once; explicit "N años" mentions are used
+    when no ranges are found.
+
+    Args:
+        experience: JSON string (or list) of experience entries
+        current_year (Optional[int]): Year used for "presente". Defaults to this year.
+
+    Returns:
+        Optional[int]: Estimated years, or None when there is no date information
+    """
+    from datetime import date
+    current_year = current_year or date.today().year
+
+    texts = []
+    for entry in _json_list(experience):
+        if isinstance(entry, dict):
+            texts.append(' '.join(str(v) for v in entry.values() if v))
+        else:
+            texts.append(str(entry))
+    text = ' '.join(texts)
+
+    ranges = []
+    for start, end in YEAR_RANGE_PATTERN.findall(text):
+        start = int(start)
+        end = int(end) if end.isdigit() else current_year
+        if start <= end <= current_year:
+            ranges.append((start, end))
+
+    if ranges:
+        # Unión de intervalos para no contar dos veces trabajos simultáneos
+        total, last_end = 0, None
+        for start, end in sorted(ranges):
+            if last_end is None or start > last_end:
+                total += end - start
+                last_end = end
+            elif end > last_end:
+                total += end - last_end
+                last_end = end
+        return total
+
+    mentions = [int(years) for years in YEARS_PATTERN.findall(text)]
+    return max(mentions) if mentions else None
+
+def build_attribute_rows(skills: Optional[str], education: Optional[str],
+                         languages: Optional[str], certifications: Optional[str]) -> Dict[str, List]:
+    """
+    Build the normalized rows for a candidate's JSON attribute columns.
+
+    Returns:
+        Dict[str, List]: skill/education/language/certification model instances
+                         (not yet attached to a candidate)
+    """
+    rows = {'skills': [], 'education': [], 'languages': [], 'certifications': []}
+
+    seen = set()
+    for skill in _json_list(skills):
+        name = _text(skill).strip()[:200]
+        canonical = canonical_skill(name)[:200]
+        if canonical and canonical not in seen:
+            seen.add(canonical)
+            rows['skills'].append(CandidateSkill(name=name, canonical=canonical))
+
+    for entry in _json_list(education):
+        if not isinstance(entry, dict):
+            entry = {'institution': _text(entry)}
+        institution = (entry.get('institution') or '')[:300]
+        rows['education'].append(CandidateEducation(
+            institution=institution,
+            canonical_institution=canonical_institution(institution)[:300],
+            degree=(entry.get('degree') or '')[:200],
+            field=(entry.get('field') or '')[:200],
+            status=(entry.get('status') or '')[:50],
+            year=str(entry.get('year') or '')[:50]
+        ))
+
+    seen = set()
+    for language in _json_list(languages):
+        name = _text(language).strip()[:100]
+        canonical = canonical_language(name)[:100]
+        if canonical and canonical not in seen:
+            seen.add(canonical)
+            level = language.get('level', '') if isinstance(language, dict) else language_level(name)
+            rows['languages'].append(CandidateLanguage(name=name, canonical=canonical, level=(level or '')[:100]))
+
+    seen = set()
+    for certification in _json_list(certifications):
+        name = _text(certification).strip()[:300]
+        canonical = canonical_text(name)[:300]
+        if canonical and canonical not in seen:
+            seen.add(canonical)
+            rows['certifications'].append(CandidateCertification(name=name, canonical=canonical))
+
+    return rows
+
+def sync_candidate_attributes(candidate: Candidate) -> None:
+    """
+    Replace a candidate's normalized rows with ones built from its JSON columns.
+    Changes are added to the candidate's session; the caller commits.
+
+    Args:
+        candidate (Candidate): Candidate whose attributes changed
+    """
+    rows = build_attribute_rows(candidate.skills, candidate.education,
+                                candidate.languages, candidate.certifications)
+    candidate.skill_entries = rows['skills']
+    candidate.education_entries = rows['education']
+    candidate.language_entries = rows['languages']
+    candidate.certification_entries = rows['certifications']
+    candidate.experience_years = estimate_experience_years(candidate.experience)
+
+TERM_PATTERN = re.compile(r'[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]')
+MAX_TERM_LENGTH = 64
+MAX_TERMS_PER_CANDIDATE = 5000
+
+def text_terms(text: str) -> List[str]:
+    """
+    Distinct normalized words of a text ('C#', 'Node.js' and 'Python3' are kept whole).
+
+    Args:
+        text (str): CV text
+
+    Returns:
+        List[str]: Terms (lowercase, without accents), in order of first appearance
+    """
+    terms = dict.fromkeys(
+        term for term in TERM_PATTERN.findall(canonical_text(text))
+        if len(term) > 1 and len(term) <= MAX_TERM_LENGTH
+    )
+    return list(terms)[:MAX_TERMS_PER_CANDIDATE]
+
+def sync_candidate_terms(candidate: Candidate, full_text: Optional[str] = None) -> None:
+    """
+    Replace the keyword index rows of a candidate with the words of its CV text.
+    Changes are added to the candidate's session; the caller commits.
+
+    Args:
+        candidate (Candidate): Candidate
+        full_text (Optional[str]): CV text, if already at hand (avoids loading the document)
+    """
+    full_text = candidate.full_text if full_text is None else full_text
+    candidate.term_entries = [CandidateTerm(term=term) for term in text_terms(full_text or '')]
+
+def backfill_candidate_attributes(batch_size: int = 500) -> int:
+    """
+    Populate the normalized tables for every existing candidate.
+
+    Args:
+        batch_size (int): Candidates per transaction
+
+    Returns:
+        int: Number of candidates processed
+    """
+    processed = 0
+    last_id = 0
+    while True:
+        batch = db.session.query(Candidate)\
+            .filter(Candidate.id > last_id)\
+            .order_by(Candidate.id)\
+            .limit(batch_size)\
+            .all()
+        if not batch:
+            break
+
+        for candidate in batch:
+            sync_candidate_attributes(candidate)
+        db.session.commit()
+
+        processed += len(batch)
+        last_id = batch[-1].id
+        db.session.expunge_all()
+        logger.info(f"Backfilled normalized attributes for {processed} candidates")
+
+    return processed
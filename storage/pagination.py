@@ -0,0 +1,112 @@
+"""
+Keyset (cursor) pagination.
+
+Pages are addressed by opaque tokens that encode the sort key of the last row
+served, so page N costs the same as page 1 (no OFFSET scan):
+- listings are ordered by (created_at DESC, id DESC), backed by ix_candidate_created_at_id,
+- ranked results are ordered by (score DESC, id DESC).
+"""
+import json
+import base64
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+
+from models import Candidate
+
+logger = logging.getLogger(__name__)
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """
+    Encode a sort key as an opaque URL-safe token.
+
+    Args:
+        values (Dict[str, Any]): JSON-serializable sort key
+
+    Returns:
+        str: Cursor token
+    """
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(token: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Decode a cursor token produced by encode_cursor.
+
+    Args:
+        token (Optional[str]): Cursor token (None or empty for the first page)
+
+    Returns:
+        Optional[Dict[str, Any]]: Sort key, or None for the first page
+    """
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(values, dict):
+            raise ValueError('cursor is not an object')
+        return values
+    except (ValueError, TypeError) as e:
+        raise Exception(f"Invalid cursor: {str(e)}")
+
+def paginate_by_recency(candidates_query, limit: int, cursor: Optional[str] = None) -> Tuple[List, Optional[str]]:
+    """
+    One page of a Candidate query ordered by (created_at DESC, id DESC).
+
+    Args:
+        candidates_query: SQLAlchemy query over Candidate (or its columns)
+        limit (int): Page size
+        cursor (Optional[str]): Token of the previous page, None for the first page
+
+    Returns:
+        Tuple[List, Optional[str]]: Rows and the token of the next page (None on the last page)
+    """
+    key = decode_cursor(cursor)
+    if key:
+        created_at = datetime.fromisoformat(key['created_at'])
+        candidates_query = candidates_query.filter(or_(
+            Candidate.created_at < created_at,
+            and_(Candidate.created_at == created_at, Candidate.id < key['id'])
+        ))
+
+    rows = candidates_query\
+        .order_by(Candidate.created_at.desc(), Candidate.id.desc())\
+        .limit(limit + 1)\
+        .all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor({'created_at': last.created_at.isoformat(), 'id': last.id})
+    return rows, next_cursor
+
+def paginate_ranked(items: List, score: Callable[[Any], float], limit: int,
+                    cursor: Optional[str] = None) -> Tuple[List, Optional[str]]:
+    """
+    One page of scored items ordered by (score DESC, id DESC).
+
+    Args:
+        items (List): Scored items (each with an `id` attribute)
+        score (Callable[[Any], float]): Score of an item
+        limit (int): Page size
+        cursor (Optional[str]): Token of the previous page, None for the first page
+
+    Returns:
+        Tuple[List, Optional[str]]: Items of the page and the token of the next page
+    """
+    key = decode_cursor(cursor)
+    ranked = sorted(items, key=lambda item: (score(item), item.id), reverse=True)
+    if key:
+        after = (key['score'], key['id'])
+        ranked = [item for item in ranked if (score(item), item.id) < after]
+
+    page = ranked[:limit]
+    next_cursor = None
+    if len(ranked) > limit:
+        last = page[-1]
+        next_cursor = encode_cursor({'score': score(last), 'id': last.id})
+    return page, next_cursor
@@ -0,0 +1,103 @@
+"""
+Lightweight candidate projections for list views.
+
+Listings only display a handful of fields, so they select these columns
+explicitly instead of loading full Candidate rows. The heavy payloads
+(full_text, vision_analysis and the ~30 KB text_embedding) live in
+candidate_document and are only read by view_candidate.
+"""
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Optional
+
+from models import Candidate, CandidateDocument
+from storage.sqlite_profile import read_session
+
+# Columnas que necesitan los listados, las plantillas y las APIs JSON
+SUMMARY_COLUMNS = (
+    Candidate.id,
+    Candidate.name,
+    Candidate.email,
+    Candidate.phone,
+    Candidate.education,
+    Candidate.experience,
+    Candidate.skills,
+    Candidate.languages,
+    Candidate.certifications,
+    Candidate.summary,
+    Candidate.original_filename,
+    Candidate.file_type,
+    Candidate.created_at,
+    Candidate.updated_at,
+)
+
+
+@dataclass
+class CandidateSummary:
+    """Candidate fields shown in list views and returned by the JSON APIs"""
+
+    id: int
+    name: str
+    email: Optional[str]
+    phone: Optional[str]
+    education: Optional[str]
+    experience: Optional[str]
+    skills: Optional[str]
+    languages: Optional[str]
+    certifications: Optional[str]
+    summary: Optional[str]
+    original_filename: str
+    file_type: str
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    similarity: float = 0.0
+
+    @classmethod
+    def from_row(cls, row, **extra) -> 'CandidateSummary':
+        """
+        Build a summary from a row of summary_query() (or a Candidate).
+
+        Args:
+            row: Result row exposing the summary columns as attributes
+            **extra: Additional fields (e.g. similarity)
+
+        Returns:
+            CandidateSummary: Summary
+        """
+        values = {f.name: getattr(row, f.name) for f in fields(cls) if f.name != 'similarity'}
+        return cls(**values, **extra)
+
+    def to_dict(self) -> dict:
+        """Same shape as Candidate.to_dict()."""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'email': self.email,
+            'phone': self.phone,
+            'education': self.education,
+            'experience': self.experience,
+            'skills': self.skills,
+            'languages': self.languages,
+            'certifications': self.certifications,
+            'summary': self.summary,
+            'original_filename': self.original_filename,
+            'file_type': self.file_type,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+def summary_query(*extra_columns):
+    """
+    Query selecting only the summary columns (plus any extra ones), on the
+    read-only session.
+
+    Args:
+        *extra_columns: Additional Candidate or CandidateDocument columns to select
+
+    Returns:
+        SQLAlchemy query returning rows, not Candidate instances
+    """
+    query = read_session().query(*SUMMARY_COLUMNS, *extra_columns)
+    if any(getattr(column, 'class_', None) is CandidateDocument for column in extra_columns):
+        query = query.outerjoin(CandidateDocument, CandidateDocument.candidate_id == Candidate.id)
+    return query
@@ -0,0 +1,264 @@
+"""
+Saved searches with reverse matching on ingest (percolation).
+
+Instead of re-running every saved search over the whole table, the searches
+themselves are indexed and each new candidate is run against that index once:
+
+- keywords: every keyword of a saved query is stored as its normalized terms
+  (saved_search_term). A new CV's terms, with their prefixes (the keyword
+  search matches 'python' in 'python3'), are looked up in that index; a
+  keyword matches when all its terms are found, a search when any of its
+  keywords does, as in the keyword search.
+- semantic: searches with a min_similarity keep their query embedding
+  (local model); the new candidate's vector is scored against all of them
+  with one matrix-vector product.
+
+A keyword hit in the index already implies the keyword search returns the
+candidate; only searches found this way that also have structured filters
+or name an institution are checked exactly with candidate_matches_search.
+The cost grows with the CV's terms and the searches it matches, not with
+searches x candidates.
+"""
+import json
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import select, func, update
+
+from extensions import db
+from models import (CandidateLocalEmbedding, CandidateTerm, SavedSearch, SavedSearchEmbedding, SavedSearchTerm,
+                    SearchNotification)
+from storage.local_embeddings import decode_vector, encode_vector, local_model_name
+from storage.normalization import text_terms
+from storage.sqlite_handler import extract_keywords, candidate_matches_search, mentioned_institutions
+from utils.config import get_config
+
+logger = logging.getLogger(__name__)
+
+LOOKUP_CHUNK = 500
+
+
+def create_saved_search(name: str, query: str, filters: Optional[dict] = None,
+                        min_similarity: Optional[float] = None, encode=None,
+                        model_name: Optional[str] = None) -> Dict:
+    """
+    Save a search and index it for percolation.
+
+    Args:
+        name (str): Display name (e.g. the open role)
+        query (str): Keyword query, as typed in the search box
+        filters (Optional[dict]): Structured filters (skills, institutions, languages, clusters)
+        min_similarity (Optional[float]): Semantic threshold; None matches on keywords only
+        encode (Callable): Encodes a list of texts into a (n, d) float array (needed with min_similarity)
+        model_name (Optional[str]): Local model. Defaults to LOCAL_EMBEDDING_MODEL.
+
+    Returns:
+        Dict: The stored search (SavedSearch.to_dict())
+    """
+    from storage.sqlite_profile import run_write
+
+    model_name = model_name or local_model_name()
+    terms = {
+        (position, term)
+        for position, keyword in enumerate(dict.fromkeys(extract_keywords(query)))
+        for term in text_terms(keyword)
+    }
+    vector = None
+    if min_similarity is not None:
+        if encode is None:
+            raise Exception("An encoder is required for semantic saved searches")
+        vector = np.asarray(encode([query]), dtype=np.float32)[0]
+        vector = vector / (np.linalg.norm(vector) or 1)
+
+    def write(session) -> Dict:
+        search = SavedSearch(name=name[:200], query=query, filters=json.dumps(filters) if filters else None,
+                             min_similarity=min_similarity)
+        search.terms = [SavedSearchTerm(keyword=position, term=term) for position, term in sorted(terms)]
+        if vector is not None:
+            search.embeddings = [SavedSearchEmbedding(model=model_name, vector=encode_vector(vector))]
+        session.add(search)
+        session.flush()
+        return search.to_dict()
+
+    search = run_write(write)
+    logger.info(f"Saved search {search['id']} '{name}' indexed with {len(terms)} terms")
+    return search
+
+def delete_saved_search(search_id: int) -> bool:
+    """
+    Delete a saved search, its index entries and notifications.
+
+    Returns:
+        bool: False if it did not exist
+    """
+    from storage.sqlite_profile import run_write
+
+    def write(session) -> bool:
+        search = session.get(SavedSearch, search_id)
+        if search is None:
+            return False
+        session.delete(search)
+        return True
+
+    return run_write(write)
+
+def list_saved_searches() -> List[Dict]:
+    """
+    Saved searches, newest first, with their unread notification count.
+
+    Returns:
+        List[Dict]: SavedSearch.to_dict() plus unread
+    """
+    unread = dict(db.session.execute(
+        select(SearchNotification.saved_search_id, func.count())
+        .where(SearchNotification.read_at.is_(None))
+        .group_by(SearchNotification.saved_search_id)
+    ).all())
+    searches = db.session.execute(select(SavedSearch).order_by(SavedSearch.id.desc())).scalars()
+    return [search.to_dict() | {'unread': unread.get(search.id, 0)} for search in searches]
+
+def _term_prefixes(terms: List[str]) -> List[str]:
+    # Un término guardado casa con cualquier término del CV que empiece por él
+    return list({term[:length] for term in terms for length in range(2, len(term) + 1)})
+
+def _keyword_matches(candidate_id: int) -> Dict[int, float]:
+    """Saved searches with at least one keyword fully present in the CV, with the fraction present."""
+    terms = list(db.session.execute(select(CandidateTerm.term)
+                                    .where(CandidateTerm.candidate_id == candidate_id)).scalars())
+    prefixes = _term_prefixes(terms)
+    found: Dict[tuple, int] = {}
+    for offset in range(0, len(prefixes), LOOKUP_CHUNK):
+        rows = db.session.execute(
+            select(SavedSearchTerm.saved_search_id, SavedSearchTerm.keyword, func.count())
+            .where(SavedSearchTerm.term.in_(prefixes[offset:offset + LOOKUP_CHUNK]))
+            .group_by(SavedSearchTerm.saved_search_id, SavedSearchTerm.keyword)
+        ).all()
+        for search_id, keyword, count in rows:
+            found[(search_id, keyword)] = found.get((search_id, keyword), 0) + count
+    if not found:
+        return {}
+
+    # Términos por palabra clave, sólo de las búsquedas tocadas
+    needed = db.session.execute(
+        select(SavedSearchTerm.saved_search_id, SavedSearchTerm.keyword, func.count())
+        .where(SavedSearchTerm.saved_search_id.in_({search_id for search_id, _ in found}))
+        .group_by(SavedSearchTerm.saved_search_id, SavedSearchTerm.keyword)
+    ).all()
+    keywords: Dict[int, List[bool]] = {}
+    for search_id, keyword, count in needed:
+        keywords.setdefault(search_id, []).append(found.get((search_id, keyword), 0) >= count)
+    return {search_id: sum(matched) / len(matched) for search_id, matched in keywords.items() if any(matched)}
+
+def _semantic_matches(candidate_id: int, model_name: str) -> Dict[int, float]:
+    """Semantic saved searches whose query embedding is close enough to the candidate's."""
+    stored = db.session.get(CandidateLocalEmbedding, (candidate_id, model_name))
+    if stored is None:
+        return {}
+    rows = db.session.execute(
+        select(SavedSearchEmbedding.saved_search_id, SavedSearchEmbedding.vector, SavedSearch.min_similarity)
+        .join(SavedSearch, SavedSearch.id == SavedSearchEmbedding.saved_search_id)
+        .where(SavedSearchEmbedding.model == model_name, SavedSearch.min_similarity.isnot(None))
+    ).all()
+    if not rows:
+        return {}
+    vector = decode_vector(stored.vector)
+    vector = vector / (np.linalg.norm(vector) or 1)
+    similarities = np.stack([decode_vector(row[1]) for row in rows]) @ vector
+    return {row[0]: float(similarity) for row, similarity in zip(rows, similarities) if similarity >= row[2]}
+
+def percolate_candidate(candidate_id: int, model_name: Optional[str] = None) -> List[Dict]:
+    """
+    Match a newly stored candidate against every saved search and record a
+    notification for each match. Run once at ingest, after the terms and the
+    local embedding are stored.
+
+    Args:
+        candidate_id (int): Candidate id
+        model_name (Optional[str]): Local model. Defaults to LOCAL_EMBEDDING_MODEL.
+
+    Returns:
+        List[Dict]: Notifications created (SearchNotification.to_dict())
+    """
+    from storage.sqlite_profile import run_write
+
+    model_name = model_name or local_model_name()
+    keyword_scores = _keyword_matches(candidate_id)
+    semantic_scores = _semantic_matches(candidate_id, model_name)
+    shortlist = set(keyword_scores) | set(semantic_scores)
+    if not shortlist:
+        return []
+
+    already = set(db.session.execute(
+        select(SearchNotification.saved_search_id)
+        .where(SearchNotification.candidate_id == candidate_id, SearchNotification.saved_search_id.in_(shortlist))
+    ).scalars())
+    matches = []
+    for search in db.session.execute(select(SavedSearch).where(SavedSearch.id.in_(shortlist - already))).scalars():
+        filters = json.loads(search.filters) if search.filters else None
+        by_keywords = search.id in keyword_scores and (
+            not filters and not mentioned_institutions(search.query) or
+            candidate_matches_search(candidate_id, search.query, filters))
+        by_meaning = search.id in semantic_scores and (not filters or candidate_matches_search(candidate_id, '', filters))
+        if by_keywords or by_meaning:
+            matched_by = 'both' if by_keywords and by_meaning else 'keywords' if by_keywords else 'semantic'
+            score = semantic_scores[search.id] if by_meaning else keyword_scores[search.id]
+            matches.append((search.id, matched_by, round(score, 4)))
+    db.session.rollback()
+    if not matches:
+        return []
+
+    def write(session) -> List[Dict]:
+        notifications = [SearchNotification(saved_search_id=search_id, candidate_id=candidate_id,
+                                            matched_by=matched_by, score=score)
+                         for search_id, matched_by, score in matches]
+        session.add_all(notifications)
+        session.flush()
+        return [notification.to_dict() for notification in notifications]
+
+    notifications = run_write(write)
+    logger.info(f"Candidate {candidate_id} matched {len(notifications)} saved searches "
+                f"({len(shortlist)} shortlisted)")
+    return notifications
+
+def get_notifications(unread_only: bool = True, saved_search_id: Optional[int] = None,
+                      limit: Optional[int] = None) -> List[Dict]:
+    """
+    Latest notifications, newest first.
+
+    Args:
+        unread_only (bool): Skip notifications already read
+        saved_search_id (Optional[int]): Only those of one saved search
+        limit (Optional[int]): Maximum notifications. Defaults to PAGE_SIZE.
+
+    Returns:
+        List[Dict]: SearchNotification.to_dict() plus search_name and candidate_name
+    """
+    query = select(SearchNotification).order_by(SearchNotification.created_at.desc(), SearchNotification.id.desc())
+    if unread_only:
+        query = query.where(SearchNotification.read_at.is_(None))
+    if saved_search_id is not None:
+        query = query.where(SearchNotification.saved_search_id == saved_search_id)
+    notifications = db.session.execute(query.limit(limit or get_config('PAGE_SIZE', 50))).scalars()
+    return [notification.to_dict() | {'search_name': notification.saved_search.name,
+                                      'candidate_name': notification.candidate.name}
+            for notification in notifications]
+
+def mark_notifications_read(notification_ids: Optional[List[int]] = None) -> int:
+    """
+    Mark notifications as read.
+
+    Args:
+        notification_ids (Optional[List[int]]): Notifications to mark. Defaults to all unread.
+
+    Returns:
+        int: Notifications updated
+    """
+    from storage.sqlite_profile import run_write
+
+    statement = update(SearchNotification).where(SearchNotification.read_at.is_(None))
+    if notification_ids is not None:
+        statement = statement.where(SearchNotification.id.in_(notification_ids))
+
+    return run_write(lambda session: session.execute(statement.values(read_at=datetime.utcnow())).rowcount)
@@ -0,0 +1,404 @@
+"""
+Section-level embeddings: one local-model vector per CV section.
+
+The single candidate embedding is computed from one blob of name, skills,
+summary, experience and education, which dilutes strong experience signals
+and loses whatever does not fit the model's input. Here every section is
+embedded on its own (the summary, each experience entry, the education and
+the skills) into candidate_section_embedding, and a candidate's relevance
+to a query is pooled from its sections:
+
+- max: the similarity of its best section (max-sim),
+- weighted: the best section of each kind, averaged with SECTION_*_WEIGHT.
+
+Sections are exported as a memory-mapped snapshot (rows grouped by
+candidate, with kind and position columns) plus one centroid per
+candidate (mean of its section vectors). A query scans the centroids only,
+so its cost stays one matrix-vector product over the candidates, and then
+scores the sections of the SECTION_RERANK_CANDIDATES best centroids
+exactly. Sections stored or rewritten after the export started (the
+snapshot's as_of) are read from the database and always scored exactly;
+the snapshot rows of a rewritten candidate are left out.
+"""
+import os
+import json
+import time
+import logging
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import delete, func, insert, select, union
+
+from extensions import db
+from models import Candidate, CandidateSectionEmbedding
+from storage.local_embeddings import (
+    local_model_name, VECTOR_DTYPE, input_hash, encode_vector, decode_vector, get_checkpoint, set_checkpoint, clear_checkpoint
+)
+from storage.vector_snapshot import VectorSnapshot, get_vector_snapshot, open_snapshot, write_snapshot
+from utils.config import get_config
+
+logger = logging.getLogger(__name__)
+
+SECTION_KINDS = ('summary', 'experience', 'education', 'skills')
+KIND_CODES = {kind: code for code, kind in enumerate(SECTION_KINDS)}
+MAX_SECTION_CHARS = 2000  # el modelo local trunca mucho antes; evita textos enormes en memoria
+CENTROID_BLOCK = 4096  # candidatos por bloque al calcular los centroides
+
+# Columnas que alimentan las secciones
+SECTION_INPUT_COLUMNS = (
+    Candidate.id,
+    Candidate.summary,
+    Candidate.experience,
+    Candidate.education,
+    Candidate.skills,
+)
+
+
+def _entries(value) -> List:
+    if not value:
+        return []
+    try:
+        parsed = json.loads(value) if isinstance(value, str) else value
+    except (json.JSONDecodeError, TypeError):
+        return [value]
+    if isinstance(parsed, list):
+        return parsed
+    return [parsed] if parsed else []
+
+def _entry_text(entry) -> str:
+    if isinstance(entry, dict):
+        return " ".join(_entry_text(value) for value in entry.values() if value).strip()
+    if isinstance(entry, list):
+        return ", ".join(_entry_text(value) for value in entry if value)
+    return str(entry or '').strip()
+
+def candidate_sections(candidate) -> List[Tuple[str, int, str]]:
+    """
+    Sections of a candidate that are embedded separately.
+
+    Args:
+        candidate: Candidate or row exposing the SECTION_INPUT_COLUMNS
+
+    Returns:
+        List[Tuple[str, int, str]]: (kind, position, text) in kind order
+    """
+    sections = []
+    summary = " ".join(_entry_text(entry) for entry in _entries(candidate.summary)).strip()
+    if summary:
+        sections.append(('summary', 0, summary))
+    experience = [text for text in map(_entry_text, _entries(candidate.experience)) if text]
+    for position, text in enumerate(experience[:get_config('SECTION_MAX_EXPERIENCE', 8)]):
+        sections.append(('experience', position, text))
+    education = "; ".join(text for text in map(_entry_text, _entries(candidate.education)) if text)
+    if education:
+        sections.append(('education', 0, education))
+    skills = ", ".join(text for text in map(_entry_text, _entries(candidate.skills)) if text)
+    if skills:
+        sections.append(('skills', 0, skills))
+    return [(kind, position, text[:MAX_SECTION_CHARS]) for kind, position, text in sections]
+
+def sections_hash(sections: List[Tuple[str, int, str]]) -> str:
+    """sha1 of all the sections of a candidate."""
+    return input_hash("\n".join(f"{kind}:{position}:{text}" for kind, position, text in sections))
+
+def _section_rows(model_name: str, candidate_id: int, sections: List[Tuple[str, int, str]],
+                  vectors: np.ndarray) -> List[Dict]:
+    hash_ = sections_hash(sections)
+    return [{'candidate_id': candidate_id, 'model': model_name, 'kind': kind, 'position': position,
+             'input_hash': hash_, 'vector': encode_vector(vector)}
+            for (kind, position, _), vector in zip(sections, vectors)]
+
+def write_section_embeddings(session, candidate_id: int, model_name: str,
+                             sections: List[Tuple[str, int, str]], vectors: np.ndarray) -> int:
+    """
+    Replace the section embeddings of a candidate on a session, without committing.
+
+    Args:
+        session: Session of the transaction
+        candidate_id (int): Candidate id
+        model_name (str): Model identifier stored with the vectors
+        sections (List[Tuple[str, int, str]]): candidate_sections of the candidate
+        vectors (np.ndarray): One vector per section
+
+    Returns:
+        int: Number of sections stored
+    """
+    rows = _section_rows(model_name, candidate_id, sections, vectors)
+    session.execute(delete(CandidateSectionEmbedding).where(
+        CandidateSectionEmbedding.candidate_id == candidate_id, CandidateSectionEmbedding.model == model_name))
+    if rows:
+        session.execute(insert(CandidateSectionEmbedding), rows)
+    return len(rows)
+
+def rebuild_section_embeddings(encode: Callable[[Sequence[str]], np.ndarray], model_name: str,
+                               batch_size: Optional[int] = None, chunk_size: Optional[int] = None,
+                               force: bool = False, restart: bool = False) -> Dict:
+    """
+    Embed the sections of every candidate whose sections changed since the
+    last run. Resumable like rebuild_local_embeddings (job_checkpoint).
+
+    Args:
+        encode (Callable): Encodes a list of texts into a (n, d) float array
+        model_name (str): Model identifier stored with the vectors
+        batch_size (Optional[int]): Texts per encode call. Defaults to EMBEDDING_BATCH_SIZE.
+        chunk_size (Optional[int]): Candidates per transaction. Defaults to EMBEDDING_CHUNK_SIZE.
+        force (bool): Re-encode even if the sections did not change
+        restart (bool): Ignore a previous interrupted run's checkpoint
+
+    Returns:
+        Dict: rows read, rows embedded, rows skipped, sections, seconds, rows_per_second
+    """
+    batch_size = batch_size or get_config('EMBEDDING_BATCH_SIZE', 256)
+    chunk_size = chunk_size or get_config('EMBEDDING_CHUNK_SIZE', 5000)
+    job = f"section_embeddings:{model_name}"
+    if restart:
+        clear_checkpoint(job)
+
+    last_id = get_checkpoint(job)
+    if last_id:
+        logger.info(f"Resuming {job} after candidate {last_id}")
+
+    stats = {'rows': 0, 'embedded': 0, 'skipped': 0, 'sections': 0}
+    start = time.perf_counter()
+    # Todas las secciones de un candidato llevan el mismo hash
+    stored = select(CandidateSectionEmbedding.candidate_id, func.max(CandidateSectionEmbedding.input_hash)
+                    .label('input_hash'))\
+        .where(CandidateSectionEmbedding.model == model_name)\
+        .group_by(CandidateSectionEmbedding.candidate_id)\
+        .subquery()
+
+    while True:
+        query = select(*SECTION_INPUT_COLUMNS, stored.c.input_hash)\
+            .outerjoin(stored, stored.c.candidate_id == Candidate.id)\
+            .where(Candidate.id > last_id)\
+            .order_by(Candidate.id)\
+            .limit(chunk_size)
+        rows = db.session.execute(query.execution_options(yield_per=1000))
+
+        read = 0
+        pending: List[Tuple[int, List[Tuple[str, int, str]]]] = []
+        for row in rows:
+            read += 1
+            last_id = row.id
+            sections = candidate_sections(row)
+            # Sin secciones ni filas guardadas no hay nada que hacer
+            if (sections or row.input_hash) and (force or sections_hash(sections) != row.input_hash):
+                pending.append((row.id, sections))
+            else:
+                stats['skipped'] += 1
+        if not read:
+            break
+
+        texts = [text for _, sections in pending for _, _, text in sections]
+        vectors = np.concatenate([np.asarray(encode(texts[offset:offset + batch_size]), dtype=VECTOR_DTYPE)
+                                  for offset in range(0, len(texts), batch_size)]) if texts else []
+        inserts, offset = [], 0
+        for candidate_id, sections in pending:
+            inserts += _section_rows(model_name, candidate_id, sections, vectors[offset:offset + len(sections)])
+            offset += len(sections)
+        if pending:
+            db.session.execute(delete(CandidateSectionEmbedding).where(
+                CandidateSectionEmbedding.model == model_name,
+                CandidateSectionEmbedding.candidate_id.in_([candidate_id for candidate_id, _ in pending])
+            ))
+        if inserts:
+            db.session.execute(insert(CandidateSectionEmbedding), inserts)
+
+        stats['rows'] += read
+        stats['embedded'] += len(pending)
+        stats['sections'] += len(inserts)
+        set_checkpoint(job, last_id)
+        db.session.commit()
+
+        elapsed = time.perf_counter() - start
+        logger.info(f"{job}: {stats['rows']} rows ({stats['embedded']} embedded, {stats['skipped']} unchanged), "
+                    f"{stats['rows'] / elapsed:.0f} rows/s")
+
+    clear_checkpoint(job)
+    stats['seconds'] = time.perf_counter() - start
+    stats['rows_per_second'] = stats['rows'] / stats['seconds'] if stats['seconds'] else 0.0
+    return stats
+
+def _section_query(model_name: str, after: int = 0, as_of=None):
+    columns = (CandidateSectionEmbedding.candidate_id, CandidateSectionEmbedding.vector,
+               CandidateSectionEmbedding.kind, CandidateSectionEmbedding.position)
+    query = select(*columns).where(CandidateSectionEmbedding.model == model_name,
+                                   CandidateSectionEmbedding.candidate_id > after)
+    if as_of is None:
+        return query.order_by(CandidateSectionEmbedding.candidate_id, CandidateSectionEmbedding.kind,
+                              CandidateSectionEmbedding.position)
+    # Nuevas y reescritas en dos consultas con índice (un OR recorrería toda la tabla); UNION quita las repetidas
+    rewritten = select(*columns).where(CandidateSectionEmbedding.model == model_name,
+                                       CandidateSectionEmbedding.updated_at >= as_of)
+    rows = union(query, rewritten).subquery()
+    return select(rows).order_by(rows.c.candidate_id, rows.c.kind, rows.c.position)
+
+def _iter_centroids(sections: VectorSnapshot) -> Iterator[Tuple[int, np.ndarray]]:
+    ids = np.asarray(sections.ids)
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    ends = np.r_[starts[1:], len(ids)]
+    for first in range(0, len(starts), CENTROID_BLOCK):
+        block_starts, block_ends = starts[first:first + CENTROID_BLOCK], ends[first:first + CENTROID_BLOCK]
+        vectors = np.asarray(sections.vectors[block_starts[0]:block_ends[-1]])
+        centroids = np.add.reduceat(vectors, block_starts - block_starts[0]) / \
+            (block_ends - block_starts)[:, None]
+        yield from zip(ids[block_starts].tolist(), centroids)
+
+def export_section_embeddings(model_name: str, directory: Optional[str] = None) -> Optional[str]:
+    """
+    Write the stored section embeddings of a model as new snapshot versions
+    (<directory>/sections and <directory>/centroids). Must run inside an app context.
+
+    Args:
+        model_name (str): Model whose vectors are exported
+        directory (Optional[str]): Snapshot directory. Defaults to SECTION_SNAPSHOT_DIR.
+
+    Returns:
+        Optional[str]: Path of the new sections version, or None if there are no vectors
+    """
+    directory = directory or get_config('SECTION_SNAPSHOT_DIR', 'section_snapshot')
+    count = db.session.query(func.count()).select_from(CandidateSectionEmbedding)\
+        .filter(CandidateSectionEmbedding.model == model_name).scalar()
+    if not count:
+        return None
+    first = db.session.execute(_section_query(model_name).limit(1)).first()
+    dimensions = len(decode_vector(first.vector))
+
+    rows = db.session.execute(_section_query(model_name).execution_options(yield_per=5000))
+    path = write_snapshot(((candidate_id, decode_vector(vector), KIND_CODES[kind], position)
+                           for candidate_id, vector, kind, position in rows),
+                          count, dimensions, model_name, os.path.join(directory, 'sections'),
+                          unique_ids=False, columns={'kind': np.int8, 'position': np.int16})
+
+    sections = open_snapshot(os.path.join(directory, 'sections'))
+    candidates = int(np.count_nonzero(np.diff(np.asarray(sections.ids)))) + 1
+    write_snapshot(_iter_centroids(sections), candidates, dimensions, model_name,
+                   os.path.join(directory, 'centroids'))
+    logger.info(f"Exported {len(sections)} section vectors of {candidates} candidates")
+    return path
+
+def _shortlist_rows(query_vector: np.ndarray, sections: VectorSnapshot, centroids: VectorSnapshot,
+                    rerank: int) -> np.ndarray:
+    # Etapa 1: un producto matriz-vector sobre los centroides (uno por candidato)
+    scores = np.asarray(centroids.vectors) @ query_vector
+    candidate_ids = np.asarray(centroids.ids)
+    if rerank < len(candidate_ids):
+        candidate_ids = np.sort(candidate_ids[np.argpartition(-scores, rerank - 1)[:rerank]])
+
+    # Filas de sus secciones (contiguas por candidato)
+    section_ids = np.asarray(sections.ids)
+    starts = np.searchsorted(section_ids, candidate_ids, 'left')
+    lengths = np.searchsorted(section_ids, candidate_ids, 'right') - starts
+    offsets = np.repeat(starts - np.r_[0, np.cumsum(lengths)[:-1]], lengths)
+    return offsets + np.arange(int(lengths.sum()))
+
+def section_blocks(query_vector: np.ndarray, model_name: str, rerank: int) -> List[Tuple]:
+    """
+    Section rows scored for a query: the sections of the best candidates by
+    centroid (snapshot) and every section stored or rewritten after the export.
+
+    Args:
+        query_vector (np.ndarray): Unit query embedding
+        model_name (str): Local model
+        rerank (int): Candidates of the snapshot whose sections are scored
+
+    Returns:
+        List[Tuple]: (candidate ids, kind codes, positions, similarities) per block, grouped by candidate
+    """
+    directory = get_config('SECTION_SNAPSHOT_DIR', 'section_snapshot')
+    sections = get_vector_snapshot(os.path.join(directory, 'sections'))
+    centroids = get_vector_snapshot(os.path.join(directory, 'centroids'))
+    if sections is None or centroids is None or sections.model != model_name or not len(sections):
+        sections = None
+    after, as_of = (int(sections.ids[-1]), sections.as_of) if sections is not None else (0, None)
+    rows = db.session.execute(_section_query(model_name, after, as_of)).all()
+
+    blocks = []
+    if sections is not None:
+        shortlist = _shortlist_rows(query_vector, sections, centroids, rerank)
+        # Candidatos reescritos tras la exportación: cuentan sus secciones de la base de datos
+        shortlist = shortlist[~np.isin(np.asarray(sections.ids)[shortlist], [row.candidate_id for row in rows])]
+        blocks.append((np.asarray(sections.ids)[shortlist], np.asarray(sections.columns['kind'])[shortlist],
+                       np.asarray(sections.columns['position'])[shortlist],
+                       sections.vectors[shortlist] @ query_vector))
+    if rows:
+        vectors = np.stack([decode_vector(row.vector) for row in rows])
+        norms = np.linalg.norm(vectors, axis=1)
+        blocks.append((np.array([row.candidate_id for row in rows], dtype=np.int64),
+                       np.array([KIND_CODES[row.kind] for row in rows], dtype=np.int8),
+                       np.array([row.position for row in rows], dtype=np.int16),
+                       (vectors @ query_vector) / np.where(norms > 0, norms, 1)))
+    return blocks
+
+def _section_weights() -> np.ndarray:
+    return np.array([get_config(f'SECTION_{kind.upper()}_WEIGHT', 1.0) for kind in SECTION_KINDS],
+                    dtype=np.float32)
+
+def pool_section_scores(ids: np.ndarray, kinds: np.ndarray, scores: np.ndarray,
+                        pooling: str = 'max') -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Per-candidate relevance from section similarities.
+
+    Args:
+        ids (np.ndarray): Candidate id per section, rows grouped by candidate (and kind)
+        kinds (np.ndarray): Kind code per section
+        scores (np.ndarray): Similarity per section
+        pooling (str): 'max' (best section) or 'weighted' (weighted mean of the best section of each kind)
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: candidate ids, pooled scores and the row of each
+        candidate's best section
+    """
+    if not len(ids):
+        return ids, scores, np.zeros(0, dtype=np.int64)
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    best = np.maximum.reduceat(scores, starts)
+    # Fila de la mejor sección: la primera del grupo cuyo valor es el máximo
+    owner = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(ids)]))
+    hits = np.flatnonzero(scores == best[owner])
+    best_rows = hits[np.r_[True, owner[hits][1:] != owner[hits][:-1]]]
+
+    if pooling == 'weighted':
+        # Máximo por (candidato, tipo de sección) y media ponderada entre los tipos presentes
+        groups = np.flatnonzero(np.r_[True, (ids[1:] != ids[:-1]) | (kinds[1:] != kinds[:-1])])
+        kind_best = np.maximum.reduceat(scores, groups)
+        weights = _section_weights()[kinds[groups]]
+        group_owner = owner[groups]
+        total = np.bincount(group_owner, weights, len(starts))
+        pooled = np.bincount(group_owner, weights * kind_best, len(starts)) / np.where(total > 0, total, 1)
+    elif pooling == 'max':
+        pooled = best
+    else:
+        raise Exception(f"Unknown section pooling: {pooling}")
+    return ids[starts], pooled.astype(np.float32), best_rows
+
+def search_sections(query_vector: np.ndarray, limit: int, pooling: Optional[str] = None,
+                    model_name: Optional[str] = None, rerank: Optional[int] = None) -> List[Tuple[int, float, Dict]]:
+    """
+    Rank candidates by their sections' similarity to a query.
+
+    Args:
+        query_vector (np.ndarray): Unit query embedding (local model)
+        limit (int): Candidates to keep
+        pooling (Optional[str]): 'max' or 'weighted'. Defaults to SECTION_POOLING.
+        model_name (Optional[str]): Local model. Defaults to LOCAL_EMBEDDING_MODEL.
+        rerank (Optional[int]): Candidates re-scored by section. Defaults to SECTION_RERANK_CANDIDATES.
+
+    Returns:
+        List[Tuple[int, float, Dict]]: (candidate id, score, best section kind and position), best first
+    """
+    pooling = pooling or get_config('SECTION_POOLING', 'max')
+    model_name = model_name or local_model_name()
+    rerank = max(rerank or get_config('SECTION_RERANK_CANDIDATES', 1000), limit)
+    blocks = section_blocks(query_vector, model_name, rerank)
+    if not blocks:
+        return []
+    ids, kinds, positions, scores = (np.concatenate(column) for column in zip(*blocks))
+    candidate_ids, pooled, best_rows = pool_section_scores(ids, kinds, scores.astype(np.float32), pooling)
+
+    keep = min(limit, len(candidate_ids))
+    top = np.argpartition(-pooled, keep - 1)[:keep] if keep < len(candidate_ids) else np.arange(keep)
+    top = top[np.argsort(-pooled[top], kind='stable')]
+    return [(int(candidate_ids[i]), float(pooled[i]),
+             {'kind': SECTION_KINDS[kinds[best_rows[i]]], 'position': int(positions[best_rows[i]])})
+            for i in top.tolist()]
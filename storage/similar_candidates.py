@@ -0,0 +1,313 @@
+"""
+Precomputed "similar candidates" (top-k nearest neighbour graph).
+
+candidate_neighbor keeps, for every candidate, its SIMILAR_CANDIDATES_K
+most similar candidates by cosine similarity of the local embeddings, so
+the candidate page reads them with one primary-key range query on any
+database backend.
+
+The graph is rebuilt from the vector snapshot in blocks of rows (one
+matrix-matrix product per block, blocks spread over a thread pool; numpy
+releases the GIL). A block's scores are rows x N, so the rows per block and
+the threads are sized to SIMILAR_CANDIDATES_MEMORY_MB. The graph is kept
+current between rebuilds:
+
+- upload: the new vector is compared with every vector (snapshot plus the
+  local embeddings added after it); the new candidate gets its top k and
+  joins the lists of the candidates it is now closer to than their k-th
+  neighbour;
+- re-embedding (late vision upgrade): the candidate leaves the graph and
+  joins it again with its new vector;
+- delete: the rows pointing to the candidate are removed and the lists
+  that lost a neighbour are recomputed.
+"""
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import delete, func, insert, select
+
+from extensions import db
+from models import Candidate, CandidateNeighbor
+from storage.local_embeddings import local_model_name
+from storage.vector_snapshot import candidate_vector_sources, open_snapshot
+from utils.config import get_config
+
+logger = logging.getLogger(__name__)
+
+# Candidatos existentes revisados al insertar uno nuevo (los más parecidos a él)
+REVERSE_CANDIDATES = 200
+# Bytes por puntuación de un bloque: float32, su negación y las posiciones int64 de argpartition
+BYTES_PER_SCORE = 16
+MIN_BLOCK_ROWS = 64
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms > 0, norms, 1)
+
+def _vector_of(candidate_id: int, sources: List[Tuple[np.ndarray, np.ndarray]]) -> Optional[np.ndarray]:
+    for ids, vectors in sources:
+        position = np.searchsorted(ids, candidate_id)
+        if position < len(ids) and ids[position] == candidate_id:
+            return np.asarray(vectors[position])
+    return None
+
+def _scores(vector: np.ndarray, sources: List[Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+    if not sources:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    ids = np.concatenate([ids for ids, _ in sources])
+    scores = np.concatenate([np.asarray(vectors) @ vector for _, vectors in sources])
+    return ids, scores
+
+def _top(ids: np.ndarray, scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+    if len(ids) > k:
+        best = np.argpartition(-scores, k - 1)[:k]
+        ids, scores = ids[best], scores[best]
+    order = np.argsort(-scores, kind='stable')
+    return [(int(ids[i]), float(scores[i])) for i in order]
+
+def _existing_ids(candidate_ids) -> set:
+    # El snapshot puede contener candidatos borrados desde su exportación
+    candidate_ids = [int(candidate_id) for candidate_id in candidate_ids]
+    if not candidate_ids:
+        return set()
+    return set(db.session.execute(select(Candidate.id).where(Candidate.id.in_(candidate_ids))).scalars())
+
+def _nearest(vector: np.ndarray, sources, k: int, exclude_id: int) -> List[Tuple[int, float]]:
+    ids, scores = _scores(vector, sources)
+    scores = np.where(ids == exclude_id, -np.inf, scores)
+    # Margen para descartar los borrados sin una segunda pasada
+    top = [(candidate_id, score) for candidate_id, score in _top(ids, scores, k * 2) if np.isfinite(score)]
+    existing = _existing_ids(candidate_id for candidate_id, _ in top)
+    return [(candidate_id, score) for candidate_id, score in top if candidate_id in existing][:k]
+
+def get_similar_candidates(candidate_id: int, limit: Optional[int] = None) -> List[Dict]:
+    """
+    Precomputed similar candidates of a candidate.
+
+    Args:
+        candidate_id (int): Candidate id
+        limit (Optional[int]): Maximum number of candidates. Defaults to SIMILAR_CANDIDATES_K.
+
+    Returns:
+        List[Dict]: id, name, email, skills and similarity, most similar first
+    """
+    limit = limit or get_config('SIMILAR_CANDIDATES_K', 10)
+    rows = db.session.execute(
+        select(Candidate.id, Candidate.name, Candidate.email, Candidate.skills, CandidateNeighbor.similarity)
+        .join(Candidate, Candidate.id == CandidateNeighbor.neighbor_id)
+        .where(CandidateNeighbor.candidate_id == candidate_id)
+        .order_by(CandidateNeighbor.similarity.desc())
+        .limit(limit)
+    ).all()
+    return [{
+        'id': row.id,
+        'name': row.name,
+        'email': row.email or '',
+        'skills': row.skills or '',
+        'similarity': float(row.similarity)
+    } for row in rows]
+
+def link_candidate_neighbors(candidate_id: int, vector: np.ndarray, model_name: Optional[str] = None,
+                             relink: bool = False) -> int:
+    """
+    Link a committed candidate into the neighbour graph (its own list and the
+    lists it now belongs to), given its local embedding.
+
+    Args:
+        candidate_id (int): Committed candidate
+        vector (np.ndarray): Its local embedding
+        model_name (Optional[str]): Local model. Defaults to LOCAL_EMBEDDING_MODEL.
+        relink (bool): The candidate was re-embedded: drop its old links first
+
+    Returns:
+        int: Number of neighbour rows written
+    """
+    from storage.sqlite_profile import run_write
+
+    model_name = model_name or local_model_name()
+    k = get_config('SIMILAR_CANDIDATES_K', 10)
+    # Re-embebido: se sale del grafo como en un borrado y vuelve a entrar con el vector nuevo
+    affected = run_write(lambda session: unlink_candidate(session, candidate_id)) if relink else []
+    vector = _normalize(np.asarray(vector, dtype=np.float32))
+
+    # Un solo recorrido: los más parecidos son sus vecinos y las listas en las que puede entrar
+    nearest = _nearest(vector, candidate_vector_sources(model_name), max(k, REVERSE_CANDIDATES), candidate_id)
+    neighbors = nearest[:k]
+    lists = db.session.execute(
+        select(CandidateNeighbor.candidate_id, func.count(), func.min(CandidateNeighbor.similarity))
+        .where(CandidateNeighbor.candidate_id.in_([owner_id for owner_id, _ in nearest]))
+        .group_by(CandidateNeighbor.candidate_id)
+    ).all() if nearest else []
+    db.session.rollback()
+    kth = {owner_id: (count, lowest) for owner_id, count, lowest in lists}
+    # Entra en una lista incompleta o si supera al k-ésimo vecino actual
+    joined = [(owner_id, score) for owner_id, score in nearest
+              if kth.get(owner_id, (0, None))[0] < k or score > kth[owner_id][1]]
+
+    def write(session) -> int:
+        session.execute(delete(CandidateNeighbor).where(CandidateNeighbor.candidate_id == candidate_id))
+        rows = [{'candidate_id': candidate_id, 'neighbor_id': neighbor_id, 'similarity': score}
+                for neighbor_id, score in neighbors]
+        rows += [{'candidate_id': owner_id, 'neighbor_id': candidate_id, 'similarity': score}
+                 for owner_id, score in joined]
+        if rows:
+            session.execute(insert(CandidateNeighbor), rows)
+        # Cada lista que recibió al candidato se recorta a k vecinos
+        for owner_id, _ in joined:
+            if kth.get(owner_id, (0, None))[0] >= k:
+                session.execute(delete(CandidateNeighbor).where(
+                    CandidateNeighbor.candidate_id == owner_id,
+                    CandidateNeighbor.neighbor_id == _weakest_neighbor(session, owner_id)
+                ))
+        return len(rows)
+
+    written = run_write(write)
+    # Las listas que lo perdieron y no lo recuperaron se recalculan
+    refill_neighbors(sorted(set(affected) - {owner_id for owner_id, _ in joined}), model_name)
+    return written
+
+def _weakest_neighbor(session, candidate_id: int) -> int:
+    return session.execute(
+        select(CandidateNeighbor.neighbor_id)
+        .where(CandidateNeighbor.candidate_id == candidate_id)
+        .order_by(CandidateNeighbor.similarity, CandidateNeighbor.neighbor_id.desc())
+        .limit(1)
+    ).scalar()
+
+def unlink_candidate(session, candidate_id: int) -> List[int]:
+    """
+    Remove a candidate from the neighbour graph before deleting it (no commit).
+
+    Args:
+        session: Session of the delete transaction
+        candidate_id (int): Candidate being deleted
+
+    Returns:
+        List[int]: Candidates that lost a neighbour (pass them to refill_neighbors after the commit)
+    """
+    affected = session.execute(
+        select(CandidateNeighbor.candidate_id).where(CandidateNeighbor.neighbor_id == candidate_id)
+    ).scalars().all()
+    session.execute(delete(CandidateNeighbor).where(CandidateNeighbor.neighbor_id == candidate_id))
+    session.execute(delete(CandidateNeighbor).where(CandidateNeighbor.candidate_id == candidate_id))
+    return [owner_id for owner_id in affected if owner_id != candidate_id]
+
+def refill_neighbors(candidate_ids: Sequence[int], model_name: Optional[str] = None) -> int:
+    """
+    Recompute the neighbour lists of some candidates (e.g. after a delete).
+
+    Args:
+        candidate_ids (Sequence[int]): Candidates whose lists are recomputed
+        model_name (Optional[str]): Local model. Defaults to LOCAL_EMBEDDING_MODEL.
+
+    Returns:
+        int: Number of lists recomputed
+    """
+    from storage.sqlite_profile import run_write
+
+    if not candidate_ids:
+        return 0
+    model_name = model_name or local_model_name()
+    k = get_config('SIMILAR_CANDIDATES_K', 10)
+    sources = candidate_vector_sources(model_name)
+
+    lists = {}
+    for candidate_id in candidate_ids:
+        vector = _vector_of(candidate_id, sources)
+        if vector is not None:
+            lists[candidate_id] = _nearest(vector, sources, k, candidate_id)
+
+    def write(session) -> int:
+        session.execute(delete(CandidateNeighbor).where(CandidateNeighbor.candidate_id.in_(list(lists))))
+        rows = [{'candidate_id': owner_id, 'neighbor_id': neighbor_id, 'similarity': score}
+                for owner_id, neighbors in lists.items() for neighbor_id, score in neighbors]
+        if rows:
+            session.execute(insert(CandidateNeighbor), rows)
+        return len(lists)
+
+    return run_write(write) if lists else 0
+
+def _block_plan(count: int, block_size: int, workers: int, memory_bytes: int) -> Tuple[int, int]:
+    """Rows per block and threads so that the blocks in flight fit in memory_bytes."""
+    row_bytes = BYTES_PER_SCORE * max(count, 1)
+    # Menos hilos antes que bloques diminutos (el producto pierde eficiencia)
+    workers = max(1, min(workers, memory_bytes // (row_bytes * MIN_BLOCK_ROWS)))
+    rows = max(1, min(block_size, memory_bytes // (row_bytes * workers)))
+    return rows, workers
+
+def _knn_blocks(matrix: np.ndarray, k: int, block_size: int, workers: int):
+    """Yield (start, neighbour positions, similarities) per block of rows."""
+    count = len(matrix)
+    k = min(k, count - 1)
+
+    def block(start: int):
+        end = min(start + block_size, count)
+        scores = matrix[start:end] @ matrix.T
+        # Un candidato no es vecino de sí mismo
+        scores[np.arange(end - start), np.arange(start, end)] = -np.inf
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        return start, np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+    if k <= 0:
+        return
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(block, range(0, count, block_size))
+
+def rebuild_similar_candidates(model_name: Optional[str] = None, k: Optional[int] = None,
+                               block_size: Optional[int] = None, workers: Optional[int] = None,
+                               snapshot_directory: Optional[str] = None) -> Dict:
+    """
+    Recompute the whole neighbour graph from the vector snapshot (plus the
+    local embeddings stored after it). Must run inside an app context.
+
+    Args:
+        model_name (Optional[str]): Local model. Defaults to LOCAL_EMBEDDING_MODEL.
+        k (Optional[int]): Neighbours per candidate. Defaults to SIMILAR_CANDIDATES_K.
+        block_size (Optional[int]): Rows per matrix product. Defaults to SIMILAR_CANDIDATES_BLOCK_SIZE.
+        workers (Optional[int]): Threads computing blocks. Defaults to SIMILAR_CANDIDATES_WORKERS (0 = one per core).
+            Both are lowered to keep the blocks in flight within SIMILAR_CANDIDATES_MEMORY_MB.
+        snapshot_directory (Optional[str]): Snapshot directory. Defaults to VECTOR_SNAPSHOT_DIR.
+
+    Returns:
+        Dict: candidates, rows written, seconds
+    """
+    model_name = model_name or local_model_name()
+    k = k or get_config('SIMILAR_CANDIDATES_K', 10)
+    block_size = block_size or get_config('SIMILAR_CANDIDATES_BLOCK_SIZE', 1024)
+    workers = workers or get_config('SIMILAR_CANDIDATES_WORKERS', 0) or os.cpu_count() or 1
+    start = time.perf_counter()
+
+    sources = candidate_vector_sources(model_name, open_snapshot(snapshot_directory) if snapshot_directory else None)
+    if not sources:
+        return {'candidates': 0, 'rows': 0, 'seconds': 0.0}
+    ids = np.concatenate([ids for ids, _ in sources])
+    matrix = np.concatenate([np.asarray(vectors, dtype=np.float32) for _, vectors in sources])
+    existing = np.fromiter(db.session.execute(select(Candidate.id)).scalars(), dtype=np.int64)
+    keep = np.isin(ids, existing)
+    ids, matrix = ids[keep], np.ascontiguousarray(matrix[keep])
+
+    block_size, workers = _block_plan(len(ids), block_size, workers,
+                                      get_config('SIMILAR_CANDIDATES_MEMORY_MB', 512) * 2 ** 20)
+    logger.info(f"Similar candidates rebuild: {block_size} rows per block, {workers} threads")
+
+    # Se reemplaza el grafo entero en una transacción: los lectores ven el anterior hasta el commit
+    db.session.execute(delete(CandidateNeighbor))
+    rows_written = 0
+    for first, positions, scores in _knn_blocks(matrix, k, block_size, workers):
+        owners = np.repeat(ids[first:first + len(positions)], positions.shape[1])
+        rows = [{'candidate_id': int(owner), 'neighbor_id': int(neighbor), 'similarity': float(score)}
+                for owner, neighbor, score in zip(owners, ids[positions].ravel(), scores.ravel())]
+        db.session.execute(insert(CandidateNeighbor), rows)
+        rows_written += len(rows)
+    db.session.commit()
+
+    elapsed = time.perf_counter() - start
+    logger.info(f"Similar candidates graph: {len(ids)} candidates, {rows_written} rows in {elapsed:.1f}s")
+    return {'candidates': len(ids), 'rows': rows_written, 'seconds': elapsed}
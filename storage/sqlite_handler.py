@@ -1,12 +1,18 @@
 import logging
-from typing import List, Optional
-from sqlalchemy import or_, and_
+from typing import List, Optional, Tuple
+from sqlalchemy import or_, and_, select, false
 from extensions import db
-from models import Candidate
+from models import Candidate, CandidateSkill, CandidateEducation, CandidateLanguage, CandidateTerm
 import re
 import json
 import unicodedata
 from constants.constants import UNIVERSITY_ALIASES,ROLE_ALIASES
+from storage.normalization import canonical_skill, canonical_institution, canonical_language, text_terms
+from storage.pagination import paginate_by_recency
+from storage.projections import CandidateSummary, summary_query
+from storage.sqlite_profile import read_session
+from storage.stats import get_counter, get_counters, TOTAL_CANDIDATES, FILE_TYPE_PREFIX
+from utils.config import get_config
 
 logger = logging.getLogger(__name__)
 
@@ -39,59 +45,227 @@ def is_university(institution: str) -> bool:
     return any(kw in institution for kw in universidad_keywords)
 
 
-def search_candidates(query: str) -> List[Candidate]:
+def mentioned_institutions(query: str) -> set:
+    """Canonical institutions named in a query (or by one of their aliases)."""
+    return {
+        canonical_institution(UNIVERSITY_ALIASES[k])
+        for k in UNIVERSITY_ALIASES
+        if k.lower() in query.lower() or UNIVERSITY_ALIASES[k].lower() in query.lower()
+    }
+
+def _apply_search(candidates_query, query: str, filters: Optional[dict] = None):
+    """
+    Apply the keyword search (and optional structured filters) to a query over
+    Candidate or its columns.
+    """
+    keywords = extract_keywords(query)
+
+    # Filtros OR por campo
+    education_filter = or_(*[Candidate.education.ilike(f"%{kw}%") for kw in keywords])
+    skills_filter = or_(*[Candidate.skills.ilike(f"%{kw}%") for kw in keywords])
+    # El texto del CV se guarda comprimido: se busca en el índice de términos
+    fulltext_filter = or_(*[_candidates_with_text(kw) for kw in keywords])
+    experience_filter = or_(*[Candidate.experience.ilike(f"%{kw}%") for kw in keywords])
+
+    candidates_query = candidates_query.filter(
+        or_(
+            education_filter,
+            skills_filter,
+            fulltext_filter,
+            experience_filter
+        )
+    )
+
+    # Detectar si se mencionó alguna universidad o alias
+    mentioned_universities = mentioned_institutions(query)
+
+    if mentioned_universities:
+        # Filtro indexado sobre candidate_education, aplicado antes del límite
+        candidates_query = candidates_query.filter(
+            Candidate.id.in_(_candidates_with_institutions(mentioned_universities))
+        )
+
+    if filters:
+        candidates_query = apply_attribute_filters(
+            candidates_query,
+            skills=filters.get('skills'),
+            institutions=filters.get('institutions'),
+            languages=filters.get('languages'),
+            clusters=filters.get('clusters')
+        )
+
+    return candidates_query, keywords
+
+def search_candidates(query: str, filters: Optional[dict] = None) -> List[CandidateSummary]:
+    return search_candidates_page(query, filters, limit=50)[0]
+
+def search_candidates_page(query: str, filters: Optional[dict] = None, limit: Optional[int] = None,
+                           cursor: Optional[str] = None) -> Tuple[List[CandidateSummary], Optional[str]]:
+    """
+    One page of keyword search results, newest first.
+
+    Args:
+        query (str): Keyword query
+        filters (Optional[dict]): Structured filters (skills, institutions, languages, clusters)
+        limit (Optional[int]): Page size. Defaults to PAGE_SIZE.
+        cursor (Optional[str]): Token of the previous page
+
+    Returns:
+        Tuple[List[CandidateSummary], Optional[str]]: Candidates and the next page token
+    """
+    rows, next_cursor = search_candidate_rows(query, filters, limit, cursor)
+    return [CandidateSummary.from_row(row) for row in rows], next_cursor
+
+def search_candidate_rows(query: str, filters: Optional[dict] = None, limit: Optional[int] = None,
+                          cursor: Optional[str] = None, extra_columns: tuple = ()) -> Tuple[List, Optional[str]]:
+    """
+    One page of keyword search results as rows of the summary columns,
+    plus any extra columns the caller needs (e.g. full_text for scoring).
+
+    Returns:
+        Tuple[List, Optional[str]]: Rows and the next page token
+    """
     try:
         if not query or not query.strip():
-            return []
-
-        keywords = extract_keywords(query)
-
-        # Filtros OR por campo
-        education_filter = or_(*[Candidate.education.ilike(f"%{kw}%") for kw in keywords])
-        skills_filter = or_(*[Candidate.skills.ilike(f"%{kw}%") for kw in keywords])
-        fulltext_filter = or_(*[Candidate.full_text.ilike(f"%{kw}%") for kw in keywords])
-        experience_filter = or_(*[Candidate.experience.ilike(f"%{kw}%") for kw in keywords])
-
-        candidates = db.session.query(Candidate).filter(
-            or_(
-                education_filter,
-                skills_filter,
-                fulltext_filter,
-                experience_filter
-            )
-        ).order_by(Candidate.created_at.desc()).limit(50).all()
-
-        # Detectar si se mencionó alguna universidad o alias
-        mentioned_universities = [
-            normalize(UNIVERSITY_ALIASES[k])
-            for k in UNIVERSITY_ALIASES
-            if k.lower() in query.lower() or UNIVERSITY_ALIASES[k].lower() in query.lower()
-        ]
-
-        if mentioned_universities:
-            filtered_candidates = []
-            for c in candidates:
-                try:
-                    education_data = json.loads(c.education) if isinstance(c.education, str) else c.education
-                    for ed in education_data:
-                        if isinstance(ed, dict):
-                            inst = normalize(ed.get("institution", ""))
-                            if any(alias in inst or inst in alias for alias in mentioned_universities):
-                                filtered_candidates.append(c)
-                                break
-                except Exception as parse_error:
-                    logger.warning(f"Error parsing education JSON for candidate {c.id}: {parse_error}")
-            candidates = filtered_candidates
-
-        logger.info(f"Search for keywords {keywords} returned {len(candidates)} candidates")
-        return candidates
+            return [], None
+
+        candidates_query, keywords = _apply_search(summary_query(*extra_columns), query, filters)
+        rows, next_cursor = paginate_by_recency(candidates_query, limit or get_config('PAGE_SIZE', 50), cursor)
+
+        logger.info(f"Search for keywords {keywords} returned {len(rows)} candidates")
+        return rows, next_cursor
 
     except Exception as e:
         logger.error(f"Error searching candidates: {str(e)}")
         raise Exception(f"Database search failed: {str(e)}")
 
+def search_candidate_ids(query: str = '', filters: Optional[dict] = None) -> Optional[List[int]]:
+    """
+    IDs of every candidate matching a search (no limit), used for facet counts.
+
+    Args:
+        query (str): Keyword query
+        filters (Optional[dict]): Structured filters (skills, institutions, languages, clusters)
+
+    Returns:
+        Optional[List[int]]: Matching IDs, or None when there is no query nor filters
+    """
+    try:
+        ids_query = read_session().query(Candidate.id)
+        if query and query.strip():
+            ids_query, _ = _apply_search(ids_query, query, filters)
+        elif filters:
+            ids_query = apply_attribute_filters(
+                ids_query,
+                skills=filters.get('skills'),
+                institutions=filters.get('institutions'),
+                languages=filters.get('languages'),
+                clusters=filters.get('clusters')
+            )
+        else:
+            return None
+        return [row[0] for row in ids_query.all()]
+
+    except Exception as e:
+        logger.error(f"Error searching candidate ids: {str(e)}")
+        raise Exception(f"Database search failed: {str(e)}")
+
+
+def candidate_matches_search(candidate_id: int, query: str = '', filters: Optional[dict] = None) -> bool:
+    """
+    Whether one candidate is among the results of a search (saved-search
+    percolation checks each new candidate only against the searches it may match).
+
+    Args:
+        candidate_id (int): Candidate id
+        query (str): Keyword query ('' = filters only)
+        filters (Optional[dict]): Structured filters (skills, institutions, languages, clusters)
+
+    Returns:
+        bool: True if the search returns the candidate
+    """
+    ids_query = db.session.query(Candidate.id).filter(Candidate.id == candidate_id)
+    if query and query.strip():
+        ids_query, _ = _apply_search(ids_query, query, filters)
+    elif filters:
+        ids_query = apply_attribute_filters(
+            ids_query,
+            skills=filters.get('skills'),
+            institutions=filters.get('institutions'),
+            languages=filters.get('languages'),
+            clusters=filters.get('clusters')
+        )
+    return ids_query.first() is not None
+
+
+def _candidates_with_text(keyword: str):
+    """
+    Condition matching candidates whose CV text contains every word of the
+    keyword (prefix match on the term index: 'python' matches 'python3').
+    """
+    conditions = [
+        Candidate.id.in_(
+            select(CandidateTerm.candidate_id)
+            .where(CandidateTerm.term >= term, CandidateTerm.term < term + '\uffff')
+        )
+        for term in text_terms(keyword)
+    ]
+    return and_(*conditions) if conditions else false()
+
+def _candidates_with_skills(skills):
+    """Subquery of candidate ids having ALL the given canonical skills."""
+    skills = set(skills)
+    return select(CandidateSkill.candidate_id)\
+        .where(CandidateSkill.canonical.in_(skills))\
+        .group_by(CandidateSkill.candidate_id)\
+        .having(db.func.count(CandidateSkill.canonical.distinct()) == len(skills))
+
+def _candidates_with_institutions(institutions):
+    """Subquery of candidate ids that studied at ANY of the given canonical institutions."""
+    return select(CandidateEducation.candidate_id)\
+        .where(CandidateEducation.canonical_institution.in_(set(institutions)))
+
+def _candidates_with_languages(languages):
+    """Subquery of candidate ids speaking ALL the given canonical languages."""
+    languages = set(languages)
+    return select(CandidateLanguage.candidate_id)\
+        .where(CandidateLanguage.canonical.in_(languages))\
+        .group_by(CandidateLanguage.candidate_id)\
+        .having(db.func.count(CandidateLanguage.canonical.distinct()) == len(languages))
+
+def apply_attribute_filters(candidates_query, skills: Optional[List[str]] = None,
+                            institutions: Optional[List[str]] = None,
+                            languages: Optional[List[str]] = None,
+                            clusters: Optional[List[int]] = None):
+    """
+    Restrict a Candidate query with the normalized attribute tables.
+
+    Args:
+        candidates_query: SQLAlchemy query over Candidate
+        skills (Optional[List[str]]): Candidate must have all of these skills
+        institutions (Optional[List[str]]): Candidate must have studied at one of these
+        languages (Optional[List[str]]): Candidate must speak all of these languages
+        clusters (Optional[List[int]]): Candidate must belong to one of these clusters
 
-def get_all_candidates(limit: int = 100, offset: int = 0) -> List[Candidate]:
+    Returns:
+        The filtered query
+    """
+    skills = [canonical_skill(s) for s in skills or [] if s and s.strip()]
+    institutions = [canonical_institution(i) for i in institutions or [] if i and i.strip()]
+    languages = [canonical_language(l) for l in languages or [] if l and l.strip()]
+    clusters = [int(c) for c in clusters or [] if str(c).strip().isdigit()]
+
+    if skills:
+        candidates_query = candidates_query.filter(Candidate.id.in_(_candidates_with_skills(skills)))
+    if institutions:
+        candidates_query = candidates_query.filter(Candidate.id.in_(_candidates_with_institutions(institutions)))
+    if languages:
+        candidates_query = candidates_query.filter(Candidate.id.in_(_candidates_with_languages(languages)))
+    if clusters:
+        candidates_query = candidates_query.filter(Candidate.cluster_id.in_(clusters))
+    return candidates_query
+
+def get_all_candidates(limit: int = 100, offset: int = 0) -> List[CandidateSummary]:
     """
     Retrieve all candidates with pagination.
     
@@ -100,14 +274,15 @@ def get_all_candidates(limit: int = 100, offset: int = 0) -> List[Candidate]:
         offset (int): Number of candidates to skip
         
     Returns:
-        List[Candidate]: List of candidates
+        List[CandidateSummary]: List of candidates
     """
     try:
-        candidates = db.session.query(Candidate)\
+        rows = summary_query()\
             .order_by(Candidate.created_at.desc())\
             .limit(limit)\
             .offset(offset)\
             .all()
+        candidates = [CandidateSummary.from_row(row) for row in rows]
         
         logger.info(f"Retrieved {len(candidates)} candidates (limit: {limit}, offset: {offset})")
         return candidates
@@ -116,6 +291,52 @@ def get_all_candidates(limit: int = 100, offset: int = 0) -> List[Candidate]:
         logger.error(f"Error retrieving candidates: {str(e)}")
         raise Exception(f"Database query failed: {str(e)}")
 
+def get_candidates_page(limit: Optional[int] = None, cursor: Optional[str] = None,
+                        filters: Optional[dict] = None) -> Tuple[List[CandidateSummary], Optional[str]]:
+    """
+    One page of candidates, newest first, using keyset pagination.
+
+    Args:
+        limit (Optional[int]): Page size. Defaults to PAGE_SIZE.
+        cursor (Optional[str]): Token of the previous page
+        filters (Optional[dict]): Structured filters (skills, institutions, languages, clusters)
+
+    Returns:
+        Tuple[List[CandidateSummary], Optional[str]]: Candidates and the next page token
+    """
+    try:
+        candidates_query = summary_query()
+        if filters:
+            candidates_query = apply_attribute_filters(
+                candidates_query,
+                skills=filters.get('skills'),
+                institutions=filters.get('institutions'),
+                languages=filters.get('languages'),
+                clusters=filters.get('clusters')
+            )
+        rows, next_cursor = paginate_by_recency(candidates_query, limit or get_config('PAGE_SIZE', 50), cursor)
+        candidates = [CandidateSummary.from_row(row) for row in rows]
+
+        logger.info(f"Retrieved {len(candidates)} candidates (limit: {limit}, more: {next_cursor is not None})")
+        return candidates, next_cursor
+
+    except Exception as e:
+        logger.error(f"Error retrieving candidates: {str(e)}")
+        raise Exception(f"Database query failed: {str(e)}")
+
+def get_file_type_counts() -> dict:
+    """
+    Number of candidates per uploaded file type (maintained counters).
+
+    Returns:
+        dict: file_type -> count
+    """
+    try:
+        return get_counters(FILE_TYPE_PREFIX)
+    except Exception as e:
+        logger.error(f"Error counting file types: {str(e)}")
+        return {}
+
 def get_candidate_by_id(candidate_id: int) -> Optional[Candidate]:
     """
     Retrieve a specific candidate by ID.
@@ -140,7 +361,7 @@ def get_candidate_by_id(candidate_id: int) -> Optional[Candidate]:
         logger.error(f"Error retrieving candidate {candidate_id}: {str(e)}")
         raise Exception(f"Database query failed: {str(e)}")
 
-def get_candidates_by_skill(skill: str) -> List[Candidate]:
+def get_candidates_by_skill(skill: str) -> List[CandidateSummary]:
     """
     Search for candidates by specific skill.
     
@@ -148,17 +369,16 @@ def get_candidates_by_skill(skill: str) -> List[Candidate]:
         skill (str): Skill to search for
         
     Returns:
-        List[Candidate]: List of candidates with the skill
+        List[CandidateSummary]: List of candidates with the skill
     """
     try:
-        skill_term = f"%{skill.strip()}%"
-        
-        candidates = db.session.query(Candidate).filter(
-            or_(
-                Candidate.skills.ilike(skill_term),
-                Candidate.full_text.ilike(skill_term)
-            )
-        ).order_by(Candidate.created_at.desc()).all()
+        # Join indexado por nombre canónico en lugar de LIKE sobre JSON y texto completo
+        rows = summary_query()\
+            .join(CandidateSkill, CandidateSkill.candidate_id == Candidate.id)\
+            .filter(CandidateSkill.canonical == canonical_skill(skill))\
+            .order_by(Candidate.created_at.desc())\
+            .all()
+        candidates = [CandidateSummary.from_row(row) for row in rows]
         
         logger.info(f"Skill search for '{skill}' returned {len(candidates)} candidates")
         return candidates
@@ -169,13 +389,13 @@ def get_candidates_by_skill(skill: str) -> List[Candidate]:
 
 def get_candidates_count() -> int:
     """
-    Get total number of candidates in the database.
+    Get total number of candidates in the database (maintained counter).
     
     Returns:
         int: Total number of candidates
     """
     try:
-        count = db.session.query(Candidate).count()
+        count = get_counter(TOTAL_CANDIDATES)
         logger.info(f"Total candidates count: {count}")
         return count
         
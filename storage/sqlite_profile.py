@@ -0,0 +1,276 @@
+"""
+SQLite deployment profile.
+
+With the default settings every upload takes the database write lock in
+rollback-journal mode, readers block behind it and concurrent writers fail
+with "database is locked". This profile:
+
+- switches the database to WAL (readers never block on the writer) with
+  synchronous=NORMAL, and sets mmap_size, cache_size and busy_timeout on
+  every connection;
+- serves search and listing queries from a separate engine whose
+  connections are read-only (PRAGMA query_only);
+- funnels ingest writes through a single writer thread that commits queued
+  jobs in batches, so writes are serialized instead of racing for the lock.
+
+Other databases (PostgreSQL) are left untouched: read_session() returns the
+regular session and run_write() commits inline.
+"""
+import time
+import queue
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional
+
+from flask.globals import app_ctx
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, scoped_session, sessionmaker
+
+from extensions import db
+from utils.config import get_config
+
+logger = logging.getLogger(__name__)
+
+_read_engine = None
+_read_sessions = scoped_session(sessionmaker(), scopefunc=lambda: id(app_ctx._get_current_object()))
+_writer: Optional['WriterQueue'] = None
+_writer_lock = threading.Lock()
+
+def is_file_sqlite(url) -> bool:
+    """True for an on-disk SQLite database (not :memory:)."""
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+def sqlite_engine_options() -> dict:
+    """
+    SQLALCHEMY_ENGINE_OPTIONS for a SQLite database.
+
+    Returns:
+        dict: Engine options (busy timeout, connections shared across threads)
+    """
+    return {
+        "connect_args": {
+            "timeout": get_config('SQLITE_BUSY_TIMEOUT_MS', 5000) / 1000,
+            "check_same_thread": False,
+        }
+    }
+
+def _apply_pragmas(dbapi_connection, read_only: bool = False) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        if not read_only and get_config('SQLITE_WAL', True):
+            # Persistente en el archivo: basta con que lo ejecute la conexión de escritura
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(get_config('SQLITE_BUSY_TIMEOUT_MS', 5000))}")
+        cursor.execute(f"PRAGMA mmap_size={int(get_config('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))}")
+        # Valor negativo = tamaño en KiB
+        cursor.execute(f"PRAGMA cache_size=-{int(get_config('SQLITE_CACHE_SIZE_KB', 64 * 1024))}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+    finally:
+        cursor.close()
+
+def configure_sqlite_engine(engine, read_only: bool = False) -> None:
+    """
+    Apply the profile pragmas to every new connection of an engine.
+
+    Args:
+        engine: SQLAlchemy engine for a SQLite database
+        read_only (bool): Reject writes on these connections
+    """
+    event.listen(engine, 'connect', lambda dbapi_connection, record: _apply_pragmas(dbapi_connection, read_only))
+    # Las conexiones ya abiertas no pasaron por el evento
+    engine.dispose()
+
+def init_sqlite_profile(app) -> bool:
+    """
+    Configure the write engine and create the read-only engine.
+    Must run inside an app context, before the first query.
+
+    Args:
+        app: Flask application
+
+    Returns:
+        bool: True if the profile was applied (on-disk SQLite only)
+    """
+    global _read_engine
+
+    engine = db.engine
+    if not is_file_sqlite(engine.url):
+        return False
+
+    configure_sqlite_engine(engine)
+    if get_config('SQLITE_READ_ONLY_SEARCH', True):
+        _read_engine = create_engine(engine.url, pool_size=get_config('SQLITE_READ_POOL_SIZE', 8),
+                                     **sqlite_engine_options())
+        configure_sqlite_engine(_read_engine, read_only=True)
+        _read_sessions.configure(bind=_read_engine)
+        app.teardown_appcontext(lambda exc: _read_sessions.remove())
+
+    logger.info(f"SQLite profile enabled (WAL={get_config('SQLITE_WAL', True)}, "
+                f"read-only search={_read_engine is not None})")
+    return True
+
+def read_session():
+    """
+    Session for search and listing queries: read-only connections when the
+    SQLite profile is enabled, the regular session otherwise.
+
+    Reads only see committed data, so never use it to read back rows written
+    in the current (uncommitted) transaction.
+    """
+    return _read_sessions() if _read_engine is not None else db.session
+
+
+class _WriteJob:
+    __slots__ = ('func', 'future')
+
+    def __init__(self, func: Callable[[Session], Any]):
+        self.func = func
+        self.future = Future()
+
+
+class WriterQueue:
+    """
+    Single writer thread. Jobs are callables receiving a Session; the ones
+    queued while the previous commit ran (plus those arriving within
+    SQLITE_WRITER_BATCH_WAIT_MS, if set) are committed together, up to
+    SQLITE_WRITER_BATCH_SIZE. If a batch fails each job is retried alone, so
+    one bad job never fails the others.
+
+    Objects added by a job stay usable after the commit (loaded, detached).
+    """
+
+    def __init__(self, engine, batch_size: Optional[int] = None, batch_wait_ms: Optional[float] = None):
+        self._engine = engine
+        self._batch_size = batch_size or get_config('SQLITE_WRITER_BATCH_SIZE', 32)
+        self._batch_wait = (batch_wait_ms if batch_wait_ms is not None
+                            else get_config('SQLITE_WRITER_BATCH_WAIT_MS', 0)) / 1000
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='sqlite-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, func: Callable[[Session], Any]) -> Future:
+        """
+        Queue a write job.
+
+        Args:
+            func (Callable[[Session], Any]): Adds/changes rows on the given session (must not commit)
+
+        Returns:
+            Future: Resolves to the job's return value once committed
+        """
+        job = _WriteJob(func)
+        self._queue.put(job)
+        return job.future
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Commit the queued jobs and stop the thread."""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            # Group commit: lo que se encoló mientras se hacía el commit anterior va
+            # en este lote; opcionalmente se espera un poco más a otros trabajos
+            batch = [job]
+            deadline = time.monotonic() + self._batch_wait
+            stop = False
+            while len(batch) < self._batch_size:
+                try:
+                    remaining = deadline - time.monotonic()
+                    job = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    stop = True
+                    break
+                batch.append(job)
+            self._commit(batch)
+            if stop:
+                return
+
+    def _commit(self, batch: List[_WriteJob]) -> None:
+        session = Session(self._engine, expire_on_commit=False)
+        try:
+            results = [job.func(session) for job in batch]
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            if len(batch) > 1:
+                logger.warning(f"Write batch of {len(batch)} failed ({str(e)}), retrying jobs one by one")
+                for job in batch:
+                    self._commit([job])
+            else:
+                batch[0].future.set_exception(e)
+            return
+        finally:
+            session.close()
+
+        for job, result in zip(batch, results):
+            job.future.set_result(result)
+
+def start_writer_queue(engine=None) -> Optional[WriterQueue]:
+    """
+    Start the writer thread for an on-disk SQLite database.
+
+    Args:
+        engine: Engine to write with. Defaults to db.engine (needs an app context).
+
+    Returns:
+        Optional[WriterQueue]: The queue, or None when writes are committed inline
+    """
+    global _writer
+
+    # Los procesos del pool de parsing re-importan la app: no escriben
+    if multiprocessing.parent_process() is not None or not get_config('SQLITE_WRITER_QUEUE', True):
+        return None
+
+    engine = engine or db.engine
+    if not is_file_sqlite(engine.url):
+        return None
+
+    with _writer_lock:
+        if _writer is None:
+            _writer = WriterQueue(engine)
+            logger.info("SQLite writer queue started")
+        return _writer
+
+def shutdown_writer_queue() -> None:
+    """Commit pending writes and stop the writer thread, if running."""
+    global _writer
+
+    with _writer_lock:
+        if _writer is not None:
+            _writer.stop()
+            _writer = None
+            logger.info("SQLite writer queue stopped")
+
+def run_write(func: Callable[[Session], Any], timeout: Optional[float] = None) -> Any:
+    """
+    Run a write job through the writer queue and wait for its commit, or run
+    and commit it on the current session when the queue is disabled.
+
+    Args:
+        func (Callable[[Session], Any]): Adds/changes rows on the given session (must not commit)
+        timeout (Optional[float]): Seconds to wait for the commit
+
+    Returns:
+        Any: The job's return value
+    """
+    writer = _writer
+    if writer is not None:
+        return writer.submit(func).result(timeout)
+
+    try:
+        result = func(db.session)
+        db.session.commit()
+        return result
+    except Exception:
+        db.session.rollback()
+        raise
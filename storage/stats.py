@@ -0,0 +1,197 @@
+"""
+Dashboard counters kept up to date on every insert and delete.
+
+Counting candidates on each page hit scans the whole table, so the numbers
+the dashboard shows live in the stat_counter table instead. Mapper events
+on Candidate and CandidateDocument adjust them with an upsert on the flush
+connection, so a counter changes in the same transaction as the rows it
+counts (a rollback undoes both).
+
+Counters:
+- 'candidates': total candidates
+- 'candidates_with_vectors': candidates with a text embedding
+- 'file_type:<ext>': candidates per uploaded file type
+- 'uploads:<YYYY-MM-DD>': uploads per day (history: not decremented on delete)
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Dict
+
+from sqlalchemy import event, inspect, select, text
+
+from extensions import db
+from models import Candidate, CandidateDocument, StatCounter
+from utils.embeddings import stored_embedding_present
+
+logger = logging.getLogger(__name__)
+
+TOTAL_CANDIDATES = 'candidates'
+CANDIDATES_WITH_VECTORS = 'candidates_with_vectors'
+FILE_TYPE_PREFIX = 'file_type:'
+UPLOADS_PREFIX = 'uploads:'
+FACET_INDEX_VERSION = 'facet_index_version'  # lo incrementan los procesos que reescriben atributos en bloque
+FACET_CHANGES_PRUNED = 'facet_changes_pruned'  # último id de facet_change purgado
+
+# Upsert portable entre SQLite (>= 3.24) y PostgreSQL
+_UPSERT = text("""
+    INSERT INTO stat_counter (name, value) VALUES (:name, :delta)
+    ON CONFLICT (name) DO UPDATE SET value = stat_counter.value + excluded.value
+""")
+
+def increment_counter(connection, name: str, delta: int = 1) -> None:
+    """
+    Add delta to a counter, creating it if missing.
+
+    Args:
+        connection: Connection of the current transaction
+        name (str): Counter name
+        delta (int): Amount to add (negative to subtract)
+    """
+    if delta:
+        connection.execute(_UPSERT, {'name': name, 'delta': delta})
+
+def _column_value(connection, target, model, key_column, column: str):
+    """Attribute value of a flushed object, read from the row if it was expired."""
+    if column not in inspect(target).unloaded:
+        return getattr(target, column)
+    return connection.execute(
+        select(getattr(model, column)).where(key_column == inspect(target).identity[0])
+    ).scalar()
+
+def _has_embedding(connection, candidate_id: int) -> bool:
+    """True if the stored document of a candidate has an embedding."""
+    return bool(connection.execute(
+        select(CandidateDocument.text_embedding.isnot(None))
+        .where(CandidateDocument.candidate_id == candidate_id)
+    ).scalar())
+
+
+@event.listens_for(Candidate, 'after_insert')
+def _candidate_inserted(mapper, connection, target):
+    day = (target.created_at or datetime.utcnow()).date().isoformat()
+    increment_counter(connection, TOTAL_CANDIDATES)
+    increment_counter(connection, f"{FILE_TYPE_PREFIX}{target.file_type}")
+    increment_counter(connection, f"{UPLOADS_PREFIX}{day}")
+
+@event.listens_for(Candidate, 'before_delete')
+def _candidate_deleted(mapper, connection, target):
+    file_type = _column_value(connection, target, Candidate, Candidate.id, 'file_type')
+    increment_counter(connection, TOTAL_CANDIDATES, -1)
+    increment_counter(connection, f"{FILE_TYPE_PREFIX}{file_type}", -1)
+
+@event.listens_for(CandidateDocument, 'after_insert')
+def _document_inserted(mapper, connection, target):
+    if target.text_embedding is not None:
+        increment_counter(connection, CANDIDATES_WITH_VECTORS)
+
+@event.listens_for(CandidateDocument, 'before_update')
+def _document_updated(mapper, connection, target):
+    if not inspect(target).attrs.text_embedding.history.has_changes():
+        return
+    had_embedding = _has_embedding(connection, target.candidate_id)
+    has_embedding = target.text_embedding is not None
+    increment_counter(connection, CANDIDATES_WITH_VECTORS, int(has_embedding) - int(had_embedding))
+
+@event.listens_for(CandidateDocument, 'before_delete')
+def _document_deleted(mapper, connection, target):
+    if _has_embedding(connection, inspect(target).identity[0]):
+        increment_counter(connection, CANDIDATES_WITH_VECTORS, -1)
+
+
+def get_counter(name: str) -> int:
+    """
+    Current value of a counter (primary key lookup).
+
+    Args:
+        name (str): Counter name
+
+    Returns:
+        int: Value, 0 if the counter does not exist
+    """
+    # Consulta directa (no el identity map): los eventos actualizan la fila con SQL
+    value = db.session.query(StatCounter.value).filter(StatCounter.name == name).scalar()
+    return value or 0
+
+def get_counters(prefix: str) -> Dict[str, int]:
+    """
+    Counters whose name starts with a prefix (index range on the primary key).
+
+    Args:
+        prefix (str): e.g. FILE_TYPE_PREFIX
+
+    Returns:
+        Dict[str, int]: name without the prefix -> value (zero counters omitted)
+    """
+    rows = db.session.query(StatCounter.name, StatCounter.value)\
+        .filter(StatCounter.name >= prefix, StatCounter.name < prefix + '\uffff')\
+        .all()
+    return {name[len(prefix):]: value for name, value in rows if value}
+
+def get_uploads_per_day(days: int = 30) -> Dict[str, int]:
+    """
+    Uploads per day for the last days, including days without uploads.
+
+    Args:
+        days (int): Number of days, ending today (UTC)
+
+    Returns:
+        Dict[str, int]: ISO date -> uploads, oldest first
+    """
+    today = datetime.utcnow().date()
+    dates = [(today - timedelta(days=offset)).isoformat() for offset in range(days - 1, -1, -1)]
+    rows = db.session.query(StatCounter.name, StatCounter.value)\
+        .filter(StatCounter.name.in_([f"{UPLOADS_PREFIX}{date}" for date in dates]))\
+        .all()
+    values = {name[len(UPLOADS_PREFIX):]: value for name, value in rows}
+    return {date: values.get(date, 0) for date in dates}
+
+def get_dashboard_stats(days: int = 30) -> dict:
+    """
+    Every dashboard counter, read from stat_counter.
+
+    Args:
+        days (int): Days of upload history
+
+    Returns:
+        dict: total_candidates, candidates_with_vectors, vector_coverage,
+              file_types and uploads_per_day
+    """
+    total = get_counter(TOTAL_CANDIDATES)
+    with_vectors = get_counter(CANDIDATES_WITH_VECTORS)
+    return {
+        'total_candidates': total,
+        'candidates_with_vectors': with_vectors,
+        'vector_coverage': (with_vectors / total * 100) if total > 0 else 0,
+        'file_types': get_counters(FILE_TYPE_PREFIX),
+        'uploads_per_day': get_uploads_per_day(days)
+    }
+
+def rebuild_counters() -> dict:
+    """
+    Recompute every counter from the candidate tables (one full scan).
+    Used to initialize the counters of an existing database, or to repair them
+    after rows were changed outside the ORM.
+
+    Returns:
+        dict: Counter name -> value
+    """
+    day = db.func.date(Candidate.created_at)
+    # Misma regla que al guardar: '[]' y el embedding de relleno no cuentan como vector
+    embeddings = db.session.query(CandidateDocument.text_embedding)\
+        .filter(CandidateDocument.text_embedding.isnot(None)).execution_options(yield_per=1000)
+    counters = {
+        TOTAL_CANDIDATES: db.session.query(db.func.count(Candidate.id)).scalar(),
+        CANDIDATES_WITH_VECTORS: sum(1 for (value,) in embeddings if stored_embedding_present(value)),
+    }
+    for file_type, count in db.session.query(Candidate.file_type, db.func.count(Candidate.id))\
+            .group_by(Candidate.file_type):
+        counters[f"{FILE_TYPE_PREFIX}{file_type}"] = count
+    for date, count in db.session.query(day, db.func.count(Candidate.id))\
+            .filter(Candidate.created_at.isnot(None)).group_by(day):
+        counters[f"{UPLOADS_PREFIX}{str(date)[:10]}"] = count
+
+    db.session.query(StatCounter).delete()
+    db.session.add_all(StatCounter(name=name, value=value) for name, value in counters.items())
+    db.session.commit()
+    logger.info(f"Rebuilt {len(counters)} dashboard counters ({counters[TOTAL_CANDIDATES]} candidates)")
+    return counters
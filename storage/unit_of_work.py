@@ -0,0 +1,162 @@
+"""
+Single-transaction persistence of new candidates.
+
+A candidate is several writes: the candidate row, its document (CV text,
+vision JSON, embedding), the normalized attribute rows, the keyword terms,
+the pgvector column, the near-duplicate signature, the local and section
+embeddings and the dashboard counters. CandidateUnitOfWork writes
+all of them for one upload or for a batch of N imported CVs in a single
+transaction, with one multi-row statement per table, and updates the
+in-memory facet index and the indexes derived from the local embedding
+(rederive_candidate) only after the commit.
+"""
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import insert
+
+from models import Candidate, CandidateTerm
+from storage.derived_indexes import LocalVectors, encode_local_vectors, rederive_candidate
+from storage.facets import index_candidate
+from storage.near_duplicates import minhash_signature, flag_near_duplicate
+from storage.normalization import sync_candidate_attributes, text_terms
+from storage.sqlite_profile import run_write
+from storage.vector_search import write_embedding_vectors
+from utils.embeddings import embedding_json, has_embedding
+
+logger = logging.getLogger(__name__)
+
+def new_candidate(candidate_info: Dict, full_text: str, filename: str, file_type: str,
+                  vision_data: Optional[Dict] = None, embedding: Optional[List[float]] = None) -> Candidate:
+    """
+    Build a (not yet persisted) Candidate from extracted CV data.
+
+    Args:
+        candidate_info (Dict): Extracted fields (JSON strings for list fields)
+        full_text (str): Extracted CV text
+        filename (str): Original file name
+        file_type (str): File extension
+        vision_data (Optional[Dict]): Vision/LLM analysis
+        embedding (Optional[List[float]]): Text embedding
+
+    Returns:
+        Candidate: New candidate with its normalized attributes
+    """
+    candidate = Candidate(
+        name=candidate_info.get('name', 'Unknown'),
+        email=candidate_info.get('email', ''),
+        phone=candidate_info.get('phone', ''),
+        education=candidate_info.get('education', ''),
+        experience=candidate_info.get('experience', ''),
+        skills=candidate_info.get('skills', ''),
+        languages=candidate_info.get('languages', json.dumps([])),
+        certifications=candidate_info.get('certifications', json.dumps([])),
+        summary=candidate_info.get('summary', ''),
+        vision_analysis=json.dumps(vision_data or {}),
+        text_embedding=embedding_json(embedding),  # NULL sin embedding real (sin API o circuito abierto)
+        full_text=full_text,
+        original_filename=filename,
+        file_type=file_type
+    )
+    sync_candidate_attributes(candidate)
+    return candidate
+
+
+@dataclass
+class _PendingCandidate:
+    candidate: Candidate
+    terms: List[str]
+    signature: np.ndarray
+    embedding: Optional[List[float]] = field(default=None)
+    local_vectors: Optional[LocalVectors] = field(default=None)
+
+
+class CandidateUnitOfWork:
+    """
+    New candidates written together in one transaction.
+
+    Usage:
+        work = CandidateUnitOfWork()
+        work.add(candidate, embedding)
+        work.commit()
+    """
+
+    def __init__(self):
+        self._pending: List[_PendingCandidate] = []
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, candidate: Candidate, embedding: Optional[List[float]] = None,
+            full_text: Optional[str] = None, encode=None) -> None:
+        """
+        Queue a new candidate (built with new_candidate).
+
+        Args:
+            candidate (Candidate): Candidate with its document and attribute rows set
+            embedding (Optional[List[float]]): Embedding for the pgvector column
+            full_text (Optional[str]): CV text to index, if already at hand
+            encode (Callable): Local model encoder; if given, the local and section embeddings are written too
+        """
+        # Términos, firma MinHash y vectores locales se calculan aquí, fuera del hilo de escritura
+        full_text = (candidate.full_text if full_text is None else full_text) or ''
+        local_vectors = encode_local_vectors(candidate, encode) if encode is not None else None
+        self._pending.append(_PendingCandidate(candidate, text_terms(full_text), minhash_signature(full_text),
+                                               embedding, local_vectors))
+
+    def write(self, session) -> List[Candidate]:
+        """
+        Write every queued candidate on a session, without committing.
+
+        Args:
+            session: Session of the transaction
+
+        Returns:
+            List[Candidate]: The candidates, with their ids
+        """
+        candidates = [pending.candidate for pending in self._pending]
+        # Candidatos, documentos y atributos: el ORM agrupa un INSERT multi-fila por tabla
+        session.add_all(candidates)
+        session.flush()
+
+        terms = [{'candidate_id': pending.candidate.id, 'term': term}
+                 for pending in self._pending for term in pending.terms]
+        if terms:
+            session.execute(insert(CandidateTerm), terms)
+
+        write_embedding_vectors(session, [(pending.candidate.id, pending.embedding)
+                                          for pending in self._pending if has_embedding(pending.embedding)])
+        for pending in self._pending:
+            if pending.local_vectors is not None:
+                pending.local_vectors.write(session, pending.candidate.id)
+
+        # En orden: un CV del mismo lote también se detecta como duplicado
+        for pending in self._pending:
+            flag_near_duplicate(session, pending.candidate, pending.signature)
+        session.flush()
+        return candidates
+
+    def commit(self) -> List[Candidate]:
+        """
+        Write the queued candidates in one transaction (through the SQLite
+        writer queue when enabled), then add them to the facet index and
+        re-derive the indexes built from their local embeddings.
+
+        Returns:
+            List[Candidate]: The committed candidates
+        """
+        if not self._pending:
+            return []
+        candidates = run_write(self.write)
+        pending, self._pending = self._pending, []
+
+        for candidate in candidates:
+            index_candidate(candidate)
+        for item in pending:
+            if item.local_vectors is not None:
+                rederive_candidate(item.candidate.id, item.local_vectors)
+        logger.info(f"Committed {len(candidates)} candidates in one transaction")
+        return candidates
@@ -1,13 +1,21 @@
 """
 Vector database search functionality using pgvector.
 Provides high-performance semantic search with native PostgreSQL vector operations.
+
+embedding_vector holds the first-stage (possibly reduced) vector; its size
+comes from utils.embeddings (EMBEDDING_DIMENSIONS), never from a literal.
 """
 import json
 import logging
 from typing import List, Dict, Optional, Tuple
-from sqlalchemy import text
-from app import db
+
+import numpy as np
+from sqlalchemy import bindparam, text
+from extensions import db
 from models import Candidate
+from storage.stats import get_dashboard_stats, increment_counter, CANDIDATES_WITH_VECTORS
+from utils.config import get_config
+from utils.embeddings import has_embedding, index_dimensions, rerank_enabled, vector_literal, vector_type
 
 logger = logging.getLogger(__name__)
 
@@ -22,22 +30,34 @@ def store_embedding_vector(candidate_id: int, embedding: List[float]) -> bool:
     Returns:
         bool: True if successful, False otherwise
     """
+    if not has_embedding(embedding):
+        return False
     try:
-        # Convert embedding to PostgreSQL vector format
-        embedding_str = '[' + ','.join(map(str, embedding)) + ']'
+        # Convert embedding to PostgreSQL vector format (first-stage dimensions)
+        embedding_str = vector_literal(embedding)
         
-        query = text("""
+        vector_query = text(f"""
             UPDATE candidate 
-            SET embedding_vector = %(embedding)s::vector(1536),
-                text_embedding = %(embedding_json)s
-            WHERE id = %(candidate_id)s
+            SET embedding_vector = CAST(:embedding AS {vector_type()})
+            WHERE id = :candidate_id
         """)
         
-        db.session.execute(query, {
-            'embedding': embedding_str,
-            'embedding_json': json.dumps(embedding),
-            'candidate_id': candidate_id
-        })
+        # El JSON del embedding vive en candidate_document (fuera de la fila caliente)
+        document_query = text("""
+            UPDATE candidate_document
+            SET text_embedding = :embedding_json
+            WHERE candidate_id = :candidate_id
+        """)
+        
+        # SQL directo: los eventos del ORM no ven este UPDATE, se ajusta el contador aquí
+        had_embedding = db.session.execute(text("""
+            SELECT text_embedding IS NOT NULL FROM candidate_document WHERE candidate_id = :candidate_id
+        """), {'candidate_id': candidate_id}).scalar()
+        
+        db.session.execute(vector_query, {'embedding': embedding_str, 'candidate_id': candidate_id})
+        if had_embedding is not None and not had_embedding:
+            increment_counter(db.session.connection(), CANDIDATES_WITH_VECTORS)
+        db.session.execute(document_query, {'embedding_json': json.dumps(embedding), 'candidate_id': candidate_id})
         db.session.commit()
         
         logger.info(f"Successfully stored vector embedding for candidate {candidate_id}")
@@ -48,12 +68,42 @@ def store_embedding_vector(candidate_id: int, embedding: List[float]) -> bool:
         db.session.rollback()
         return False
 
+def write_embedding_vectors(session, embeddings: List[Tuple[int, List[float]]]) -> int:
+    """
+    Write native pgvector embeddings in the caller's transaction (one
+    executemany UPDATE, no commit). Other databases keep only the JSON
+    embedding in candidate_document, so nothing is written there.
+    
+    Args:
+        session: Session of the current transaction
+        embeddings: (candidate_id, embedding) pairs
+        
+    Returns:
+        int: Number of vectors written
+    """
+    if not embeddings or session.get_bind().dialect.name != 'postgresql':
+        return 0
+    
+    vector_query = text(f"""
+        UPDATE candidate 
+        SET embedding_vector = CAST(:embedding AS {vector_type()})
+        WHERE id = :candidate_id
+    """)
+    session.execute(vector_query, [
+        {'embedding': vector_literal(embedding), 'candidate_id': candidate_id}
+        for candidate_id, embedding in embeddings
+    ])
+    return len(embeddings)
+
 def vector_similarity_search(query_embedding: List[float], limit: int = 10, min_similarity: float = 0.0) -> List[Dict]:
     """
     Perform high-performance vector similarity search using pgvector.
     
+    The index is searched with the reduced query vector; when full vectors
+    are stored, the top EMBEDDING_RERANK_CANDIDATES are re-scored with them.
+    
     Args:
-        query_embedding: Query embedding vector
+        query_embedding: Query embedding vector (as returned by generate_text_embedding)
         limit: Maximum number of results to return
         min_similarity: Minimum cosine similarity threshold
         
@@ -61,8 +111,10 @@ def vector_similarity_search(query_embedding: List[float], limit: int = 10, min_
         List of candidate dictionaries with similarity scores
     """
     try:
-        # Convert query embedding to PostgreSQL vector format
-        query_vector = '[' + ','.join(map(str, query_embedding)) + ']'
+        # Convert query embedding to PostgreSQL vector format (first-stage dimensions)
+        query_vector = vector_literal(query_embedding)
+        rerank = rerank_enabled() and len(query_embedding) > index_dimensions()
+        first_stage = max(limit, get_config('EMBEDDING_RERANK_CANDIDATES', 100)) if rerank else limit
         
         # Use pgvector's native cosine similarity with HNSW index
         # Using string formatting to avoid SQLAlchemy parameter issues with vector types
@@ -78,18 +130,22 @@ def vector_similarity_search(query_embedding: List[float], limit: int = 10, min_
                 c.summary,
                 c.original_filename,
                 c.created_at,
-                1 - (c.embedding_vector <=> '{query_vector}'::vector(1536)) as similarity
+                1 - (c.embedding_vector <=> '{query_vector}'::{vector_type()}) as similarity
             FROM candidate c
             WHERE c.embedding_vector IS NOT NULL
-            ORDER BY c.embedding_vector <=> '{query_vector}'::vector(1536)
-            LIMIT {limit}
+            ORDER BY c.embedding_vector <=> '{query_vector}'::{vector_type()}
+            LIMIT {int(first_stage)}
         """
         
-        result = db.session.execute(text(query_sql))
+        rows = db.session.execute(text(query_sql)).all()
+        similarities = {row.id: float(row.similarity) for row in rows}
+        if rerank and rows:
+            similarities.update(_full_similarities(query_embedding, [row.id for row in rows]))
+            rows = sorted(rows, key=lambda row: similarities[row.id], reverse=True)[:limit]
         
         candidates = []
-        for row in result:
-            similarity = float(row.similarity)
+        for row in rows:
+            similarity = similarities[row.id]
             
             # Filter by minimum similarity threshold
             if similarity >= min_similarity:
@@ -114,27 +170,49 @@ def vector_similarity_search(query_embedding: List[float], limit: int = 10, min_
         logger.error(f"Error in vector similarity search: {e}")
         return []
 
-def get_candidates_with_vectors(limit: int = 100) -> List[Dict]:
+def _full_similarities(query_embedding: List[float], candidate_ids: List[int]) -> Dict[int, float]:
+    """Cosine similarity with the full stored vectors (candidate_document.text_embedding)."""
+    rows = db.session.execute(text("""
+        SELECT candidate_id, text_embedding FROM candidate_document
+        WHERE candidate_id IN :ids AND text_embedding IS NOT NULL
+    """).bindparams(bindparam('ids', expanding=True)), {'ids': candidate_ids})
+    
+    query = np.asarray(query_embedding, dtype=np.float32)
+    query /= np.linalg.norm(query) or 1.0
+    similarities = {}
+    for candidate_id, embedding in rows:
+        vector = np.asarray(json.loads(embedding), dtype=np.float32)
+        # Vectores guardados con otras dimensiones conservan la similitud de la primera etapa
+        if vector.shape == query.shape:
+            similarities[candidate_id] = float(vector @ query / (np.linalg.norm(vector) or 1.0))
+    return similarities
+
+def get_candidates_with_vectors(limit: int = 100, include_embedding: bool = False) -> List[Dict]:
     """
     Get all candidates with their vector embeddings for visualization.
     
     Args:
         limit: Maximum number of candidates to return
+        include_embedding: Also return the full embedding (megabytes per
+            request); by default only the precomputed 2-D map coordinates
         
     Returns:
-        List of candidates with embeddings
+        List of candidates with map coordinates (and embeddings if requested)
     """
     try:
-        query = text("""
+        embedding_column = "d.text_embedding" if include_embedding else "NULL AS text_embedding"
+        query = text(f"""
             SELECT 
                 c.id,
                 c.name,
                 c.email,
                 c.phone,
                 c.skills,
-                c.text_embedding,
-                c.embedding_vector
+                c.map_x,
+                c.map_y,
+                {embedding_column}
             FROM candidate c
+            LEFT JOIN candidate_document d ON d.candidate_id = c.id
             WHERE c.embedding_vector IS NOT NULL
             ORDER BY c.created_at DESC
             LIMIT :limit
@@ -144,22 +222,24 @@ def get_candidates_with_vectors(limit: int = 100) -> List[Dict]:
         
         candidates = []
         for row in result:
-            # Parse embedding from JSON for visualization
-            embedding = []
-            if row.text_embedding:
-                try:
-                    embedding = json.loads(row.text_embedding)
-                except json.JSONDecodeError:
-                    logger.warning(f"Invalid JSON embedding for candidate {row.id}")
-            
-            candidates.append({
+            candidate = {
                 'id': row.id,
                 'name': row.name,
                 'email': row.email or '',
                 'phone': row.phone or '',
                 'skills': row.skills or '',
-                'embedding': embedding
-            })
+                'map': {'x': round(row.map_x, 4), 'y': round(row.map_y, 4)} if row.map_x is not None else None
+            }
+            if include_embedding:
+                # Parse embedding from JSON for visualization
+                embedding = []
+                if row.text_embedding:
+                    try:
+                        embedding = json.loads(row.text_embedding)
+                    except json.JSONDecodeError:
+                        logger.warning(f"Invalid JSON embedding for candidate {row.id}")
+                candidate['embedding'] = embedding
+            candidates.append(candidate)
         
         logger.info(f"Retrieved {len(candidates)} candidates with vectors")
         return candidates
@@ -176,21 +256,14 @@ def get_vector_statistics() -> Dict:
         Dictionary with vector database statistics
     """
     try:
-        stats_query = text("""
-            SELECT 
-                COUNT(*) as total_candidates,
-                COUNT(embedding_vector) as candidates_with_vectors,
-                AVG(array_length(string_to_array(embedding_vector::text, ','), 1)) as avg_dimensions
-            FROM candidate
-        """)
-        
-        result = db.session.execute(stats_query).fetchone()
+        # Contadores mantenidos en cada insert/delete (storage/stats.py): sin recorrer la tabla
+        stats = get_dashboard_stats(days=1)
         
         return {
-            'total_candidates': result.total_candidates,
-            'candidates_with_vectors': result.candidates_with_vectors,
-            'avg_dimensions': int(result.avg_dimensions) if result.avg_dimensions else 0,
-            'vector_coverage': (result.candidates_with_vectors / result.total_candidates * 100) if result.total_candidates > 0 else 0
+            'total_candidates': stats['total_candidates'],
+            'candidates_with_vectors': stats['candidates_with_vectors'],
+            'avg_dimensions': index_dimensions() if stats['candidates_with_vectors'] else 0,
+            'vector_coverage': stats['vector_coverage']
         }
         
     except Exception as e:
@@ -204,7 +277,10 @@ def get_vector_statistics() -> Dict:
 
 def find_similar_candidates(candidate_id: int, limit: int = 5) -> List[Dict]:
     """
-    Find candidates similar to a given candidate using vector similarity.
+    Find candidates similar to a given candidate.
+    
+    Reads the precomputed neighbour graph (storage/similar_candidates.py)
+    instead of an ORDER BY distance query, so it works on every backend.
     
     Args:
         candidate_id: ID of the reference candidate
@@ -213,53 +289,13 @@ def find_similar_candidates(candidate_id: int, limit: int = 5) -> List[Dict]:
     Returns:
         List of similar candidates with similarity scores
     """
+    from storage.similar_candidates import get_similar_candidates
+    
     try:
-        # Get the reference candidate's embedding
-        ref_query = text("""
-            SELECT embedding_vector FROM candidate 
-            WHERE id = :candidate_id AND embedding_vector IS NOT NULL
-        """)
-        
-        ref_result = db.session.execute(ref_query, {'candidate_id': candidate_id}).fetchone()
-        
-        if not ref_result:
-            logger.warning(f"No embedding found for candidate {candidate_id}")
-            return []
-        
-        # Find similar candidates
-        similar_query = text("""
-            SELECT 
-                c.id,
-                c.name,
-                c.email,
-                c.skills,
-                1 - (c.embedding_vector <=> :ref_vector) as similarity
-            FROM candidate c
-            WHERE c.embedding_vector IS NOT NULL 
-            AND c.id != :candidate_id
-            ORDER BY c.embedding_vector <=> :ref_vector
-            LIMIT :limit
-        """)
-        
-        result = db.session.execute(similar_query, {
-            'ref_vector': ref_result.embedding_vector,
-            'candidate_id': candidate_id,
-            'limit': limit
-        })
-        
-        similar_candidates = []
-        for row in result:
-            similar_candidates.append({
-                'id': row.id,
-                'name': row.name,
-                'email': row.email or '',
-                'skills': row.skills or '',
-                'similarity': float(row.similarity)
-            })
-        
+        similar_candidates = get_similar_candidates(candidate_id, limit)
         logger.info(f"Found {len(similar_candidates)} similar candidates for candidate {candidate_id}")
         return similar_candidates
         
     except Exception as e:
         logger.error(f"Error finding similar candidates: {e}")
-        return []
\ No newline at end of file
+        return []
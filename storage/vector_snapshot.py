@@ -0,0 +1,314 @@
+"""
+Versioned, memory-mapped snapshot of the candidate vectors.
+
+Layout of a snapshot directory (VECTOR_SNAPSHOT_DIR):
+
+    CURRENT                       name of the active version
+    <version>/header.json         format, model, dimensions, count, normalized
+    <version>/ids.npy             int64 candidate ids, sorted ascending
+    <version>/vectors.npy         float32 (count, dimensions), row i = ids[i]
+    <version>/<column>.npy        optional per-row columns (e.g. section kind)
+
+Both arrays are opened with mmap, so opening is instant whatever the size,
+vectors are only paged in when read, and every worker process shares the
+same page cache. A new version is written next to the active one and
+published by atomically replacing CURRENT; readers reopen it on their next
+access. The header records when the export started (as_of), so vectors
+stored or re-embedded after it are read from the database instead.
+"""
+import os
+import json
+import time
+import shutil
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from utils.config import get_config
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 'candidate-vectors'
+SNAPSHOT_FORMAT_VERSION = 1
+CURRENT_FILE = 'CURRENT'
+KEEP_VERSIONS = 2
+
+
+class VectorSnapshot:
+    """Read-only view of one snapshot version (memory-mapped arrays)."""
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, 'header.json'), encoding='utf-8') as f:
+            self.header = json.load(f)
+        if self.header.get('format') != SNAPSHOT_FORMAT or self.header.get('format_version') != SNAPSHOT_FORMAT_VERSION:
+            raise Exception(f"Unsupported vector snapshot format in {path}: "
+                            f"{self.header.get('format')} v{self.header.get('format_version')}")
+        self.path = path
+        self.ids = np.load(os.path.join(path, 'ids.npy'), mmap_mode='r')
+        self.vectors = np.load(os.path.join(path, 'vectors.npy'), mmap_mode='r')
+        self.columns = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+                        for name in self.header.get('columns', [])}
+
+    @property
+    def model(self) -> str:
+        return self.header['model']
+
+    @property
+    def dimensions(self) -> int:
+        return self.header['dimensions']
+
+    @property
+    def as_of(self) -> datetime:
+        """Start of the export: rows changed since then may be stale."""
+        # Versiones anteriores sin as_of: created_at (fin de la exportación)
+        return datetime.fromisoformat(self.header.get('as_of') or self.header['created_at'])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def positions(self, candidate_ids) -> np.ndarray:
+        """
+        Row positions of candidate ids (binary search on the sorted ids; the
+        first row of the id when ids repeat).
+
+        Args:
+            candidate_ids: Candidate ids
+
+        Returns:
+            np.ndarray: Row index per id, -1 for ids not in the snapshot
+        """
+        candidate_ids = np.asarray(candidate_ids, dtype=np.int64)
+        if not len(self.ids):
+            return np.full(len(candidate_ids), -1, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.ids, candidate_ids), len(self.ids) - 1)
+        return np.where(self.ids[positions] == candidate_ids, positions, -1)
+
+    def get(self, candidate_id: int) -> Optional[np.ndarray]:
+        """Vector of a candidate, or None if it is not in the snapshot."""
+        position = self.positions([candidate_id])[0]
+        return self.vectors[position] if position >= 0 else None
+
+
+def _version_name() -> str:
+    return datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+
+def write_snapshot(rows: Iterable[Tuple], count: int, dimensions: int, model: str,
+                   directory: Optional[str] = None, normalize: bool = True, unique_ids: bool = True,
+                   columns: Optional[Dict[str, np.dtype]] = None) -> str:
+    """
+    Write a new snapshot version and make it the active one.
+
+    Args:
+        rows (Iterable[Tuple]): (candidate id, vector, *column values) in ascending id order
+        count (int): Upper bound on the number of rows (extra space is trimmed)
+        dimensions (int): Vector dimensions
+        model (str): Model that produced the vectors
+        directory (Optional[str]): Snapshot directory. Defaults to VECTOR_SNAPSHOT_DIR.
+        normalize (bool): Store unit-length vectors (dot product = cosine similarity)
+        unique_ids (bool): One row per id. False allows consecutive rows with the same id.
+        columns (Optional[Dict[str, np.dtype]]): Extra per-row columns, in the order of the row values
+
+    Returns:
+        str: Path of the new version
+    """
+    columns = columns or {}
+    directory = directory or get_config('VECTOR_SNAPSHOT_DIR', 'vector_snapshot')
+    # Antes de leer la primera fila: lo modificado durante la exportación queda después
+    as_of = datetime.utcnow()
+    version = _version_name()
+    path = os.path.join(directory, version)
+    os.makedirs(path)
+
+    # Escritura en streaming directamente sobre los .npy (sin cargar todo en memoria)
+    vectors = np.lib.format.open_memmap(os.path.join(path, 'vectors.npy'), mode='w+',
+                                        dtype=np.float32, shape=(count, dimensions))
+    ids = np.zeros(count, dtype=np.int64)
+    values = {name: np.zeros(count, dtype=dtype) for name, dtype in columns.items()}
+    written = 0
+    previous_id = None
+    for candidate_id, vector, *row_values in rows:
+        if previous_id is not None and (candidate_id < previous_id or (unique_ids and candidate_id == previous_id)):
+            raise Exception("Vector snapshot rows must be in ascending candidate id order")
+        if written >= count:
+            raise Exception(f"Vector snapshot got more than the announced {count} rows")
+        vector = np.asarray(vector, dtype=np.float32)
+        if normalize:
+            norm = np.linalg.norm(vector)
+            vector = vector / norm if norm > 0 else vector
+        vectors[written] = vector
+        ids[written] = candidate_id
+        for name, value in zip(columns, row_values):
+            values[name][written] = value
+        previous_id = candidate_id
+        written += 1
+    vectors.flush()
+    del vectors
+
+    if written < count:
+        # Recortar el espacio reservado de más (filas borradas durante la exportación)
+        trimmed = np.load(os.path.join(path, 'vectors.npy'), mmap_mode='r')[:written]
+        np.save(os.path.join(path, 'vectors.tmp.npy'), trimmed)
+        del trimmed
+        os.replace(os.path.join(path, 'vectors.tmp.npy'), os.path.join(path, 'vectors.npy'))
+    np.save(os.path.join(path, 'ids.npy'), ids[:written])
+    for name, column in values.items():
+        np.save(os.path.join(path, f'{name}.npy'), column[:written])
+
+    header = {
+        'format': SNAPSHOT_FORMAT,
+        'format_version': SNAPSHOT_FORMAT_VERSION,
+        'model': model,
+        'dimensions': dimensions,
+        'count': written,
+        'dtype': 'float32',
+        'normalized': normalize,
+        'unique_ids': unique_ids,
+        'columns': list(columns),
+        'as_of': as_of.isoformat(),
+        'created_at': datetime.utcnow().isoformat()
+    }
+    with open(os.path.join(path, 'header.json'), 'w', encoding='utf-8') as f:
+        json.dump(header, f, indent=2)
+
+    # Publicación atómica de la nueva versión
+    current_tmp = os.path.join(directory, f'{CURRENT_FILE}.tmp')
+    with open(current_tmp, 'w', encoding='utf-8') as f:
+        f.write(version)
+    os.replace(current_tmp, os.path.join(directory, CURRENT_FILE))
+
+    _remove_old_versions(directory, keep=version)
+    logger.info(f"Vector snapshot {version}: {written} x {dimensions} vectors ({model})")
+    return path
+
+def _remove_old_versions(directory: str, keep: str) -> None:
+    # Las versiones anteriores pueden seguir mapeadas por otros procesos: se conservan algunas
+    versions = sorted(name for name in os.listdir(directory)
+                      if os.path.isdir(os.path.join(directory, name)) and name != keep)
+    for name in versions[:max(0, len(versions) - (KEEP_VERSIONS - 1))]:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+def open_snapshot(directory: Optional[str] = None) -> Optional[VectorSnapshot]:
+    """
+    Open the active snapshot version.
+
+    Args:
+        directory (Optional[str]): Snapshot directory. Defaults to VECTOR_SNAPSHOT_DIR.
+
+    Returns:
+        Optional[VectorSnapshot]: The snapshot, or None if none has been written
+    """
+    directory = directory or get_config('VECTOR_SNAPSHOT_DIR', 'vector_snapshot')
+    try:
+        with open(os.path.join(directory, CURRENT_FILE), encoding='utf-8') as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return VectorSnapshot(os.path.join(directory, version))
+
+
+_snapshots: Dict[str, Tuple[Optional[VectorSnapshot], float]] = {}  # directorio -> (snapshot, última comprobación)
+_snapshot_lock = threading.Lock()
+
+def get_vector_snapshot(directory: Optional[str] = None) -> Optional[VectorSnapshot]:
+    """
+    Shared snapshot of this process, reopened when a new version is published
+    (CURRENT is checked at most every VECTOR_SNAPSHOT_CHECK_SECONDS).
+
+    Args:
+        directory (Optional[str]): Snapshot directory. Defaults to VECTOR_SNAPSHOT_DIR.
+    """
+    directory = directory or get_config('VECTOR_SNAPSHOT_DIR', 'vector_snapshot')
+    now = time.monotonic()
+    snapshot, checked = _snapshots.get(directory, (None, 0.0))
+    if snapshot is not None and now - checked < get_config('VECTOR_SNAPSHOT_CHECK_SECONDS', 5):
+        return snapshot
+
+    with _snapshot_lock:
+        try:
+            with open(os.path.join(directory, CURRENT_FILE), encoding='utf-8') as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            _snapshots[directory] = (None, now)
+            return None
+        if snapshot is None or os.path.basename(snapshot.path) != version:
+            snapshot = VectorSnapshot(os.path.join(directory, version))
+            logger.info(f"Opened vector snapshot {directory}/{version} ({len(snapshot)} vectors)")
+        _snapshots[directory] = (snapshot, now)
+        return snapshot
+
+def export_local_embeddings(model_name: str, directory: Optional[str] = None) -> Optional[str]:
+    """
+    Write the stored local embeddings of a model as a new snapshot version.
+    Must run inside an app context.
+
+    Args:
+        model_name (str): Model whose vectors are exported
+        directory (Optional[str]): Snapshot directory. Defaults to VECTOR_SNAPSHOT_DIR.
+
+    Returns:
+        Optional[str]: Path of the new version, or None if there are no vectors
+    """
+    from extensions import db
+    from models import CandidateLocalEmbedding
+    from storage.local_embeddings import iter_local_embeddings
+
+    count, dimensions = db.session.query(db.func.count(CandidateLocalEmbedding.candidate_id),
+                                         db.func.max(CandidateLocalEmbedding.dimensions))\
+        .filter(CandidateLocalEmbedding.model == model_name).one()
+    if not count:
+        return None
+    return write_snapshot(iter_local_embeddings(model_name), count, dimensions, model_name, directory)
+
+def candidate_vector_sources(model_name: str, snapshot: Optional[VectorSnapshot] = None
+                             ) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Every candidate vector of a model as (ids, unit vectors) blocks: the
+    active snapshot (memory-mapped) and the local embeddings stored or
+    re-embedded after it was exported. A re-embedded candidate's snapshot
+    row is left out, so every id appears in one block only. Must run inside
+    an app context.
+
+    Args:
+        model_name (str): Local model
+        snapshot (Optional[VectorSnapshot]): Snapshot to use. Defaults to the shared one.
+
+    Returns:
+        List[Tuple[np.ndarray, np.ndarray]]: Ascending int64 ids and float32 rows per block
+    """
+    from extensions import db
+    from models import CandidateLocalEmbedding
+    from storage.local_embeddings import decode_vector
+
+    snapshot = snapshot if snapshot is not None else get_vector_snapshot()
+    if snapshot is None or snapshot.model != model_name or not len(snapshot):
+        snapshot = None
+    columns = (CandidateLocalEmbedding.candidate_id, CandidateLocalEmbedding.vector)
+    query = db.select(*columns).where(CandidateLocalEmbedding.model == model_name)
+    if snapshot is not None:
+        # Nuevos y re-embebidos en dos consultas con índice (un OR recorrería toda la tabla)
+        query = db.union(
+            query.where(CandidateLocalEmbedding.candidate_id > int(snapshot.ids[-1])),
+            db.select(*columns).where(CandidateLocalEmbedding.model == model_name,
+                                      CandidateLocalEmbedding.updated_at >= snapshot.as_of)
+        ).subquery()
+        query = db.select(query)
+    rows = db.session.execute(query.order_by('candidate_id')).all()
+    stored_ids = np.array([row[0] for row in rows], dtype=np.int64)
+
+    sources = []
+    if snapshot is not None:
+        ids = np.asarray(snapshot.ids)
+        # Las filas desactualizadas parten el snapshot en tramos (vistas del mmap, sin copia)
+        stale = snapshot.positions(stored_ids)
+        bounds = [-1] + sorted(set(stale[stale >= 0].tolist())) + [len(ids)]
+        for previous, following in zip(bounds[:-1], bounds[1:]):
+            if following - previous > 1:
+                sources.append((ids[previous + 1:following], snapshot.vectors[previous + 1:following]))
+    if rows:
+        vectors = np.stack([decode_vector(row[1]) for row in rows])
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        sources.append((stored_ids, vectors / np.where(norms > 0, norms, 1)))
+    return sources
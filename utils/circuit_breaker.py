@@ -0,0 +1,205 @@
+"""
+Circuit breaker for external providers (OpenAI chat/vision and embeddings).
+
+While a provider is failing or too slow the circuit opens and calls fail fast
+with CircuitOpenError, so callers go straight to their local fallback instead
+of waiting out the client timeout. After BREAKER_OPEN_SECONDS the circuit goes
+half-open and lets a few probe requests through to decide whether to close.
+"""
+import time
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Dict
+
+from utils.config import get_config
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Rolling-window circuit breaker tracking error rate and slow-call rate.
+    """
+
+    def __init__(self, name: str, window_size: int = 20, min_calls: int = 5,
+                 failure_rate_threshold: float = 0.5, slow_call_seconds: float = 15.0,
+                 slow_call_rate_threshold: float = 0.8, open_seconds: float = 30.0,
+                 half_open_probes: int = 2):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+
+        self._lock = threading.Lock()
+        self._window = deque(maxlen=window_size)  # (failed, slow) por llamada
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+
+    # -- state ---------------------------------------------------------------
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self) -> None:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes_in_flight = 0
+            self._probe_successes = 0
+            logger.info(f"Circuit '{self.name}' half-open, sending probe requests")
+
+    def _open(self) -> None:
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        metrics.increment(f'circuit_breaker.{self.name}.opened')
+        logger.warning(f"Circuit '{self.name}' opened")
+
+    def _close(self) -> None:
+        self._state = CLOSED
+        self._window.clear()
+        logger.info(f"Circuit '{self.name}' closed")
+
+    def is_call_permitted(self) -> bool:
+        """Check, without reserving a probe slot, whether a call would be let through."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == HALF_OPEN:
+                return self._probes_in_flight < self.half_open_probes
+            return self._state == CLOSED
+
+    def allow_request(self) -> bool:
+        """Reserve the right to make a call. Must be followed by record_success/record_failure."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._probes_in_flight < self.half_open_probes:
+                self._probes_in_flight += 1
+                return True
+            return False
+
+    # -- outcomes --------------------------------------------------------------
+
+    def record_success(self, latency: float) -> None:
+        slow = latency >= self.slow_call_seconds
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if slow:
+                    self._open()
+                    return
+                self._probe_successes += 1
+                if self._probe_successes >= self.half_open_probes:
+                    self._close()
+                return
+            self._window.append((False, slow))
+            self._evaluate()
+
+    def record_failure(self, latency: float = 0.0) -> None:
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                self._open()
+                return
+            self._window.append((True, latency >= self.slow_call_seconds))
+            self._evaluate()
+
+    def _evaluate(self) -> None:
+        if self._state != CLOSED or len(self._window) < self.min_calls:
+            return
+        calls = len(self._window)
+        failure_rate = sum(1 for failed, _ in self._window if failed) / calls
+        slow_rate = sum(1 for _, slow in self._window if slow) / calls
+        if failure_rate >= self.failure_rate_threshold or slow_rate >= self.slow_call_rate_threshold:
+            self._open()
+
+    # -- calls ---------------------------------------------------------------
+
+    def call(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Call `func` through the breaker.
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+            Exception: Whatever `func` raises (recorded as a failure)
+        """
+        if not self.allow_request():
+            metrics.increment(f'circuit_breaker.{self.name}.rejected')
+            raise CircuitOpenError(f"Circuit '{self.name}' is open")
+
+        start = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            latency = time.monotonic() - start
+            self.record_failure(latency)
+            metrics.increment(f'circuit_breaker.{self.name}.failures')
+            metrics.observe(f'circuit_breaker.{self.name}.latency', latency)
+            raise
+
+        latency = time.monotonic() - start
+        self.record_success(latency)
+        metrics.increment(f'circuit_breaker.{self.name}.successes')
+        metrics.observe(f'circuit_breaker.{self.name}.latency', latency)
+        return result
+
+    def stats(self) -> Dict:
+        """Current state and rolling-window rates, as exposed in /api/metrics."""
+        with self._lock:
+            self._maybe_half_open()
+            calls = len(self._window)
+            return {
+                'state': self._state,
+                'window_calls': calls,
+                'failure_rate': sum(1 for failed, _ in self._window if failed) / calls if calls else 0.0,
+                'slow_call_rate': sum(1 for _, slow in self._window if slow) / calls if calls else 0.0,
+                'open_for_seconds': round(time.monotonic() - self._opened_at, 1) if self._state == OPEN else 0.0,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """
+    Get (or create from configuration) the breaker for a provider.
+
+    Args:
+        name (str): Provider name, e.g. 'openai_llm' or 'openai_embeddings'
+
+    Returns:
+        CircuitBreaker: Shared breaker instance
+    """
+    with _registry_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                name,
+                window_size=get_config('BREAKER_WINDOW_SIZE', 20),
+                min_calls=get_config('BREAKER_MIN_CALLS', 5),
+                failure_rate_threshold=get_config('BREAKER_FAILURE_RATE', 0.5),
+                slow_call_seconds=get_config('BREAKER_SLOW_CALL_SECONDS', 15.0),
+                slow_call_rate_threshold=get_config('BREAKER_SLOW_CALL_RATE', 0.8),
+                open_seconds=get_config('BREAKER_OPEN_SECONDS', 30.0),
+                half_open_probes=get_config('BREAKER_HALF_OPEN_PROBES', 2),
+            )
+            _breakers[name] = breaker
+            metrics.register_gauge(f'circuit_breaker.{name}', breaker.stats)
+        return breaker
@@ -0,0 +1,193 @@
+"""
+Transparent compression for large text columns.
+
+Values are stored as bytes with a small header:
+- b'\\x00z' + zlib stream
+- b'\\x00s' + 4-byte dictionary id (0 = none) + zstd frame
+Anything without the header is legacy plain text (UTF-8) and is returned as is,
+so rows written before compression keep working until they are rewritten.
+
+zstd (with a dictionary trained on our CVs) is used when the `zstandard`
+package is installed; zlib otherwise.
+"""
+import zlib
+import struct
+import logging
+import threading
+from typing import Callable, Dict, Iterable, Optional
+
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+from utils.config import get_config
+
+try:
+    import zstandard
+except ImportError:  # zstd es opcional: se usa zlib
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'\x00'
+CODEC_ZLIB = b'z'
+CODEC_ZSTD = b's'
+
+_dictionaries: Dict[int, object] = {}   # id -> zstandard.ZstdCompressionDict
+_active_dictionary_id = 0
+_dictionary_loader: Optional[Callable[[int], Optional[bytes]]] = None
+_dictionary_lock = threading.Lock()
+_local = threading.local()              # compresores zstd por hilo (no son thread-safe)
+
+def zstd_available() -> bool:
+    """True if the zstandard package is installed."""
+    return zstandard is not None
+
+def register_dictionary(dictionary_id: int, data: bytes, active: bool = True) -> None:
+    """
+    Make a trained zstd dictionary available for compression/decompression.
+
+    Args:
+        dictionary_id (int): Dictionary ID stored in the value header
+        data (bytes): Dictionary content
+        active (bool): Use it for new values
+    """
+    global _active_dictionary_id
+    if not zstd_available():
+        return
+    _dictionaries[dictionary_id] = zstandard.ZstdCompressionDict(data)
+    if active:
+        _active_dictionary_id = dictionary_id
+    _local.__dict__.clear()
+
+def set_dictionary_loader(loader: Optional[Callable[[int], Optional[bytes]]]) -> None:
+    """
+    Set the function that fetches a dictionary missing from this process
+    (e.g. trained by compress_documents.py after the server started).
+
+    Args:
+        loader (Optional[Callable[[int], Optional[bytes]]]): Dictionary id -> content, or None if unknown
+    """
+    global _dictionary_loader
+    _dictionary_loader = loader
+
+def _load_missing_dictionary(dictionary_id: int) -> None:
+    with _dictionary_lock:
+        if dictionary_id in _dictionaries:
+            return
+        data = _dictionary_loader(dictionary_id) if _dictionary_loader else None
+        if data is None:
+            raise Exception(f"zstd dictionary {dictionary_id} is not loaded")
+        # Un diccionario más nuevo que el activo pasa a comprimir los valores nuevos
+        register_dictionary(dictionary_id, data, active=dictionary_id > _active_dictionary_id)
+        logger.info(f"Loaded zstd dictionary {dictionary_id} on demand")
+
+def active_dictionary_id() -> int:
+    """ID of the dictionary used for new values (0 if none)."""
+    return _active_dictionary_id
+
+def train_dictionary(samples: Iterable[str], size: Optional[int] = None) -> bytes:
+    """
+    Train a zstd dictionary on sample texts.
+
+    Args:
+        samples (Iterable[str]): Representative values (e.g. CV texts)
+        size (Optional[int]): Dictionary size in bytes. Defaults to COMPRESSION_DICT_SIZE.
+
+    Returns:
+        bytes: Dictionary content
+    """
+    if not zstd_available():
+        raise Exception("zstandard is not installed; cannot train a dictionary")
+    size = size or get_config('COMPRESSION_DICT_SIZE', 64 * 1024)
+    dictionary = zstandard.train_dictionary(size, [s.encode('utf-8') for s in samples if s])
+    return dictionary.as_bytes()
+
+def _zstd_compressor(dictionary_id: int):
+    key = f'c{dictionary_id}'
+    compressor = getattr(_local, key, None)
+    if compressor is None:
+        level = get_config('COMPRESSION_LEVEL', 9)
+        dictionary = _dictionaries.get(dictionary_id)
+        compressor = zstandard.ZstdCompressor(level=level, dict_data=dictionary) if dictionary \
+            else zstandard.ZstdCompressor(level=level)
+        setattr(_local, key, compressor)
+    return compressor
+
+def _zstd_decompressor(dictionary_id: int):
+    key = f'd{dictionary_id}'
+    decompressor = getattr(_local, key, None)
+    if decompressor is None:
+        if dictionary_id and dictionary_id not in _dictionaries:
+            _load_missing_dictionary(dictionary_id)
+        dictionary = _dictionaries.get(dictionary_id)
+        decompressor = zstandard.ZstdDecompressor(dict_data=dictionary) if dictionary \
+            else zstandard.ZstdDecompressor()
+        setattr(_local, key, decompressor)
+    return decompressor
+
+def compress_text(value: str, codec: Optional[str] = None) -> bytes:
+    """
+    Compress a text value with the configured codec.
+
+    Args:
+        value (str): Text to store
+        codec (Optional[str]): 'zstd' or 'zlib'. Defaults to COMPRESSION_CODEC.
+
+    Returns:
+        bytes: Stored representation (header + payload)
+    """
+    raw = value.encode('utf-8')
+    codec = codec or get_config('COMPRESSION_CODEC', 'zstd')
+
+    if codec == 'zstd' and zstd_available():
+        dictionary_id = _active_dictionary_id
+        return MAGIC + CODEC_ZSTD + struct.pack('>I', dictionary_id) + _zstd_compressor(dictionary_id).compress(raw)
+
+    return MAGIC + CODEC_ZLIB + zlib.compress(raw, min(get_config('COMPRESSION_LEVEL', 9), 9))
+
+def is_compressed(value) -> bool:
+    """True if a stored value carries the compression header."""
+    return isinstance(value, (bytes, bytearray, memoryview)) and bytes(value[:1]) == MAGIC
+
+def decompress_text(value) -> Optional[str]:
+    """
+    Decode a stored value (compressed or legacy plain text).
+
+    Args:
+        value: bytes/memoryview from the database, legacy str, or None
+
+    Returns:
+        Optional[str]: Text
+    """
+    if value is None or isinstance(value, str):
+        return value
+    value = bytes(value)
+    if value[:1] != MAGIC:
+        return value.decode('utf-8')
+
+    codec = value[1:2]
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(value[2:]).decode('utf-8')
+    if codec == CODEC_ZSTD:
+        if not zstd_available():
+            raise Exception("Value is zstd-compressed but zstandard is not installed")
+        dictionary_id = struct.unpack('>I', value[2:6])[0]
+        return _zstd_decompressor(dictionary_id).decompress(value[6:]).decode('utf-8')
+    raise Exception(f"Unknown compression codec {codec!r}")
+
+
+class CompressedText(TypeDecorator):
+    """
+    Text column stored compressed as bytes; reads and writes plain str.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress_text(value)
+
+    def result_processor(self, dialect, coltype):
+        # Sin el procesador de LargeBinary: las filas antiguas de SQLite pueden venir como str
+        return decompress_text
@@ -18,9 +18,135 @@ CONFIG = {
     # Database settings
     'DATABASE_URL': os.environ.get('DATABASE_URL', 'sqlite:///recruitment.db'),
     
+    # SQLite deployment profile (ignored for other databases)
+    'SQLITE_WAL': os.environ.get('SQLITE_WAL', 'true').lower() == 'true',
+    'SQLITE_BUSY_TIMEOUT_MS': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+    'SQLITE_MMAP_SIZE': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    'SQLITE_CACHE_SIZE_KB': int(os.environ.get('SQLITE_CACHE_SIZE_KB', 64 * 1024)),
+    'SQLITE_READ_ONLY_SEARCH': os.environ.get('SQLITE_READ_ONLY_SEARCH', 'true').lower() == 'true',
+    'SQLITE_READ_POOL_SIZE': int(os.environ.get('SQLITE_READ_POOL_SIZE', 8)),
+    'SQLITE_WRITER_QUEUE': os.environ.get('SQLITE_WRITER_QUEUE', 'true').lower() == 'true',
+    'SQLITE_WRITER_BATCH_SIZE': int(os.environ.get('SQLITE_WRITER_BATCH_SIZE', 32)),
+    'SQLITE_WRITER_BATCH_WAIT_MS': float(os.environ.get('SQLITE_WRITER_BATCH_WAIT_MS', 0)),
+    
     # Security settings
     'SESSION_SECRET': os.environ.get('SESSION_SECRET', 'dev-secret-key-change-in-production'),
     
+    # Parser process pool settings
+    'PARSER_POOL_SIZE': int(os.environ.get('PARSER_POOL_SIZE', os.cpu_count() or 2)),
+    'PARSER_TASK_TIMEOUT': float(os.environ.get('PARSER_TASK_TIMEOUT', 60)),
+    
+    # Speculative extraction settings (regex parser runs alongside the LLM call)
+    'VISION_WORKERS': int(os.environ.get('VISION_WORKERS', 4)),
+    'VISION_GRACE_SECONDS': float(os.environ.get('VISION_GRACE_SECONDS', 0)),
+    
+    # Confidence-gated LLM extraction
+    'LLM_CONFIDENCE_THRESHOLD': float(os.environ.get('LLM_CONFIDENCE_THRESHOLD', 0.75)),
+    'LLM_FIELD_THRESHOLD': float(os.environ.get('LLM_FIELD_THRESHOLD', 0.6)),
+    'LLM_FIELDS': [f.strip() for f in os.environ.get('LLM_FIELDS', '').split(',') if f.strip()],
+    'LLM_FIELD_WEIGHTS': {
+        'name': 2.0, 'email': 1.0, 'phone': 1.0,
+        'skills': 2.0, 'education': 1.5, 'experience': 1.5
+    },
+    
+    # OpenAI client and circuit breaker settings
+    'OPENAI_TIMEOUT': float(os.environ.get('OPENAI_TIMEOUT', 30)),
+    'OPENAI_MAX_RETRIES': int(os.environ.get('OPENAI_MAX_RETRIES', 2)),
+    'BREAKER_WINDOW_SIZE': int(os.environ.get('BREAKER_WINDOW_SIZE', 20)),
+    'BREAKER_MIN_CALLS': int(os.environ.get('BREAKER_MIN_CALLS', 5)),
+    'BREAKER_FAILURE_RATE': float(os.environ.get('BREAKER_FAILURE_RATE', 0.5)),
+    'BREAKER_SLOW_CALL_SECONDS': float(os.environ.get('BREAKER_SLOW_CALL_SECONDS', 15)),
+    'BREAKER_SLOW_CALL_RATE': float(os.environ.get('BREAKER_SLOW_CALL_RATE', 0.8)),
+    'BREAKER_OPEN_SECONDS': float(os.environ.get('BREAKER_OPEN_SECONDS', 30)),
+    'BREAKER_HALF_OPEN_PROBES': int(os.environ.get('BREAKER_HALF_OPEN_PROBES', 2)),
+    
+    # Vision page packing
+    'VISION_TOKEN_BUDGET': int(os.environ.get('VISION_TOKEN_BUDGET', 1200)),
+    'VISION_LOW_DETAIL_MAX_INK': float(os.environ.get('VISION_LOW_DETAIL_MAX_INK', 0.03)),
+    'VISION_BLANK_PAGE_MAX_INK': float(os.environ.get('VISION_BLANK_PAGE_MAX_INK', 0.002)),
+    'VISION_DUPLICATE_MAX_DIFF': float(os.environ.get('VISION_DUPLICATE_MAX_DIFF', 2.0)),
+    
+    # Pagination
+    'PAGE_SIZE': int(os.environ.get('PAGE_SIZE', 50)),
+    'MAX_PAGE_SIZE': int(os.environ.get('MAX_PAGE_SIZE', 200)),
+    'RANKED_SEARCH_MAX_RESULTS': int(os.environ.get('RANKED_SEARCH_MAX_RESULTS', 1000)),
+    
+    # Compression of stored CV text / LLM JSON
+    'COMPRESSION_CODEC': os.environ.get('COMPRESSION_CODEC', 'zstd'),  # zstd (si está instalado) o zlib
+    'COMPRESSION_LEVEL': int(os.environ.get('COMPRESSION_LEVEL', 9)),
+    'COMPRESSION_DICT_SIZE': int(os.environ.get('COMPRESSION_DICT_SIZE', 64 * 1024)),
+    'COMPRESSION_DICT_SAMPLES': int(os.environ.get('COMPRESSION_DICT_SAMPLES', 2000)),
+    
+    # OpenAI embeddings: first-stage index dimensions and full-dimension re-rank
+    'EMBEDDING_MODEL': os.environ.get('EMBEDDING_MODEL', 'text-embedding-3-small'),
+    'EMBEDDING_MODEL_DIMENSIONS': int(os.environ.get('EMBEDDING_MODEL_DIMENSIONS', 1536)),
+    'EMBEDDING_DIMENSIONS': int(os.environ.get('EMBEDDING_DIMENSIONS', 1536)),  # p. ej. 256 o 512
+    'EMBEDDING_STORE_FULL': os.environ.get('EMBEDDING_STORE_FULL', 'true').lower() == 'true',
+    'EMBEDDING_RERANK_CANDIDATES': int(os.environ.get('EMBEDDING_RERANK_CANDIDATES', 100)),  # 0 = sin re-rank
+    
+    # Local embeddings (generate_embeddings.py)
+    'LOCAL_EMBEDDING_MODEL': os.environ.get('LOCAL_EMBEDDING_MODEL', 'sentence-transformers/all-MiniLM-L6-v2'),
+    'EMBEDDING_BATCH_SIZE': int(os.environ.get('EMBEDDING_BATCH_SIZE', 256)),
+    'EMBEDDING_CHUNK_SIZE': int(os.environ.get('EMBEDDING_CHUNK_SIZE', 5000)),
+    'VECTOR_SNAPSHOT_DIR': os.environ.get('VECTOR_SNAPSHOT_DIR', 'vector_snapshot'),
+    'VECTOR_SNAPSHOT_CHECK_SECONDS': float(os.environ.get('VECTOR_SNAPSHOT_CHECK_SECONDS', 5)),
+    
+    # Near-duplicate detection (MinHash + LSH)
+    'SHINGLE_SIZE': int(os.environ.get('SHINGLE_SIZE', 3)),
+    'MINHASH_PERMUTATIONS': int(os.environ.get('MINHASH_PERMUTATIONS', 128)),
+    'MINHASH_BANDS': int(os.environ.get('MINHASH_BANDS', 16)),  # 16 bandas x 8 filas: pocos falsos candidatos por consulta
+    'NEAR_DUPLICATE_THRESHOLD': float(os.environ.get('NEAR_DUPLICATE_THRESHOLD', 0.75)),
+    
+    # Similar candidates (precomputed kNN graph)
+    'SIMILAR_CANDIDATES_K': int(os.environ.get('SIMILAR_CANDIDATES_K', 10)),
+    'SIMILAR_CANDIDATES_BLOCK_SIZE': int(os.environ.get('SIMILAR_CANDIDATES_BLOCK_SIZE', 1024)),
+    'SIMILAR_CANDIDATES_WORKERS': int(os.environ.get('SIMILAR_CANDIDATES_WORKERS', 0)),  # 0 = uno por núcleo
+    # Memoria de las matrices de puntuaciones de todos los hilos: limita filas por bloque e hilos
+    'SIMILAR_CANDIDATES_MEMORY_MB': int(os.environ.get('SIMILAR_CANDIDATES_MEMORY_MB', 512)),
+    
+    # Section-level embeddings (max-sim retrieval)
+    'SECTION_SNAPSHOT_DIR': os.environ.get('SECTION_SNAPSHOT_DIR', 'section_snapshot'),
+    'SECTION_POOLING': os.environ.get('SECTION_POOLING', 'max'),  # 'max' o 'weighted'
+    'SECTION_RERANK_CANDIDATES': int(os.environ.get('SECTION_RERANK_CANDIDATES', 1000)),
+    'SECTION_MAX_EXPERIENCE': int(os.environ.get('SECTION_MAX_EXPERIENCE', 8)),
+    'SECTION_SUMMARY_WEIGHT': float(os.environ.get('SECTION_SUMMARY_WEIGHT', 1.0)),
+    'SECTION_EXPERIENCE_WEIGHT': float(os.environ.get('SECTION_EXPERIENCE_WEIGHT', 1.0)),
+    'SECTION_EDUCATION_WEIGHT': float(os.environ.get('SECTION_EDUCATION_WEIGHT', 0.5)),
+    'SECTION_SKILLS_WEIGHT': float(os.environ.get('SECTION_SKILLS_WEIGHT', 0.8)),
+    
+    # Talent-pool clustering (mini-batch k-means)
+    'CLUSTER_COUNT': int(os.environ.get('CLUSTER_COUNT', 20)),
+    'CLUSTER_BATCH_SIZE': int(os.environ.get('CLUSTER_BATCH_SIZE', 4096)),  # vectores en memoria por paso
+    'CLUSTER_ITERATIONS': int(os.environ.get('CLUSTER_ITERATIONS', 100)),
+    'CLUSTER_REFIT_EVERY': int(os.environ.get('CLUSTER_REFIT_EVERY', 500)),  # altas entre reajustes (0 = nunca)
+    'CLUSTER_LABEL_SKILLS': int(os.environ.get('CLUSTER_LABEL_SKILLS', 3)),
+    
+    # 2-D map of the pool for the vector visualization (PCA)
+    'MAP_BATCH_SIZE': int(os.environ.get('MAP_BATCH_SIZE', 4096)),  # vectores en memoria por paso
+    'MAP_REFIT_EVERY': int(os.environ.get('MAP_REFIT_EVERY', 1000)),  # altas entre reajustes (0 = nunca)
+    
+    # Saved searches (percolation at ingest)
+    'SAVED_SEARCH_MIN_SIMILARITY': float(os.environ.get('SAVED_SEARCH_MIN_SIMILARITY', 0.45)),  # semantic=true
+    
+    # Job-description matching (/api/match)
+    'MATCH_TOP_K': int(os.environ.get('MATCH_TOP_K', 50)),
+    'MATCH_MAX_RESULTS': int(os.environ.get('MATCH_MAX_RESULTS', 500)),
+    'MATCH_SEMANTIC_WEIGHT': float(os.environ.get('MATCH_SEMANTIC_WEIGHT', 0.5)),
+    'MATCH_SKILLS_WEIGHT': float(os.environ.get('MATCH_SKILLS_WEIGHT', 0.3)),
+    'MATCH_LANGUAGES_WEIGHT': float(os.environ.get('MATCH_LANGUAGES_WEIGHT', 0.05)),
+    'MATCH_EXPERIENCE_WEIGHT': float(os.environ.get('MATCH_EXPERIENCE_WEIGHT', 0.1)),
+    'MATCH_DEGREE_WEIGHT': float(os.environ.get('MATCH_DEGREE_WEIGHT', 0.05)),
+    
+    # Batch semantic search (/api/search-batch)
+    'BATCH_SEARCH_MAX_QUERIES': int(os.environ.get('BATCH_SEARCH_MAX_QUERIES', 100)),
+    
+    # Search facets
+    'FACET_TOP_VALUES': int(os.environ.get('FACET_TOP_VALUES', 10)),
+    'FACET_BITMAP_VALUES': int(os.environ.get('FACET_BITMAP_VALUES', 100)),
+    'FACET_EXACT_MAX_RESULTS': int(os.environ.get('FACET_EXACT_MAX_RESULTS', 500)),
+    # Cambios por candidato que los demás procesos aplican a sus facetas; se purgan al arrancar
+    'FACET_CHANGE_RETENTION_HOURS': float(os.environ.get('FACET_CHANGE_RETENTION_HOURS', 24)),
+    
     # Pagination settings
     'CANDIDATES_PER_PAGE': 20,
     'SEARCH_RESULTS_LIMIT': 50,
@@ -0,0 +1,80 @@
+"""
+Dimensions of the OpenAI text embeddings, in one place.
+
+text-embedding-3 models are trained so that a prefix of the vector,
+re-normalized, is itself a good embedding (Matryoshka representation). The
+first-stage pgvector index (candidate.embedding_vector) keeps only the
+first EMBEDDING_DIMENSIONS values, which makes the index and its scans
+several times smaller, while candidate_document.text_embedding can keep
+the full EMBEDDING_MODEL_DIMENSIONS vector (EMBEDDING_STORE_FULL) to
+re-rank the top EMBEDDING_RERANK_CANDIDATES exactly.
+
+Every SQL string and placeholder vector takes its size from here.
+"""
+import re
+import json
+import math
+from typing import List, Optional, Sequence
+
+from utils.config import get_config
+
+def model_dimensions() -> int:
+    """Native dimensions of EMBEDDING_MODEL."""
+    return get_config('EMBEDDING_MODEL_DIMENSIONS', 1536)
+
+def index_dimensions() -> int:
+    """Dimensions of the first-stage vector index (never more than the model's)."""
+    return min(get_config('EMBEDDING_DIMENSIONS', 1536), model_dimensions())
+
+def stored_dimensions() -> int:
+    """Dimensions requested from the API and stored with the candidate document."""
+    return model_dimensions() if get_config('EMBEDDING_STORE_FULL', True) else index_dimensions()
+
+def rerank_enabled() -> bool:
+    """Whether searches re-rank the first-stage results with the stored full vectors."""
+    return get_config('EMBEDDING_RERANK_CANDIDATES', 100) > 0 and stored_dimensions() > index_dimensions()
+
+def reduce_embedding(embedding: Sequence[float], dimensions: int = None) -> List[float]:
+    """
+    Shorten an embedding to its first dimensions and re-normalize it.
+
+    Args:
+        embedding (Sequence[float]): Full (or already reduced) embedding
+        dimensions (int): Target dimensions. Defaults to index_dimensions().
+
+    Returns:
+        List[float]: Unit-length prefix (all zeros stays all zeros)
+    """
+    dimensions = dimensions or index_dimensions()
+    prefix = [float(value) for value in embedding[:dimensions]]
+    if len(embedding) <= dimensions:
+        return prefix
+    norm = math.sqrt(sum(value * value for value in prefix))
+    return [value / norm for value in prefix] if norm > 0 else prefix
+
+def placeholder_embedding() -> List[float]:
+    """All-zero embedding used when the API is unavailable."""
+    return [0.0] * stored_dimensions()
+
+def has_embedding(embedding: Optional[Sequence[float]]) -> bool:
+    """False for a missing, empty or placeholder (all-zero) embedding."""
+    return bool(embedding) and any(embedding)
+
+def embedding_json(embedding: Optional[Sequence[float]]) -> Optional[str]:
+    """Value stored in candidate_document.text_embedding: NULL unless it is a real embedding."""
+    return json.dumps(list(embedding)) if has_embedding(embedding) else None
+
+def stored_embedding_present(value: Optional[str]) -> bool:
+    """
+    Same rule as has_embedding on a stored JSON value, without parsing it:
+    '[]' and the placeholder ('[0.0, 0.0, ...]') have no non-zero digit.
+    """
+    return value is not None and re.search(r'[1-9]', value) is not None
+
+def vector_type() -> str:
+    """pgvector type of the first-stage index column, e.g. 'vector(512)'."""
+    return f"vector({index_dimensions()})"
+
+def vector_literal(embedding: Sequence[float]) -> str:
+    """pgvector text literal of the first-stage (reduced) vector of an embedding."""
+    return '[' + ','.join(map(str, reduce_embedding(embedding))) + ']'
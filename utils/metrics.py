@@ -0,0 +1,77 @@
+"""
+In-process metrics: counters, gauges and latency summaries.
+
+Values are kept per worker process and exposed through /api/metrics.
+"""
+import threading
+from typing import Any, Callable, Dict
+
+_lock = threading.Lock()
+_counters: Dict[str, int] = {}
+_timings: Dict[str, Dict[str, float]] = {}
+_gauges: Dict[str, Callable[[], Any]] = {}
+
+def increment(name: str, value: int = 1) -> None:
+    """
+    Increase a counter.
+    
+    Args:
+        name (str): Counter name, dotted (e.g. 'llm_extraction.skipped')
+        value (int): Amount to add
+    """
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+def observe(name: str, seconds: float) -> None:
+    """
+    Record a latency observation.
+    
+    Args:
+        name (str): Timing name
+        seconds (float): Observed duration in seconds
+    """
+    with _lock:
+        timing = _timings.setdefault(name, {'count': 0, 'total': 0.0, 'max': 0.0})
+        timing['count'] += 1
+        timing['total'] += seconds
+        timing['max'] = max(timing['max'], seconds)
+
+def register_gauge(name: str, func: Callable[[], Any]) -> None:
+    """
+    Register a callable evaluated on every snapshot (e.g. circuit breaker state).
+    
+    Args:
+        name (str): Gauge name
+        func (Callable[[], Any]): Returns the current value
+    """
+    with _lock:
+        _gauges[name] = func
+
+def get_counter(name: str) -> int:
+    with _lock:
+        return _counters.get(name, 0)
+
+def snapshot() -> Dict[str, Any]:
+    """
+    Get the current value of every metric.
+    
+    Returns:
+        Dict[str, Any]: counters, timings (count/avg/max) and gauges
+    """
+    with _lock:
+        counters = dict(_counters)
+        timings = {
+            name: {
+                'count': t['count'],
+                'avg': t['total'] / t['count'] if t['count'] else 0.0,
+                'max': t['max']
+            }
+            for name, t in _timings.items()
+        }
+        gauges = dict(_gauges)
+
+    return {
+        'counters': counters,
+        'timings': timings,
+        'gauges': {name: func() for name, func in gauges.items()}
+    }